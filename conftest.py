@@ -0,0 +1,66 @@
+"""
+Shared fixtures for the root test_*.py checks.
+
+`synthetic_db` generates small databases with scripts/generate_synthetic_dataset.py and
+points the code under test at them; `database_factory` is the same thing as a context
+manager so the files' `python test_x.py` runners can use it without pytest.
+"""
+
+import argparse
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+import pytest
+
+import scripts.convert_meets_to_sqlite_simple as db
+from scripts.generate_synthetic_dataset import generate
+from src.web.utils import points
+from src.web.utils.distribution import DISTRIBUTION
+
+SYNTHETIC_DEFAULTS = dict(
+    athletes=300, clubs=10, meets=12, years=2, results=4000, foreign_rate=0.1, alias_rate=0.1, seed=7,
+)
+
+
+def use_database(path):
+    """Point DATABASE_PATH at `path` and drop every process cache built against the old one."""
+    db.DATABASE_PATH = path
+    db.reset_caches()
+    points.reset_caches()
+    DISTRIBUTION.invalidate()
+
+
+@contextmanager
+def database_factory():
+    """Yield make(path=None, **options) -> open connection.
+
+    Without `path`, make() generates a synthetic database (SYNTHETIC_DEFAULTS overridden
+    by `options`) in a temporary directory. Either way DATABASE_PATH points at the new
+    database afterwards; on exit the connections are closed and the original path restored.
+    """
+    saved_path = db.DATABASE_PATH
+    connections = []
+    with tempfile.TemporaryDirectory() as tmp:
+
+        def make(path=None, **options):
+            if path is None:
+                path = Path(tmp) / f"synthetic_{len(connections)}.db"
+                generate(argparse.Namespace(output=path, **{**SYNTHETIC_DEFAULTS, **options}))
+            use_database(path)
+            conn = db.get_database_connection()
+            connections.append(conn)
+            return conn
+
+        try:
+            yield make
+        finally:
+            for conn in connections:
+                conn.close()
+            use_database(saved_path)
+
+
+@pytest.fixture
+def synthetic_db():
+    with database_factory() as make:
+        yield make
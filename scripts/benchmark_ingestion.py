@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Malaysia Swimming Analytics - Ingestion Benchmark
+
+Runs process_meet_file_simple + insert_data_simple over meet workbooks against a
+scratch copy of the database and reports where the time goes:
+
+    workbook_read   pd.ExcelFile / pd.read_excel
+    snapshot_load   reference data snapshot (athletes, clubs, events, meets)
+    index_build     AthleteIndex / ClubIndex / EventIndex construction
+    sheet_parse     process_sheet, excluding matching
+    matching        AthleteIndex.find + ClubIndex.resolve
+    insert          insert_data_simple
+
+Usage:
+    python scripts/benchmark_ingestion.py
+    python scripts/benchmark_ingestion.py data/meets/SUKMA_2024_Men.xls --repeat 3
+    python scripts/benchmark_ingestion.py --output bench/ingest.json
+
+The JSON output carries the git commit so runs can be compared across commits.
+"""
+
+import argparse
+import json
+import platform
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import pandas as pd  # noqa: E402
+
+from scripts import convert_meets_to_sqlite_simple as sim  # noqa: E402
+from src.web.utils import points  # noqa: E402
+
+DEFAULT_WORKBOOKS = sorted((PROJECT_ROOT / "data" / "meets").glob("*.xls"))
+DEFAULT_SOURCE_DBS = [
+    PROJECT_ROOT / "malaysia_swimming.db",
+    PROJECT_ROOT / "times_database" / "database" / "malaysia_swimming.db",
+]
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MB (None if the platform can't tell us).
+
+    This is the high-water mark over the whole process lifetime, so it is reported
+    once per benchmark rather than per run.
+    """
+    try:
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KB, macOS reports bytes
+        return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    except ImportError:
+        pass
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [
+                ("cb", wintypes.DWORD),
+                ("PageFaultCount", wintypes.DWORD),
+                ("PeakWorkingSetSize", ctypes.c_size_t),
+                ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t),
+                ("PeakPagefileUsage", ctypes.c_size_t),
+            ]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        handle = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+            return round(counters.PeakWorkingSetSize / (1024 * 1024), 1)
+    except (AttributeError, OSError):
+        pass
+    return None
+
+
+def git_commit() -> Optional[str]:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+            timeout=5,
+        )
+        return result.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+class PhaseTimer:
+    """Wraps functions in place and accumulates their wall time per phase."""
+
+    def __init__(self):
+        self.seconds: Dict[str, float] = defaultdict(float)
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.sheets: List[Dict[str, Any]] = []
+        self._patches: List[tuple] = []
+
+    def _timed(self, phase: str, func: Callable) -> Callable:
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.seconds[phase] += time.perf_counter() - started
+                self.calls[phase] += 1
+
+        return wrapper
+
+    def patch(self, owner: Any, name: str, phase: str, static: bool = False) -> None:
+        original = owner.__dict__[name] if isinstance(owner, type) else getattr(owner, name)
+        target = getattr(owner, name)
+        wrapped = self._timed(phase, target)
+        setattr(owner, name, staticmethod(wrapped) if static else wrapped)
+        self._patches.append((owner, name, original))
+
+    def patch_process_sheet(self) -> None:
+        original = sim.process_sheet
+
+        def wrapper(sheet_name, df, *args, **kwargs):
+            matching_before = self.seconds["matching"]
+            started = time.perf_counter()
+            output = original(sheet_name, df, *args, **kwargs)
+            elapsed = time.perf_counter() - started
+            self.seconds["sheet_total"] += elapsed
+            self.calls["sheet_total"] += 1
+            self.sheets.append(
+                {
+                    "sheet": sheet_name,
+                    "rows": int(len(df)),
+                    "results": len(output[0]),
+                    "seconds": round(elapsed, 4),
+                    "matching_seconds": round(self.seconds["matching"] - matching_before, 4),
+                }
+            )
+            return output
+
+        sim.process_sheet = wrapper
+        self._patches.append((sim, "process_sheet", original))
+
+    def restore(self) -> None:
+        for owner, name, original in reversed(self._patches):
+            setattr(owner, name, original)
+        self._patches.clear()
+
+
+def copy_database(source: Path, target: Path) -> None:
+    """Copy via the backup API so pages still sitting in the WAL are included."""
+    src = sqlite3.connect(str(source))
+    dst = sqlite3.connect(str(target))
+    try:
+        src.backup(dst)
+    finally:
+        dst.close()
+        src.close()
+
+
+def run_once(workbook: Path, source_db: Path, scratch_dir: Path, run: int) -> Dict[str, Any]:
+    scratch_db = scratch_dir / f"bench_{run}_{workbook.stem}.db"
+    copy_database(source_db, scratch_db)
+    sim.DATABASE_PATH = scratch_db
+    # Each run starts from a fresh scratch DB, so nothing cached by the last run may carry over
+    sim.reset_caches()
+    points.reset_caches()
+
+    timer = PhaseTimer()
+    timer.patch(pd, "ExcelFile", "workbook_read")
+    timer.patch(pd, "read_excel", "workbook_read")
+    timer.patch(sim, "load_reference_snapshot", "snapshot_load")
+    for index_cls in (sim.AthleteIndex, sim.ClubIndex, sim.EventIndex):
+        timer.patch(index_cls, "from_snapshot", "index_build", static=True)
+    timer.patch(sim.AthleteIndex, "find", "matching")
+    timer.patch(sim.ClubIndex, "resolve", "matching")
+    timer.patch_process_sheet()
+
+    meet_info = {
+        "id": str(uuid.uuid4()),
+        "name": f"Benchmark {workbook.stem}",
+        "meet_type": None,
+        "meet_date": datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "location": "Benchmark",
+    }
+    try:
+        started = time.perf_counter()
+        athletes, results, events, collector = sim.process_meet_file_simple(workbook, meet_info)
+        parse_seconds = time.perf_counter() - started
+
+        conn = sim.get_database_connection()
+        try:
+            started = time.perf_counter()
+            summary = sim.insert_data_simple(conn, athletes, results, events, meet_info, collector=collector)
+            insert_seconds = time.perf_counter() - started
+        finally:
+            conn.close()
+    finally:
+        timer.restore()
+
+    # Matching runs inside process_sheet, so it is taken out of sheet_parse
+    phases = {
+        "workbook_read": timer.seconds["workbook_read"],
+        "snapshot_load": timer.seconds["snapshot_load"],
+        "index_build": timer.seconds["index_build"],
+        "sheet_parse": timer.seconds["sheet_total"] - timer.seconds["matching"],
+        "matching": timer.seconds["matching"],
+        "insert": insert_seconds,
+    }
+    total_seconds = parse_seconds + insert_seconds
+    rows_read = sum(sheet["rows"] for sheet in timer.sheets)
+    return {
+        "workbook": str(workbook.relative_to(PROJECT_ROOT) if workbook.is_relative_to(PROJECT_ROOT) else workbook),
+        "run": run,
+        "sheets": len(timer.sheets),
+        "rows_read": rows_read,
+        "results": len(results),
+        "inserted": summary.get("inserted_results", 0),
+        "skipped": summary.get("skipped_results", 0),
+        "phases_seconds": {name: round(value, 4) for name, value in phases.items()},
+        "match_calls": timer.calls["matching"],
+        "parse_seconds": round(parse_seconds, 4),
+        "unaccounted_seconds": round(total_seconds - sum(phases.values()), 4),
+        "total_seconds": round(total_seconds, 4),
+        "rows_per_sec": round(rows_read / parse_seconds, 1) if parse_seconds else None,
+        "results_per_sec": round(len(results) / total_seconds, 1) if total_seconds else None,
+        "insert_rows_per_sec": round(len(results) / insert_seconds, 1) if insert_seconds else None,
+        "per_sheet": timer.sheets,
+    }
+
+
+def print_table(runs: List[Dict[str, Any]]) -> None:
+    phase_names = list(runs[0]["phases_seconds"]) if runs else []
+    header = f"{'workbook':<36}{'run':>4}{'results':>9}" + "".join(f"{p[:11]:>12}" for p in phase_names)
+    header += f"{'total':>9}{'res/s':>9}"
+    print(header)
+    print("-" * len(header))
+    for entry in runs:
+        line = f"{Path(entry['workbook']).name[:35]:<36}{entry['run']:>4}{entry['results']:>9}"
+        line += "".join(f"{entry['phases_seconds'][p]:>12.3f}" for p in phase_names)
+        line += f"{entry['total_seconds']:>9.2f}{entry['results_per_sec'] or 0:>9.0f}"
+        print(line)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark meet workbook ingestion")
+    parser.add_argument("workbooks", nargs="*", type=Path, help="Workbooks to ingest (default: data/meets/*.xls)")
+    parser.add_argument("--db", type=Path, help="Source database to copy (default: project database)")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per workbook (default: 1)")
+    parser.add_argument("--output", type=Path, help="Write JSON results to this file")
+    parser.add_argument("--keep-scratch", action="store_true", help="Keep the scratch databases")
+    args = parser.parse_args()
+
+    workbooks = [path.resolve() for path in (args.workbooks or DEFAULT_WORKBOOKS)]
+    missing = [str(path) for path in workbooks if not path.exists()]
+    if missing or not workbooks:
+        print(f"[ERROR] Workbooks not found: {', '.join(missing) or 'none given'}")
+        return 1
+    source_db = args.db or next((path for path in DEFAULT_SOURCE_DBS if path.exists()), None)
+    if not source_db or not source_db.exists():
+        print(f"[ERROR] Source database not found: {source_db}")
+        return 1
+
+    scratch_dir = Path(tempfile.mkdtemp(prefix="swim_bench_"))
+    print(f"[BENCH] Source DB: {source_db}")
+    print(f"[BENCH] Scratch dir: {scratch_dir}")
+
+    runs: List[Dict[str, Any]] = []
+    try:
+        for workbook in workbooks:
+            for run in range(1, args.repeat + 1):
+                print(f"[BENCH] {workbook.name} run {run}/{args.repeat}...", flush=True)
+                runs.append(run_once(workbook, source_db, scratch_dir, run))
+    finally:
+        if not args.keep_scratch:
+            shutil.rmtree(scratch_dir, ignore_errors=True)
+
+    print()
+    print_table(runs)
+    peak = peak_rss_mb()
+    print(f"\n[BENCH] Peak RSS over all runs: {peak if peak is not None else '-'} MB")
+
+    report = {
+        "benchmark": "ingestion",
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "source_db": str(source_db),
+        "repeat": args.repeat,
+        "runs": runs,
+        "peak_rss_mb": peak,
+    }
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"\n[BENCH] Wrote {args.output}")
+    else:
+        print(json.dumps({key: value for key, value in report.items() if key != "runs"}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Canada On Track curves as arrays.
+
+Every canada_on_track row is loaded with one query into a float array indexed by
+(event, track, age), NaN where a time is missing. When an (event, track, age) has rows
+for several canada_track_year values, the most recent year is used.
+
+Each curve is filled between its first and last known age by linear interpolation, so an
+age missing inside a track is estimated from its neighbours. Ages outside a track's known
+range stay NaN; curves are never extrapolated. Lookups are vectorized: interpolate() and
+delta() take arrays (or scalars) of events, tracks and ages, broadcast them, and accept
+fractional ages (16.5 lies halfway between the 16 and 17 times).
+
+The web process keeps one CanadaCurves in CANADA_CURVES. POST /admin/canada-on-track
+calls invalidate_canada_curves() after committing; edits made by other processes are
+seen through a cheap row-count/sum fingerprint that is re-read at most every
+check_interval seconds. Scripts (populate_mot_base_times.py,
+generate_mot_methodology_pages.py) call load_canada_curves() once per run and read the
+stored times only (grid(..., interpolated=False), points()): interpolated ages are for
+the admin curve view and are not part of the MOT methodology.
+
+Usage:
+    from scripts.canada_curves import get_canada_curves
+    curves = get_canada_curves(conn)
+    curves.interpolate("LCM_Free_100_M", [1, 2, 3], 17.5)
+    curves.delta(["LCM_Free_100_M", "LCM_Free_200_M"], 3, 18)   # 18 -> 19 improvement
+    curves.grid(events, (1, 2, 3), range(15, 24))                # (event, track, age) array
+
+    python scripts/canada_curves.py --event LCM_Free_100_M --step 0.5
+"""
+
+import argparse
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).parent.parent
+DEFAULT_DB_PATH = PROJECT_ROOT / "malaysia_swimming.db"
+
+TRACKS = (1, 2, 3)
+
+_FINGERPRINT_SQL = """
+    SELECT COUNT(*), COALESCE(MAX(id), 0), TOTAL(canada_track_time_seconds), COALESCE(MAX(canada_track_year), 0)
+    FROM canada_on_track
+"""
+
+
+def fill_gaps(times: np.ndarray) -> np.ndarray:
+    """Linearly interpolate NaNs along the last axis between each curve's known ages."""
+    known = ~np.isnan(times)
+    index = np.broadcast_to(np.arange(times.shape[-1]), times.shape)
+    previous = np.maximum.accumulate(np.where(known, index, -1), axis=-1)
+    following = np.flip(np.minimum.accumulate(np.flip(np.where(known, index, times.shape[-1]), axis=-1), axis=-1), axis=-1)
+    inside = (previous >= 0) & (following < times.shape[-1])
+
+    low = np.take_along_axis(times, np.clip(previous, 0, None), axis=-1)
+    high = np.take_along_axis(times, np.clip(following, None, times.shape[-1] - 1), axis=-1)
+    span = np.where(following > previous, following - previous, 1)
+    estimate = low + (high - low) * (index - previous) / span
+    return np.where(known, times, np.where(inside, estimate, np.nan))
+
+
+class CanadaCurves:
+    """All Canada On Track times; times[e, t, a] is event e, track tracks[t], age min_age + a."""
+
+    def __init__(self, events: Sequence[str], tracks: Sequence[int], min_age: int, times: np.ndarray,
+                 fingerprint: Tuple = ()):
+        self.events = tuple(events)
+        self.tracks = tuple(tracks)
+        self.min_age = min_age
+        self.times = times
+        self.filled = fill_gaps(times) if times.size else times
+        self.fingerprint = fingerprint
+        self.loaded_at = time.time()
+        self._event_index = {event_id: i for i, event_id in enumerate(self.events)}
+        self._track_index = {track: i for i, track in enumerate(self.tracks)}
+
+    @property
+    def max_age(self) -> int:
+        return self.min_age + self.times.shape[-1] - 1
+
+    def _indices(self, events, tracks) -> Tuple[np.ndarray, np.ndarray]:
+        """Event and track positions; -1 for ids not in the table."""
+        event_pos = np.vectorize(lambda e: self._event_index.get(e, -1), otypes=[np.int64])(np.asarray(events, dtype=object))
+        track_pos = np.vectorize(lambda t: self._track_index.get(int(t), -1), otypes=[np.int64])(np.asarray(tracks))
+        return event_pos, track_pos
+
+    def interpolate(self, events, tracks, ages) -> np.ndarray:
+        """Times at (event, track, age), broadcast; fractional ages blend the two nearest ages."""
+        event_pos, track_pos = self._indices(events, tracks)
+        event_pos, track_pos, ages = np.broadcast_arrays(event_pos, track_pos, np.asarray(ages, dtype=float))
+        if not self.times.size:
+            return np.full(ages.shape, np.nan)
+
+        position = ages - self.min_age
+        valid = (event_pos >= 0) & (track_pos >= 0) & (position >= 0) & (position <= self.times.shape[-1] - 1)
+        position = np.where(valid, position, 0.0)
+        low = np.floor(position).astype(np.int64)
+        high = np.ceil(position).astype(np.int64)
+        e, t = np.where(valid, event_pos, 0), np.where(valid, track_pos, 0)
+        low_time, high_time = self.filled[e, t, low], self.filled[e, t, high]
+        blended = np.where(high == low, low_time, low_time + (high_time - low_time) * (position - low))
+        return np.where(valid, blended, np.nan)
+
+    def delta(self, events, tracks, age_start, age_end=None) -> np.ndarray:
+        """Improvement (seconds faster) from age_start to age_end (default age_start + 1)."""
+        age_start = np.asarray(age_start, dtype=float)
+        age_end = age_start + 1 if age_end is None else np.asarray(age_end, dtype=float)
+        return self.interpolate(events, tracks, age_start) - self.interpolate(events, tracks, age_end)
+
+    def grid(self, events: Sequence[str], tracks: Sequence[int] = TRACKS, ages: Sequence[float] = None,
+             interpolated: bool = True) -> np.ndarray:
+        """(event, track, age) array of times; ages default to every age in the table.
+
+        With interpolated=False only stored times are returned (whole ages, NaN where a row
+        is missing), which is what the MOT methodology reads.
+        """
+        ages = np.arange(self.min_age, self.max_age + 1) if ages is None else np.asarray(ages, dtype=float)
+        events, tracks, ages = (
+            np.asarray(events, dtype=object)[:, None, None], np.asarray(tracks)[None, :, None], ages[None, None, :]
+        )
+        if interpolated:
+            return self.interpolate(events, tracks, ages)
+        event_pos, track_pos = self._indices(events, tracks)
+        event_pos, track_pos, ages = np.broadcast_arrays(event_pos, track_pos, ages)
+        position = ages - self.min_age
+        valid = ((event_pos >= 0) & (track_pos >= 0) & (position >= 0) & (position <= self.times.shape[-1] - 1)
+                 & (position == np.round(position)))
+        if not self.times.size:
+            return np.full(ages.shape, np.nan)
+        stored = self.times[
+            np.where(valid, event_pos, 0), np.where(valid, track_pos, 0), np.where(valid, position, 0).astype(np.int64)
+        ]
+        return np.where(valid, stored, np.nan)
+
+    def points(self, event_id: str) -> Dict[int, Dict[int, float]]:
+        """{track: {age: time}} of the stored (not interpolated) times for one event."""
+        result: Dict[int, Dict[int, float]] = {track: {} for track in self.tracks}
+        e = self._event_index.get(event_id)
+        if e is None:
+            return result
+        for t, track in enumerate(self.tracks):
+            for a in np.nonzero(~np.isnan(self.times[e, t]))[0]:
+                result[track][self.min_age + int(a)] = float(self.times[e, t, a])
+        return result
+
+    def curve(self, event_id: str, step: float = 1.0) -> Dict[str, Any]:
+        """Per-track interpolated times and 1-year deltas for one event (admin UI payload)."""
+        e = self._event_index.get(event_id)
+        tracks = []
+        if e is not None:
+            for t, track in enumerate(self.tracks):
+                known = np.nonzero(~np.isnan(self.times[e, t]))[0]
+                if not len(known):
+                    continue
+                first, last = self.min_age + int(known[0]), self.min_age + int(known[-1])
+                ages = np.round(np.arange(first, last + step / 2, step), 6)
+                times = self.interpolate(event_id, track, ages)
+                deltas = self.delta(event_id, track, np.arange(first, last))
+                tracks.append({
+                    "track": track,
+                    "entry_age": first,
+                    "final_age": last,
+                    "interpolated_ages": [first + int(a) for a in range(last - first + 1) if np.isnan(self.times[e, t, known[0] + a])],
+                    "points": [{"age": float(age), "time_seconds": round(float(seconds), 2)} for age, seconds in zip(ages, times)],
+                    "deltas": [
+                        {"age_start": first + i, "age_end": first + i + 1, "delta_seconds": round(float(d), 2)}
+                        for i, d in enumerate(deltas)
+                    ],
+                })
+        return {"event_id": event_id, "step": step, "tracks": tracks}
+
+
+def load_canada_curves(conn: sqlite3.Connection) -> CanadaCurves:
+    """Read canada_on_track into a CanadaCurves (latest year wins per event/track/age)."""
+    fingerprint = tuple(conn.execute(_FINGERPRINT_SQL).fetchone())
+    rows = conn.execute("""
+        SELECT event_id, canada_track, canada_track_age, canada_track_time_seconds
+        FROM canada_on_track
+        WHERE canada_track_time_seconds IS NOT NULL AND canada_track_age IS NOT NULL
+        ORDER BY COALESCE(canada_track_year, 0)
+    """).fetchall()
+    # Rows come in year order, so a later year overwrites an earlier one for the same key
+    latest = {(row[0], row[1], row[2]): row[3] for row in rows if row[1] in TRACKS}
+    if not latest:
+        return CanadaCurves((), TRACKS, 0, np.full((0, len(TRACKS), 0), np.nan), fingerprint)
+
+    events = sorted({event_id for event_id, _, _ in latest})
+    event_index = {event_id: i for i, event_id in enumerate(events)}
+    ages = np.array([age for _, _, age in latest], dtype=np.int64)
+    min_age = int(ages.min())
+    times = np.full((len(events), len(TRACKS), int(ages.max()) - min_age + 1), np.nan)
+    # One value per (event, track, age), so the fancy-index assignment has no repeated indices
+    times[
+        np.array([event_index[event_id] for event_id, _, _ in latest]),
+        np.array([TRACKS.index(track) for _, track, _ in latest]),
+        ages - min_age,
+    ] = np.array(list(latest.values()), dtype=float)
+    return CanadaCurves(events, TRACKS, min_age, times, fingerprint)
+
+
+class CanadaCurveCache:
+    """Holds the current CanadaCurves; reloads after invalidate() or when the table fingerprint moves."""
+
+    def __init__(self, check_interval: float = 5.0):
+        self.check_interval = check_interval
+        self._curves: Optional[CanadaCurves] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def current(self, conn: Optional[sqlite3.Connection] = None) -> CanadaCurves:
+        curves = self._curves
+        if curves is not None and time.monotonic() - self._checked_at < self.check_interval:
+            return curves
+        with self._lock:
+            own_conn = conn is None
+            if own_conn:
+                from scripts.convert_meets_to_sqlite_simple import get_database_connection
+                conn = get_database_connection()
+            try:
+                if self._curves is None or tuple(conn.execute(_FINGERPRINT_SQL).fetchone()) != self._curves.fingerprint:
+                    started = time.perf_counter()
+                    self._curves = load_canada_curves(conn)
+                    print(
+                        f"[CanadaCurves] Loaded {len(self._curves.events)} events "
+                        f"in {(time.perf_counter() - started) * 1000:.1f}ms",
+                        flush=True,
+                    )
+                self._checked_at = time.monotonic()
+                return self._curves
+            finally:
+                if own_conn:
+                    conn.close()
+
+    def invalidate(self) -> None:
+        """Drop the cached curves; the next read reloads them."""
+        self._curves = None
+
+
+CANADA_CURVES = CanadaCurveCache()
+
+
+def get_canada_curves(conn: Optional[sqlite3.Connection] = None) -> CanadaCurves:
+    return CANADA_CURVES.current(conn)
+
+
+def invalidate_canada_curves() -> None:
+    CANADA_CURVES.invalidate()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Show interpolated Canada On Track curves for one event")
+    parser.add_argument("--db", type=Path, default=DEFAULT_DB_PATH, help=f"Database file (default: {DEFAULT_DB_PATH})")
+    parser.add_argument("--event", default="LCM_Free_100_M", help="Event id (default: LCM_Free_100_M)")
+    parser.add_argument("--step", type=float, default=1.0, help="Age step for the printed curve (default: 1.0)")
+    args = parser.parse_args(argv)
+    if not args.db.exists():
+        print(f"[ERROR] Database not found: {args.db}")
+        return 1
+
+    conn = sqlite3.connect(args.db)
+    try:
+        curves = load_canada_curves(conn)
+    finally:
+        conn.close()
+    print(f"[OK] {len(curves.events)} events, ages {curves.min_age}-{curves.max_age}")
+    for track in curves.curve(args.event, args.step)["tracks"]:
+        filled = f" (interpolated: {track['interpolated_ages']})" if track["interpolated_ages"] else ""
+        print(f"\nTrack {track['track']}: ages {track['entry_age']}-{track['final_age']}{filled}")
+        for point in track["points"]:
+            print(f"  {point['age']:5.1f}  {point['time_seconds']:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
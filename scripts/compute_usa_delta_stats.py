@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+USA delta statistics per (event, age transition).
+
+Builds usa_delta_stats from usa_delta_data.usa_delta_improvement_seconds. It stores
+sample size, median, mean, trimmed mean, sd, min/max and the quartiles with IQR. These
+are computed from the improvement rows themselves. The precomputed usa_delta_median
+columns are not used: they are copied onto every row, so a GROUP BY read just takes
+whichever row SQLite picks.
+
+All groups are done in one NumPy pass. The rows are sorted once by (event, age start,
+age end, improvement). Every statistic is then read from group offsets into that
+sorted array: quantiles by linear interpolation (as np.percentile), trimmed means
+from a cumulative sum.
+
+populate_mot_base_times.py and generate_mot_methodology_pages.py read this table.
+load_usa_data.py refreshes it after loading delta rows.
+
+Usage:
+    python scripts/compute_usa_delta_stats.py
+    python scripts/compute_usa_delta_stats.py --db path/to/malaysia_swimming.db --trim 0.1
+"""
+
+import argparse
+import sqlite3
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_DB_PATH = Path(__file__).parent.parent / "malaysia_swimming.db"
+DEFAULT_TRIM = 0.1  # share cut from each end for the trimmed mean
+
+STATS_COLUMNS = [
+    "event_id", "age_start", "age_end", "sample_size", "median", "mean", "trimmed_mean", "trim",
+    "sd", "min", "max", "q25", "q75", "iqr", "computed_at",
+]
+
+
+def ensure_stats_table(conn: sqlite3.Connection) -> None:
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS usa_delta_stats (
+            event_id TEXT NOT NULL,
+            age_start INTEGER NOT NULL,
+            age_end INTEGER NOT NULL,
+            sample_size INTEGER NOT NULL,
+            median REAL,
+            mean REAL,
+            trimmed_mean REAL,
+            trim REAL,
+            sd REAL,
+            min REAL,
+            max REAL,
+            q25 REAL,
+            q75 REAL,
+            iqr REAL,
+            computed_at TEXT NOT NULL,
+            PRIMARY KEY (event_id, age_start, age_end)
+        )
+    """)
+
+
+def group_stats(event_ids: np.ndarray, age_start: np.ndarray, age_end: np.ndarray,
+                values: np.ndarray, trim: float = DEFAULT_TRIM) -> Dict[str, np.ndarray]:
+    """Statistics per (event, age_start, age_end) group; one array entry per group."""
+    if not 0 <= trim < 0.5:
+        raise ValueError(f"trim must be in [0, 0.5), got {trim}")
+    if not len(values):
+        return {"event_id": np.array([], dtype=object), "age_start": np.array([], dtype=np.int64),
+                "age_end": np.array([], dtype=np.int64), "sample_size": np.array([], dtype=np.int64)}
+
+    event_axis, event_code = np.unique(event_ids, return_inverse=True)
+    order = np.lexsort((values, age_end, age_start, event_code))
+    codes, starts_a, ends_a, v = event_code[order], age_start[order], age_end[order], values[order]
+
+    changed = (codes[1:] != codes[:-1]) | (starts_a[1:] != starts_a[:-1]) | (ends_a[1:] != ends_a[:-1])
+    starts = np.concatenate(([0], np.nonzero(changed)[0] + 1))
+    counts = np.diff(np.append(starts, len(v)))
+
+    def quantile(q: float) -> np.ndarray:
+        position = starts + q * (counts - 1)
+        low = np.floor(position).astype(np.int64)
+        high = np.ceil(position).astype(np.int64)
+        return v[low] + (v[high] - v[low]) * (position - low)
+
+    sums = np.add.reduceat(v, starts)
+    mean = sums / counts
+    squares = np.add.reduceat((v - np.repeat(mean, counts)) ** 2, starts)
+    sd = np.sqrt(np.divide(squares, counts - 1, out=np.full(len(counts), np.nan), where=counts > 1))
+
+    cumulative = np.concatenate(([0.0], np.cumsum(v)))
+    cut = np.floor(counts * trim).astype(np.int64)
+    trimmed_mean = (cumulative[starts + counts - cut] - cumulative[starts + cut]) / (counts - 2 * cut)
+
+    q25, q75 = quantile(0.25), quantile(0.75)
+    return {
+        "event_id": event_axis[codes[starts]],
+        "age_start": starts_a[starts],
+        "age_end": ends_a[starts],
+        "sample_size": counts,
+        "median": quantile(0.5),
+        "mean": mean,
+        "trimmed_mean": trimmed_mean,
+        "sd": sd,
+        "min": v[starts],
+        "max": v[starts + counts - 1],
+        "q25": q25,
+        "q75": q75,
+        "iqr": q75 - q25,
+    }
+
+
+def compute_usa_delta_stats(conn: sqlite3.Connection, trim: float = DEFAULT_TRIM) -> int:
+    """Recompute usa_delta_stats from usa_delta_data in one transaction; returns the number of groups."""
+    rows = conn.execute("""
+        SELECT usa_delta_event_id, usa_delta_age_start, usa_delta_age_end, usa_delta_improvement_seconds
+        FROM usa_delta_data
+        WHERE usa_delta_improvement_seconds IS NOT NULL
+    """).fetchall()
+    if rows:
+        event_ids, age_start, age_end, values = zip(*rows)
+    else:
+        event_ids, age_start, age_end, values = (), (), (), ()
+    stats = group_stats(
+        np.array(event_ids, dtype=object),
+        np.array(age_start, dtype=np.int64),
+        np.array(age_end, dtype=np.int64),
+        np.array(values, dtype=float),
+        trim,
+    )
+
+    computed_at = datetime.now().isoformat(timespec="seconds")
+    records: List[Tuple] = []
+    for i in range(len(stats["sample_size"])):
+        record = [str(stats["event_id"][i]), int(stats["age_start"][i]), int(stats["age_end"][i]), int(stats["sample_size"][i])]
+        for column in ("median", "mean", "trimmed_mean"):
+            record.append(round(float(stats[column][i]), 4))
+        record.append(trim)
+        for column in ("sd", "min", "max", "q25", "q75", "iqr"):
+            value = float(stats[column][i])
+            record.append(None if np.isnan(value) else round(value, 4))
+        record.append(computed_at)
+        records.append(tuple(record))
+
+    with conn:
+        ensure_stats_table(conn)
+        conn.execute("DELETE FROM usa_delta_stats")
+        conn.executemany(
+            f"INSERT INTO usa_delta_stats ({', '.join(STATS_COLUMNS)}) VALUES ({', '.join('?' * len(STATS_COLUMNS))})",
+            records,
+        )
+    print(f"[OK] usa_delta_stats: {len(records)} event/age transitions from {len(rows)} delta rows")
+    return len(records)
+
+
+def ensure_usa_delta_stats(conn: sqlite3.Connection) -> None:
+    """Build usa_delta_stats on first use; later reads use the stored table."""
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'usa_delta_stats'").fetchone()
+    if not exists:
+        compute_usa_delta_stats(conn)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compute USA delta statistics per event and age transition")
+    parser.add_argument("--db", type=Path, default=DEFAULT_DB_PATH, help=f"Database file (default: {DEFAULT_DB_PATH})")
+    parser.add_argument("--trim", type=float, default=DEFAULT_TRIM, help="Share cut from each end for the trimmed mean")
+    args = parser.parse_args(argv)
+    if not args.db.exists():
+        print(f"[ERROR] Database not found: {args.db}")
+        return 1
+
+    conn = sqlite3.connect(args.db)
+    try:
+        compute_usa_delta_stats(conn, args.trim)
+        print("\nSample (LCM_Free_100_M):")
+        for row in conn.execute("""
+            SELECT age_start, age_end, sample_size, median, trimmed_mean, iqr
+            FROM usa_delta_stats WHERE event_id = 'LCM_Free_100_M' ORDER BY age_start
+        """):
+            print(f"  {row[0]}->{row[1]}: n={row[2]} median={row[3]:.2f}s trimmed mean={row[4]:.2f}s IQR={row[5] or 0:.2f}s")
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
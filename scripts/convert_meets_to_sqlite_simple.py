@@ -15,14 +15,19 @@ All validation issues are accumulated and raised together as a
 
 from __future__ import annotations
 
+import hashlib
 import json
 import re
 import sqlite3
+import threading
+import time
 import uuid
+from collections import defaultdict
+from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
 
 import pandas as pd
 
@@ -900,7 +905,7 @@ def detect_relay(distance_value: Any, stroke_value: Any, sheet_name: str) -> Opt
             stroke_kind = "Free"
         elif "MEDLEY" in combined or "IM" in combined:
             stroke_kind = "Medley"
-    if not stroke_kind or leg_distance not in (100, 200):
+    if not stroke_kind or leg_distance not in (50, 100, 200):
         return None
     return RelayMeta(leg_distance=leg_distance, stroke_kind=stroke_kind)
 
@@ -920,19 +925,96 @@ def get_value(row: pd.Series, column_key: str) -> Any:
         return None
 
 
+# --------------------------------------------------------------------------- #
+# Upload timing
+# --------------------------------------------------------------------------- #
+
+
+class UploadTimings:
+    """Phase spans and counters for one upload.
+
+    Hot loops only bump counters; the whole picture is logged once at the end
+    (log_summary) and returned to the admin UI via ConversionResult.timings.
+    """
+
+    def __init__(self):
+        self._started = time.perf_counter()
+        self.spans: List[Dict[str, Any]] = []
+        self.counters: Dict[str, int] = defaultdict(int)
+
+    @contextmanager
+    def span(self, name: str, **attrs: Any) -> Iterator[Dict[str, Any]]:
+        """Time a phase. Yields the span dict so callers can attach results (row counts etc.)."""
+        record: Dict[str, Any] = {"name": name, **attrs}
+        started = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["start"] = round(started - self._started, 4)
+            record["seconds"] = round(time.perf_counter() - started, 4)
+            self.spans.append(record)
+
+    def record(self, name: str, started: float, **attrs: Any) -> None:
+        """Add a span that began at perf_counter() value `started` and ends now."""
+        self.spans.append(
+            {
+                "name": name,
+                **attrs,
+                "start": round(started - self._started, 4),
+                "seconds": round(time.perf_counter() - started, 4),
+            }
+        )
+
+    def count(self, name: str, amount: int = 1) -> None:
+        self.counters[name] += amount
+
+    def merge(self, counters: Dict[str, int]) -> None:
+        for name, amount in counters.items():
+            self.counters[name] += amount
+
+    def phase_totals(self) -> Dict[str, float]:
+        totals: Dict[str, float] = defaultdict(float)
+        for record in self.spans:
+            totals[record["name"]] += record["seconds"]
+        return {name: round(seconds, 4) for name, seconds in totals.items()}
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "total_seconds": round(time.perf_counter() - self._started, 4),
+            "phases": self.phase_totals(),
+            "counters": dict(self.counters),
+            "spans": sorted(self.spans, key=lambda record: record["start"]),
+        }
+
+    def log_summary(self, label: str) -> None:
+        summary = self.as_dict()
+        phases = ", ".join(f"{name}={seconds:.2f}s" for name, seconds in summary["phases"].items())
+        counters = ", ".join(f"{name}={value}" for name, value in sorted(summary["counters"].items()))
+        print(f"[TIMING] {label}: total={summary['total_seconds']:.2f}s | {phases} | {counters}", flush=True)
+
+
 # --------------------------------------------------------------------------- #
 # Lookup indexes sourced from the database
 # --------------------------------------------------------------------------- #
 
 
-def load_roster_mapping(roster_file_path: Optional[Path] = None) -> Dict[str, str]:
+ROSTER_FILE_PATH = Path("data/manual_matching/Database Athlete Sort/SportEngine Data 17.11.25.xlsx")
+
+# Process-level memo of the roster cache: (resolved path, mtime_ns) -> mapping
+_ROSTER_MEMO: Dict[Tuple[str, int], Dict[str, str]] = {}
+
+
+def load_roster_mapping(roster_file_path: Optional[Path] = None, strict: bool = False) -> Dict[str, str]:
     """
     Load Roster (club name) mapping from SportEngine file.
     Returns a dict mapping normalized athlete names to club names.
+
+    This always re-reads the workbook; upload paths should use
+    `load_cached_roster_mapping()` instead. With strict=True a workbook that
+    cannot be read raises instead of returning an empty mapping.
     """
     if not roster_file_path:
-        # Default path
-        roster_file_path = Path("data/manual_matching/Database Athlete Sort/SportEngine Data 17.11.25.xlsx")
+        roster_file_path = ROSTER_FILE_PATH
     
     if not roster_file_path.exists():
         return {}
@@ -1033,16 +1115,132 @@ def load_roster_mapping(roster_file_path: Optional[Path] = None) -> Dict[str, st
         
         return roster_map
     except Exception as e:
+        if strict:
+            raise
+        print(f"[WARNING] Could not load Roster mapping from {roster_file_path}: {e}", flush=True)
+        return {}
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _ensure_roster_cache_tables(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS roster_cache_meta (
+            source_path TEXT PRIMARY KEY,
+            source_mtime_ns INTEGER NOT NULL,
+            source_sha256 TEXT NOT NULL,
+            entry_count INTEGER NOT NULL,
+            built_at TEXT NOT NULL
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS roster_cache (
+            normalized_name TEXT PRIMARY KEY,
+            roster_club TEXT NOT NULL
+        ) WITHOUT ROWID
+        """
+    )
+
+
+def load_cached_roster_mapping(
+    conn: sqlite3.Connection, roster_file_path: Optional[Path] = None
+) -> Dict[str, str]:
+    """Return the normalized name -> roster club map, rebuilding only when the roster file changes.
+
+    The computed map is persisted in the `roster_cache` table together with the
+    source file's mtime and SHA-256 (`roster_cache_meta`). A matching mtime reuses
+    the table directly; a changed mtime with an unchanged hash (e.g. the file was
+    copied) just refreshes the stored mtime. Only a changed hash re-reads the workbook.
+    """
+    roster_file_path = roster_file_path or ROSTER_FILE_PATH
+    if not roster_file_path.exists():
+        return {}
+
+    source_key = str(roster_file_path.resolve())
+    mtime_ns = roster_file_path.stat().st_mtime_ns
+    memo = _ROSTER_MEMO.get((source_key, mtime_ns))
+    if memo is not None:
+        return memo
+
+    try:
+        get_schema_capabilities(conn)  # roster_cache tables
+        meta = conn.execute(
+            "SELECT source_mtime_ns, source_sha256 FROM roster_cache_meta WHERE source_path = ?",
+            (source_key,),
+        ).fetchone()
+
+        source_hash = None
+        if meta and meta[0] != mtime_ns:
+            source_hash = _file_sha256(roster_file_path)
+            if source_hash == meta[1]:
+                conn.execute(
+                    "UPDATE roster_cache_meta SET source_mtime_ns = ? WHERE source_path = ?",
+                    (mtime_ns, source_key),
+                )
+                conn.commit()
+            else:
+                meta = None
+
+        if meta:
+            roster_map = dict(conn.execute("SELECT normalized_name, roster_club FROM roster_cache"))
+        else:
+            roster_map = load_roster_mapping(roster_file_path, strict=True)
+            source_hash = source_hash or _file_sha256(roster_file_path)
+            with conn:
+                conn.execute("DELETE FROM roster_cache")
+                conn.execute("DELETE FROM roster_cache_meta")
+                conn.executemany(
+                    "INSERT INTO roster_cache (normalized_name, roster_club) VALUES (?, ?)",
+                    roster_map.items(),
+                )
+                conn.execute(
+                    """
+                    INSERT INTO roster_cache_meta (source_path, source_mtime_ns, source_sha256, entry_count, built_at)
+                    VALUES (?, ?, ?, ?, ?)
+                    """,
+                    (source_key, mtime_ns, source_hash, len(roster_map), datetime.now().isoformat()),
+                )
+            print(f"[Roster] Rebuilt roster cache: {len(roster_map)} name variants", flush=True)
+    except sqlite3.Error as e:
+        # Read-only or locked database - fall back to reading the workbook
+        print(f"[WARNING] Roster cache unavailable ({e}); reading workbook directly", flush=True)
+        try:
+            roster_map = load_roster_mapping(roster_file_path, strict=True)
+        except Exception as e:
+            print(f"[WARNING] Could not load Roster mapping from {roster_file_path}: {e}", flush=True)
+            return {}
+    except Exception as e:
+        # Unreadable workbook: nothing is cached, so the next upload tries again
         print(f"[WARNING] Could not load Roster mapping from {roster_file_path}: {e}", flush=True)
         return {}
 
+    _ROSTER_MEMO.clear()
+    _ROSTER_MEMO[(source_key, mtime_ns)] = roster_map
+    return roster_map
+
 
 class AthleteIndex:
     def __init__(self, records: List[AthleteRecord], roster_map: Optional[Dict[str, str]] = None):
         self.records: List[AthleteRecord] = records  # Store records for exact matching
         self.roster_map: Dict[str, str] = roster_map or {}  # Mapping of normalized names to club names
         self.by_name: Dict[str, List[AthleteRecord]] = {}
+        # (id, is_foreign) -> record, for mapping fallback-matcher ids back to records
+        self.by_id: Dict[Tuple[str, bool], AthleteRecord] = {}
+        # Per-upload resolution memo: (name, birthdate, gender, club) -> (record, gender_mismatch)
+        self._resolved: Dict[Tuple[str, str, Optional[str], str], Tuple[Optional[AthleteRecord], bool]] = {}
+        # How each lookup was answered, reported through UploadTimings
+        self.stats: Dict[str, int] = defaultdict(int)
         for record in records:
+            self.by_id.setdefault((record.id, record.is_foreign), record)
             # Index by FULLNAME
             key = normalize_name(record.full_name)
             if key:
@@ -1059,115 +1257,40 @@ class AthleteIndex:
 
     @classmethod
     def from_connection(cls, conn: sqlite3.Connection) -> "AthleteIndex":
-        columns = {row[1].lower() for row in conn.execute("PRAGMA table_info(athletes)")}
-        columns_original = {row[1] for row in conn.execute("PRAGMA table_info(athletes)")}
-        select_cols = ["id", "FULLNAME", "BIRTHDATE", "NATION"]
-        gender_present = "gender" in columns
-        gender_col = "GENDER"  # Default, will be updated if present
-        if gender_present:
-            # Use original case for column name
-            gender_col = next((col for col in columns_original if col.lower() == "gender"), "GENDER")
-            select_cols.append(gender_col)
-        # Check if CLUBNAME column exists in athletes table
-        clubname_present = "clubname" in columns
-        clubname_col = None
-        if clubname_present:
-            clubname_col = next((col for col in columns_original if col.lower() == "clubname"), "CLUBNAME")
-            select_cols.append(clubname_col)
-        # Also load alias fields if they exist
-        alias_1_present = "athlete_alias_1" in columns  # columns is already lowercase set
-        alias_2_present = "athlete_alias_2" in columns  # columns is already lowercase set
-        if alias_1_present:
-            alias_1_col = next((col for col in columns_original if col.lower() == "athlete_alias_1"), "athlete_alias_1")
-            select_cols.append(alias_1_col)
-        if alias_2_present:
-            alias_2_col = next((col for col in columns_original if col.lower() == "athlete_alias_2"), "athlete_alias_2")
-            select_cols.append(alias_2_col)
-        query = f"SELECT {', '.join(select_cols)} FROM athletes"
-        df = pd.read_sql_query(query, conn)
-        records: List[AthleteRecord] = []
-        alias_count = 0
-        for _, row in df.iterrows():
-            gender_value = row.get(gender_col) if gender_present else None
-            club_name_value = None
-            if clubname_present and clubname_col:
-                club_name_value = as_clean_str(row.get(clubname_col))
-            
-            # IMPORTANT: Normalize birthdate consistently - handle all data types
-            # pandas might return datetime, Timestamp, string, or None
-            birthdate_raw = row["BIRTHDATE"]
-            birthdate_normalized = normalize_birthdate(birthdate_raw)
-            
-            # Get nation column - handle both old (NATION) and new (nation) column names
-            nation_value = row.get("nation") or row.get("NATION") or ""
+        return cls.from_snapshot(get_reference_snapshot(conn), conn)
 
+    @classmethod
+    def from_snapshot(cls, snapshot: "ReferenceSnapshot", conn: sqlite3.Connection) -> "AthleteIndex":
+        """Build a per-upload index from the shared snapshot (records are fresh copies)."""
+        records: List[AthleteRecord] = []
+        for row in snapshot.athletes:
             record = AthleteRecord(
-                id=str(row["id"]),
-                full_name=str(row["FULLNAME"] or ""),
-                birthdate=birthdate_normalized,  # Always store normalized format
-                nation=as_clean_str(nation_value).upper(),
-                gender=as_clean_str(gender_value).upper() or None,
-                club_name=club_name_value,
+                id=row.id,
+                full_name=row.full_name,
+                birthdate=row.birthdate,  # Already normalized by the snapshot loader
+                nation=row.nation,
+                gender=row.gender,
+                club_name=row.club_name,
+                is_foreign=row.is_foreign,
             )
-            # Add alias fields as attributes if they exist
-            if alias_1_present:
-                alias_1_col = next((col for col in columns_original if col.lower() == "athlete_alias_1"), "athlete_alias_1")
-                alias_1_value = row.get(alias_1_col)
-                record.alias_1 = as_clean_str(alias_1_value) if alias_1_value else None
-            if alias_2_present:
-                alias_2_col = next((col for col in columns_original if col.lower() == "athlete_alias_2"), "athlete_alias_2")
-                alias_2_value = row.get(alias_2_col)
-                record.alias_2 = as_clean_str(alias_2_value) if alias_2_value else None
-                if record.alias_2:
-                    alias_count += 1
-            if alias_1_present and record.alias_1:
-                alias_count += 1
+            record.alias_1 = row.alias_1
+            record.alias_2 = row.alias_2
             records.append(record)
 
-        # Also load foreign athletes
-        try:
-            foreign_query = "SELECT id, fullname, birthdate, nation, gender, club_name FROM foreign_athletes"
-            foreign_df = pd.read_sql_query(foreign_query, conn)
-            foreign_count = 0
-            for _, row in foreign_df.iterrows():
-                birthdate_raw = row["birthdate"]
-                birthdate_normalized = normalize_birthdate(birthdate_raw)
-                nation_value = as_clean_str(row.get("nation") or "").upper()
-                gender_value = as_clean_str(row.get("gender") or "").upper()
-
-                record = AthleteRecord(
-                    id=str(row["id"]),
-                    full_name=str(row["fullname"] or ""),
-                    birthdate=birthdate_normalized,
-                    nation=nation_value,
-                    gender=gender_value or None,
-                    club_name=as_clean_str(row.get("club_name")),
-                    is_foreign=True,
-                )
-                records.append(record)
-                foreign_count += 1
-            # print(f"[AthleteIndex] Also loaded {foreign_count} foreign athletes")  # Removed to reduce noise
-        except Exception as e:
-            # foreign_athletes table might not exist - that's OK
-            pass
-
-        # print(f"[AthleteIndex] Loaded {len(records)} athletes, {alias_count} with aliases (alias_1={alias_1_present}, alias_2={alias_2_present})")  # Removed to reduce noise
         # Load Roster mapping
-        roster_map = load_roster_mapping()
+        roster_map = load_cached_roster_mapping(conn)
         # Create instance
         instance = cls(records, roster_map=roster_map)
 
-        # PRELOAD athletes for BATCH matching (same logic as preview)
-        try:
-            from web.utils.name_matcher import preload_athletes_for_matching
-            instance._preloaded_athletes = preload_athletes_for_matching(conn)
-            print(f"[AthleteIndex] BATCH MODE: Preloaded {len(instance._preloaded_athletes)} athletes for matching")
-        except ImportError as e:
-            print(f"[AthleteIndex] WARNING: Could not preload athletes, falling back to DB queries: {e}")
-            instance._preloaded_athletes = None
+        # PRELOADED athletes for BATCH matching (same logic as preview)
+        instance._preloaded_athletes = snapshot.matcher_rows
 
         return instance
 
+    def roster_club(self, norm_name: str) -> Optional[str]:
+        """O(1) lookup of the SportEngine roster club for an already normalize_name()'d athlete name."""
+        return self.roster_map.get(norm_name)
+
     def find(
         self,
         full_name: str,
@@ -1193,6 +1316,40 @@ class AthleteIndex:
             return None
 
         normalized_birthdate = normalize_birthdate(birthdate)
+
+        # The same swimmer appears on many event sheets - resolve each distinct
+        # (name, birthdate, gender, club) once per upload. Gender mismatches are
+        # re-reported for every row so the validation report stays per-row.
+        memo_key = (norm_name, normalized_birthdate, gender, normalize_name(club_name))
+        memo = self._resolved.get(memo_key)
+        if memo is None:
+            memo = self._find_uncached(
+                full_name, norm_name, birthdate, normalized_birthdate, gender,
+                sheet, row, collector, meet_name, club_name, conn,
+            )
+            self._resolved[memo_key] = memo
+        else:
+            self.stats["athlete_memo_hits"] += 1
+            if memo[1]:
+                collector.add_gender_mismatch(sheet, row, full_name, gender, memo[0].gender)
+        record, gender_mismatch = memo
+        return None if gender_mismatch else record
+
+    def _find_uncached(
+        self,
+        full_name: str,
+        norm_name: str,
+        birthdate: str,
+        normalized_birthdate: str,
+        gender: Optional[str],
+        sheet: str,
+        row: int,
+        collector: ValidationCollector,
+        meet_name: Optional[str],
+        club_name: Optional[str],
+        conn: Optional[sqlite3.Connection],
+    ) -> Tuple[Optional[AthleteRecord], bool]:
+        """Resolve one swimmer. Returns (record, gender_mismatch)."""
         # Don't return early on blank birthdate - try find_athlete_ids fallback first
         # The global name_matcher can still match by name alone
 
@@ -1268,7 +1425,7 @@ class AthleteIndex:
             return False
         
         # Get expected club name from Roster mapping
-        expected_roster_club = self.roster_map.get(norm_name)
+        expected_roster_club = self.roster_club(norm_name)
         
         # Step 3: Check for exact match on normalized fullname or normalized aliases
         # Use the by_name index for O(1) lookup instead of iterating all records
@@ -1295,108 +1452,223 @@ class AthleteIndex:
                     collector.add_fullname_update(selected.id, full_name, selected.full_name, sheet, row, meet_name)
                     selected.full_name = full_name
             
+            self.stats["athlete_index_matches"] += 1
             # Check gender mismatch
             if gender and selected.gender and gender != selected.gender:
                 collector.add_gender_mismatch(sheet, row, full_name, gender, selected.gender)
-                return None
+                return selected, True
             
-            return selected
+            return selected, False
         
         # Step 4: Use GLOBAL name matcher - DO NOT duplicate matching logic here!
         # Uses match_athlete_by_name() from src/web/utils/name_matcher.py
         # This handles: single-word identifiers + birthdate, nickname expansion, weighted scoring, etc.
         if conn:
-            print(f"[DEBUG STEP4] Trying global matcher for: {full_name} | birthdate={birthdate}", flush=True)
+            self.stats["athlete_matcher_calls"] += 1
             try:
                 match_result = find_athlete_ids(
                     conn, full_name, birthdate, gender, None, club_name,
                     preloaded_athletes=getattr(self, '_preloaded_athletes', None)
                 )
-                print(f"[DEBUG STEP4] find_athlete_ids result: {match_result}", flush=True)
+                r = None
                 if match_result and match_result.athlete_id:
                     # Found via advanced matching - convert to AthleteRecord
-                    for r in self.records:
-                        if r.id == str(match_result.athlete_id) and not r.is_foreign:
-                            # Check gender mismatch
-                            if gender and r.gender and gender != r.gender:
-                                collector.add_gender_mismatch(sheet, row, full_name, gender, r.gender)
-                                return None
-                            return r
+                    r = self.by_id.get((str(match_result.athlete_id), False))
                 elif match_result and match_result.foreign_athlete_id:
                     # Found as foreign athlete
-                    for r in self.records:
-                        if r.id == str(match_result.foreign_athlete_id) and r.is_foreign:
-                            if gender and r.gender and gender != r.gender:
-                                collector.add_gender_mismatch(sheet, row, full_name, gender, r.gender)
-                                return None
-                            return r
+                    r = self.by_id.get((str(match_result.foreign_athlete_id), True))
+                if r:
+                    self.stats["athlete_matcher_matches"] += 1
+                    # Check gender mismatch
+                    if gender and r.gender and gender != r.gender:
+                        collector.add_gender_mismatch(sheet, row, full_name, gender, r.gender)
+                        return r, True
+                    return r, False
             except Exception as e:
                 # Fallback failed - continue to missing athlete
                 pass
 
         # No match found - truly missing athlete
         # NOTE: Don't add to collector here - main loop handles this with more complete info
-        return None
+        self.stats["athlete_unmatched"] += 1
+        return None, False
+
+
+CLUB_NAME_SUFFIXES = ['CLUB', 'SWIMMING', 'SCHOOL', 'ACADEMY', 'TEAM']
+
+
+def strip_club_suffixes(norm: str) -> str:
+    """Drop trailing CLUB/SWIMMING/SCHOOL/ACADEMY/TEAM words (applied in list order)."""
+    for suffix in CLUB_NAME_SUFFIXES:
+        if norm.endswith(suffix):
+            norm = norm[:-len(suffix)].strip()
+    return norm
+
+
+def split_club_aliases(raw: Any) -> List[str]:
+    """Split a legacy comma-joined `club_alias` value into individual aliases."""
+    return [part.strip() for part in as_clean_str(raw).split(",") if part.strip()]
+
+
+def ensure_club_aliases_table(conn: sqlite3.Connection) -> None:
+    """Create the normalized `club_aliases` table, backfilling it from `clubs.club_alias` once."""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'club_aliases'"
+    ).fetchone()
+    if exists:
+        return
+    conn.execute(
+        """
+        CREATE TABLE club_aliases (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            club_name TEXT NOT NULL,
+            alias TEXT NOT NULL,
+            normalized_alias TEXT NOT NULL UNIQUE
+        )
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_club_aliases_club_name ON club_aliases(club_name)")
+    columns = {row[1].lower() for row in conn.execute("PRAGMA table_info(clubs)")}
+    if "club_alias" in columns:
+        rows = conn.execute(
+            "SELECT club_name, club_alias FROM clubs WHERE club_alias IS NOT NULL AND club_alias != ''"
+        ).fetchall()
+        conn.executemany(
+            "INSERT OR IGNORE INTO club_aliases (club_name, alias, normalized_alias) VALUES (?, ?, ?)",
+            [
+                (club_name, alias, normalize_name(alias))
+                for club_name, raw in rows
+                for alias in split_club_aliases(raw)
+            ],
+        )
+    conn.commit()
+
+
+def add_club_alias(conn: sqlite3.Connection, club_name: str, alias: str) -> bool:
+    """Attach an alias to a club. Returns False if that alias is already registered."""
+    norm = normalize_name(alias)
+    if not norm:
+        return False
+    cursor = conn.execute(
+        "INSERT OR IGNORE INTO club_aliases (club_name, alias, normalized_alias) VALUES (?, ?, ?)",
+        (club_name, alias.strip(), norm),
+    )
+    return cursor.rowcount > 0
+
+
+def load_club_aliases(conn: sqlite3.Connection) -> Dict[str, List[str]]:
+    """Return club_name -> [alias, ...] from the `club_aliases` table."""
+    aliases: Dict[str, List[str]] = {}
+    for club_name, alias in conn.execute("SELECT club_name, alias FROM club_aliases ORDER BY id"):
+        aliases.setdefault(club_name, []).append(alias)
+    return aliases
+
+
+class ClubNgramIndex:
+    """Trigram inverted index over normalized club names.
+
+    Substring containment implies trigram containment, so the posting lists give
+    an exact candidate set for "key contained in text" and "text contained in key"
+    checks without scanning every club.
+    """
+
+    def __init__(self, keys: Iterable[str] = (), n: int = 3):
+        self.n = n
+        self.keys: List[str] = []
+        self._gram_counts: List[int] = []
+        self._postings: Dict[str, List[int]] = {}
+        for key in keys:
+            self.add(key)
+
+    def grams(self, text: str) -> Set[str]:
+        if len(text) <= self.n:
+            return {text} if text else set()
+        return {text[i:i + self.n] for i in range(len(text) - self.n + 1)}
+
+    def add(self, key: str) -> int:
+        idx = len(self.keys)
+        grams = self.grams(key)
+        self.keys.append(key)
+        self._gram_counts.append(len(grams))
+        for gram in grams:
+            self._postings.setdefault(gram, []).append(idx)
+        return idx
+
+    def _hits(self, grams: Set[str]) -> Dict[int, int]:
+        hits: Dict[int, int] = {}
+        for gram in grams:
+            for idx in self._postings.get(gram, ()):
+                hits[idx] = hits.get(idx, 0) + 1
+        return hits
+
+    def contained_in(self, text: str) -> List[int]:
+        """Indexes of keys (len >= n) that occur as substrings of `text`, in insertion order."""
+        hits = self._hits(self.grams(text))
+        return sorted(
+            idx for idx, count in hits.items()
+            if count == self._gram_counts[idx] and self.keys[idx] in text
+        )
+
+    def containing(self, text: str) -> List[int]:
+        """Indexes of keys that contain `text` as a substring, in insertion order."""
+        if not text:
+            return []
+        if len(text) < self.n:
+            return [idx for idx, key in enumerate(self.keys) if text in key]
+        postings = sorted((self._postings.get(gram, []) for gram in self.grams(text)), key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                break
+        return sorted(idx for idx in candidates if text in self.keys[idx])
+
+    def search(self, text: str, limit: int = 20) -> List[Tuple[int, float]]:
+        """Rank keys by trigram similarity to `text`; substring matches rank first."""
+        if len(text) < self.n:
+            return [(idx, 1.0) for idx in self.containing(text)[:limit]]
+        grams = self.grams(text)
+        scored = []
+        for idx, count in self._hits(grams).items():
+            score = count / (len(grams) + self._gram_counts[idx] - count)
+            if text in self.keys[idx]:
+                score += 1.0
+            scored.append((score, idx))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [(idx, score) for score, idx in scored[:limit]]
 
 
 class ClubIndex:
     def __init__(self, mapping: Dict[str, ClubRecord]):
         self.mapping = mapping
+        self.records: List[ClubRecord] = list(mapping.values())
+        self.ngrams = ClubNgramIndex(mapping.keys())
+        # Per-upload memo: raw club string from the workbook -> resolved record (or None)
+        self._resolved: Dict[str, Optional[ClubRecord]] = {}
+        self.stats: Dict[str, int] = defaultdict(int)
 
     @classmethod
     def from_connection(cls, conn: sqlite3.Connection) -> "ClubIndex":
-        # Check if alias column exists
-        cursor = conn.cursor()
-        cursor.execute("PRAGMA table_info(clubs)")
-        columns = {row[1].lower() for row in cursor.fetchall()}
-        has_alias = 'club_alias' in columns
-
-        if has_alias:
-            df = pd.read_sql_query(
-                "SELECT club_name, club_code, state_code, club_nation, club_alias FROM clubs", conn
-            )
-        else:
-            df = pd.read_sql_query(
-                "SELECT club_name, club_code, state_code, club_nation FROM clubs", conn
-            )
-        
-        mapping: Dict[str, ClubRecord] = {}
-        for _, row in df.iterrows():
-            club_name_raw = as_clean_str(row["club_name"])
-            if not club_name_raw:
-                continue
-            
-            # Clean state codes from club name in database
-            club_name_cleaned, state_from_name = clean_club_name_and_extract_state(club_name_raw)
-            
-            # Use state from name if extracted, otherwise use database state_code
-            # Normalize state code to ensure consistency (WPKL -> KL, etc.)
-            state_code_raw = state_from_name or as_clean_str(row.get("state_code")) or None
-            state_code = normalize_state_code(state_code_raw)
-            
-            # Use cleaned club name (without state codes)
-            club_name_final = club_name_cleaned if club_name_cleaned else club_name_raw
-            
-            # Get alias if it exists
-            alias = as_clean_str(row.get("club_alias")) if has_alias else None
+        return cls.from_snapshot(get_reference_snapshot(conn))
 
+    @classmethod
+    def from_snapshot(cls, snapshot: "ReferenceSnapshot") -> "ClubIndex":
+        """Build a per-upload index from the shared snapshot (records are fresh copies)."""
+        mapping: Dict[str, ClubRecord] = {}
+        for club in snapshot.clubs:
             record = ClubRecord(
-                club_name=club_name_final,
-                club_code=as_clean_str(row.get("club_code")) or None,
-                state_code=state_code,
-                nation=as_clean_str(row.get("club_nation")).upper() if row.get("club_nation") else None,
-                alias=alias,
+                club_name=club.club_name,
+                club_code=club.club_code,
+                state_code=club.state_code,
+                nation=club.nation,
+                alias=", ".join(club.aliases) or None,
             )
             # Store in mapping using cleaned name (without state codes)
-            norm_name = normalize_name(club_name_final)
-            if norm_name:
-                mapping[norm_name] = record
-            
-            # Also map alias if it exists
-            if alias:
-                cleaned_alias, _ = clean_club_name_and_extract_state(alias)
-                alias_norm = normalize_name(cleaned_alias) if cleaned_alias else normalize_name(alias)
-                if alias_norm and alias_norm not in mapping:
+            if club.normalized_name:
+                mapping[club.normalized_name] = record
+            # Also map every alias
+            for alias_norm in club.normalized_aliases:
+                if alias_norm not in mapping:
                     mapping[alias_norm] = record
         
         return cls(mapping)
@@ -1408,80 +1680,117 @@ class ClubIndex:
         row: int,
         collector: ValidationCollector,
     ) -> Optional[ClubRecord]:
+        if club_name in self._resolved:
+            record = self._resolved[club_name]
+            self.stats["club_memo_hits"] += 1
+        else:
+            record = self._resolve_uncached(club_name)
+            self._resolved[club_name] = record
+        if record is None:
+            self.stats["club_misses"] += 1
+            collector.add_club_missing(sheet, row, club_name)
+        return record
+
+    def _resolve_uncached(self, club_name: str) -> Optional[ClubRecord]:
         # Clean state codes from the search term
         club_name_cleaned, extracted_state = clean_club_name_and_extract_state(club_name)
         norm = normalize_name(club_name_cleaned) if club_name_cleaned else normalize_name(club_name)
         
         if not norm:
-            collector.add_club_missing(sheet, row, club_name)
             return None
         
         # Normalize extracted state code (WPKL -> KL, etc.)
         extracted_state_normalized = normalize_state_code(extracted_state)
+
+        def with_state(record: ClubRecord) -> ClubRecord:
+            # If we extracted a state from Excel but DB doesn't have one, update the record's state
+            if extracted_state_normalized and not normalize_state_code(record.state_code):
+                record.state_code = extracted_state_normalized
+            return record
         
         # Try exact match first (with cleaned name)
         record = self.mapping.get(norm)
         if record:
-            # Normalize record's state code for comparison
-            record_state_normalized = normalize_state_code(record.state_code)
-            
-            # If we extracted a state from Excel but DB doesn't have one, update the record's state
-            if extracted_state_normalized and not record_state_normalized:
-                record.state_code = extracted_state_normalized
-            return record
+            return with_state(record)
         
         # Try removing " CLUB", " SWIMMING", " SCHOOL" suffixes and matching
-        common_suffixes = ['CLUB', 'SWIMMING', 'SCHOOL', 'ACADEMY', 'TEAM']
-        for suffix in common_suffixes:
+        for suffix in CLUB_NAME_SUFFIXES:
             if norm.endswith(suffix):
-                norm_without_suffix = norm[:-len(suffix)].strip()
-                # Try exact match without suffix
-                record = self.mapping.get(norm_without_suffix)
+                record = self.mapping.get(norm[:-len(suffix)].strip())
                 if record:
-                    record_state_normalized = normalize_state_code(record.state_code)
-                    if extracted_state_normalized and not record_state_normalized:
-                        record.state_code = extracted_state_normalized
-                    return record
+                    return with_state(record)
         
-        # Try partial matching: check if any club name in database is contained in the search term or vice versa
-        for db_norm, db_record in self.mapping.items():
-            # Check if database club name is contained in search term (e.g., "Aquasplash Swimming Club" in "Aquasplash Swimming Club Sel")
-            if db_norm in norm and len(db_norm) > 10:  # Only if DB name is substantial (>10 chars)
-                db_state_normalized = normalize_state_code(db_record.state_code)
-                if extracted_state_normalized and not db_state_normalized:
-                    db_record.state_code = extracted_state_normalized
-                return db_record
-            # Check if search term (without suffixes) is contained in database name
-            norm_clean = norm
-            for suffix in common_suffixes:
-                if norm_clean.endswith(suffix):
-                    norm_clean = norm_clean[:-len(suffix)].strip()
-            if norm_clean and norm_clean in db_norm and len(norm_clean) > 5:  # Only if search term is substantial (>5 chars)
-                db_state_normalized = normalize_state_code(db_record.state_code)
-                if extracted_state_normalized and not db_state_normalized:
-                    db_record.state_code = extracted_state_normalized
-                return db_record
+        # Partial matching via the trigram index. The first club (in load order) that
+        # either is contained in the search term (>10 chars, e.g. "Aquasplash Swimming Club"
+        # in "Aquasplash Swimming Club Sel") or contains the suffix-stripped search term
+        # (>5 chars) wins - same precedence as the old linear scan.
+        candidates = [idx for idx in self.ngrams.contained_in(norm) if len(self.ngrams.keys[idx]) > 10]
+        norm_clean = strip_club_suffixes(norm)
+        if norm_clean and len(norm_clean) > 5:
+            candidates.extend(self.ngrams.containing(norm_clean))
+        if candidates:
+            return with_state(self.mapping[self.ngrams.keys[min(candidates)]])
         
         # No match found
-        collector.add_club_missing(sheet, row, club_name)
         return None
 
 
+# Club lookup shared by the admin club endpoints, rebuilt once per (database, reference snapshot)
+_CLUB_LOOKUP: Optional[Tuple[Tuple[str, int], Tuple[ClubNgramIndex, List[Dict[str, Any]], Dict[str, int]]]] = None
+
+
+def get_club_lookup(conn: sqlite3.Connection) -> Tuple[ClubNgramIndex, List[Dict[str, Any]], Dict[str, int]]:
+    """Return (index, clubs, exact) for admin club search.
+
+    `index` keys are normalized club names, codes and aliases; `clubs[i]` is the
+    club row behind key i; `exact` maps a normalized name/alias to its key index.
+    """
+    global _CLUB_LOOKUP
+    snapshot = get_reference_snapshot(conn)
+    key = (str(DATABASE_PATH), snapshot.generation)
+    cached = _CLUB_LOOKUP
+    if cached is not None and cached[0] == key:
+        count_cache("club_lookup", hit=True)
+        return cached[1]
+    count_cache("club_lookup", hit=False)
+
+    index = ClubNgramIndex()
+    clubs: List[Dict[str, Any]] = []
+    exact: Dict[str, int] = {}
+    for row in sorted(snapshot.clubs, key=lambda c: c.name):
+        club = {
+            "club_name": row.name,
+            "club_code": row.club_code,
+            "state_code": row.stored_state_code,
+            "nation": row.stored_nation,
+            "alias": ", ".join(row.aliases) or None,
+        }
+        names = [normalize_name(row.name), row.normalized_name]
+        names += [normalize_name(alias) for alias in row.aliases] + list(row.normalized_aliases)
+        for norm in dict.fromkeys([*names, normalize_name(row.club_code)]):
+            if not norm:
+                continue
+            idx = index.add(norm)
+            clubs.append(club)
+            if norm in names:
+                exact.setdefault(norm, idx)
+    lookup = (index, clubs, exact)
+    _CLUB_LOOKUP = (key, lookup)
+    return lookup
+
+
 class EventIndex:
     def __init__(self, mapping: Dict[Tuple[str, int, str, str], str]):
         self.mapping = mapping
 
     @classmethod
     def from_connection(cls, conn: sqlite3.Connection) -> "EventIndex":
-        df = pd.read_sql_query("SELECT id, event_course, event_distance, event_stroke, gender FROM events", conn)
-        mapping: Dict[Tuple[str, int, str, str], str] = {}
-        for _, row in df.iterrows():
-            course = as_clean_str(row["event_course"]).upper()
-            distance = int(row["event_distance"])
-            stroke = as_clean_str(row["event_stroke"])
-            gender = as_clean_str(row["gender"]).upper()
-            mapping[(course, distance, stroke, gender)] = row["id"]
-        return cls(mapping)
+        return cls.from_snapshot(get_reference_snapshot(conn))
+
+    @classmethod
+    def from_snapshot(cls, snapshot: "ReferenceSnapshot") -> "EventIndex":
+        # Event keys are never mutated, so the snapshot mapping is shared as-is
+        return cls(snapshot.event_ids)
 
     def resolve_individual(self, course: str, distance: int, stroke: str, gender: str) -> Optional[str]:
         return self.mapping.get((course, distance, stroke, gender))
@@ -1491,11 +1800,378 @@ class EventIndex:
         return self.mapping.get(key)
 
 
+# --------------------------------------------------------------------------- #
+# Reference data snapshot
+# --------------------------------------------------------------------------- #
+
+# Tables whose writes invalidate the reference snapshot
+REFERENCE_TABLES = ("athletes", "foreign_athletes", "clubs", "club_aliases", "events", "meets")
+
+
+class AthleteRow(NamedTuple):
+    id: str
+    full_name: str
+    birthdate: str  # normalize_birthdate() output
+    nation: str
+    gender: Optional[str]
+    club_name: Optional[str]
+    alias_1: Optional[str]
+    alias_2: Optional[str]
+    is_foreign: bool
+
+
+class ClubRow(NamedTuple):
+    name: str  # clubs.club_name as stored
+    club_name: str  # state suffix removed
+    normalized_name: str
+    club_code: Optional[str]
+    state_code: Optional[str]  # normalize_state_code() output
+    nation: Optional[str]
+    stored_state_code: Optional[str]  # clubs.state_code as stored
+    stored_nation: Optional[str]  # clubs.club_nation as stored
+    aliases: Tuple[str, ...]
+    normalized_aliases: Tuple[str, ...]
+
+
+class EventRow(NamedTuple):
+    id: str
+    course: str
+    distance: int
+    stroke: str
+    gender: str
+
+
+class MeetRow(NamedTuple):
+    id: str
+    name: Optional[str]
+    alias: Optional[str]
+    meet_date: Optional[str]
+    meet_type: Optional[str]
+    city: Optional[str]
+
+
+@dataclass(frozen=True)
+class ReferenceSnapshot:
+    """Immutable copy of the reference tables, shared by ingestion and the read API."""
+
+    generation: int
+    loaded_at: float
+    athletes: Tuple[AthleteRow, ...]
+    clubs: Tuple[ClubRow, ...]
+    events: Tuple[EventRow, ...]
+    meets: Tuple[MeetRow, ...]
+    event_ids: Dict[Tuple[str, int, str, str], str]
+    athletes_by_id: Dict[str, AthleteRow]
+    matcher_rows: Optional[List[Tuple]] = None  # preload_athletes_for_matching() rows
+
+
+def ensure_reference_generation(conn: sqlite3.Connection) -> None:
+    """Create the write-generation counter and the triggers that bump it."""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS reference_generation (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            generation INTEGER NOT NULL
+        )
+        """
+    )
+    conn.execute("INSERT OR IGNORE INTO reference_generation (id, generation) VALUES (1, 0)")
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    for table in REFERENCE_TABLES:
+        if table not in existing:
+            continue
+        for op in ("INSERT", "UPDATE", "DELETE"):
+            conn.execute(
+                f"""
+                CREATE TRIGGER IF NOT EXISTS trg_refgen_{table}_{op.lower()}
+                AFTER {op} ON {table}
+                BEGIN
+                    UPDATE reference_generation SET generation = generation + 1 WHERE id = 1;
+                END
+                """
+            )
+    conn.commit()
+
+
+def read_reference_generation(conn: sqlite3.Connection) -> int:
+    row = conn.execute("SELECT generation FROM reference_generation WHERE id = 1").fetchone()
+    return row[0] if row else 0
+
+
+def _optional_column(row: Dict[str, Any], column: Optional[str]) -> Any:
+    """Value of an optional athletes column, or None when the schema lacks it."""
+    return row.get(column) if column else None
+
+
+def _load_athlete_rows(conn: sqlite3.Connection) -> List[AthleteRow]:
+    schema = get_schema_capabilities(conn)
+    optional = {
+        key: schema.column("athletes", key)
+        for key in ("gender", "clubname", "athlete_alias_1", "athlete_alias_2")
+    }
+    select_cols = ["id", "FULLNAME", "BIRTHDATE", "NATION"] + [col for col in optional.values() if col]
+    rows: List[AthleteRow] = []
+    for values in conn.execute(f"SELECT {', '.join(select_cols)} FROM athletes"):
+        row = dict(zip(select_cols, values))
+        rows.append(
+            AthleteRow(
+                id=str(row["id"]),
+                full_name=str(row["FULLNAME"] or ""),
+                birthdate=normalize_birthdate(row["BIRTHDATE"]),
+                nation=as_clean_str(row["NATION"]).upper(),
+                gender=as_clean_str(_optional_column(row, optional["gender"])).upper() or None,
+                club_name=as_clean_str(_optional_column(row, optional["clubname"])) if optional["clubname"] else None,
+                alias_1=as_clean_str(_optional_column(row, optional["athlete_alias_1"])) or None,
+                alias_2=as_clean_str(_optional_column(row, optional["athlete_alias_2"])) or None,
+                is_foreign=False,
+            )
+        )
+
+    # Also load foreign athletes
+    foreign = []  # foreign_athletes table might not exist - that's OK
+    if schema.has_table("foreign_athletes"):
+        foreign = conn.execute(
+            "SELECT id, fullname, birthdate, nation, gender, club_name FROM foreign_athletes"
+        ).fetchall()
+    for athlete_id, fullname, birthdate, nation, gender, club_name in foreign:
+        rows.append(
+            AthleteRow(
+                id=str(athlete_id),
+                full_name=str(fullname or ""),
+                birthdate=normalize_birthdate(birthdate),
+                nation=as_clean_str(nation).upper(),
+                gender=as_clean_str(gender).upper() or None,
+                club_name=as_clean_str(club_name),
+                alias_1=None,
+                alias_2=None,
+                is_foreign=True,
+            )
+        )
+    return rows
+
+
+def _load_club_rows(conn: sqlite3.Connection) -> List[ClubRow]:
+    schema = get_schema_capabilities(conn)
+    aliases_by_club: Optional[Dict[str, List[str]]] = None
+    if schema.has_table("club_aliases"):
+        aliases_by_club = load_club_aliases(conn)
+    alias_col = "club_alias" if schema.has_column("clubs", "club_alias") else "NULL"
+
+    rows: List[ClubRow] = []
+    for name, code, state, nation, legacy_alias in conn.execute(
+        f"SELECT club_name, club_code, state_code, club_nation, {alias_col} FROM clubs"
+    ):
+        club_name_raw = as_clean_str(name)
+        if not club_name_raw:
+            continue
+        # Clean state codes from club name; the extracted state wins over the stored one
+        club_name_cleaned, state_from_name = clean_club_name_and_extract_state(club_name_raw)
+        club_name_final = club_name_cleaned if club_name_cleaned else club_name_raw
+        if aliases_by_club is not None:
+            aliases = aliases_by_club.get(club_name_raw, [])
+        else:
+            aliases = split_club_aliases(legacy_alias)
+        normalized_aliases = []
+        for alias in aliases:
+            cleaned_alias, _ = clean_club_name_and_extract_state(alias)
+            alias_norm = normalize_name(cleaned_alias) if cleaned_alias else normalize_name(alias)
+            if alias_norm:
+                normalized_aliases.append(alias_norm)
+        rows.append(
+            ClubRow(
+                name=club_name_raw,
+                club_name=club_name_final,
+                normalized_name=normalize_name(club_name_final),
+                club_code=as_clean_str(code) or None,
+                state_code=normalize_state_code(state_from_name or as_clean_str(state) or None),
+                nation=as_clean_str(nation).upper() or None,
+                stored_state_code=state,
+                stored_nation=nation,
+                aliases=tuple(aliases),
+                normalized_aliases=tuple(normalized_aliases),
+            )
+        )
+    return rows
+
+
+def load_reference_snapshot(conn: sqlite3.Connection) -> ReferenceSnapshot:
+    """Read every reference table once into an immutable ReferenceSnapshot."""
+    generation = read_reference_generation(conn)
+
+    events = [
+        EventRow(
+            id=event_id,
+            course=as_clean_str(course).upper(),
+            distance=int(distance),
+            stroke=as_clean_str(stroke),
+            gender=as_clean_str(gender).upper(),
+        )
+        for event_id, course, distance, stroke, gender in conn.execute(
+            """
+            SELECT id, event_course, event_distance, event_stroke, gender FROM events
+            WHERE event_distance IS NOT NULL AND event_stroke IS NOT NULL
+            """
+        )
+    ]
+    meets = [
+        MeetRow(*row)
+        for row in conn.execute(
+            "SELECT id, meet_name, meet_alias, meet_date, meet_type, meet_city FROM meets"
+        )
+    ]
+
+    matcher_rows = None
+    try:
+        from web.utils.name_matcher import preload_athletes_for_matching
+        matcher_rows = preload_athletes_for_matching(conn)
+    except (ImportError, sqlite3.Error) as e:
+        print(f"[Snapshot] WARNING: Could not preload athletes for matching: {e}", flush=True)
+
+    athletes = tuple(_load_athlete_rows(conn))
+    return ReferenceSnapshot(
+        generation=generation,
+        loaded_at=time.time(),
+        athletes=athletes,
+        clubs=tuple(_load_club_rows(conn)),
+        events=tuple(events),
+        meets=tuple(meets),
+        event_ids={(e.course, e.distance, e.stroke, e.gender): e.id for e in events},
+        athletes_by_id={row.id: row for row in athletes},
+        matcher_rows=matcher_rows,
+    )
+
+
+class ReferenceDataService:
+    """Holds the current ReferenceSnapshot and swaps it when the write generation moves.
+
+    Readers take `current()` without locking; the generation row is re-read at
+    most every `check_interval` seconds (or immediately after `mark_changed()`),
+    and a changed generation rebuilds the snapshot and replaces the reference.
+    Repointing DATABASE_PATH also rebuilds it on the next read.
+    """
+
+    def __init__(self, check_interval: float = 1.0):
+        self.check_interval = check_interval
+        self._snapshot: Optional[ReferenceSnapshot] = None
+        self._database: Optional[str] = None
+        self._checked_at = 0.0
+        self._changed = False
+        self._lock = threading.Lock()
+
+    def current(self, conn: Optional[sqlite3.Connection] = None) -> ReferenceSnapshot:
+        snapshot = self._snapshot
+        if (
+            snapshot is not None
+            and not self._changed
+            and self._database == str(DATABASE_PATH)
+            and time.monotonic() - self._checked_at < self.check_interval
+        ):
+            count_cache("reference_snapshot", hit=True)
+            return snapshot
+        with self._lock:
+            own_conn = conn is None
+            conn = conn or get_database_connection()
+            try:
+                get_schema_capabilities(conn)  # reference_generation table and triggers
+                self._changed = False
+                database = str(DATABASE_PATH)
+                generation = read_reference_generation(conn)
+                reload = (
+                    self._snapshot is None
+                    or self._database != database
+                    or self._snapshot.generation != generation
+                )
+                count_cache("reference_snapshot", hit=not reload)
+                if reload:
+                    started = time.perf_counter()
+                    self._snapshot = load_reference_snapshot(conn)
+                    self._database = database
+                    print(
+                        f"[Snapshot] Loaded reference data generation {self._snapshot.generation} "
+                        f"in {time.perf_counter() - started:.2f}s",
+                        flush=True,
+                    )
+                self._checked_at = time.monotonic()
+                return self._snapshot
+            finally:
+                if own_conn:
+                    conn.close()
+
+    def mark_changed(self) -> None:
+        """Force a generation check on the next read (call after committing a write)."""
+        self._changed = True
+
+
+REFERENCE_DATA = ReferenceDataService()
+
+
+def get_reference_snapshot(conn: Optional[sqlite3.Connection] = None) -> ReferenceSnapshot:
+    return REFERENCE_DATA.current(conn)
+
+
+def mark_reference_data_changed() -> None:
+    REFERENCE_DATA.mark_changed()
+
+
 # --------------------------------------------------------------------------- #
 # Sheet processing
 # --------------------------------------------------------------------------- #
 
 
+def build_relay_result(
+    row: pd.Series,
+    sheet_name: str,
+    excel_row: int,
+    team_name: str,
+    course: str,
+    gender: str,
+    relay_meta: RelayMeta,
+    meet_info: Dict[str, Any],
+    club_index: ClubIndex,
+    event_index: EventIndex,
+    collector: ValidationCollector,
+) -> Optional[Dict[str, Any]]:
+    """One relay team row -> relay result dict (is_relay=1), or None without a valid time.
+
+    SwimRankings relay sheets carry the team in FULLNAME and no leg swimmers or splits;
+    legs are attached later (set_relay_legs).
+    """
+    time_string = as_clean_str(get_value(row, "SWIMTIME"))
+    time_numeric = parse_swimtime_numeric(get_value(row, "SWIMTIME_N"), time_string)
+    if time_numeric is None:
+        collector.add_time_error(sheet_name, excel_row, team_name, time_string, as_clean_str(get_value(row, "SWIMTIME_N")))
+        return None
+
+    club_value = as_clean_str(get_value(row, "CLUBNAME")) or team_name
+    club_record = None
+    if normalize_name(club_value) != normalize_name("Malaysia"):
+        club_record = club_index.resolve(club_value, sheet_name, excel_row, collector)
+
+    meet_date_obj = parse_excel_date(get_value(row, "MEETDATE")) or parse_excel_date(meet_info.get("meet_date"))
+    return {
+        "id": str(uuid.uuid4()),
+        "is_relay": 1,
+        "event_id": event_index.resolve_relay(course, relay_meta.leg_distance, relay_meta.stroke_kind, gender),
+        "course": course,
+        "gender": gender,
+        "leg_distance": relay_meta.leg_distance,
+        "stroke_kind": relay_meta.stroke_kind,
+        "team_name": club_record.club_name if club_record else team_name,
+        "team_code": (club_record.club_code if club_record else None) or as_clean_str(get_value(row, "CLUBCODE")) or None,
+        "team_state_code": club_record.state_code if club_record else None,
+        "team_nation": as_clean_str(get_value(row, "NATION")).upper() or (club_record.nation if club_record else None),
+        "time_seconds": time_numeric,
+        "time_string": time_string,
+        "aqua_points": parse_optional_int(get_value(row, "PTS_FINA")),
+        "result_meet_date": meet_date_obj.strftime("%Y-%m-%d") if meet_date_obj else meet_info.get("meet_date"),
+        "meet_name": as_clean_str(get_value(row, "MEETNAME")) or meet_info.get("name"),
+        "meet_city": as_clean_str(get_value(row, "MEETCITY")) or meet_info.get("city"),
+        "sheet_name": sheet_name,
+        "excel_row": excel_row,
+        "full_name": team_name,
+    }
+
+
 def process_sheet(
     sheet_name: str,
     df: pd.DataFrame,
@@ -1602,9 +2278,15 @@ def process_sheet(
             stroke_name: Optional[str] = None
 
             if relay_meta:
-                # Silently skip relays - no age group data available for proper results table entry
-                # TODO: Add relay support later when age group handling is implemented
-                skip_reasons["no_event"] += 1
+                # Team rows go to relay_results (see insert_relay_results), not the individual path
+                relay_result = build_relay_result(
+                    row, sheet_name, excel_row, full_name, course, gender, relay_meta,
+                    meet_info, club_index, event_index, collector,
+                )
+                if relay_result is None:
+                    skip_reasons["no_time"] += 1
+                else:
+                    results.append(relay_result)
                 continue
             else:
                 distance_text = as_clean_str(distance_value)
@@ -1831,7 +2513,6 @@ def process_sheet(
                     if nation_value != "MAS" and athlete_record.nation == "MAS":
                         # Excel says non-MAS, DB says MAS - trust Excel and update athlete
                         nation_update_new = nation_value
-                        print(f"    [NATION] Row {excel_row}: {full_name} - Will update nation from '{athlete_record.nation}' to '{nation_value}' (Excel non-MAS)", flush=True)
                         # Continue processing - don't skip the row
                     else:
                         # Other mismatch (Excel=MAS but DB=non-MAS, or both non-MAS but different)
@@ -1914,7 +2595,12 @@ def process_sheet(
 # --------------------------------------------------------------------------- #
 
 
-def process_meet_file_simple(file_path: Path, meet_info: Dict[str, Any], sheet_filter: Optional[List[str]] = None):
+def process_meet_file_simple(
+    file_path: Path,
+    meet_info: Dict[str, Any],
+    sheet_filter: Optional[List[str]] = None,
+    timings: Optional[UploadTimings] = None,
+):
     """Read an Excel workbook and return (athlete_refs, results, event_refs).
 
     Args:
@@ -1923,7 +2609,11 @@ def process_meet_file_simple(file_path: Path, meet_info: Dict[str, Any], sheet_f
         sheet_filter: Optional list of sheet names to process (for debugging).
                      If None, processes all sheets.
                      TEMPORARY: Remove this constraint after debugging is complete.
+        timings: Optional UploadTimings to record phases/counters into. When omitted,
+                 a local one is used and its summary is logged at the end.
     """
+    owns_timings = timings is None
+    timings = timings or UploadTimings()
     # print(f"Processing: {file_path.name}")  # Removed to reduce noise
 
     collector = ValidationCollector()
@@ -1932,14 +2622,15 @@ def process_meet_file_simple(file_path: Path, meet_info: Dict[str, Any], sheet_f
     # NOTE: conn is kept open for use in process_sheet() for find_athlete_ids()
     # It will be closed at the end of this function
 
-    # print(f"\n[process_meet_file_simple] Loading indexes for {file_path.name}...")  # Removed to reduce noise
-    athlete_index = AthleteIndex.from_connection(conn)
-    # print(f"[process_meet_file_simple] AthleteIndex loaded, total keys in index: {len(athlete_index.by_name)}")  # Removed to reduce noise
-    club_index = ClubIndex.from_connection(conn)
-    event_index = EventIndex.from_connection(conn)
+    with timings.span("load_indexes"):
+        snapshot = get_reference_snapshot(conn)
+        athlete_index = AthleteIndex.from_snapshot(snapshot, conn)
+        club_index = ClubIndex.from_snapshot(snapshot)
+        event_index = EventIndex.from_snapshot(snapshot)
 
     excel_engine = "xlrd" if file_path.suffix.lower() == ".xls" else None
-    excel = pd.ExcelFile(file_path, engine=excel_engine)
+    with timings.span("open_workbook"):
+        excel = pd.ExcelFile(file_path, engine=excel_engine)
 
     all_results: List[Dict[str, Any]] = []
     used_athletes: Set[str] = set()
@@ -1947,9 +2638,9 @@ def process_meet_file_simple(file_path: Path, meet_info: Dict[str, Any], sheet_f
     meet_name_candidates: List[str] = []
     meet_date_candidates: List[str] = []
     meet_city_candidates: List[str] = []
-    # Skip sheets: LAP (lap times), TOP (top results), 4X (relays), 5000 (open water)
-    # Note: Relays skipped for now - no age group data available for proper results table entry
-    skip_patterns = ["LAP", "TOP", "4X", "5000"]
+    # Skip sheets: LAP (lap times), TOP (top results), 5000 (open water).
+    # 4X (relay) sheets are parsed into relay rows (is_relay=1) that insert_data_simple stores separately.
+    skip_patterns = ["LAP", "TOP", "5000"]
 
     # Apply sheet filter if provided (TEMPORARY for debugging)
     sheets_to_process = excel.sheet_names
@@ -1968,33 +2659,34 @@ def process_meet_file_simple(file_path: Path, meet_info: Dict[str, Any], sheet_f
             continue
 
         sheet_num += 1
-        print(f"[PARSE] Processing sheet {sheet_num}/{total_sheets}: '{sheet_name}'...", flush=True)
-
-        df = pd.read_excel(
-            file_path,
-            sheet_name=sheet_name,
-            header=None,
-            usecols=USECOLS,
-            engine=excel_engine,
-        )
-        
-        # Debug: Print first few rows to understand file structure
-        if sheet_name == '50m Fr':  # Only for first sheet to avoid spam
-            print(f"    [DEBUG] Sheet '{sheet_name}' shape: {df.shape}", flush=True)
-            print(f"    [DEBUG] First 3 rows of data:", flush=True)
-            for i in range(min(3, len(df))):
-                print(f"    [DEBUG]   Row {i}: {df.iloc[i].tolist()}", flush=True)
-
-        results, sheet_meet_name, sheet_meet_date, sheet_meet_city, skip_reasons, skipped_rows_details = process_sheet(
-            sheet_name,
-            df,
-            meet_info,
-            athlete_index,
-            club_index,
-            event_index,
-            collector,
-            conn,  # Pass connection for find_athlete_ids()
-        )
+
+        with timings.span("read_sheet", sheet=sheet_name):
+            df = pd.read_excel(
+                file_path,
+                sheet_name=sheet_name,
+                header=None,
+                usecols=USECOLS,
+                engine=excel_engine,
+            )
+
+        with timings.span("parse_sheet", sheet=sheet_name, index=f"{sheet_num}/{total_sheets}") as span:
+            results, sheet_meet_name, sheet_meet_date, sheet_meet_city, skip_reasons, skipped_rows_details = process_sheet(
+                sheet_name,
+                df,
+                meet_info,
+                athlete_index,
+                club_index,
+                event_index,
+                collector,
+                conn,  # Pass connection for find_athlete_ids()
+            )
+            span["rows"] = max(0, len(df) - 2)
+            span["results"] = len(results)
+        timings.count("sheets_parsed")
+        timings.count("rows_parsed", max(0, len(df) - 2))
+        timings.count("results_parsed", len(results))
+        timings.count("rows_skipped", sum(skip_reasons.values()))
+        timings.count("nation_updates_queued", sum(1 for result in results if result.get("_nation_update")))
 
         for result in results:
             if result.get("athlete_id"):
@@ -2040,6 +2732,11 @@ def process_meet_file_simple(file_path: Path, meet_info: Dict[str, Any], sheet_f
     # Close database connection (was kept open for find_athlete_ids in process_sheet)
     conn.close()
 
+    timings.merge(athlete_index.stats)
+    timings.merge(club_index.stats)
+    if owns_timings:
+        timings.log_summary(f"Parsed {file_path.name}")
+
     # Return validation collector so issues can be reported (but don't raise)
     return athlete_refs, all_results, event_refs, collector
 
@@ -2048,6 +2745,78 @@ def process_meet_file_simple(file_path: Path, meet_info: Dict[str, Any], sheet_f
 # Database interaction helpers
 # --------------------------------------------------------------------------- #
 
+# Authoritative database in the project root (benchmarks point this at a scratch copy)
+DATABASE_PATH = Path(__file__).parent.parent / "malaysia_swimming.db"
+
+# Called as observer(sql, parameters, seconds) after every statement run through a
+# connection from get_database_connection(); empty list = no timing overhead.
+SqlObserver = Callable[[str, Any, float], None]
+_SQL_OBSERVERS: List[SqlObserver] = []
+
+# (cache name, "hit" | "miss") -> count, read by the /metrics endpoint
+CACHE_STATS: Dict[Tuple[str, str], int] = defaultdict(int)
+
+
+def add_sql_observer(observer: SqlObserver) -> None:
+    if observer not in _SQL_OBSERVERS:
+        _SQL_OBSERVERS.append(observer)
+
+
+def remove_sql_observer(observer: SqlObserver) -> None:
+    if observer in _SQL_OBSERVERS:
+        _SQL_OBSERVERS.remove(observer)
+
+
+def count_cache(cache: str, hit: bool) -> None:
+    CACHE_STATS[(cache, "hit" if hit else "miss")] += 1
+
+
+def _notify_sql(sql: str, parameters: Any, seconds: float) -> None:
+    for observer in tuple(_SQL_OBSERVERS):
+        try:
+            observer(sql, parameters, seconds)
+        except Exception as e:  # instrumentation must never break a query
+            print(f"[WARN] SQL observer failed: {e}", flush=True)
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that reports each statement and its execute() time to the SQL observers.
+
+    Only the execute step is timed; rows stepped later by fetch*() are not.
+    """
+
+    def execute(self, sql: str, parameters: Any = ()) -> "InstrumentedCursor":
+        if not _SQL_OBSERVERS:
+            return super().execute(sql, parameters)
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            _notify_sql(sql, parameters, time.perf_counter() - started)
+
+    def executemany(self, sql: str, seq_of_parameters: Iterable[Any]) -> "InstrumentedCursor":
+        if not _SQL_OBSERVERS:
+            return super().executemany(sql, seq_of_parameters)
+        rows = seq_of_parameters if isinstance(seq_of_parameters, list) else list(seq_of_parameters)
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, rows)
+        finally:
+            _notify_sql(sql, rows, time.perf_counter() - started)
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose cursors (including conn.execute shortcuts) are InstrumentedCursors."""
+
+    def cursor(self, factory: type = InstrumentedCursor) -> sqlite3.Cursor:
+        return super().cursor(factory)
+
+    def execute(self, sql: str, parameters: Any = ()) -> sqlite3.Cursor:
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters: Iterable[Any]) -> sqlite3.Cursor:
+        return self.cursor().executemany(sql, seq_of_parameters)
+
 
 def get_database_connection():
     """
@@ -2063,14 +2832,14 @@ def get_database_connection():
         finally:
             conn.close()
     """
-    project_root = Path(__file__).parent.parent
-    db_path = project_root / "malaysia_swimming.db"
+    db_path = DATABASE_PATH
     
     # Try to connect with WAL mode - this allows concurrent access
     conn = sqlite3.connect(
         str(db_path), 
         timeout=30.0,  # Wait up to 30 seconds for lock to clear
-        check_same_thread=False  # Allow connections from different threads
+        check_same_thread=False,  # Allow connections from different threads
+        factory=InstrumentedConnection,  # Statement timing for /metrics and the SQL trace
     )
     
     # Enable WAL mode for better concurrency (allows readers while writer is active)
@@ -2083,7 +2852,506 @@ def get_database_connection():
     return conn
 
 
-def insert_data_simple(conn, athletes, results, events, meet_info, collector=None):
+# --------------------------------------------------------------------------- #
+# Schema migrations
+# --------------------------------------------------------------------------- #
+
+# Columns added to `results` after the original import scripts were written
+RESULTS_INGESTION_COLUMNS = [
+    ("day_age", "INTEGER"),
+    ("year_age", "INTEGER"),
+    ("result_meet_date", "TEXT"),
+    ("aqua_points", "INTEGER"),
+    ("rudolph_points", "REAL"),
+    ("team_name", "TEXT"),
+    ("team_code", "TEXT"),
+    ("team_state_code", "TEXT"),
+    ("team_nation", "TEXT"),
+    ("is_relay", "INTEGER DEFAULT 0"),
+]
+
+
+def _table_columns(conn: sqlite3.Connection, table: str) -> List[str]:
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def _add_missing_columns(conn: sqlite3.Connection, table: str, columns: List[Tuple[str, str]]) -> None:
+    existing = {col.lower() for col in _table_columns(conn, table)}
+    if not existing:
+        return  # Table not created yet on this database
+    for col_name, col_type in columns:
+        if col_name.lower() not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {col_name} {col_type}")
+
+
+def _migrate_results_ingestion_columns(conn: sqlite3.Connection) -> None:
+    _add_missing_columns(conn, "results", RESULTS_INGESTION_COLUMNS)
+    if _table_columns(conn, "results"):
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_results_unique ON results(meet_id, event_id, athlete_id)"
+        )
+
+
+def _migrate_results_athlete_event_index(conn: sqlite3.Connection) -> None:
+    # Per-athlete lookups (athlete results, /compare) read one athlete's swims event by event
+    if _table_columns(conn, "results"):
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_results_athlete_event_date ON results(athlete_id, event_id, meet_date)"
+        )
+
+
+def _migrate_alias_columns(conn: sqlite3.Connection) -> None:
+    _add_missing_columns(conn, "clubs", [("club_alias", "TEXT")])
+    _add_missing_columns(conn, "athletes", [("athlete_alias_1", "TEXT"), ("athlete_alias_2", "TEXT")])
+
+
+def _migrate_club_aliases(conn: sqlite3.Connection) -> None:
+    if _table_columns(conn, "clubs"):
+        ensure_club_aliases_table(conn)
+
+
+# (version, name, step). Steps must tolerate databases that were patched by the old
+# runtime ALTERs, so each one checks before it adds. Append only - never renumber.
+SCHEMA_MIGRATIONS: List[Tuple[int, str, Any]] = [
+    (1, "results_ingestion_columns", _migrate_results_ingestion_columns),
+    (2, "alias_columns", _migrate_alias_columns),
+    (3, "club_aliases", _migrate_club_aliases),
+    (4, "roster_cache", lambda conn: _ensure_roster_cache_tables(conn)),
+    (5, "reference_generation", lambda conn: ensure_reference_generation(conn)),
+    (6, "athlete_progression", lambda conn: ensure_athlete_progression(conn)),
+    (7, "performance_distribution", lambda conn: ensure_performance_distribution(conn)),
+    (8, "relay_results", lambda conn: ensure_relay_tables(conn)),
+    (9, "results_athlete_event_index", _migrate_results_athlete_event_index),
+]
+
+
+@dataclass(frozen=True)
+class SchemaCapabilities:
+    """What the migrated database offers, read once so requests never run PRAGMA table_info."""
+
+    version: int
+    columns: Dict[str, Tuple[str, ...]]  # table -> column names as declared
+
+    def has_table(self, table: str) -> bool:
+        return bool(self.columns.get(table))
+
+    def column(self, table: str, name: str) -> Optional[str]:
+        """Declared spelling of `name` in `table` (e.g. 'Gender' for 'gender'), or None."""
+        name = name.lower()
+        return next((col for col in self.columns.get(table, ()) if col.lower() == name), None)
+
+    def has_column(self, table: str, name: str) -> bool:
+        return self.column(table, name) is not None
+
+
+def migrate_schema(conn: sqlite3.Connection) -> SchemaCapabilities:
+    """Apply pending SCHEMA_MIGRATIONS in order and return the resulting capabilities."""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TEXT NOT NULL
+        )
+        """
+    )
+    applied = {row[0] for row in conn.execute("SELECT version FROM schema_migrations")}
+    for version, name, step in SCHEMA_MIGRATIONS:
+        if version in applied:
+            continue
+        step(conn)
+        conn.execute(
+            "INSERT OR IGNORE INTO schema_migrations (version, name, applied_at) VALUES (?, ?, ?)",
+            (version, name, datetime.now().isoformat()),
+        )
+        conn.commit()
+        print(f"[Schema] Applied migration {version:03d}_{name}", flush=True)
+
+    tables = [
+        row[0]
+        for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+        )
+    ]
+    version = conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations").fetchone()[0]
+    return SchemaCapabilities(
+        version=version,
+        columns={table: tuple(_table_columns(conn, table)) for table in tables},
+    )
+
+
+# Capabilities per database file (str(DATABASE_PATH)), filled by the first migration in this process
+_SCHEMA_CAPABILITIES: Dict[str, SchemaCapabilities] = {}
+_SCHEMA_LOCK = threading.Lock()
+
+
+def get_schema_capabilities(conn: Optional[sqlite3.Connection] = None) -> SchemaCapabilities:
+    """Migrate the database on first use in this process, then return the cached capabilities."""
+    key = str(DATABASE_PATH)
+    capabilities = _SCHEMA_CAPABILITIES.get(key)
+    if capabilities is not None:
+        return capabilities
+    with _SCHEMA_LOCK:
+        if key not in _SCHEMA_CAPABILITIES:
+            own_conn = conn is None
+            conn = conn or get_database_connection()
+            try:
+                _SCHEMA_CAPABILITIES[key] = migrate_schema(conn)
+            finally:
+                if own_conn:
+                    conn.close()
+        return _SCHEMA_CAPABILITIES[key]
+
+
+def reset_caches() -> None:
+    """Drop every process-level cache in this module so the next use rebuilds from the database.
+
+    Covers the roster memo, schema capabilities, admin club lookup and reference snapshot.
+    """
+    global _CLUB_LOOKUP, REFERENCE_DATA
+    _ROSTER_MEMO.clear()
+    with _SCHEMA_LOCK:
+        _SCHEMA_CAPABILITIES.clear()
+    _CLUB_LOOKUP = None
+    REFERENCE_DATA = ReferenceDataService(REFERENCE_DATA.check_interval)
+
+
+# --------------------------------------------------------------------------- #
+# Athlete progression index
+# --------------------------------------------------------------------------- #
+
+# One row per (athlete, event, season): the season-best swim, how many swims it came
+# from, the change against the previous season best, and whether it set a new PB.
+# Triggers on `results` queue touched athletes in athlete_progression_dirty; refresh
+# rebuilds just those athletes, so out-of-order meets and deletes stay correct.
+
+PROGRESSION_REFRESH_BATCH = 500
+
+# Called as listener(changes) after a refresh commits; changes maps
+# (athlete_id, event_id, season) -> new season-best seconds, or None if the row went away.
+ProgressionListener = Callable[[Dict[Tuple[str, str, int], Optional[float]]], None]
+_PROGRESSION_LISTENERS: List[ProgressionListener] = []
+
+
+def add_progression_listener(listener: ProgressionListener) -> None:
+    if listener not in _PROGRESSION_LISTENERS:
+        _PROGRESSION_LISTENERS.append(listener)
+
+_PROGRESSION_SELECT = """
+    WITH swims AS (
+        SELECT r.athlete_id, r.event_id, r.id AS result_id, r.meet_id, r.time_seconds, r.time_string,
+               COALESCE(r.meet_date, m.meet_date) AS meet_date,
+               CAST(substr(COALESCE(r.meet_date, m.meet_date), 1, 4) AS INTEGER) AS season
+        FROM results r
+        LEFT JOIN meets m ON r.meet_id = m.id
+        WHERE r.athlete_id IN ({placeholders})
+          AND r.time_seconds > 0
+          AND COALESCE(r.result_status, 'OK') = 'OK'
+          AND COALESCE(r.is_relay, 0) = 0
+    ),
+    season_best AS (
+        SELECT *, ROW_NUMBER() OVER (
+                      PARTITION BY athlete_id, event_id, season ORDER BY time_seconds, meet_date
+                  ) AS rn,
+               COUNT(*) OVER (PARTITION BY athlete_id, event_id, season) AS swims
+        FROM swims
+        WHERE season > 0
+    ),
+    progression AS (
+        SELECT athlete_id, event_id, season, result_id, meet_id, meet_date, time_seconds, time_string, swims,
+               LAG(time_seconds) OVER w AS previous_season_best,
+               MIN(time_seconds) OVER (w ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING) AS previous_pb
+        FROM season_best
+        WHERE rn = 1
+        WINDOW w AS (PARTITION BY athlete_id, event_id ORDER BY season)
+    )
+    SELECT athlete_id, event_id, season, result_id, meet_id, meet_date, time_seconds, time_string, swims,
+           ROUND(time_seconds - previous_season_best, 2),
+           previous_pb,
+           CASE WHEN previous_pb IS NULL OR time_seconds < previous_pb THEN 1 ELSE 0 END
+    FROM progression
+"""
+
+
+def ensure_athlete_progression(conn: sqlite3.Connection) -> None:
+    """Create the progression table, its dirty queue and the results triggers that feed it."""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS athlete_progression (
+            athlete_id TEXT NOT NULL,
+            event_id TEXT NOT NULL,
+            season INTEGER NOT NULL,
+            result_id TEXT NOT NULL,
+            meet_id TEXT,
+            meet_date TEXT,
+            time_seconds REAL NOT NULL,
+            time_string TEXT,
+            swims INTEGER NOT NULL,
+            season_delta REAL,
+            previous_pb REAL,
+            is_pb INTEGER NOT NULL,
+            PRIMARY KEY (athlete_id, event_id, season)
+        )
+        """
+    )
+    conn.execute("CREATE TABLE IF NOT EXISTS athlete_progression_dirty (athlete_id TEXT PRIMARY KEY)")
+    if not _table_columns(conn, "results"):
+        conn.commit()
+        return
+    for op, rows in (("INSERT", ("NEW",)), ("DELETE", ("OLD",)), ("UPDATE", ("OLD", "NEW"))):
+        columns = " OF athlete_id, event_id, meet_id, meet_date, time_seconds, result_status" if op == "UPDATE" else ""
+        body = "\n".join(
+            f"INSERT OR IGNORE INTO athlete_progression_dirty (athlete_id) "
+            f"SELECT {row}.athlete_id WHERE {row}.athlete_id IS NOT NULL;"
+            for row in rows
+        )
+        conn.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_progression_results_{op.lower()}
+            AFTER {op}{columns} ON results
+            BEGIN
+                {body}
+            END
+            """
+        )
+    # Existing athletes are built by the web app's background drain (refresh_athlete_progression(conn, all_dirty=True))
+    conn.execute(
+        "INSERT OR IGNORE INTO athlete_progression_dirty (athlete_id) "
+        "SELECT DISTINCT athlete_id FROM results WHERE athlete_id IS NOT NULL"
+    )
+    conn.commit()
+
+
+def refresh_athlete_progression(
+    conn: sqlite3.Connection,
+    athlete_ids: Optional[Iterable[str]] = None,
+    all_dirty: bool = False,
+) -> int:
+    """Rebuild progression rows for the given athletes (only those queued as dirty).
+
+    With all_dirty=True the whole queue is drained. Returns the number of athletes rebuilt.
+    Commits; call after the caller's own results writes are committed.
+    """
+    get_schema_capabilities(conn)  # progression tables and triggers
+    if all_dirty:
+        ids = [row[0] for row in conn.execute("SELECT athlete_id FROM athlete_progression_dirty")]
+    else:
+        wanted = [a for a in dict.fromkeys(athlete_ids or []) if a]
+        ids = []
+        for start in range(0, len(wanted), PROGRESSION_REFRESH_BATCH):
+            chunk = wanted[start:start + PROGRESSION_REFRESH_BATCH]
+            placeholders = ",".join("?" * len(chunk))
+            ids += [row[0] for row in conn.execute(
+                f"SELECT athlete_id FROM athlete_progression_dirty WHERE athlete_id IN ({placeholders})", chunk
+            )]
+    for start in range(0, len(ids), PROGRESSION_REFRESH_BATCH):
+        chunk = ids[start:start + PROGRESSION_REFRESH_BATCH]
+        placeholders = ",".join("?" * len(chunk))
+        season_bests = (
+            f"SELECT athlete_id, event_id, season, time_seconds FROM athlete_progression "
+            f"WHERE athlete_id IN ({placeholders})"
+        )
+        with conn:
+            before = conn.execute(season_bests, chunk).fetchall() if _PROGRESSION_LISTENERS else []
+            conn.execute(f"DELETE FROM athlete_progression WHERE athlete_id IN ({placeholders})", chunk)
+            conn.execute(
+                "INSERT INTO athlete_progression (athlete_id, event_id, season, result_id, meet_id, meet_date, "
+                "time_seconds, time_string, swims, season_delta, previous_pb, is_pb) "
+                + _PROGRESSION_SELECT.format(placeholders=placeholders),
+                chunk,
+            )
+            conn.execute(f"DELETE FROM athlete_progression_dirty WHERE athlete_id IN ({placeholders})", chunk)
+            after = conn.execute(season_bests, chunk).fetchall() if _PROGRESSION_LISTENERS else []
+        if _PROGRESSION_LISTENERS:
+            changes: Dict[Tuple[str, str, int], Optional[float]] = {row[:3]: None for row in before}
+            changes.update({row[:3]: row[3] for row in after})
+            for row in before:
+                if changes[row[:3]] == row[3]:
+                    del changes[row[:3]]
+            for listener in tuple(_PROGRESSION_LISTENERS):
+                listener(changes)
+    return len(ids)
+
+
+# --------------------------------------------------------------------------- #
+# Performance distribution statistics
+# --------------------------------------------------------------------------- #
+
+# One row per (event, age, season, metric) with counts, mean, percentiles and a
+# histogram of athletes' best swims (metric 'time' = seconds, 'aqua' = AQUA points).
+# The numbers are computed in src/web/utils/distribution.py; here we only keep the
+# table and a queue of (event_id, season) partitions touched by results writes.
+
+DISTRIBUTION_PERCENTILES = (10, 25, 50, 75, 90, 95, 99)
+
+
+def ensure_performance_distribution(conn: sqlite3.Connection) -> None:
+    """Create the distribution table, its dirty queue and the results triggers that feed it."""
+    percentile_columns = ",\n".join(f"            p{p} REAL" for p in DISTRIBUTION_PERCENTILES)
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS performance_distribution (
+            event_id TEXT NOT NULL,
+            gender TEXT,
+            age INTEGER NOT NULL,
+            season INTEGER NOT NULL,
+            metric TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            mean REAL,
+            std REAL,
+            min REAL,
+            max REAL,
+{percentile_columns},
+            histogram TEXT,
+            computed_at TEXT,
+            PRIMARY KEY (event_id, season, age, metric)
+        )
+        """
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS performance_distribution_dirty ("
+        "event_id TEXT NOT NULL, season INTEGER NOT NULL, PRIMARY KEY (event_id, season))"
+    )
+    if not _table_columns(conn, "results"):
+        conn.commit()
+        return
+    for op, rows in (("INSERT", ("NEW",)), ("DELETE", ("OLD",)), ("UPDATE", ("OLD", "NEW"))):
+        columns = (
+            " OF athlete_id, event_id, meet_id, meet_date, time_seconds, aqua_points, year_age, day_age, result_status"
+            if op == "UPDATE" else ""
+        )
+        body = "\n".join(
+            f"INSERT OR IGNORE INTO performance_distribution_dirty (event_id, season) "
+            f"SELECT {row}.event_id, CAST(substr(COALESCE({row}.meet_date, "
+            f"(SELECT meet_date FROM meets WHERE id = {row}.meet_id)), 1, 4) AS INTEGER) "
+            f"WHERE {row}.event_id IS NOT NULL;"
+            for row in rows
+        )
+        conn.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_distribution_results_{op.lower()}
+            AFTER {op}{columns} ON results
+            BEGIN
+                {body}
+            END
+            """
+        )
+    # Existing partitions are computed on first read (or by a full refresh)
+    conn.execute(
+        "INSERT OR IGNORE INTO performance_distribution_dirty (event_id, season) "
+        "SELECT DISTINCT r.event_id, CAST(substr(COALESCE(r.meet_date, m.meet_date), 1, 4) AS INTEGER) "
+        "FROM results r LEFT JOIN meets m ON r.meet_id = m.id WHERE r.event_id IS NOT NULL"
+    )
+    conn.commit()
+
+
+# --------------------------------------------------------------------------- #
+# Relay results
+# --------------------------------------------------------------------------- #
+
+# Team rows from 4X sheets live in relay_results (results stays one row per swimmer).
+# relay_legs holds the swimmers and, when known, their splits; leg strokes follow
+# the medley order for medley relays.
+
+MEDLEY_LEG_STROKES = ("Back", "Breast", "Fly", "Free")
+
+_RELAY_COLUMNS = (
+    "id", "meet_id", "event_id", "course", "gender", "leg_distance", "stroke_kind", "team_name", "team_code",
+    "state_code", "nation", "time_seconds", "time_string", "aqua_points", "meet_date", "meet_name", "meet_city",
+)
+
+
+def ensure_relay_tables(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS relay_results (
+            id TEXT PRIMARY KEY,
+            meet_id TEXT,
+            event_id TEXT,
+            course TEXT NOT NULL,
+            gender TEXT NOT NULL,
+            leg_distance INTEGER NOT NULL,
+            stroke_kind TEXT NOT NULL,
+            team_name TEXT NOT NULL,
+            team_code TEXT,
+            state_code TEXT,
+            nation TEXT,
+            time_seconds REAL NOT NULL,
+            time_string TEXT,
+            aqua_points INTEGER,
+            meet_date TEXT,
+            meet_name TEXT,
+            meet_city TEXT
+        )
+        """
+    )
+    conn.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_relay_results_unique ON relay_results("
+        "meet_id, course, gender, leg_distance, stroke_kind, team_name, time_seconds)"
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS relay_legs (
+            relay_result_id TEXT NOT NULL,
+            leg_order INTEGER NOT NULL CHECK (leg_order BETWEEN 1 AND 4),
+            athlete_id TEXT,
+            foreign_athlete_id TEXT,
+            full_name TEXT,
+            stroke TEXT NOT NULL,
+            split_seconds REAL,
+            PRIMARY KEY (relay_result_id, leg_order)
+        )
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_relay_legs_athlete ON relay_legs(athlete_id)")
+    conn.commit()
+
+
+def insert_relay_results(cursor: sqlite3.Cursor, relays: List[Dict[str, Any]], meet_id: str) -> int:
+    """Insert parsed relay rows for one meet; re-uploads of the same swim are ignored. Returns rows added."""
+    rows = [
+        (
+            relay["id"], meet_id, relay.get("event_id"), relay["course"], relay["gender"], relay["leg_distance"],
+            relay["stroke_kind"], relay["team_name"], relay.get("team_code"), relay.get("team_state_code"),
+            relay.get("team_nation"), relay["time_seconds"], relay.get("time_string"), relay.get("aqua_points"),
+            relay.get("result_meet_date"), relay.get("meet_name"), relay.get("meet_city"),
+        )
+        for relay in relays
+    ]
+    before = cursor.connection.total_changes
+    cursor.executemany(
+        f"INSERT OR IGNORE INTO relay_results ({', '.join(_RELAY_COLUMNS)}) "
+        f"VALUES ({', '.join('?' * len(_RELAY_COLUMNS))})",
+        rows,
+    )
+    return cursor.connection.total_changes - before
+
+
+def set_relay_legs(conn: sqlite3.Connection, relay_result_id: str, legs: List[Dict[str, Any]]) -> int:
+    """Replace the legs of a relay. Each leg: leg_order, athlete_id or foreign_athlete_id or full_name, split_seconds."""
+    get_schema_capabilities(conn)  # relay tables
+    relay = conn.execute("SELECT stroke_kind FROM relay_results WHERE id = ?", (relay_result_id,)).fetchone()
+    if relay is None:
+        raise KeyError(relay_result_id)
+    rows = []
+    for leg in legs:
+        order = int(leg["leg_order"])
+        if not 1 <= order <= 4:
+            raise ValueError(f"leg_order must be 1-4, got {order}")
+        stroke = MEDLEY_LEG_STROKES[order - 1] if relay[0] == "Medley" else "Free"
+        rows.append((relay_result_id, order, leg.get("athlete_id"), leg.get("foreign_athlete_id"),
+                     leg.get("full_name"), stroke, leg.get("split_seconds")))
+    with conn:
+        conn.execute("DELETE FROM relay_legs WHERE relay_result_id = ?", (relay_result_id,))
+        conn.executemany(
+            "INSERT INTO relay_legs (relay_result_id, leg_order, athlete_id, foreign_athlete_id, full_name, stroke, "
+            "split_seconds) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+    return len(rows)
+
+
+def insert_data_simple(conn, athletes, results, events, meet_info, collector=None, timings=None):
     """Insert the prepared results into SQLite (athletes/events lists mark existing rows).
     
     Args:
@@ -2093,33 +3361,15 @@ def insert_data_simple(conn, athletes, results, events, meet_info, collector=Non
         events: List of event references
         meet_info: Meet information dictionary
         collector: Optional ValidationCollector to track skipped rows
+        timings: Optional UploadTimings to record insert phases/counters into
     """
+    timings = timings or UploadTimings()
+    phase_started = time.perf_counter()
     cursor = conn.cursor()
-    
-    columns_to_add = [
-        ("day_age", "INTEGER"),
-        ("year_age", "INTEGER"),
-        ("result_meet_date", "TEXT"),
-        ("aqua_points", "INTEGER"),
-        ("rudolph_points", "REAL"),
-        ("team_name", "TEXT"),
-        ("team_code", "TEXT"),
-        ("team_state_code", "TEXT"),
-        ("team_nation", "TEXT"),
-        ("is_relay", "INTEGER DEFAULT 0"),
-    ]
-    for col_name, col_type in columns_to_add:
-        try:
-            cursor.execute(f"ALTER TABLE results ADD COLUMN {col_name} {col_type}")
-        except sqlite3.OperationalError:
-            pass
-
-    try:
-        cursor.execute(
-            "CREATE INDEX IF NOT EXISTS idx_results_unique ON results(meet_id, event_id, athlete_id)"
-        )
-    except sqlite3.OperationalError:
-        pass
+    # results columns and idx_results_unique come from SCHEMA_MIGRATIONS
+    schema = get_schema_capabilities(conn)
+    relays = [r for r in results if r.get("is_relay")]
+    results = [r for r in results if not r.get("is_relay")]
 
     cursor.execute(
         """
@@ -2178,7 +3428,6 @@ def insert_data_simple(conn, athletes, results, events, meet_info, collector=Non
     meet_name = meet_info.get("name", "Unknown")
     existing_results_set = set()
     if meet_id and results:
-        print(f"    [DB] Loading existing results for meet {meet_id} ('{meet_name}')...", flush=True)
         cursor.execute("""
             SELECT event_id, athlete_id, foreign_athlete_id
             FROM results
@@ -2191,20 +3440,16 @@ def insert_data_simple(conn, athletes, results, events, meet_info, collector=Non
             # Use 3-tuple (event_id, athlete_id, foreign_athlete_id) as key - MUST match duplicate_key format
             key = (event_id, athlete_id if athlete_id else None, foreign_athlete_id if foreign_athlete_id else None)
             existing_results_set.add(key)
-        print(f"    [DB] Found {len(existing_results_set)} existing results to check against for meet '{meet_name}' (ID: {meet_id})", flush=True)
         if len(existing_results_set) > 0:
             print(f"    [DB] WARNING: Meet '{meet_name}' already has {len(existing_results_set)} results in database. New results with same (event_id, athlete_id, foreign_athlete_id) will be skipped as duplicates.", flush=True)
     
-    # Progress tracking
-    progress_interval = max(1, total_results // 10) if total_results > 0 else 1  # Print every 10%
-    
+    timings.record("insert_lookup_existing", phase_started, meet=meet_name, existing=len(existing_results_set))
+    phase_started = time.perf_counter()
+
     # Prepare batch insert data
     batch_inserts = []
     
     for idx, result in enumerate(results, 1):
-        # Print progress for large batches
-        if total_results > 50 and idx % progress_interval == 0:
-            print(f"    [Progress] {idx}/{total_results} ({100*idx//total_results}%) - Inserted: {inserted}, Skipped: {skipped}", flush=True)
         sheet_name = result.get("sheet_name", "Unknown")
         excel_row = result.get("excel_row", 0)
         full_name = result.get("full_name", result.get("athlete_name", "Unknown"))
@@ -2276,9 +3521,11 @@ def insert_data_simple(conn, athletes, results, events, meet_info, collector=Non
         ))
         inserted += 1
 
+    timings.record("insert_prepare", phase_started, meet=meet_name, results=total_results)
+    phase_started = time.perf_counter()
+
     # OPTIMIZATION: Batch insert all results at once instead of one-by-one
     if batch_inserts:
-        print(f"    [DB] Batch inserting {len(batch_inserts)} results...", flush=True)
         cursor.executemany(
             """
             INSERT INTO results (
@@ -2308,7 +3555,9 @@ def insert_data_simple(conn, athletes, results, events, meet_info, collector=Non
             """,
             batch_inserts,
         )
-        print(f"    [DB] Batch insert complete", flush=True)
+    relays_inserted = insert_relay_results(cursor, relays, meet_id) if relays else 0
+    timings.record("insert_batch", phase_started, meet=meet_name, rows=len(batch_inserts), relays=len(relays))
+    phase_started = time.perf_counter()
     
     # Apply FULLNAME updates (results FULLNAME overwrites registration FULLNAME)
     # IMPORTANT: Preserve old FULLNAME in alias field before updating
@@ -2328,11 +3577,8 @@ def insert_data_simple(conn, athletes, results, events, meet_info, collector=Non
                     old_names_by_athlete[athlete_id] = old_fullname
         
         # Check which alias columns exist
-        cursor.execute("PRAGMA table_info(athletes)")
-        columns_info = cursor.fetchall()
-        columns = {row[1].lower() for row in columns_info}
-        has_alias_1 = "athlete_alias_1" in columns
-        has_alias_2 = "athlete_alias_2" in columns
+        has_alias_1 = schema.has_column("athletes", "athlete_alias_1")
+        has_alias_2 = schema.has_column("athletes", "athlete_alias_2")
         
         for athlete_id, new_fullname in updates_by_athlete.items():
             try:
@@ -2369,11 +3615,11 @@ def insert_data_simple(conn, athletes, results, events, meet_info, collector=Non
                         if has_alias_1 and not current_alias_1:
                             # Use alias_1 if available
                             cursor.execute("UPDATE athletes SET athlete_alias_1 = ? WHERE id = ?", (old_fullname, athlete_id))
-                            print(f"    [DB] Stored old FULLNAME '{old_fullname}' in athlete_alias_1 for athlete {athlete_id}", flush=True)
+                            timings.count("old_names_preserved")
                         elif has_alias_2 and not current_alias_2:
                             # Use alias_2 if alias_1 is taken
                             cursor.execute("UPDATE athletes SET athlete_alias_2 = ? WHERE id = ?", (old_fullname, athlete_id))
-                            print(f"    [DB] Stored old FULLNAME '{old_fullname}' in athlete_alias_2 for athlete {athlete_id}", flush=True)
+                            timings.count("old_names_preserved")
                         elif has_alias_1:
                             # Both aliases are taken, but we'll still update FULLNAME
                             print(f"    [DB] WARNING: Both alias fields are full for athlete {athlete_id}, cannot preserve old name '{old_fullname}'", flush=True)
@@ -2382,10 +3628,6 @@ def insert_data_simple(conn, athletes, results, events, meet_info, collector=Non
                 if old_fullname != new_fullname:
                     cursor.execute("UPDATE athletes SET FULLNAME = ? WHERE id = ?", (new_fullname, athlete_id))
                     fullname_updates_applied += 1
-                    print(f"    [DB] Updated athlete {athlete_id} FULLNAME from '{old_fullname}' to '{new_fullname}'", flush=True)
-                else:
-                    # Names are the same, no update needed
-                    print(f"    [DB] Skipped FULLNAME update for athlete {athlete_id} (already '{new_fullname}')", flush=True)
             except Exception as e:
                 if collector:
                     collector.add_general_error("FULLNAME Update", 0, f"Error updating {athlete_id}: {e}")
@@ -2406,7 +3648,6 @@ def insert_data_simple(conn, athletes, results, events, meet_info, collector=Non
                 # Update birthdate
                 cursor.execute("UPDATE athletes SET BIRTHDATE = ? WHERE id = ?", (new_birthdate, athlete_id))
                 birthdate_updates_applied += 1
-                print(f"    [DB] Updated athlete {athlete_id} BIRTHDATE to '{new_birthdate}' (transposed date corrected)", flush=True)
             except Exception as e:
                 conn.rollback()
                 print(f"    [DB] ERROR updating BIRTHDATE for athlete {athlete_id}: {e}", flush=True)
@@ -2425,20 +3666,34 @@ def insert_data_simple(conn, athletes, results, events, meet_info, collector=Non
         try:
             cursor.execute("UPDATE athletes SET NATION = ? WHERE id = ?", (new_nation, athlete_id))
             nation_updates_applied += 1
-            print(f"    [DB] Updated athlete {athlete_id} nation to '{new_nation}'", flush=True)
         except Exception as e:
             if collector:
                 collector.add_general_error("NATION Update", 0, f"Error updating athlete {athlete_id} nation to {new_nation}: {e}")
     
     conn.commit()
+    mark_reference_data_changed()
+    timings.record("insert_athlete_updates", phase_started, meet=meet_name)
+    phase_started = time.perf_counter()
+    refresh_athlete_progression(conn, (row[2] for row in batch_inserts))
+    timings.record("insert_progression", phase_started, meet=meet_name)
+    timings.count("results_inserted", inserted)
+    timings.count("results_skipped", skipped)
+    timings.count("relays_inserted", relays_inserted)
+    timings.count("fullname_updates", fullname_updates_applied)
+    timings.count("birthdate_updates", birthdate_updates_applied)
+    timings.count("nation_updates", nation_updates_applied)
     
     # Final summary for this batch
     if total_results > 0:
         print(f"    [Complete] Inserted: {inserted}, Skipped: {skipped}, Total processed: {total_results}")
+    if relays:
+        print(f"    [Complete] Relays inserted: {relays_inserted}, duplicates: {len(relays) - relays_inserted}")
     
     return {
         "inserted_results": inserted, 
         "skipped_results": skipped,
+        "inserted_relays": relays_inserted,
+        "skipped_relays": len(relays) - relays_inserted,
         "fullname_updates_applied": fullname_updates_applied,
         "birthdate_updates_applied": birthdate_updates_applied
     }
@@ -1,13 +1,36 @@
 """
 Generate MOT Methodology HTML pages for all events.
-Uses data from canada_on_track, usa_delta_data, and mot_base_times tables.
+Uses data from canada_on_track, usa_delta_stats, and mot_base_times tables.
+Canada times come from the shared curve arrays in canada_curves.py (stored times only).
+
+All inputs are loaded with one query per table, then pages are rendered in a process
+pool. A manifest in the output folder keeps, for each page, a hash of its inputs and of
+the template. Only pages whose hash changed (or whose file is missing) are rendered
+and written again.
+
+Usage:
+    python scripts/generate_mot_methodology_pages.py
+    python scripts/generate_mot_methodology_pages.py --db path/to/malaysia_swimming.db --output-dir public/mot/reports
+    python scripts/generate_mot_methodology_pages.py --force     # re-render every page
 """
 
+import argparse
+import hashlib
+import json
 import sqlite3
 import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
 
-DB_PATH = r'C:\Users\megan\OneDrive\Documents\Malaysia Swimming Analytics\malaysia_swimming.db'
-OUTPUT_DIR = r'C:\Users\megan\OneDrive\Documents\Malaysia Swimming Analytics\public\statistical_analysis\reports'
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from scripts.canada_curves import load_canada_curves
+from scripts.compute_usa_delta_stats import ensure_usa_delta_stats
+
+DB_PATH = os.path.join(PROJECT_ROOT, 'malaysia_swimming.db')
+OUTPUT_DIR = os.path.join(PROJECT_ROOT, 'public', 'statistical_analysis', 'reports')
+MANIFEST_NAME = '.mot_methodology_manifest.json'
 
 # Event definitions
 EVENTS = [
@@ -132,77 +155,55 @@ def format_time(seconds):
         return f"{mins}:{secs:05.2f}"
     return f"{seconds:.2f}"
 
-def get_canada_tracks(conn, event_id):
-    """Get Canada On Track data for an event"""
-    cursor = conn.cursor()
-    cursor.execute('''
-        SELECT canada_track, canada_track_age, canada_track_time_seconds
-        FROM canada_on_track
-        WHERE event_id = ?
-        ORDER BY canada_track, canada_track_age
-    ''', (event_id,))
-    rows = cursor.fetchall()
-
-    # Organize by track
-    tracks = {1: {}, 2: {}, 3: {}}
-    for track, age, time_sec in rows:
-        tracks[track][age] = time_sec
-
-    return tracks
-
-def get_usa_deltas(conn, event_id):
-    """Get USA delta data for an event"""
-    cursor = conn.cursor()
-    # Get aggregated stats per age transition
-    cursor.execute('''
-        SELECT usa_delta_age_start, usa_delta_age_end,
-               COUNT(*) as sample_size,
-               AVG(usa_delta_improvement_seconds) as mean_improvement,
-               usa_delta_median
-        FROM usa_delta_data
-        WHERE usa_delta_event_id = ?
-        GROUP BY usa_delta_age_start, usa_delta_age_end
-        ORDER BY usa_delta_age_start
-    ''', (event_id,))
-    rows = cursor.fetchall()
-
-    deltas = {}
-    for age_start, age_end, sample_size, mean_imp, median_imp in rows:
-        deltas[f"{age_start}_to_{age_end}"] = {
+def load_inputs(conn):
+    """
+    Load every event's inputs in one query per table.
+    Returns: {event_id: {'canada': {track: {age: time}}, 'canada_deltas': {"18_to_19": deltas},
+                         'usa': {"15_to_16": stats}, 'mot': {age: time}}}
+    """
+    ensure_usa_delta_stats(conn)
+    inputs = {}
+
+    def event(event_id):
+        return inputs.setdefault(event_id, {'canada': {1: {}, 2: {}, 3: {}}, 'canada_deltas': {}, 'usa': {}, 'mot': {}})
+
+    curves = load_canada_curves(conn)
+    for event_id in curves.events:
+        event(event_id)['canada'] = curves.points(event_id)
+        event(event_id)['canada_deltas'] = calculate_canada_deltas(event(event_id)['canada'])
+
+    for event_id, age_start, age_end, sample_size, mean_imp, median_imp, trimmed_imp, iqr in conn.execute('''
+        SELECT event_id, age_start, age_end, sample_size, mean, median, trimmed_mean, iqr
+        FROM usa_delta_stats
+        ORDER BY event_id, age_start
+    '''):
+        event(event_id)['usa'][f"{age_start}_to_{age_end}"] = {
             'sample_size': sample_size,
             'mean': mean_imp,
-            'median': median_imp
+            'median': median_imp,
+            'trimmed_mean': trimmed_imp,
+            'iqr': iqr
         }
 
-    return deltas
-
-def get_mot_times(conn, event_id):
-    """Get MOT base times for an event"""
-    cursor = conn.cursor()
-    cursor.execute('''
-        SELECT mot_age, mot_time_seconds
+    for event_id, age, time_sec in conn.execute('''
+        SELECT mot_event_id, mot_age, mot_time_seconds
         FROM mot_base_times
-        WHERE mot_event_id = ?
-        ORDER BY mot_age
-    ''', (event_id,))
-    return {age: time_sec for age, time_sec in cursor.fetchall()}
+        ORDER BY mot_event_id, mot_age
+    '''):
+        event(event_id)['mot'][age] = time_sec
+
+    return inputs
 
 def calculate_canada_deltas(tracks):
-    """Calculate average deltas from Canada track data"""
+    """Average deltas between consecutive stored Canada ages ({track: {age: time}}, no interpolation)"""
     deltas = {}
-    ages = set()
-    for track_data in tracks.values():
-        ages.update(track_data.keys())
-
-    ages = sorted(ages)
-    for i in range(len(ages) - 1):
-        age_start, age_end = ages[i], ages[i + 1]
-        track_deltas = []
-        for track_num, track_data in tracks.items():
-            if age_start in track_data and age_end in track_data:
-                delta = track_data[age_start] - track_data[age_end]
-                track_deltas.append((track_num, delta))
-
+    ages = sorted({age for track_data in tracks.values() for age in track_data})
+    for age_start, age_end in zip(ages, ages[1:]):
+        track_deltas = [
+            (track_num, track_data[age_start] - track_data[age_end])
+            for track_num, track_data in tracks.items()
+            if age_start in track_data and age_end in track_data
+        ]
         if track_deltas:
             avg_delta = sum(d for _, d in track_deltas) / len(track_deltas)
             deltas[f"{age_start}_to_{age_end}"] = {
@@ -212,11 +213,9 @@ def calculate_canada_deltas(tracks):
 
     return deltas
 
-def generate_html(gender_code, gender_full, stroke, distance, conn):
-    """Generate HTML for a specific event"""
+def generate_html(gender_code, gender_full, stroke, distance, event_inputs):
+    """Generate HTML for a specific event from its load_inputs() entry"""
 
-    # Build event_id
-    event_id = f"LCM_{stroke}_{distance}_{gender_code}"
     is_50m = distance == 50
 
     # Stroke display names
@@ -230,10 +229,10 @@ def generate_html(gender_code, gender_full, stroke, distance, conn):
     stroke_full = stroke_display.get(stroke, stroke)
 
     # Get data
-    canada_tracks = get_canada_tracks(conn, event_id)
-    usa_deltas = get_usa_deltas(conn, event_id)
-    mot_times = get_mot_times(conn, event_id)
-    canada_deltas = calculate_canada_deltas(canada_tracks)
+    canada_tracks = event_inputs['canada']
+    usa_deltas = event_inputs['usa']
+    mot_times = event_inputs['mot']
+    canada_deltas = event_inputs['canada_deltas']
 
     # Warning box for 50m events
     warning_box = ""
@@ -432,36 +431,94 @@ def generate_html(gender_code, gender_full, stroke, distance, conn):
 
     return html
 
-def main():
-    conn = sqlite3.connect(DB_PATH)
-
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
-
-    generated = 0
+def page_hash(event_inputs):
+    """Hash of a page's inputs and the template, so either changing re-renders the page"""
+    payload = json.dumps(event_inputs, sort_keys=True, default=str) + HTML_TEMPLATE
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def render_page(job):
+    """Worker: render one page and write it. job = (filepath, gender_code, gender_full, stroke, distance, inputs)"""
+    filepath, gender_code, gender_full, stroke, distance, event_inputs = job
+    html = generate_html(gender_code, gender_full, stroke, distance, event_inputs)
+    with open(filepath, 'w', encoding='utf-8') as f:
+        f.write(html)
+    return filepath
+
+
+def load_manifest(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate MOT methodology pages for events whose data changed")
+    parser.add_argument("--db", default=DB_PATH, help=f"Database file (default: {DB_PATH})")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR, help=f"Folder for the HTML pages (default: {OUTPUT_DIR})")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Render processes")
+    parser.add_argument("--force", action="store_true", help="Re-render every page")
+    args = parser.parse_args(argv)
+    if not os.path.exists(args.db):
+        print(f"[ERROR] Database not found: {args.db}")
+        return 1
+
+    conn = sqlite3.connect(args.db)
+    try:
+        inputs = load_inputs(conn)
+    finally:
+        conn.close()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    manifest_path = os.path.join(args.output_dir, MANIFEST_NAME)
+    manifest = {} if args.force else load_manifest(manifest_path)
+    empty = {'canada': {1: {}, 2: {}, 3: {}}, 'canada_deltas': {}, 'usa': {}, 'mot': {}}
+
+    jobs = []
+    hashes = {}
+    unchanged = 0
     skipped = 0
-
     for stroke, distance in EVENTS:
         for gender_code, gender_full in GENDERS:
             filename = f"{gender_code}_{distance}_{stroke}_MOT_Methodology.html"
-            filepath = os.path.join(OUTPUT_DIR, filename)
-
-            # Skip if already exists (F_50_Free and F_100_Free)
+            filepath = os.path.join(args.output_dir, filename)
+            event_inputs = inputs.get(f"LCM_{stroke}_{distance}_{gender_code}", empty)
+            hashes[filename] = page_hash(event_inputs)
             if os.path.exists(filepath):
-                print(f"[SKIP] {filename} already exists")
-                skipped += 1
-                continue
-
-            try:
-                html = generate_html(gender_code, gender_full, stroke, distance, conn)
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    f.write(html)
-                print(f"[OK] Generated {filename}")
-                generated += 1
-            except Exception as e:
-                print(f"[ERROR] Failed to generate {filename}: {e}")
-
-    conn.close()
-    print(f"\nDone! Generated {generated} files, skipped {skipped} existing files.")
+                if filename not in manifest and not args.force:
+                    # Pages that predate the manifest (e.g. F_50_Free, F_100_Free) may be hand-edited
+                    print(f"[SKIP] {filename} already exists and is not in the manifest (use --force)")
+                    skipped += 1
+                    continue
+                if manifest.get(filename) == hashes[filename]:
+                    unchanged += 1
+                    continue
+            jobs.append((filepath, gender_code, gender_full, stroke, distance, event_inputs))
+
+    generated = 0
+    failed = 0
+    if jobs:
+        with ProcessPoolExecutor(max_workers=max(1, min(args.workers, len(jobs)))) as pool:
+            futures = {pool.submit(render_page, job): job for job in jobs}
+            for future, job in futures.items():
+                filename = os.path.basename(job[0])
+                try:
+                    future.result()
+                    manifest[filename] = hashes[filename]
+                    print(f"[OK] Generated {filename}")
+                    generated += 1
+                except Exception as e:
+                    manifest.pop(filename, None)
+                    print(f"[ERROR] Failed to generate {filename}: {e}")
+                    failed += 1
+
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+    print(f"\nDone! Generated {generated} files, {unchanged} unchanged, skipped {skipped}, {failed} failed.")
+    return 1 if failed else 0
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
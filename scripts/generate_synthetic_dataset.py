@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+Malaysia Swimming Analytics - Synthetic Scale Dataset Generator
+
+Builds a throwaway SQLite database with the production schema filled with
+realistic-looking data at a chosen scale, for load and performance testing:
+
+- athletes named the way Malaysian entries actually arrive (Malay names with
+  MUHD/MOHD/MUHAMMAD and BIN/B variants, Chinese "SURNAME, Given" names,
+  Indian A/L / A/P names), drawing on COMMON_NAMES and SPELLING_VARIATIONS
+  from the name matcher; some athletes carry a spelling variant as alias
+- clubs spread over the state codes, a few foreign athletes
+- LCM and SCM events, meets across several seasons
+- results with plausible times per event/gender/age, ages and AQUA points
+
+Usage:
+    python scripts/generate_synthetic_dataset.py --output bench/synthetic.db --results 2000000
+    python scripts/generate_synthetic_dataset.py --output bench/small.db --athletes 5000 --results 100000
+
+Never point --output at the real database; the file is recreated from scratch.
+"""
+
+import argparse
+import random
+import sqlite3
+import sys
+import time
+import uuid
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.web.utils.name_matcher import COMMON_NAMES, SPELLING_VARIATIONS  # noqa: E402
+
+BATCH_SIZE = 50_000
+
+STATE_CODES = [
+    "JHR", "KDH", "KTN", "MLK", "NSN", "PHG", "PRK", "PLS", "PNG", "SBH",
+    "SWK", "SEL", "TRG", "KL", "LBN", "PJY",
+]
+FOREIGN_NATIONS = ["SGP", "THA", "INA", "PHI", "VIE", "HKG", "AUS", "JPN"]
+
+# (distance, stroke) pairs swum in both courses, with an approximate senior male
+# LCM reference time in seconds (roughly national-record level)
+EVENTS: Dict[Tuple[int, str], float] = {
+    (50, "Free"): 22.3, (100, "Free"): 49.0, (200, "Free"): 108.0, (400, "Free"): 230.0,
+    (800, "Free"): 480.0, (1500, "Free"): 915.0,
+    (50, "Back"): 25.5, (100, "Back"): 55.0, (200, "Back"): 120.0,
+    (50, "Breast"): 27.8, (100, "Breast"): 61.0, (200, "Breast"): 133.0,
+    (50, "Fly"): 23.8, (100, "Fly"): 52.5, (200, "Fly"): 118.0,
+    (200, "Medley"): 121.0, (400, "Medley"): 258.0,
+}
+SCM_FACTOR = 0.975
+FEMALE_FACTOR = 1.105
+
+# Malay name building blocks; the variants come from SPELLING_VARIATIONS
+MALAY_MALE_GIVEN = ["adam", "hafiz", "irfan", "danial", "aiman", "haziq", "firdaus", "amir",
+                    "syafiq", "arif", "hakim", "luqman", "zikri", "faris", "iqbal"]
+MALAY_FEMALE_GIVEN = ["aisyah", "alya", "balqis", "damia", "hana", "sofea", "qistina",
+                      "iman", "auni", "nadia", "farah", "syahirah", "amani"]
+MALAY_FATHERS = ["ismail", "ibrahim", "hassan", "yusof", "osman", "omar", "rahman", "aziz",
+                 "rahim", "razak", "hamid", "kamal", "zainal", "salleh", "ali"]
+CHINESE_GIVEN = ["wei", "jie", "jun", "hao", "xin", "yi", "kai", "zhen", "ming", "hui",
+                 "shan", "ling", "jia", "en", "yu", "qi", "rui", "zi"]
+INDIAN_GIVEN_MALE = ["arjun", "vikram", "darren", "pravin", "ravin", "kishen", "sanjay"]
+INDIAN_GIVEN_FEMALE = ["priya", "kavitha", "shalini", "divya", "nisha", "anjali"]
+INDIAN_FATHERS = ["kumar", "raj", "singh", "muthu", "subramaniam", "krishnan", "ram"]
+ENGLISH_GIVEN = ["nicholas", "michael", "daniel", "ryan", "jasmine", "chloe", "natalie", "ethan"]
+CLUB_WORDS = ["AQUA", "MARLIN", "DOLPHIN", "SHARK", "BARRACUDA", "STINGRAY", "TIGER", "ORCA",
+              "WAVE", "SPLASH", "TORPEDO", "NEPTUNE"]
+CLUB_SUFFIXES = ["SWIMMING CLUB", "SWIM TEAM", "AQUATIC CLUB", "SWIM ACADEMY"]
+MEET_NAMES = ["State Championships", "Malaysia Open", "MIAG", "SUKMA", "Age Group Championships",
+              "Invitational", "Time Trial", "Zone Championships"]
+MEET_CITIES = ["Kuala Lumpur", "Bukit Jalil", "Ipoh", "Johor Bahru", "George Town", "Kuching",
+               "Kota Kinabalu", "Kuantan", "Melaka", "Shah Alam"]
+
+SCHEMA = """
+CREATE TABLE athletes (
+    id TEXT PRIMARY KEY,
+    FULLNAME TEXT,
+    FIRSTNAME TEXT,
+    LASTNAME TEXT,
+    MIDDLEINITIAL TEXT,
+    SUFFIX TEXT,
+    PreferredName TEXT,
+    BIRTHDATE TEXT,
+    Gender TEXT,
+    NATION TEXT,
+    CLUBNAME TEXT,
+    club_code TEXT,
+    state_code TEXT,
+    athlete_alias_1 TEXT,
+    athlete_alias_2 TEXT
+);
+CREATE TABLE foreign_athletes (
+    id TEXT PRIMARY KEY,
+    fullname TEXT,
+    birthdate TEXT,
+    nation TEXT,
+    gender TEXT,
+    club_name TEXT,
+    club_code TEXT
+);
+CREATE TABLE clubs (
+    club_name TEXT PRIMARY KEY,
+    club_code TEXT,
+    state_code TEXT,
+    club_nation TEXT,
+    club_alias TEXT
+);
+CREATE TABLE events (
+    id TEXT PRIMARY KEY,
+    event_course TEXT,
+    event_distance INTEGER,
+    event_stroke TEXT,
+    gender TEXT,
+    event_type TEXT,
+    created_at TEXT
+);
+CREATE TABLE meets (
+    id TEXT PRIMARY KEY,
+    meet_name TEXT,
+    meet_type TEXT,
+    meet_date TEXT,
+    location TEXT,
+    meet_city TEXT,
+    meet_alias TEXT,
+    meet_course TEXT
+);
+CREATE TABLE results (
+    id TEXT PRIMARY KEY,
+    meet_id TEXT,
+    athlete_id TEXT,
+    foreign_athlete_id TEXT,
+    event_id TEXT,
+    time_seconds REAL,
+    time_string TEXT,
+    comp_place INTEGER,
+    aqua_points INTEGER,
+    rudolph_points REAL,
+    meet_course TEXT,
+    meet_date TEXT,
+    day_age INTEGER,
+    year_age INTEGER,
+    club_name TEXT,
+    club_code TEXT,
+    state_code TEXT,
+    nation TEXT,
+    is_relay INTEGER DEFAULT 0,
+    meet_name TEXT,
+    meet_city TEXT,
+    result_status TEXT DEFAULT 'OK'
+);
+CREATE INDEX idx_results_meet ON results(meet_id);
+CREATE INDEX idx_results_athlete ON results(athlete_id);
+CREATE INDEX idx_results_event ON results(event_id);
+"""
+
+
+def variants_of(canonical: str) -> List[str]:
+    return sorted(word for word, canon in SPELLING_VARIATIONS.items() if canon == canonical)
+
+
+MUHAMMAD = variants_of("muhammad")
+NUR = variants_of("nur") + variants_of("nurul")
+BIN = variants_of("bin")
+BINTI = variants_of("binti")
+# Chinese surnames: the romanization groups in SPELLING_VARIATIONS that are common surnames
+CHINESE_SURNAMES = sorted(
+    {canon for canon in SPELLING_VARIATIONS.values()}
+    & {"tan", "lee", "lim", "ng", "ong", "wong", "chong", "chua", "goh", "teh", "koh", "yap", "ooi"}
+    & COMMON_NAMES
+)
+
+
+def format_time(seconds: float) -> str:
+    minutes, rest = divmod(seconds, 60)
+    return f"{int(minutes)}:{rest:05.2f}" if minutes else f"{rest:.2f}"
+
+
+def make_name(rng: random.Random, gender: str) -> Tuple[str, str, str, str]:
+    """Return (FULLNAME, FIRSTNAME, LASTNAME, alias) where alias is a plausible re-spelling."""
+    roll = rng.random()
+    if roll < 0.45:
+        if gender == "M":
+            prefix = rng.choice(MUHAMMAD) if rng.random() < 0.6 else ""
+            given = " ".join(filter(None, [prefix, rng.choice(MALAY_MALE_GIVEN)]))
+            connector, alt_connector = rng.choice(BIN), rng.choice(BIN)
+        else:
+            prefix = rng.choice(NUR) if rng.random() < 0.5 else ""
+            given = " ".join(filter(None, [prefix, rng.choice(MALAY_FEMALE_GIVEN)]))
+            connector, alt_connector = rng.choice(BINTI), rng.choice(BINTI)
+        father = rng.choice(MALAY_FATHERS)
+        if rng.random() < 0.2:
+            father = f"{rng.choice(variants_of('abdul'))} {father}"
+        full = f"{given} {connector} {father}".upper()
+        alt_given = given
+        for word in given.split():
+            if word in SPELLING_VARIATIONS:
+                alt_given = alt_given.replace(word, rng.choice(variants_of(SPELLING_VARIATIONS[word])))
+        alias = f"{alt_given} {alt_connector} {father}".upper()
+        return full, given.title(), father.title(), alias
+    if roll < 0.85:
+        surname = rng.choice(CHINESE_SURNAMES)
+        given = f"{rng.choice(CHINESE_GIVEN)} {rng.choice(CHINESE_GIVEN)}".title()
+        if rng.random() < 0.25:
+            given = f"{rng.choice(ENGLISH_GIVEN).title()} {given}"
+        full = f"{surname.upper()}, {given}"
+        alt_surname = rng.choice(variants_of(surname)) if variants_of(surname) else surname
+        return full, given, surname.title(), f"{alt_surname.upper()}, {given}"
+    given = rng.choice(INDIAN_GIVEN_MALE if gender == "M" else INDIAN_GIVEN_FEMALE)
+    father = rng.choice(INDIAN_FATHERS)
+    full = f"{given} {'A/L' if gender == 'M' else 'A/P'} {father}".upper()
+    return full, given.title(), father.title(), f"{given} {father}".upper()
+
+
+def aqua_points(base_seconds: float, seconds: float) -> int:
+    return int(1000 * (base_seconds / seconds) ** 3)
+
+
+def generate(args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    output: Path = args.output
+    if output.exists():
+        output.unlink()
+    output.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(output))
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.executescript(SCHEMA)
+    started = time.perf_counter()
+
+    # Clubs
+    clubs = []
+    used_names = set()
+    while len(clubs) < args.clubs:
+        state = rng.choice(STATE_CODES)
+        name = f"{rng.choice(CLUB_WORDS)} {rng.choice(CLUB_WORDS)} {rng.choice(CLUB_SUFFIXES)}"
+        if name in used_names:
+            continue
+        used_names.add(name)
+        code = f"{state[:2]}{len(clubs):04d}"
+        alias = f"{name.replace('SWIMMING CLUB', 'SC')}" if "SWIMMING CLUB" in name else None
+        clubs.append((name, code, state, "MAS", alias))
+    conn.executemany("INSERT INTO clubs VALUES (?, ?, ?, ?, ?)", clubs)
+
+    # Events (LCM + SCM, both genders)
+    events = []
+    for course in ("LCM", "SCM"):
+        for (distance, stroke), base in EVENTS.items():
+            for gender in ("M", "F"):
+                base_seconds = base * (SCM_FACTOR if course == "SCM" else 1.0)
+                base_seconds *= FEMALE_FACTOR if gender == "F" else 1.0
+                events.append((str(uuid.uuid4()), course, distance, stroke, gender, base_seconds))
+    conn.executemany(
+        "INSERT INTO events (id, event_course, event_distance, event_stroke, gender, event_type)"
+        " VALUES (?, ?, ?, ?, ?, 'Individual')",
+        [event[:5] for event in events],
+    )
+    events_by_gender = {g: [e for e in events if e[4] == g] for g in ("M", "F")}
+
+    # Meets spread across the seasons
+    first_year = date.today().year - args.years + 1
+    meets = []
+    for i in range(args.meets):
+        meet_date = date(first_year, 1, 1) + timedelta(days=rng.randrange(args.years * 365))
+        course = "SCM" if rng.random() < 0.3 else "LCM"
+        name = f"{rng.choice(MEET_NAMES)} {meet_date.year} #{i + 1}"
+        meets.append(
+            (str(uuid.uuid4()), name, rng.choice(["OPEN-D", "OPEN-D", "OPEN-I", "OPEN-N"]),
+             meet_date.strftime("%Y-%m-%dT00:00:00Z"), "Malaysia", rng.choice(MEET_CITIES),
+             f"SYN{i + 1:04d}", course)
+        )
+    conn.executemany("INSERT INTO meets VALUES (?, ?, ?, ?, ?, ?, ?, ?)", meets)
+
+    # Athletes: ability is a per-athlete multiplier on the reference time
+    athletes = []
+    athlete_rows = []
+    for _ in range(args.athletes):
+        gender = rng.choice("MF")
+        full, first, last, alias = make_name(rng, gender)
+        birth = date(first_year - rng.randint(8, 20), 1, 1) + timedelta(days=rng.randrange(365))
+        club = rng.choice(clubs)
+        athlete_id = str(uuid.uuid4())
+        ability = rng.uniform(1.02, 1.45)
+        athletes.append((athlete_id, gender, birth, club, ability, False))
+        athlete_rows.append(
+            (athlete_id, full, first, last, None, None, None, birth.strftime("%Y-%m-%dT00:00:00Z"),
+             gender, "MAS", club[0], club[1], club[2],
+             alias if rng.random() < args.alias_rate and alias != full else None, None)
+        )
+    conn.executemany(f"INSERT INTO athletes VALUES ({', '.join('?' * 15)})", athlete_rows)
+
+    foreign_rows = []
+    for _ in range(int(args.athletes * args.foreign_rate)):
+        gender = rng.choice("MF")
+        full, _, _, _ = make_name(rng, gender)
+        birth = date(first_year - rng.randint(10, 20), 1, 1) + timedelta(days=rng.randrange(365))
+        nation = rng.choice(FOREIGN_NATIONS)
+        athlete_id = str(uuid.uuid4())
+        athletes.append((athlete_id, gender, birth, (f"{nation} NATIONAL TEAM", None, None), rng.uniform(1.0, 1.3), True))
+        foreign_rows.append((athlete_id, full, birth.strftime("%Y-%m-%dT00:00:00Z"), nation, gender,
+                             f"{nation} NATIONAL TEAM", None))
+    conn.executemany("INSERT INTO foreign_athletes VALUES (?, ?, ?, ?, ?, ?, ?)", foreign_rows)
+    conn.commit()
+    print(f"[GEN] {len(clubs)} clubs, {len(events)} events, {len(meets)} meets, "
+          f"{len(athlete_rows)} athletes, {len(foreign_rows)} foreign athletes", flush=True)
+
+    # Results
+    insert_sql = f"INSERT INTO results VALUES ({', '.join('?' * 22)})"
+    batch = []
+    written = 0
+    while written < args.results:
+        meet = rng.choice(meets)
+        meet_id, meet_name, _, meet_date_str, _, meet_city, _, course = meet
+        meet_date = date.fromisoformat(meet_date_str[:10])
+        athlete_id, gender, birth, club, ability, is_foreign = rng.choice(athletes)
+        age = meet_date.year - birth.year
+        if age < 7:
+            continue
+        day_age = age - (1 if (meet_date.month, meet_date.day) < (birth.month, birth.day) else 0)
+        # Younger swimmers are slower; improvement flattens out around 18
+        age_factor = 1.0 + max(0, 18 - age) * 0.045
+        for event in rng.sample([e for e in events_by_gender[gender] if e[1] == course], k=rng.randint(1, 5)):
+            event_id, _, _, _, _, base_seconds = event
+            seconds = round(base_seconds * ability * age_factor * rng.uniform(0.98, 1.04), 2)
+            batch.append(
+                (str(uuid.uuid4()), meet_id, None if is_foreign else athlete_id,
+                 athlete_id if is_foreign else None, event_id, seconds, format_time(seconds),
+                 rng.randint(1, 40), aqua_points(base_seconds / 1.03, seconds), None, course,
+                 meet_date_str, day_age, age, club[0], club[1], club[2],
+                 "MAS" if not is_foreign else club[0][:3], 0, meet_name, meet_city, "OK")
+            )
+            written += 1
+        if len(batch) >= BATCH_SIZE:
+            conn.executemany(insert_sql, batch)
+            conn.commit()
+            batch.clear()
+            print(f"[GEN]   {written:,} results ({time.perf_counter() - started:.0f}s)", flush=True)
+    if batch:
+        conn.executemany(insert_sql, batch)
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+
+    # Bring the file to the current schema version like any other database
+    from scripts import convert_meets_to_sqlite_simple as sim
+
+    conn = sqlite3.connect(str(output))
+    try:
+        schema = sim.migrate_schema(conn)
+    finally:
+        conn.close()
+    print(f"[GEN] Wrote {written:,} results to {output} (schema v{schema.version}) "
+          f"in {time.perf_counter() - started:.1f}s", flush=True)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Generate a synthetic swimming database for scale testing")
+    parser.add_argument("--output", type=Path, required=True, help="Database file to (re)create")
+    parser.add_argument("--athletes", type=int, default=50_000)
+    parser.add_argument("--clubs", type=int, default=400)
+    parser.add_argument("--meets", type=int, default=600)
+    parser.add_argument("--years", type=int, default=8, help="Seasons the meets are spread over")
+    parser.add_argument("--results", type=int, default=1_000_000)
+    parser.add_argument("--foreign-rate", type=float, default=0.05, help="Foreign athletes per local athlete")
+    parser.add_argument("--alias-rate", type=float, default=0.15, help="Share of athletes with a spelling alias")
+    parser.add_argument("--seed", type=int, default=2024)
+    args = parser.parse_args()
+
+    if args.output.resolve() == (PROJECT_ROOT / "malaysia_swimming.db").resolve():
+        print("[ERROR] Refusing to overwrite the project database")
+        return 1
+    generate(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
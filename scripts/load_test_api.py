@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Malaysia Swimming Analytics - API Load Driver
+
+Fires a weighted mix of read requests at a running backend with N concurrent
+clients and reports p50/p95/p99 latency and throughput per endpoint.
+
+Typical use against a synthetic database:
+    python scripts/generate_synthetic_dataset.py --output bench/synthetic.db --results 2000000
+    (in a scratch checkout: copy bench/synthetic.db over malaysia_swimming.db and start uvicorn)
+    python scripts/load_test_api.py --base-url http://localhost:8000 --clients 16 --duration 60
+
+Scenarios (weights adjustable with --mix name=weight,...):
+    filtered   /api/results/filtered with random meets, genders, events and age groups
+    meets      /api/meets
+    search     /api/admin/athletes/search with common name fragments
+    export     /api/results/export-sxl-gf for a random meet
+    export_all /api/admin/results/export-excel (off by default - very heavy)
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+DEFAULT_MIX = {"filtered": 50, "meets": 15, "search": 25, "export": 10, "export_all": 0}
+GENDERS = ["M", "F"]
+EVENTS = ["50m Free", "100m Free", "200m Free", "400m Free", "100m Back", "200m Back",
+          "100m Breast", "200m Breast", "100m Fly", "200m Fly", "200m IM", "400m IM"]
+AGE_GROUPS = ["OPEN", "13U", "14", "15", "16", "17+", "13-14", "16-18"]
+SEARCH_TERMS = ["tan", "lim", "muhammad", "mohd", "nur", "wong wei", "lee", "bin ismail",
+                "ong", "siti", "kumar", "abdul", "chong", "aisyah", "haziq"]
+
+
+def percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    k = (len(sorted_values) - 1) * pct / 100
+    lower = int(k)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (k - lower)
+
+
+def parse_mix(raw: Optional[str]) -> Dict[str, int]:
+    mix = dict(DEFAULT_MIX)
+    for item in (raw or "").split(","):
+        if "=" in item:
+            name, weight = item.split("=", 1)
+            if name.strip() not in mix:
+                raise ValueError(f"Unknown scenario '{name.strip()}'")
+            mix[name.strip()] = int(weight)
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+
+def build_request(scenario: str, rng: random.Random, meet_ids: List[str]) -> Tuple[str, Dict[str, Any]]:
+    if scenario == "filtered":
+        params = {
+            "meet_ids": ",".join(rng.sample(meet_ids, k=min(len(meet_ids), rng.randint(1, 3)))),
+            "genders": rng.choice(["M", "F", "M,F"]),
+            "events": ",".join(rng.sample(EVENTS, k=rng.randint(1, 3))),
+        }
+        if rng.random() < 0.6:
+            params["age_groups"] = rng.choice(AGE_GROUPS)
+        return "/api/results/filtered", params
+    if scenario == "meets":
+        return "/api/meets", {}
+    if scenario == "search":
+        return "/api/admin/athletes/search", {"q": rng.choice(SEARCH_TERMS)}
+    if scenario == "export":
+        return "/api/results/export-sxl-gf", {"meet_ids": rng.choice(meet_ids), "genders": rng.choice(GENDERS)}
+    return "/api/admin/results/export-excel", {}
+
+
+async def client_loop(
+    client: httpx.AsyncClient,
+    scenarios: List[str],
+    weights: List[int],
+    meet_ids: List[str],
+    deadline: float,
+    max_requests: Optional[int],
+    counter: List[int],
+    samples: Dict[str, List[float]],
+    errors: Dict[str, int],
+    seed: int,
+) -> None:
+    rng = random.Random(seed)
+    while time.perf_counter() < deadline and (max_requests is None or counter[0] < max_requests):
+        counter[0] += 1
+        scenario = rng.choices(scenarios, weights=weights)[0]
+        path, params = build_request(scenario, rng, meet_ids)
+        started = time.perf_counter()
+        try:
+            response = await client.get(path, params=params)
+            await response.aread()
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if ok:
+            samples[scenario].append(elapsed_ms)
+        else:
+            errors[scenario] += 1
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    mix = parse_mix(args.mix)
+    timeout = httpx.Timeout(args.timeout)
+    limits = httpx.Limits(max_connections=args.clients, max_keepalive_connections=args.clients)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=timeout, limits=limits) as client:
+        meets = (await client.get("/api/meets")).json().get("meets", [])
+        meet_ids = [str(meet["id"]) for meet in meets]
+        if not meet_ids:
+            raise SystemExit("[ERROR] /api/meets returned no meets - is the backend running on a populated DB?")
+        print(f"[LOAD] {len(meet_ids)} meets, {args.clients} clients, mix {mix}", flush=True)
+
+        samples: Dict[str, List[float]] = defaultdict(list)
+        errors: Dict[str, int] = defaultdict(int)
+        counter = [0]
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(
+            *(
+                client_loop(client, list(mix), list(mix.values()), meet_ids, deadline,
+                            args.requests, counter, samples, errors, args.seed + i)
+                for i in range(args.clients)
+            )
+        )
+        wall = time.perf_counter() - started
+
+    endpoints = {}
+    for scenario in mix:
+        values = sorted(samples.get(scenario, []))
+        endpoints[scenario] = {
+            "requests": len(values),
+            "errors": errors.get(scenario, 0),
+            "rps": round(len(values) / wall, 2),
+            "p50_ms": round(percentile(values, 50), 1) if values else None,
+            "p95_ms": round(percentile(values, 95), 1) if values else None,
+            "p99_ms": round(percentile(values, 99), 1) if values else None,
+            "max_ms": round(values[-1], 1) if values else None,
+        }
+    everything = sorted(v for values in samples.values() for v in values)
+    return {
+        "benchmark": "api_load",
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "base_url": args.base_url,
+        "clients": args.clients,
+        "wall_seconds": round(wall, 2),
+        "total_requests": len(everything),
+        "total_errors": sum(errors.values()),
+        "throughput_rps": round(len(everything) / wall, 2),
+        "p50_ms": round(percentile(everything, 50), 1) if everything else None,
+        "p95_ms": round(percentile(everything, 95), 1) if everything else None,
+        "p99_ms": round(percentile(everything, 99), 1) if everything else None,
+        "endpoints": endpoints,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Concurrent load driver for the analytics API")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent clients")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run")
+    parser.add_argument("--requests", type=int, help="Stop after this many requests instead")
+    parser.add_argument("--mix", help="Scenario weights, e.g. filtered=60,search=40,export_all=1")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout (s)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", type=Path, help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+
+    print(f"\n{'endpoint':<12}{'reqs':>8}{'errs':>6}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+    for name, stats in report["endpoints"].items():
+        print(f"{name:<12}{stats['requests']:>8}{stats['errors']:>6}{stats['rps']:>9}"
+              + "".join(f"{stats[key] if stats[key] is not None else '-':>9}"
+                        for key in ("p50_ms", "p95_ms", "p99_ms", "max_ms")))
+    print(f"\n[LOAD] {report['total_requests']} requests in {report['wall_seconds']}s "
+          f"({report['throughput_rps']} req/s), p50 {report['p50_ms']} ms, "
+          f"p95 {report['p95_ms']} ms, p99 {report['p99_ms']} ms, errors {report['total_errors']}")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"[LOAD] Wrote {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+Bulk loader for USA Swimming period and delta data.
+
+Loads the same tables as create_usa_raw_period_data.py and create_usa_delta_data.py,
+without their row-by-row parsing:
+  - files are parsed in a process pool, one file per task, with columns converted
+    by pandas (times such as "1:02.52r" included),
+  - usa_athlete is upserted in bulk from the period files. It is keyed by
+    (lower-cased name, gender), and birth year = period end year - age at the latest
+    appearance,
+  - each file's rows go into usa_raw_period_data / usa_delta_data with chunked
+    executemany, in one transaction per file,
+  - usa_load_files records every loaded file in that same transaction. A re-run skips
+    files that are already loaded, so an interrupted load resumes where it stopped.
+    A table that has rows but no usa_load_files entries (filled by the old scripts) is
+    refused unless --rebuild is given, so it is never loaded twice,
+  - names that match no usa_athlete row are reported in aggregate (per event and most
+    frequent names), not one line per row.
+
+Expected layout under --data-dir (the folders the old scripts read):
+    USA Period Data/<period>/<event>/F 100 Back 15 9.1.24-8.31.25.txt
+    USA Delta Data/<folder>/F 100 Back 15 to 16 Athlete_Improvement_Data.csv
+
+Usage:
+    python scripts/load_usa_data.py --data-dir "statistical_analysis/USA Data"
+    python scripts/load_usa_data.py --data-dir ... --db path/to/malaysia_swimming.db --workers 8
+    python scripts/load_usa_data.py --data-dir ... --only delta --rebuild
+"""
+
+import argparse
+import csv
+import os
+import sqlite3
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from scripts import create_usa_delta_data as delta_script  # noqa: E402
+from scripts import create_usa_raw_period_data as period_script  # noqa: E402
+from scripts.compute_usa_delta_stats import compute_usa_delta_stats  # noqa: E402
+
+DEFAULT_DB_PATH = PROJECT_ROOT / "malaysia_swimming.db"
+DEFAULT_DATA_DIR = PROJECT_ROOT / "statistical_analysis" / "USA Data"
+CHUNK_SIZE = 5000
+UNMATCHED_SAMPLE = 10
+
+PERIOD_INSERT = """
+    INSERT INTO usa_raw_period_data (usa_raw_event_id, usa_raw_year, usa_athlete_id, usa_raw_time_seconds)
+    VALUES (?, ?, ?, ?)
+"""
+DELTA_INSERT = """
+    INSERT INTO usa_delta_data (
+        usa_delta_event_id, usa_athlete_id, usa_delta_age_start, usa_delta_age_end,
+        usa_delta_time_start, usa_delta_time_end, usa_delta_improvement_seconds,
+        usa_delta_improvement_percentage, usa_delta_rank_start, usa_delta_rank_end
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+DELTA_COLUMNS = {
+    "age_from": "age_start",
+    "age_to": "age_end",
+    "time_from": "time_start",
+    "time_to": "time_end",
+    "improvement_seconds": "improvement_seconds",
+    "improvement_percentage": "improvement_percentage",
+    "rank_from": "rank_start",
+    "rank_to": "rank_end",
+}
+DELTA_REQUIRED = ["age_start", "age_end", "time_start", "time_end", "improvement_seconds", "improvement_percentage"]
+
+
+# --------------------------------------------------------------------------- #
+# Parsing (runs in worker processes)
+# --------------------------------------------------------------------------- #
+
+def parse_times(times: pd.Series) -> pd.Series:
+    """Vectorized parse_time_string: "59.67", "1:00.43", "1:02.52r" -> seconds; NaN if invalid."""
+    cleaned = times.astype(str).str.strip().str.replace(r"[a-zA-Z]+$", "", regex=True)
+    parts = cleaned.str.split(":", n=1, expand=True)
+    if parts.shape[1] == 1:
+        return pd.to_numeric(parts[0], errors="coerce")
+    has_minutes = parts[1].notna()
+    minutes = pd.to_numeric(parts[0].where(has_minutes), errors="coerce")
+    seconds = pd.to_numeric(parts[1].where(has_minutes, parts[0]), errors="coerce")
+    return seconds + minutes.fillna(0) * 60
+
+
+def name_keys(names: pd.Series) -> pd.Series:
+    return names.str.strip().str.lower()
+
+
+def parse_period_file(path: str) -> Dict[str, Any]:
+    """One period .txt file -> {"event_id", "year", "age", "gender", "frame": name, key, time_seconds}."""
+    parsed = period_script.parse_filename(os.path.basename(path))
+    if parsed is None:
+        return {"path": path, "error": "unparsable filename"}
+    gender, distance, stroke, age, year = parsed
+    # Columns: Rank, Swim Time, Name, Foreign, Age, Event, LSC, Team, Meet, Time Standard
+    frame = pd.read_csv(
+        path, sep="\t", header=None, skiprows=1, usecols=[1, 2], names=["time", "name"],
+        dtype=str, quoting=csv.QUOTE_NONE, encoding="utf-8", skip_blank_lines=True, on_bad_lines="skip",
+    )
+    frame = frame.dropna()
+    frame = frame[frame["time"].str.strip().ne("-") & frame["name"].str.strip().ne("")]
+    frame["time_seconds"] = parse_times(frame["time"])
+    frame = frame.dropna(subset=["time_seconds"])
+    frame["name"] = frame["name"].str.strip()
+    frame["key"] = name_keys(frame["name"])
+    return {
+        "path": path,
+        "event_id": period_script.build_event_id(gender, distance, stroke),
+        "year": year,
+        "age": age,
+        "gender": gender,
+        "frame": frame[["name", "key", "time_seconds"]].reset_index(drop=True),
+    }
+
+
+def parse_delta_file(path: str) -> Dict[str, Any]:
+    """One delta .csv file -> {"event_id", "gender", "frame": name, key, numeric columns}."""
+    parsed = delta_script.parse_filename(os.path.basename(path))
+    if parsed is None:
+        return {"path": path, "error": "unparsable filename"}
+    gender, distance, stroke = parsed
+    frame = pd.read_csv(path, dtype=str, encoding="utf-8", keep_default_na=False)
+    missing = [column for column in ["name", *DELTA_COLUMNS] if column not in frame.columns]
+    if missing:
+        return {"path": path, "error": f"missing columns: {', '.join(missing)}"}
+    frame = frame[["name", *DELTA_COLUMNS]].rename(columns=DELTA_COLUMNS)
+    for column in DELTA_COLUMNS.values():
+        frame[column] = pd.to_numeric(frame[column].str.strip(), errors="coerce")
+    frame = frame.dropna(subset=DELTA_REQUIRED)
+    frame["name"] = frame["name"].str.strip()
+    frame["key"] = name_keys(frame["name"])
+    return {
+        "path": path,
+        "event_id": delta_script.build_event_id(gender, distance, stroke),
+        "gender": gender,
+        "frame": frame.reset_index(drop=True),
+    }
+
+
+# --------------------------------------------------------------------------- #
+# Database
+# --------------------------------------------------------------------------- #
+
+def ensure_tables(conn: sqlite3.Connection, datasets: Sequence[str], rebuild: bool) -> None:
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS usa_athlete (
+            usa_athlete_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            usa_name TEXT NOT NULL,
+            usa_gender TEXT NOT NULL,
+            usa_birthyear INTEGER
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS usa_load_files (
+            path TEXT PRIMARY KEY,
+            dataset TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            mtime REAL NOT NULL,
+            rows_loaded INTEGER NOT NULL,
+            rows_unmatched INTEGER NOT NULL,
+            loaded_at TEXT NOT NULL
+        )
+    """)
+    tables = {"period": ("usa_raw_period_data", period_script), "delta": ("usa_delta_data", delta_script)}
+    for dataset in datasets:
+        table, script = tables[dataset]
+        exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone()
+        if exists and not rebuild:
+            # Rows without manifest entries came from the old scripts; loading on top would duplicate them
+            has_rows = conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone()
+            has_manifest = conn.execute("SELECT 1 FROM usa_load_files WHERE dataset = ? LIMIT 1", (dataset,)).fetchone()
+            if has_rows and not has_manifest:
+                raise ValueError(
+                    f"{table} already has rows that usa_load_files does not record (loaded by "
+                    f"{script.__name__.rsplit('.', 1)[-1]}.py?); run with --rebuild to reload it from the files"
+                )
+        if rebuild or not exists:
+            script.create_table(conn)  # drops and recreates the table with its indexes
+            conn.execute("DELETE FROM usa_load_files WHERE dataset = ?", (dataset,))
+    conn.commit()
+
+
+def pending_files(conn: sqlite3.Connection, dataset: str, paths: Iterable[Path]) -> List[Path]:
+    loaded = {
+        path: (size, mtime)
+        for path, size, mtime in conn.execute(
+            "SELECT path, size, mtime FROM usa_load_files WHERE dataset = ?", (dataset,)
+        )
+    }
+    pending = []
+    for path in paths:
+        stat = path.stat()
+        previous = loaded.get(str(path))
+        if previous is None:
+            pending.append(path)
+        elif previous != (stat.st_size, stat.st_mtime):
+            print(f"  [WARNING] {path.name} changed since it was loaded; run with --rebuild to reload it")
+    return pending
+
+
+def load_athlete_keys(conn: sqlite3.Connection) -> Dict[Tuple[str, str], int]:
+    """(lower-cased name, gender) -> usa_athlete_id, as load_athletes() in the old scripts."""
+    return {
+        (name.lower().strip(), gender): usa_id
+        for usa_id, name, gender in conn.execute("SELECT usa_athlete_id, usa_name, usa_gender FROM usa_athlete")
+    }
+
+
+def upsert_athletes(conn: sqlite3.Connection, parsed: List[Dict[str, Any]]) -> Dict[Tuple[str, str], int]:
+    """Insert athletes seen in period files that usa_athlete does not have yet; fill missing birth years."""
+    frames = [
+        item["frame"].assign(gender=item["gender"], birthyear=item["year"] - item["age"], year=item["year"])
+        for item in parsed if len(item["frame"])
+    ]
+    athletes = load_athlete_keys(conn)
+    if not frames:
+        return athletes
+    seen = pd.concat(frames, ignore_index=True)
+    # Birth year from the latest appearance: period end year - age in that period
+    latest = seen.sort_values("year", kind="stable").drop_duplicates(["key", "gender"], keep="last")
+    keys = list(zip(latest["key"], latest["gender"]))
+    known = pd.Series([key in athletes for key in keys], index=latest.index)
+
+    new_rows = latest[~known]
+    with conn:
+        conn.executemany(
+            "INSERT INTO usa_athlete (usa_name, usa_gender, usa_birthyear) VALUES (?, ?, ?)",
+            zip(new_rows["name"].tolist(), new_rows["gender"].tolist(), new_rows["birthyear"].astype(int).tolist()),
+        )
+        existing = latest[known]
+        conn.executemany(
+            "UPDATE usa_athlete SET usa_birthyear = ? WHERE usa_athlete_id = ? AND usa_birthyear IS NULL",
+            zip(
+                existing["birthyear"].astype(int).tolist(),
+                [athletes[key] for key in zip(existing["key"], existing["gender"])],
+            ),
+        )
+    print(f"[OK] usa_athlete: {len(new_rows)} added, {len(existing)} already present")
+    return load_athlete_keys(conn)
+
+
+def match_athletes(frame: pd.DataFrame, gender: str, athletes: Dict[Tuple[str, str], int]) -> pd.Series:
+    """usa_athlete_id per row (nullable Int64)."""
+    ids = {key: usa_id for (key, athlete_gender), usa_id in athletes.items() if athlete_gender == gender}
+    return frame["key"].map(ids).astype("Int64")
+
+
+def write_file(conn: sqlite3.Connection, dataset: str, path: str, insert_sql: str,
+               rows: List[Tuple], unmatched: int) -> None:
+    """All rows of one file plus its usa_load_files entry, in one transaction."""
+    stat = os.stat(path)
+    with conn:
+        for start in range(0, len(rows), CHUNK_SIZE):
+            conn.executemany(insert_sql, rows[start:start + CHUNK_SIZE])
+        conn.execute(
+            "INSERT OR REPLACE INTO usa_load_files (path, dataset, size, mtime, rows_loaded, rows_unmatched, loaded_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (path, dataset, stat.st_size, stat.st_mtime, len(rows), unmatched, datetime.now().isoformat(timespec="seconds")),
+        )
+
+
+def nullable(values: pd.Series) -> List[Optional[int]]:
+    return [None if pd.isna(value) else int(value) for value in values.tolist()]
+
+
+class UnmatchedReport:
+    def __init__(self):
+        self.rows = 0
+        self.by_event: Counter = Counter()
+        self.by_name: Counter = Counter()
+
+    def add(self, event_id: str, gender: str, names: pd.Series) -> None:
+        self.rows += len(names)
+        self.by_event[event_id] += len(names)
+        self.by_name.update(f"{name} ({gender})" for name in names.tolist())
+
+    def print(self, dataset: str) -> None:
+        if not self.rows:
+            print(f"[OK] {dataset}: every row matched a usa_athlete")
+            return
+        print(f"[WARNING] {dataset}: {self.rows} rows ({len(self.by_name)} distinct names) matched no usa_athlete")
+        print("  By event: " + ", ".join(f"{event} {count}" for event, count in sorted(self.by_event.items())))
+        print("  Most frequent:")
+        for name, count in self.by_name.most_common(UNMATCHED_SAMPLE):
+            print(f"    - {name}: {count}")
+
+
+# --------------------------------------------------------------------------- #
+# Loading
+# --------------------------------------------------------------------------- #
+
+def load_period(conn: sqlite3.Connection, data_dir: Path, pool: ProcessPoolExecutor) -> int:
+    paths = pending_files(conn, "period", sorted((data_dir / "USA Period Data").rglob("*.txt")))
+    print(f"\n[Period] {len(paths)} files to load")
+    if not paths:
+        return 0
+    parsed = []
+    for item in pool.map(parse_period_file, [str(path) for path in paths]):
+        if "error" in item:
+            print(f"  [WARNING] {os.path.basename(item['path'])}: {item['error']}")
+        else:
+            parsed.append(item)
+
+    # Athletes first: every period row must resolve once they are upserted
+    athletes = upsert_athletes(conn, parsed)
+    unmatched = UnmatchedReport()
+    total = 0
+    for item in parsed:
+        frame = item["frame"]
+        ids = match_athletes(frame, item["gender"], athletes)
+        missing = ids.isna()
+        unmatched.add(item["event_id"], item["gender"], frame.loc[missing, "name"])
+        matched = frame[~missing]
+        rows = list(zip(
+            [item["event_id"]] * len(matched),
+            [item["year"]] * len(matched),
+            ids[~missing].astype(int).tolist(),
+            matched["time_seconds"].tolist(),
+        ))
+        write_file(conn, "period", item["path"], PERIOD_INSERT, rows, int(missing.sum()))
+        total += len(rows)
+    print(f"[OK] Period: inserted {total} rows from {len(parsed)} files")
+    unmatched.print("Period")
+    return total
+
+
+def load_delta(conn: sqlite3.Connection, data_dir: Path, pool: ProcessPoolExecutor) -> int:
+    paths = pending_files(conn, "delta", sorted((data_dir / "USA Delta Data").rglob("*.csv")))
+    print(f"\n[Delta] {len(paths)} files to load")
+    if not paths:
+        return 0
+    athletes = load_athlete_keys(conn)
+    unmatched = UnmatchedReport()
+    total = files = 0
+    # Write each file as soon as its worker finishes
+    futures = [pool.submit(parse_delta_file, str(path)) for path in paths]
+    for future in as_completed(futures):
+        item = future.result()
+        if "error" in item:
+            print(f"  [WARNING] {os.path.basename(item['path'])}: {item['error']}")
+            continue
+        frame = item["frame"]
+        ids = match_athletes(frame, item["gender"], athletes)
+        missing = ids.isna()
+        unmatched.add(item["event_id"], item["gender"], frame.loc[missing, "name"])
+        matched = frame[~missing]
+        rows = list(zip(
+            [item["event_id"]] * len(matched),
+            ids[~missing].astype(int).tolist(),
+            matched["age_start"].astype(int).tolist(),
+            matched["age_end"].astype(int).tolist(),
+            matched["time_start"].tolist(),
+            matched["time_end"].tolist(),
+            matched["improvement_seconds"].tolist(),
+            matched["improvement_percentage"].tolist(),
+            nullable(matched["rank_start"]),
+            nullable(matched["rank_end"]),
+        ))
+        write_file(conn, "delta", item["path"], DELTA_INSERT, rows, int(missing.sum()))
+        total += len(rows)
+        files += 1
+    print(f"[OK] Delta: inserted {total} rows from {files} files")
+    unmatched.print("Delta")
+    return total
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk-load USA Swimming period and delta data")
+    parser.add_argument("--db", type=Path, default=DEFAULT_DB_PATH, help=f"Database file (default: {DEFAULT_DB_PATH})")
+    parser.add_argument("--data-dir", type=Path, default=DEFAULT_DATA_DIR,
+                        help="Folder holding 'USA Period Data' and 'USA Delta Data'")
+    parser.add_argument("--only", choices=["period", "delta"], help="Load one dataset (default: both)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Parser processes")
+    parser.add_argument("--rebuild", action="store_true", help="Drop and reload the selected tables")
+    args = parser.parse_args(argv)
+
+    if not args.db.exists():
+        print(f"[ERROR] Database not found: {args.db}")
+        return 1
+    if not args.data_dir.is_dir():
+        print(f"[ERROR] Data folder not found: {args.data_dir}")
+        return 1
+
+    datasets = [args.only] if args.only else ["period", "delta"]
+    started = time.perf_counter()
+    conn = sqlite3.connect(args.db)
+    try:
+        try:
+            ensure_tables(conn, datasets, args.rebuild)
+        except ValueError as e:
+            print(f"[ERROR] {e}")
+            return 1
+        with ProcessPoolExecutor(max_workers=max(1, args.workers)) as pool:
+            # Period data first: it is what creates the usa_athlete rows delta data matches against
+            if "period" in datasets:
+                load_period(conn, args.data_dir, pool)
+            if "delta" in datasets and load_delta(conn, args.data_dir, pool):
+                compute_usa_delta_stats(conn)
+    finally:
+        conn.close()
+
+    print(f"\n[OK] Done in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
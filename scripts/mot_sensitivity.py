@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+MOT sensitivity analysis: rebuild the whole MOT table under many alternative parameter
+sets and measure how far each one moves from the current mot_base_times.
+
+A parameter set can change:
+  - final_age_shift: added to every event's final age (FINAL_AGES),
+  - tracks: which Canada tracks are averaged per age step
+        "current" = TRACK_RULES, "all" = (1, 2, 3), "late" = (3,), "early_middle" = (1, 2),
+  - usa_ages: which of the 15-17 steps use USA deltas (the rest fall back to Canada),
+  - usa_statistic: the usa_delta_stats column used ("median", "mean" or "trimmed_mean").
+Without --params the runner uses the full grid of these choices (3 x 4 x 4 x 3 = 144 sets).
+--params takes a JSON list of sets, e.g.
+    [{"name": "late_only", "tracks": "late"}, {"final_ages": {"LCM_Free_50_M": 24}}]
+where "final_ages" overrides single events after the shift.
+
+The inputs (podium times, the Canada curve grid, every USA statistic and the current MOT
+table) are read once and handed to each worker process through the pool initializer.
+Each job is then only a parameter set: the worker calls populate_mot_base_times.build_mot_times
+and returns per-event deviation statistics. Nothing is written to the database.
+
+Output: one CSV row per (set, event) with the number of ages compared, coverage against
+the current table, mean/max absolute deviation in seconds, mean absolute and signed
+deviation in percent. The sets are printed ranked by mean absolute percent deviation.
+
+Usage:
+    python scripts/mot_sensitivity.py
+    python scripts/mot_sensitivity.py --params my_sets.json --workers 8 --output mot_sensitivity.csv
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from scripts.populate_mot_base_times import (  # noqa: E402
+    AGES,
+    FINAL_AGES,
+    MIN_AGE,
+    SPRINT_START_AGE,
+    TRACK_RULES,
+    TRACKS,
+    USA_AGES,
+    USA_STATISTICS,
+    build_mot_times,
+    get_canada_track_times,
+    get_podium_times,
+    get_usa_delta_medians,
+)
+
+DEFAULT_DB_PATH = PROJECT_ROOT / "malaysia_swimming.db"
+DEFAULT_OUTPUT = PROJECT_ROOT / "mot_sensitivity.csv"
+
+TRACK_CHOICES = {"current": None, "all": (1, 2, 3), "late": (3,), "early_middle": (1, 2)}
+GRID = {
+    "final_age_shift": (-1, 0, 1),
+    "tracks": tuple(TRACK_CHOICES),
+    "usa_ages": ((15, 16, 17), (16, 17), (17,), ()),
+    "usa_statistic": USA_STATISTICS,
+}
+BASELINE = {"final_age_shift": 0, "tracks": "current", "usa_ages": USA_AGES, "usa_statistic": "median"}
+
+CSV_COLUMNS = [
+    "set", "event_id", "final_age", "ages_compared", "ages_computed", "ages_current",
+    "mean_abs_seconds", "max_abs_seconds", "mean_abs_pct", "mean_signed_pct",
+]
+
+
+def grid_parameter_sets() -> List[Dict[str, Any]]:
+    """Every combination in GRID; the methodology's own choices come first as "baseline"."""
+    sets = [dict(BASELINE, name="baseline")]
+    for values in itertools.product(*GRID.values()):
+        params = dict(zip(GRID, values))
+        if params == BASELINE:
+            continue
+        params["name"] = (
+            f"shift{params['final_age_shift']:+d}_{params['tracks']}"
+            f"_usa{'-'.join(map(str, params['usa_ages'])) or 'none'}_{params['usa_statistic']}"
+        )
+        sets.append(params)
+    return sets
+
+
+def normalize_parameter_set(raw: Dict[str, Any], position: int) -> Dict[str, Any]:
+    params = dict(BASELINE, **raw)
+    params.setdefault("name", f"set{position}")
+    params["usa_ages"] = tuple(int(age) for age in params["usa_ages"])
+    if params["tracks"] not in TRACK_CHOICES:
+        raise ValueError(f"{params['name']}: tracks must be one of {list(TRACK_CHOICES)}")
+    if params["usa_statistic"] not in USA_STATISTICS:
+        raise ValueError(f"{params['name']}: usa_statistic must be one of {list(USA_STATISTICS)}")
+    if not set(params["usa_ages"]) <= set(USA_AGES):
+        raise ValueError(f"{params['name']}: usa_ages must be within {list(USA_AGES)}")
+    return params
+
+
+def rules_for(final_age: int, tracks: str, usa_ages: Sequence[int]) -> Dict[int, Tuple[int, ...]]:
+    """Age step -> averaged tracks for one final age under a parameter set."""
+    if TRACK_CHOICES[tracks] is None:
+        # Nearest final age with a TRACK_RULES entry, cut at this final age
+        known = min(TRACK_RULES, key=lambda age: abs(age - final_age))
+        rules = {age: t for age, t in TRACK_RULES[known].items() if age < final_age}
+    else:
+        rules = {age: TRACK_CHOICES[tracks] for age in range(MIN_AGE, min(final_age, int(AGES[-1])))}
+    # Steps below 18 that USA does not cover fall back to every Canada track
+    for age in range(MIN_AGE, SPRINT_START_AGE):
+        if age not in usa_ages and age < final_age:
+            rules.setdefault(age, TRACKS)
+    return rules
+
+
+# Inputs shared with the worker processes; set once per process by _init_worker
+_INPUTS: Dict[str, Any] = {}
+
+
+def _init_worker(inputs: Dict[str, Any]) -> None:
+    _INPUTS.update(inputs)
+
+
+def evaluate(params: Dict[str, Any]) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Worker: build the MOT table for one parameter set and compare it with the current one."""
+    events = _INPUTS["events"]
+    final_ages = {event_id: FINAL_AGES[event_id] + params["final_age_shift"] for event_id in events}
+    final_ages.update({k: int(v) for k, v in params.get("final_ages", {}).items() if k in final_ages})
+    track_rules = {
+        final_age: rules_for(final_age, params["tracks"], params["usa_ages"])
+        for final_age in set(final_ages.values())
+    }
+    mot, _ = build_mot_times(
+        events, _INPUTS["podium"], _INPUTS["canada"], _INPUTS["usa"][params["usa_statistic"]],
+        final_ages=final_ages, track_rules=track_rules, usa_ages=params["usa_ages"],
+    )
+
+    current = _INPUTS["current"]
+    both = np.isfinite(mot) & np.isfinite(current)
+    diff = np.where(both, mot - current, 0.0)
+    pct = np.divide(diff, current, out=np.zeros_like(diff), where=both) * 100
+    compared = both.sum(axis=1)
+
+    def per_event(values: np.ndarray) -> np.ndarray:
+        return np.divide(values.sum(axis=1), compared, out=np.full(len(events), np.nan), where=compared > 0)
+
+    mean_abs_seconds = per_event(np.abs(diff))
+    mean_abs_pct = per_event(np.abs(pct))
+    mean_signed_pct = per_event(pct)
+    max_abs_seconds = np.where(compared > 0, np.abs(diff).max(axis=1), np.nan)
+    computed = np.isfinite(mot).sum(axis=1)
+    in_current = np.isfinite(current).sum(axis=1)
+
+    rows = [
+        {
+            "set": params["name"],
+            "event_id": event_id,
+            "final_age": final_ages[event_id],
+            "ages_compared": int(compared[e]),
+            "ages_computed": int(computed[e]),
+            "ages_current": int(in_current[e]),
+            "mean_abs_seconds": round(float(mean_abs_seconds[e]), 4),
+            "max_abs_seconds": round(float(max_abs_seconds[e]), 4),
+            "mean_abs_pct": round(float(mean_abs_pct[e]), 4),
+            "mean_signed_pct": round(float(mean_signed_pct[e]), 4),
+        }
+        for e, event_id in enumerate(events)
+    ]
+    total = int(compared.sum())
+    summary = {
+        "set": params["name"],
+        "ages_compared": total,
+        "coverage": round(float(np.isfinite(mot).sum()) / max(int(np.isfinite(current).sum()), 1), 4),
+        "mean_abs_pct": round(float(np.abs(pct).sum() / total), 4) if total else None,
+        "worst_event": events[int(np.nanargmax(mean_abs_pct))] if np.nansum(mean_abs_pct) > 0 else None,
+    }
+    return summary, rows
+
+
+def load_inputs(conn) -> Dict[str, Any]:
+    """Everything the builder reads, as arrays over the events that have a podium time."""
+    podium_by_event = get_podium_times(conn)
+    events = [event_id for event_id in sorted(FINAL_AGES) if event_id in podium_by_event]
+    index = {event_id: i for i, event_id in enumerate(events)}
+    current = np.full((len(events), len(AGES)), np.nan)
+    for event_id, age, seconds in conn.execute("""
+        SELECT mot_event_id, mot_age, mot_time_seconds
+        FROM mot_base_times
+        WHERE mot_time_seconds IS NOT NULL
+    """):
+        if event_id in index and MIN_AGE <= age <= AGES[-1]:
+            current[index[event_id], age - MIN_AGE] = seconds
+    return {
+        "events": events,
+        "podium": np.array([podium_by_event[event_id] for event_id in events], dtype=float),
+        "canada": get_canada_track_times(conn, events),
+        "usa": {statistic: get_usa_delta_medians(conn, events, statistic) for statistic in USA_STATISTICS},
+        "current": current,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Rebuild MOT times under alternative parameter sets and compare")
+    parser.add_argument("--db", type=Path, default=DEFAULT_DB_PATH, help=f"Database file (default: {DEFAULT_DB_PATH})")
+    parser.add_argument("--params", type=Path, help="JSON list of parameter sets (default: the built-in grid)")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT, help=f"CSV of per-event deviations (default: {DEFAULT_OUTPUT})")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument("--top", type=int, default=15, help="Sets to print, closest to the current table first")
+    args = parser.parse_args(argv)
+    if not args.db.exists():
+        print(f"[ERROR] Database not found: {args.db}")
+        return 1
+
+    if args.params:
+        with open(args.params, "r", encoding="utf-8") as f:
+            raw_sets = json.load(f)
+        try:
+            parameter_sets = [normalize_parameter_set(raw, i) for i, raw in enumerate(raw_sets, 1)]
+        except ValueError as e:
+            print(f"[ERROR] {e}")
+            return 1
+    else:
+        parameter_sets = grid_parameter_sets()
+
+    conn = sqlite3.connect(args.db)
+    try:
+        inputs = load_inputs(conn)
+    finally:
+        conn.close()
+    if not inputs["events"]:
+        print("[ERROR] No events with podium target times")
+        return 1
+
+    started = time.perf_counter()
+    workers = max(1, min(args.workers, len(parameter_sets)))
+    chunksize = max(1, len(parameter_sets) // (workers * 4))
+    summaries = []
+    with open(args.output, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS)
+        writer.writeheader()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(inputs,)) as pool:
+            for summary, rows in pool.map(evaluate, parameter_sets, chunksize=chunksize):
+                summaries.append(summary)
+                writer.writerows(rows)
+
+    print(f"\n[OK] {len(parameter_sets)} parameter sets x {len(inputs['events'])} events "
+          f"in {time.perf_counter() - started:.1f}s with {workers} workers -> {args.output}")
+    ranked = sorted(summaries, key=lambda s: (s["mean_abs_pct"] is None, s["mean_abs_pct"] or 0))
+    print(f"\n{'Set':<44} {'Coverage':>8} {'Mean |dev| %':>13}  Worst event")
+    for summary in ranked[:args.top]:
+        mean = f"{summary['mean_abs_pct']:.3f}" if summary["mean_abs_pct"] is not None else "-"
+        print(f"{summary['set']:<44} {summary['coverage']:>8.2f} {mean:>13}  {summary['worst_event'] or '-'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,15 +7,42 @@ Logic:
 3. Ages 18-22 = calculated from Canada On Track deltas
 4. Ages 15-17 = calculated from USA delta medians
 
+Which Canada tracks are averaged for each age is data (TRACK_RULES), not code. Every
+event x age is computed in one numpy pass. Each age's time is the next age's time plus
+that age's delta, so times are the podium time plus a reverse cumulative sum of deltas.
+Canada times come from the shared curve arrays in canada_curves.py.
+A missing delta leaves that age and every younger age empty. All rows are written with
+one executemany in a single transaction.
+
+Usage:
+    python scripts/populate_mot_base_times.py
+    python scripts/populate_mot_base_times.py --db path/to/malaysia_swimming.db
+
 See MOT_methodology.md for detailed explanation.
 """
 
+import argparse
 import sqlite3
-import os
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from scripts.canada_curves import load_canada_curves
+from scripts.compute_usa_delta_stats import ensure_usa_delta_stats
 
-# Paths
-BASE_PATH = r"C:\Users\megan\OneDrive\Documents\Malaysia Swimming Analytics"
-DB_PATH = os.path.join(BASE_PATH, "malaysia_swimming.db")
+DEFAULT_DB_PATH = PROJECT_ROOT / "malaysia_swimming.db"
+
+MIN_AGE, MAX_AGE = 15, 23
+AGES = np.arange(MIN_AGE, MAX_AGE + 1)
+TRACKS = (1, 2, 3)
+USA_AGES = (15, 16, 17)  # age -> age + 1 transitions taken from USA delta medians
+USA_STATISTICS = ("median", "mean", "trimmed_mean")  # usa_delta_stats columns
+SPRINT_START_AGE = 18  # 50m MOT times start here
 
 # Event final ages (from Canada On Track data)
 FINAL_AGES = {
@@ -61,6 +88,17 @@ FINAL_AGES = {
     'LCM_Breast_50_M': 26,
 }
 
+# final age -> {age: Canada tracks averaged for the age -> age + 1 delta}.
+# Ages from the final age up are the plateau (podium time) and have no rule.
+TRACK_RULES: Dict[int, Dict[int, Tuple[int, ...]]] = {
+    21: {20: (3,), 19: (3,), 18: (3, 2)},
+    22: {21: (3,), 20: (3,), 19: (3, 2), 18: (3, 2)},
+    23: {22: (3,), 21: (3,), 20: (3, 2), 19: (3, 2), 18: (3, 2, 1)},
+    24: {22: (3,), 21: (3, 2), 20: (3, 2), 19: (3, 2, 1), 18: (3, 2, 1)},
+    25: {22: (3, 2), 21: (3, 2), 20: (3, 2, 1), 19: (3, 2, 1), 18: (2, 1)},  # no Track 3 at 18
+    26: {22: (3, 2), 21: (3, 2, 1), 20: (3, 2, 1), 19: (3, 2), 18: (2,)},  # no Track 1 for 19, Track 2 only at 18
+}
+
 
 def get_podium_times(conn):
     """Get podium target times for most recent year."""
@@ -79,296 +117,130 @@ def get_podium_times(conn):
     return podium
 
 
-def get_canada_track_times(conn):
+def get_canada_track_times(conn, events: Sequence[str]) -> np.ndarray:
     """
-    Get Canada On Track times organized by event, track, and age.
-    Returns: {event_id: {track: {age: time_seconds}}}
+    Canada On Track times as an (event, track, age) array over TRACKS x AGES; NaN where missing.
+    Stored times only: missing ages are not interpolated (see MOT_methodology.md).
     """
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT event_id, canada_track, canada_track_age, canada_track_time_seconds
-        FROM canada_on_track
-    """)
-
-    canada = {}
-    for event_id, track, age, time_sec in cur.fetchall():
-        if event_id not in canada:
-            canada[event_id] = {}
-        if track not in canada[event_id]:
-            canada[event_id][track] = {}
-        canada[event_id][track][age] = time_sec
-
-    print(f"[OK] Loaded Canada On Track data for {len(canada)} events")
+    curves = load_canada_curves(conn)
+    canada = curves.grid(events, TRACKS, AGES, interpolated=False)
+    print(f"[OK] Loaded Canada On Track data for {int(np.any(~np.isnan(canada), axis=(1, 2)).sum())} events")
     return canada
 
 
-def get_usa_delta_medians(conn):
+def get_usa_delta_medians(conn, events: Sequence[str], statistic: str = "median") -> np.ndarray:
     """
-    Get USA delta medians by event and age transition.
-    Returns: {event_id: {(age_start, age_end): median}}
+    USA delta medians as an (event, age) array over AGES for the age -> age + 1 transition,
+    read from usa_delta_stats (built from usa_delta_data on first use). statistic picks
+    another usa_delta_stats column ("mean" or "trimmed_mean") instead of the median.
     """
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT usa_delta_event_id, usa_delta_age_start, usa_delta_age_end, usa_delta_median
-        FROM usa_delta_data
-        WHERE usa_delta_median IS NOT NULL
-        GROUP BY usa_delta_event_id, usa_delta_age_start, usa_delta_age_end
-    """)
-
-    usa = {}
-    for event_id, age_start, age_end, median in cur.fetchall():
-        if event_id not in usa:
-            usa[event_id] = {}
-        usa[event_id][(age_start, age_end)] = median
-
-    print(f"[OK] Loaded USA delta medians for {len(usa)} events")
+    if statistic not in USA_STATISTICS:
+        raise ValueError(f"statistic must be one of {USA_STATISTICS}, got {statistic!r}")
+    ensure_usa_delta_stats(conn)
+    index = {event_id: i for i, event_id in enumerate(events)}
+    usa = np.full((len(events), len(AGES)), np.nan)
+    loaded = set()
+    for event_id, age_start, age_end, value in conn.execute(f"""
+        SELECT event_id, age_start, age_end, {statistic}
+        FROM usa_delta_stats
+        WHERE {statistic} IS NOT NULL
+    """):
+        if event_id in index and age_end == age_start + 1 and age_start in USA_AGES:
+            usa[index[event_id], age_start - MIN_AGE] = value
+            loaded.add(event_id)
+
+    print(f"[OK] Loaded USA delta {statistic}s for {len(loaded)} events")
     return usa
 
 
-def get_track_delta(canada, event_id, track, age_from, age_to):
-    """
-    Calculate track delta (improvement) between two ages.
-    Returns None if either age is missing for this track.
-
-    Delta = time_at_younger_age - time_at_older_age
-    (Positive delta means improvement/faster at older age)
-    """
-    if event_id not in canada:
-        return None
-    if track not in canada[event_id]:
-        return None
-
-    track_data = canada[event_id][track]
-
-    if age_from not in track_data or age_to not in track_data:
-        return None
-
-    return track_data[age_from] - track_data[age_to]
+def track_weights(final_ages: Sequence[int],
+                  track_rules: Dict[int, Dict[int, Tuple[int, ...]]] = TRACK_RULES) -> np.ndarray:
+    """(event, track, age) booleans: which tracks the rules average for each event's age step."""
+    weights = np.zeros((len(final_ages), len(TRACKS), len(AGES)), dtype=bool)
+    for e, final_age in enumerate(final_ages):
+        for age, tracks in track_rules[final_age].items():
+            for track in tracks:
+                weights[e, track - TRACKS[0], age - MIN_AGE] = True
+    return weights
 
 
-def calculate_age_time(mot_times, canada, event_id, target_age, source_age, tracks_to_use):
+def build_mot_times(events: Sequence[str], podium: np.ndarray, canada: np.ndarray, usa: np.ndarray,
+                    final_ages: Optional[Dict[str, int]] = None,
+                    track_rules: Optional[Dict[int, Dict[int, Tuple[int, ...]]]] = None,
+                    usa_ages: Sequence[int] = USA_AGES) -> Tuple[np.ndarray, List[str]]:
     """
-    Calculate MOT time for target_age using source_age and specified tracks.
+    MOT times as an (event, age) array over AGES plus warnings for missing deltas.
 
-    Formula: mot_time[target_age] = mot_time[source_age] + avg(track_deltas)
-
-    Going backwards (younger ages), times get SLOWER (larger), so we ADD the delta.
-    Delta = track_time[younger] - track_time[older] (positive = younger is slower)
-
-    tracks_to_use: list of track numbers to average, e.g., [3] or [3, 2] or [3, 2, 1]
+    Going backwards (younger ages), times get SLOWER (larger), so each step ADDS its delta:
+    mot[age] = mot[age + 1] + delta[age]. Canada deltas are track_time[age] - track_time[age + 1],
+    averaged over the step's TRACK_RULES tracks that have both times. Steps for usa_ages use
+    the USA deltas instead. final_ages, track_rules and usa_ages default to the methodology's
+    values; mot_sensitivity.py passes alternatives.
     """
-    if source_age not in mot_times:
-        return None
-
-    source_time = mot_times[source_age]
-
-    # Calculate deltas for each specified track
-    deltas = []
-    for track in tracks_to_use:
-        delta = get_track_delta(canada, event_id, track, target_age, source_age)
-        if delta is not None:
-            deltas.append(delta)
-
-    if not deltas:
-        print(f"  [WARNING] No track deltas available for {event_id} age {target_age}->{source_age}")
-        return None
-
-    avg_delta = sum(deltas) / len(deltas)
-    return source_time + avg_delta
-
-
-def populate_event(conn, event_id, podium_time, canada, usa):
-    """Populate MOT times for a single event."""
-    cur = conn.cursor()
-
-    final_age = FINAL_AGES.get(event_id)
-    if final_age is None:
-        print(f"  [WARNING] No final age defined for {event_id}")
-        return 0
-
-    mot_times = {}
-
-    # Step 1: Age 23 = podium target
-    mot_times[23] = podium_time
-
-    # Step 2: Plateau ages (final_age to 22) = podium target
-    for age in range(final_age, 23):
-        mot_times[age] = podium_time
-
-    # Step 3: Ages 18-22 based on final age formulas
-    # Working backwards from the first non-plateau age
-
-    if final_age == 21:
-        # Age 20: Track 3 only
-        mot_times[20] = calculate_age_time(mot_times, canada, event_id, 20, 21, [3])
-        # Age 19: Track 3 only
-        mot_times[19] = calculate_age_time(mot_times, canada, event_id, 19, 20, [3])
-        # Age 18: Track 3 + Track 2
-        mot_times[18] = calculate_age_time(mot_times, canada, event_id, 18, 19, [3, 2])
-
-    elif final_age == 22:
-        # Age 21: Track 3 only
-        mot_times[21] = calculate_age_time(mot_times, canada, event_id, 21, 22, [3])
-        # Age 20: Track 3 only
-        mot_times[20] = calculate_age_time(mot_times, canada, event_id, 20, 21, [3])
-        # Age 19: Track 3 + Track 2
-        mot_times[19] = calculate_age_time(mot_times, canada, event_id, 19, 20, [3, 2])
-        # Age 18: Track 3 + Track 2
-        mot_times[18] = calculate_age_time(mot_times, canada, event_id, 18, 19, [3, 2])
-
-    elif final_age == 23:
-        # Age 22: Track 3 only
-        mot_times[22] = calculate_age_time(mot_times, canada, event_id, 22, 23, [3])
-        # Age 21: Track 3 only
-        mot_times[21] = calculate_age_time(mot_times, canada, event_id, 21, 22, [3])
-        # Age 20: Track 3 + Track 2
-        mot_times[20] = calculate_age_time(mot_times, canada, event_id, 20, 21, [3, 2])
-        # Age 19: Track 3 + Track 2
-        mot_times[19] = calculate_age_time(mot_times, canada, event_id, 19, 20, [3, 2])
-        # Age 18: Track 3 + Track 2 + Track 1
-        mot_times[18] = calculate_age_time(mot_times, canada, event_id, 18, 19, [3, 2, 1])
-
-    elif final_age == 24:
-        # Age 22: Track 3 only
-        mot_times[22] = calculate_age_time(mot_times, canada, event_id, 22, 23, [3])
-        # Age 21: Track 3 + Track 2
-        mot_times[21] = calculate_age_time(mot_times, canada, event_id, 21, 22, [3, 2])
-        # Age 20: Track 3 + Track 2
-        mot_times[20] = calculate_age_time(mot_times, canada, event_id, 20, 21, [3, 2])
-        # Age 19: Track 3 + Track 2 + Track 1
-        mot_times[19] = calculate_age_time(mot_times, canada, event_id, 19, 20, [3, 2, 1])
-        # Age 18: Track 3 + Track 2 + Track 1
-        mot_times[18] = calculate_age_time(mot_times, canada, event_id, 18, 19, [3, 2, 1])
-
-    elif final_age == 25:
-        # Age 22: Track 3 + Track 2
-        mot_times[22] = calculate_age_time(mot_times, canada, event_id, 22, 23, [3, 2])
-        # Age 21: Track 3 + Track 2
-        mot_times[21] = calculate_age_time(mot_times, canada, event_id, 21, 22, [3, 2])
-        # Age 20: Track 3 + Track 2 + Track 1
-        mot_times[20] = calculate_age_time(mot_times, canada, event_id, 20, 21, [3, 2, 1])
-        # Age 19: Track 3 + Track 2 + Track 1
-        mot_times[19] = calculate_age_time(mot_times, canada, event_id, 19, 20, [3, 2, 1])
-        # Age 18: Track 2 + Track 1 (no Track 3)
-        mot_times[18] = calculate_age_time(mot_times, canada, event_id, 18, 19, [2, 1])
-
-    elif final_age == 26:
-        # Age 22: Track 3 + Track 2
-        mot_times[22] = calculate_age_time(mot_times, canada, event_id, 22, 23, [3, 2])
-        # Age 21: Track 3 + Track 2 + Track 1
-        mot_times[21] = calculate_age_time(mot_times, canada, event_id, 21, 22, [3, 2, 1])
-        # Age 20: Track 3 + Track 2 + Track 1
-        mot_times[20] = calculate_age_time(mot_times, canada, event_id, 20, 21, [3, 2, 1])
-        # Age 19: Track 3 + Track 2 (no Track 1 for this transition)
-        mot_times[19] = calculate_age_time(mot_times, canada, event_id, 19, 20, [3, 2])
-        # Age 18: Track 2 only
-        mot_times[18] = calculate_age_time(mot_times, canada, event_id, 18, 19, [2])
-
-    # Step 4: Ages 15-17 using USA delta medians
-    # Skip for 50m events - USA doesn't have 50m LCM age-group data
-    is_50m_event = '_50_' in event_id
-
-    if not is_50m_event:
-        # Going backwards (younger ages), times get SLOWER, so we ADD the median
-        usa_event = usa.get(event_id, {})
-
-        # Age 17
-        if 18 in mot_times and mot_times[18] is not None:
-            median_17_18 = usa_event.get((17, 18))
-            if median_17_18 is not None:
-                mot_times[17] = mot_times[18] + median_17_18
-            else:
-                print(f"  [WARNING] No USA median for {event_id} 17->18")
-
-        # Age 16
-        if 17 in mot_times and mot_times[17] is not None:
-            median_16_17 = usa_event.get((16, 17))
-            if median_16_17 is not None:
-                mot_times[16] = mot_times[17] + median_16_17
-            else:
-                print(f"  [WARNING] No USA median for {event_id} 16->17")
-
-        # Age 15
-        if 16 in mot_times and mot_times[16] is not None:
-            median_15_16 = usa_event.get((15, 16))
-            if median_15_16 is not None:
-                mot_times[15] = mot_times[16] + median_15_16
-            else:
-                print(f"  [WARNING] No USA median for {event_id} 15->16")
-
-    # Update database
-    update_count = 0
-    for age in range(15, 24):
-        time_sec = mot_times.get(age)
-        if time_sec is not None:
-            cur.execute("""
-                UPDATE mot_base_times
-                SET mot_time_seconds = ?
-                WHERE mot_event_id = ? AND mot_age = ?
-            """, (time_sec, event_id, age))
-            update_count += cur.rowcount
-
-    conn.commit()
-    return update_count
-
-
-def main():
-    print("=" * 60)
-    print("Populating MOT Base Times")
-    print("=" * 60)
-
-    conn = sqlite3.connect(DB_PATH)
-
-    # Load data
-    podium = get_podium_times(conn)
-    canada = get_canada_track_times(conn)
-    usa = get_usa_delta_medians(conn)
-
-    # Process each event
-    total_updates = 0
-    events_processed = 0
-
-    print("\nProcessing events...")
-    for event_id in sorted(FINAL_AGES.keys()):
-        if event_id not in podium:
-            print(f"  [SKIP] {event_id} - no podium target time")
+    final_ages = np.array([(final_ages or FINAL_AGES)[event_id] for event_id in events])
+    weights = track_weights(final_ages.tolist(), track_rules or TRACK_RULES)
+
+    # delta[e, t, a] = canada[e, t, a] - canada[e, t, a + 1]; the last age has no step
+    track_delta = np.full_like(canada, np.nan)
+    track_delta[:, :, :-1] = canada[:, :, :-1] - canada[:, :, 1:]
+    usable = weights & np.isfinite(track_delta)
+    counts = usable.sum(axis=1)
+    totals = np.where(usable, track_delta, 0.0).sum(axis=1)
+    canada_step = np.divide(totals, counts, out=np.full(counts.shape, np.nan), where=counts > 0)
+
+    ages = AGES[None, :]
+    is_50m = np.array(['_50_' in event_id for event_id in events])[:, None]
+    plateau = ages >= final_ages[:, None]
+    # USA doesn't have 50m LCM age-group data, so 50m events stop at 18
+    step = np.where(np.isin(ages, usa_ages), usa, canada_step)
+    step = np.where(is_50m & (ages < SPRINT_START_AGE), np.nan, step)
+    step = np.where(plateau, 0.0, step)
+    step[:, -1] = 0.0  # age 23 is the podium time itself
+
+    # Reverse cumulative sum from age 23 down; NaN carries into every younger age
+    mot = podium[:, None] + np.cumsum(step[:, ::-1], axis=1)[:, ::-1]
+
+    warnings = []
+    missing = np.isnan(step[:, :-1]) & np.isfinite(mot[:, 1:])
+    for e, a in zip(*np.nonzero(missing)):
+        age = int(AGES[a])
+        if is_50m[e, 0] and age < SPRINT_START_AGE:
             continue
-
-        podium_time = podium[event_id]
-        updates = populate_event(conn, event_id, podium_time, canada, usa)
-        total_updates += updates
-        events_processed += 1
-
-        final_age = FINAL_AGES[event_id]
-        print(f"  [OK] {event_id} (final age {final_age}): {updates} rows updated")
-
-    # Summary
-    print(f"\n" + "=" * 60)
-    print("SUMMARY")
-    print("=" * 60)
-    print(f"Events processed: {events_processed}")
-    print(f"Total rows updated: {total_updates}")
-
-    # Verification
-    cur = conn.cursor()
-    cur.execute("SELECT COUNT(*) FROM mot_base_times WHERE mot_time_seconds IS NOT NULL")
-    with_times = cur.fetchone()[0]
-
-    cur.execute("SELECT COUNT(*) FROM mot_base_times WHERE mot_time_seconds IS NULL")
-    without_times = cur.fetchone()[0]
-
-    print(f"Rows with times: {with_times}")
-    print(f"Rows without times: {without_times}")
-
-    # Sample output
-    print(f"\nSample MOT times (LCM_Back_100_F - Final Age 21):")
-    cur.execute("""
+        source = "USA median" if age in usa_ages else "track deltas available"
+        warnings.append(f"  [WARNING] No {source} for {events[e]} {age}->{age + 1}")
+    return mot, warnings
+
+
+def write_mot_times(conn, events: Sequence[str], mot: np.ndarray) -> Dict[str, int]:
+    """Write every computed (event, age) time in one transaction; returns rows updated per event."""
+    e_index, a_index = np.nonzero(np.isfinite(mot))
+    rows = [
+        (float(mot[e, a]), events[e], int(AGES[a]))
+        for e, a in zip(e_index.tolist(), a_index.tolist())
+    ]
+    updated = {}
+    with conn:
+        # executemany only reports a total rowcount, so per-event counts come from the existing keys
+        existing = set(conn.execute("SELECT mot_event_id, mot_age FROM mot_base_times"))
+        conn.executemany("""
+            UPDATE mot_base_times
+            SET mot_time_seconds = ?
+            WHERE mot_event_id = ? AND mot_age = ?
+        """, rows)
+    for _, event_id, age in rows:
+        if (event_id, age) in existing:
+            updated[event_id] = updated.get(event_id, 0) + 1
+    return updated
+
+
+def print_sample(conn, event_id: str) -> None:
+    print(f"\nSample MOT times ({event_id} - Final Age {FINAL_AGES[event_id]}):")
+    for age, time_sec in conn.execute("""
         SELECT mot_age, mot_time_seconds
         FROM mot_base_times
-        WHERE mot_event_id = 'LCM_Back_100_F'
+        WHERE mot_event_id = ?
         ORDER BY mot_age
-    """)
-    for age, time_sec in cur.fetchall():
+    """, (event_id,)):
         if time_sec:
             mins = int(time_sec // 60)
             secs = time_sec % 60
@@ -377,25 +249,62 @@ def main():
         else:
             print(f"  Age {age}: NULL")
 
-    print(f"\nSample MOT times (LCM_Free_50_M - Final Age 25):")
-    cur.execute("""
-        SELECT mot_age, mot_time_seconds
-        FROM mot_base_times
-        WHERE mot_event_id = 'LCM_Free_50_M'
-        ORDER BY mot_age
-    """)
-    for age, time_sec in cur.fetchall():
-        if time_sec:
-            mins = int(time_sec // 60)
-            secs = time_sec % 60
-            time_str = f"{mins}:{secs:05.2f}" if mins else f"{secs:.2f}"
-            print(f"  Age {age}: {time_sec:.2f} ({time_str})")
-        else:
-            print(f"  Age {age}: NULL")
 
-    conn.close()
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Populate mot_base_times from podium, Canada On Track and USA delta data")
+    parser.add_argument("--db", type=Path, default=DEFAULT_DB_PATH, help=f"Database file (default: {DEFAULT_DB_PATH})")
+    args = parser.parse_args(argv)
+    if not args.db.exists():
+        print(f"[ERROR] Database not found: {args.db}")
+        return 1
+
+    print("=" * 60)
+    print("Populating MOT Base Times")
+    print("=" * 60)
+
+    conn = sqlite3.connect(args.db)
+    try:
+        podium_by_event = get_podium_times(conn)
+        events = []
+        for event_id in sorted(FINAL_AGES):
+            if event_id in podium_by_event:
+                events.append(event_id)
+            else:
+                print(f"  [SKIP] {event_id} - no podium target time")
+
+        canada = get_canada_track_times(conn, events)
+        usa = get_usa_delta_medians(conn, events)
+        podium = np.array([podium_by_event[event_id] for event_id in events], dtype=float)
+
+        print("\nProcessing events...")
+        mot, warnings = build_mot_times(events, podium, canada, usa)
+        for warning in warnings:
+            print(warning)
+        updated = write_mot_times(conn, events, mot)
+        for event_id in events:
+            print(f"  [OK] {event_id} (final age {FINAL_AGES[event_id]}): {updated.get(event_id, 0)} rows updated")
+
+        # Summary
+        print(f"\n" + "=" * 60)
+        print("SUMMARY")
+        print("=" * 60)
+        print(f"Events processed: {len(events)}")
+        print(f"Total rows updated: {sum(updated.values())}")
+
+        # Verification
+        with_times = conn.execute("SELECT COUNT(*) FROM mot_base_times WHERE mot_time_seconds IS NOT NULL").fetchone()[0]
+        without_times = conn.execute("SELECT COUNT(*) FROM mot_base_times WHERE mot_time_seconds IS NULL").fetchone()[0]
+        print(f"Rows with times: {with_times}")
+        print(f"Rows without times: {without_times}")
+
+        for event_id in ('LCM_Back_100_F', 'LCM_Free_50_M'):
+            print_sample(conn, event_id)
+    finally:
+        conn.close()
+
     print("\n[OK] Done!")
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -6,14 +6,18 @@ Malaysia Swimming Analytics - FastAPI Main Application
 from fastapi import FastAPI, HTTPException, Depends, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
+from fastapi.concurrency import run_in_threadpool
 import uvicorn
+import asyncio
 from typing import List, Optional
 import os
 import sys
 import sqlite3
 from pathlib import Path
 import logging
+import time
+from datetime import datetime
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -35,6 +39,15 @@ def get_db_path():
 
 # Import routers
 from src.web.routers import results, admin
+from scripts.convert_meets_to_sqlite_simple import (
+    get_database_connection,
+    get_reference_snapshot,
+    get_schema_capabilities,
+    refresh_athlete_progression,
+)
+from src.web.utils.distribution import refresh_performance_distribution
+from src.web.utils.metrics import METRICS, observe_job, request_finished, request_started, resolve_route
+from src.web.utils.sql_trace import SQL_TRACE
 
 app = FastAPI(
     title="Malaysia Swimming Analytics API",
@@ -67,18 +80,61 @@ app.add_middleware(
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
     logger.info(f"-> {request.method} {request.url.path} from {request.client.host if request.client else 'unknown'}")
+    stats = request_started(request.method, resolve_route(app, request.scope))
+    started = time.perf_counter()
+    status_code = 500
     try:
         response = await call_next(request)
+        status_code = response.status_code
+        if SQL_TRACE.enabled:
+            response.headers["Server-Timing"] = (
+                f'sql;dur={stats.sql_seconds * 1000:.1f};desc="{stats.statements} statements"'
+            )
         logger.info(f"<- {response.status_code} for {request.method} {request.url.path}")
         return response
     except Exception as e:
         logger.error(f"ERROR in {request.method} {request.url.path}: {e}")
         raise
+    finally:
+        request_finished(request.method, stats, status_code, time.perf_counter() - started)
 
 # Include routers
 app.include_router(results.router, prefix="/api")
 app.include_router(admin.router, prefix="/api")
 
+def drain_dirty_queues():
+    """Rebuild the athlete progressions and distribution partitions queued since the last drain"""
+    try:
+        with observe_job("drain_dirty_queues"):
+            conn = get_database_connection()
+            try:
+                drained = refresh_athlete_progression(conn, all_dirty=True)
+                partitions = refresh_performance_distribution(conn)
+            finally:
+                conn.close()
+        logger.info(f"Dirty queues drained: {drained} athlete progressions, {partitions} distribution partitions")
+    except Exception as e:
+        logger.error(f"Failed to drain dirty queues: {e}")
+
+@app.on_event("startup")
+async def migrate_and_warm():
+    """Bring the schema to the current version and load the reference snapshot; the dirty queues drain in the background"""
+    try:
+        schema = get_schema_capabilities()
+        logger.info(f"Database schema at version {schema.version}")
+    except Exception as e:
+        logger.error(f"Schema migration failed: {e}")
+    try:
+        snapshot = get_reference_snapshot()
+        logger.info(
+            f"Reference snapshot ready: {len(snapshot.athletes)} athletes, {len(snapshot.clubs)} clubs, "
+            f"{len(snapshot.events)} events, {len(snapshot.meets)} meets"
+        )
+    except Exception as e:
+        logger.error(f"Failed to warm reference snapshot: {e}")
+    # Keep a reference so the task is not garbage-collected while it runs
+    app.state.drain_task = asyncio.create_task(run_in_threadpool(drain_dirty_queues))
+
 # Security
 security = HTTPBearer()
 
@@ -104,25 +160,23 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "service": "malaysia-swimming-analytics"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint: route latency, in-flight requests, SQL per route, caches, jobs"""
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 
 @app.get("/api/available-years")
 async def get_available_years():
     """Get list of years that have meets in the database"""
     try:
-        db_path = get_db_path()
-        conn = sqlite3.connect(db_path, timeout=30.0)
-        cursor = conn.cursor()
-
         # Get distinct years from meet_date
-        cursor.execute("""
-            SELECT DISTINCT CAST(SUBSTR(meet_date, 1, 4) AS INTEGER) as year
-            FROM meets
-            WHERE meet_date IS NOT NULL AND meet_date != ''
-            ORDER BY year DESC
-        """)
-
-        years = [row[0] for row in cursor.fetchall() if row[0] and row[0] > 2000]
-        conn.close()
+        years = set()
+        for meet in get_reference_snapshot().meets:
+            year = str(meet.meet_date or "")[:4]
+            if year.isdigit() and int(year) > 2000:
+                years.add(int(year))
+        years = sorted(years, reverse=True)
 
         return {"years": years}
     except Exception as e:
@@ -156,11 +210,8 @@ async def create_meet(meet_data: dict, current_user: dict = Depends(get_current_
 async def get_simple_results():
     """Get simple results with direct mapping columns only."""
     try:
-        # Simple SQLite connection with WAL mode and timeout
-        db_path = get_db_path()
-        conn = sqlite3.connect(db_path, timeout=30.0)
-        conn.execute("PRAGMA journal_mode=WAL")
-        conn.execute("PRAGMA busy_timeout=30000")
+        # Shared connection setup (WAL, timeout, statement timing for /metrics and the SQL trace)
+        conn = get_database_connection()
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
@@ -237,10 +288,7 @@ async def get_simple_results():
 async def get_results_stats():
     """Get basic statistics for the results."""
     try:
-        db_path = get_db_path()
-        conn = sqlite3.connect(db_path, timeout=30.0)
-        conn.execute("PRAGMA journal_mode=WAL")
-        conn.execute("PRAGMA busy_timeout=30000")
+        conn = get_database_connection()
         cursor = conn.cursor()
         
         # Get basic stats
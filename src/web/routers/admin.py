@@ -10,10 +10,12 @@ from datetime import datetime
 from pathlib import Path
 from typing import Dict, Any, Optional, List
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Depends, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse, HTMLResponse, StreamingResponse
 from pydantic import BaseModel
 import sqlite3
 import sys
+import time
 import logging
 
 # Date validation
@@ -43,8 +45,30 @@ from scripts.convert_meets_to_sqlite_simple import (
     get_database_connection,
     insert_data_simple,
     ConversionValidationError,
+    normalize_name,
+    add_club_alias,
+    split_club_aliases,
+    get_club_lookup,
+    mark_reference_data_changed,
+    get_schema_capabilities,
+    UploadTimings,
+    refresh_athlete_progression,
+    set_relay_legs,
 )
 from scripts.convert_clubs_to_sqlite import process_clubs_file, insert_club_data
+from scripts.canada_curves import get_canada_curves, invalidate_canada_curves
+from ..utils.metrics import timed_job
+from ..utils.sql_trace import SQL_TRACE
+from ..utils.points import (
+    event_key,
+    get_points_calculator,
+    invalidate_points_calculator,
+    points_list,
+    recompute_aqua_points,
+    reprice_after_base_time_save,
+)
+from ..utils.distribution import refresh_performance_distribution
+from ..utils.team_selection import SelectionRules, select_team
 
 router = APIRouter()
 
@@ -65,6 +89,7 @@ class ConversionResult(BaseModel):
     club_misses: List[Dict[str, Any]] = []  # Full list of club misses with context 
     name_format_mismatches: List[Dict[str, Any]] = []  # List of name format mismatches with athlete_id
     missing_athletes: List[Dict[str, Any]] = []  # List of missing athletes that need to be added to database
+    timings: Optional[Dict[str, Any]] = None  # Per-phase seconds and counters (see UploadTimings.as_dict)
 
 class ClubConversionResult(BaseModel):
     success: bool
@@ -222,6 +247,7 @@ async def authenticate(request: AuthRequest):
         raise HTTPException(status_code=401, detail="Invalid password")
 
 @router.post("/admin/convert-excel", response_model=ConversionResult)
+@timed_job("upload")
 async def convert_excel(
     file: UploadFile = File(...),
     meet_name: str = Form(None),
@@ -305,7 +331,7 @@ async def upload_seag(file: UploadFile = File(...),
 
     try:
         import pandas as pd
-        from src.web.utils.calculation_utils import parse_time_to_seconds, calculate_aqua_points
+        from src.web.utils.calculation_utils import parse_time_to_seconds
 
         # Read Excel file
         try:
@@ -341,10 +367,14 @@ async def upload_seag(file: UploadFile = File(...),
         else:
             print(f"[SEAG UPLOAD] Meet already exists: {meet_id}")
 
-        # Process results
+        # Process results; rows are inserted in one batch after AQUA points are computed
         results_inserted = 0
         unmatched_athletes = []
         errors = []
+        pending_rows = []  # INSERT params with aqua_points (index 6) filled in after the loop
+        pending_event_keys = []
+        pending_times = []
+        seen_in_file = set()
 
         for idx, row in df.iterrows():
             try:
@@ -438,9 +468,6 @@ async def upload_seag(file: UploadFile = File(...),
                         errors.append(error_msg)
                         continue
 
-                # Calculate AQUA points (DO NOT read from file for SEAG)
-                aqua_points = calculate_aqua_points(conn, gender, distance, stroke_name, time_seconds)
-
                 # Get athlete details for age calculation
                 year_age = None
                 day_age = None
@@ -492,25 +519,20 @@ async def upload_seag(file: UploadFile = File(...),
                         LIMIT 1
                     """, (athlete_id, event_id, meet_id, time_seconds))
                 existing = cursor.fetchone()
-                if existing:
-                    # Skip duplicate - already in database
+                file_key = (athlete_id, event_id, result_status if result_status != 'OK' else time_seconds)
+                if existing or file_key in seen_in_file:
+                    # Skip duplicate - already in database or earlier in this file
                     continue
+                seen_in_file.add(file_key)
 
-                # Insert result with all fields (matching preview columns exactly)
-                result_id = str(uuid.uuid4())
-                cursor.execute("""
-                    INSERT INTO results (
-                        id, meet_id, athlete_id, event_id, time_seconds, time_string,
-                        aqua_points, rudolph_points, meet_course, meet_date,
-                        day_age, year_age, club_name, club_code, state_code,
-                        nation, is_relay, comp_place, meet_name, meet_city, result_status
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (result_id, meet_id, athlete_id, event_id, time_seconds, time_str,
-                      aqua_points, rudolph_points, meet_course, result_meet_date,
-                      day_age, year_age, team_name, team_code, team_state_code,
-                      team_nation, 0, place, meet_name, meetcity, result_status))
-
-                results_inserted += 1
+                # Queue result with all fields (matching preview columns exactly)
+                # AQUA points are calculated for the whole file below (DO NOT read from file for SEAG)
+                pending_rows.append([str(uuid.uuid4()), meet_id, athlete_id, event_id, time_seconds, time_str,
+                                     None, rudolph_points, meet_course, result_meet_date,
+                                     day_age, year_age, team_name, team_code, team_state_code,
+                                     team_nation, 0, place, meet_name, meetcity, result_status])
+                pending_event_keys.append(event_key(meet_course, stroke_name, distance, gender))
+                pending_times.append(time_seconds)
 
             except Exception as e:
                 error_msg = f"Row {idx+2}: {str(e)}"
@@ -520,7 +542,24 @@ async def upload_seag(file: UploadFile = File(...),
                 traceback.print_exc()
                 continue
 
+        aqua_points = points_list(
+            get_points_calculator(conn).aqua_points(pending_event_keys, pending_times, [int(year)] * len(pending_times))
+        )
+        for params, points in zip(pending_rows, aqua_points):
+            params[6] = points
+        cursor.executemany("""
+            INSERT INTO results (
+                id, meet_id, athlete_id, event_id, time_seconds, time_string,
+                aqua_points, rudolph_points, meet_course, meet_date,
+                day_age, year_age, club_name, club_code, state_code,
+                nation, is_relay, comp_place, meet_name, meet_city, result_status
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, pending_rows)
+        results_inserted = len(pending_rows)
+
         conn.commit()
+        refresh_athlete_progression(conn, (params[2] for params in pending_rows))
+        refresh_performance_distribution(conn)
         conn.close()
 
         # Build detailed message with all error counts
@@ -604,8 +643,8 @@ async def preview_seag_upload(
 
         print(f"[PREVIEW SEAG] Loaded {len(df)} rows from Excel")
 
-        # Import time parser and AQUA points calculator
-        from src.web.utils.calculation_utils import parse_time_to_seconds, calculate_aqua_points
+        # Import time parser (AQUA points are calculated in one batch after the row loop)
+        from src.web.utils.calculation_utils import parse_time_to_seconds
 
         # Get database connection
         conn = get_database_connection()
@@ -616,6 +655,7 @@ async def preview_seag_upload(
 
         # Process rows to collect preview data matching results table format
         preview_rows = []
+        preview_event_keys = []  # parallel to preview_rows
         unmatched_athletes = []  # Track unmatched athletes for alert
         row_num = 0
 
@@ -728,10 +768,9 @@ async def preview_seag_upload(
                 # Calculate time in seconds
                 time_seconds = parse_time_to_seconds(time_str)
 
-                # Calculate AQUA points using the calculator (DO NOT read from file for SEAG)
+                # AQUA points are filled in for all rows below (DO NOT read from file for SEAG)
                 aqua_points = None
-                if time_seconds and time_seconds > 0 and stroke_name and distance and gender:
-                    aqua_points = calculate_aqua_points(conn, gender, distance, stroke_name, time_seconds)
+                points_key = event_key(meet_course, stroke_name, distance, gender) if stroke_name and distance and gender else ""
 
                 # Generate preview row ID
                 preview_id = f"PREVIEW_{row_num}"
@@ -759,12 +798,19 @@ async def preview_seag_upload(
                     'meet_name': meet_name,
                     'meet_city': meetcity,
                 })
+                preview_event_keys.append(points_key)
 
             except Exception as e:
                 import traceback
                 print(f"[PREVIEW SEAG] Row {idx+2} error: {str(e)}")
                 traceback.print_exc()
 
+        preview_points = get_points_calculator(conn).aqua_points(
+            preview_event_keys, [r['time_seconds'] for r in preview_rows], [int(year)] * len(preview_rows)
+        )
+        for preview_row, points in zip(preview_rows, points_list(preview_points)):
+            preview_row['aqua_points'] = points
+
         # Print match summary
         total_rows = len(preview_rows)
         matched_count = total_rows - len(unmatched_athletes)
@@ -914,11 +960,14 @@ async def preview_swimrankings_upload(file: UploadFile = File(...)):
         }
 
         # Call process_meet_file_simple - EXACT SAME as upload
-        # This handles: sheet skipping (4x, TOP, 5000m), athlete matching, event lookup, etc.
+        # This handles: sheet skipping (TOP, 5000m), athlete matching, event lookup, etc.
         file_path_obj = Path(temp_file_path)
         athletes, results, events, collector = process_meet_file_simple(file_path_obj, meet_info)
+        # Relay team rows are stored in relay_results, not results - keep them out of the matched counts
+        relay_count = sum(1 for r in results if r.get('is_relay'))
+        results = [r for r in results if not r.get('is_relay')]
 
-        print(f"[PREVIEW] Processed: {len(results)} results, {len(collector.missing_athletes)} missing athletes")
+        print(f"[PREVIEW] Processed: {len(results)} results, {relay_count} relays, {len(collector.missing_athletes)} missing athletes")
 
         # Count matched vs unmatched
         # Results only contains MATCHED rows (process_meet_file_simple skips unmatched)
@@ -1360,6 +1409,7 @@ async def update_meet_alias(meet_id: str, alias_data: AliasUpdate):
         # Update meet_alias in database
         cursor.execute("UPDATE meets SET meet_alias = ? WHERE id = ?", (new_alias, meet_id))
         conn.commit()
+        mark_reference_data_changed()
         
         return {
             "success": True,
@@ -1417,6 +1467,7 @@ async def update_meet_category(meet_id: str, category_data: CategoryUpdate):
         # Update meet_type in database (stores OPEN-D, PARA-I, etc.)
         cursor.execute("UPDATE meets SET meet_type = ? WHERE id = ?", (category_code, meet_id))
         conn.commit()
+        mark_reference_data_changed()
 
         return {
             "success": True,
@@ -1468,6 +1519,8 @@ async def delete_meet(meet_id: str):
         # Delete the meet
         cursor.execute("DELETE FROM meets WHERE id = ?", (meet_id,))
         conn.commit()
+        mark_reference_data_changed()
+        refresh_athlete_progression(conn, all_dirty=True)
         
         return {
             "success": True,
@@ -1528,9 +1581,7 @@ async def get_meet_pdf(meet_id: str):
         
         # Get all results for this meet
         # First, detect actual column names in the database
-        cursor.execute("PRAGMA table_info(athletes)")
-        athlete_columns = {row[1]: row[1] for row in cursor.fetchall()}
-        athlete_gender_col = next((col for col in athlete_columns.values() if col.lower() == "gender"), "Gender")
+        athlete_gender_col = get_schema_capabilities(conn).column("athletes", "gender") or "Gender"
         
         # Build query with detected column names
         # Note: Gender should come from events table (e.gender) as it represents the event's gender category
@@ -1791,6 +1842,7 @@ async def process_uploaded_file(file_path: str, filename: str, meet_name: str, m
     print(f"[UPLOAD] Starting processing: {filename}", flush=True)
     print(f"[UPLOAD] Meet: {meet_name or 'N/A'}, Code: {meet_code or 'N/A'}", flush=True)
     print(f"{'='*60}", flush=True)
+    timings = UploadTimings()
     
     # Determine if we're creating a new meet or adding to existing
     conn = get_database_connection()
@@ -1831,7 +1883,9 @@ async def process_uploaded_file(file_path: str, filename: str, meet_name: str, m
     file_path_obj = Path(file_path)
     validation_issues = None
     try:
-        athletes, results, events, collector = process_meet_file_simple(file_path_obj, meet_info)
+        athletes, results, events, collector = process_meet_file_simple(
+            file_path_obj, meet_info, timings=timings
+        )
         validation_issues = collector
         print(f"[PARSE] OK Parsed: {len(athletes)} athletes, {len(results)} results, {len(events)} events", flush=True)
         if validation_issues and hasattr(validation_issues, 'has_errors') and validation_issues.has_errors():
@@ -1854,9 +1908,11 @@ async def process_uploaded_file(file_path: str, filename: str, meet_name: str, m
             if unmatched_count > 5:
                 sample_str += f" ... and {unmatched_count - 5} more"
             print(f"[UPLOAD] BLOCKED - {unmatched_count} unmatched athletes found")
+            timings.log_summary(filename)
             return ConversionResult(
                 success=False,
-                message=f"Upload blocked: {unmatched_count} unmatched athlete(s) found. Run PREVIEW first to identify and add missing athletes before uploading. Unmatched: {sample_str}"
+                message=f"Upload blocked: {unmatched_count} unmatched athlete(s) found. Run PREVIEW first to identify and add missing athletes before uploading. Unmatched: {sample_str}",
+                timings=timings.as_dict(),
             )
     except Exception as e:
         # If there's a different error, still raise it
@@ -1891,7 +1947,8 @@ async def process_uploaded_file(file_path: str, filename: str, meet_name: str, m
         print(f"[UPLOAD] ERROR No results found in file")
         return ConversionResult(
             success=False,
-            message="No valid swimming results found in the Excel file. Please check the file format."
+            message="No valid swimming results found in the Excel file. Please check the file format.",
+            timings=timings.as_dict(),
         )
     
     # Insert into database: split results by meet_name to create separate meets
@@ -1924,7 +1981,7 @@ async def process_uploaded_file(file_path: str, filename: str, meet_name: str, m
         per_meet_summaries = []
         print(f"[DB] Processing {len(results_by_meet)} meet group(s)...")
         for idx, (name, group) in enumerate(results_by_meet.items(), 1):
-            print(f"[DB] [{idx}/{len(results_by_meet)}] Processing meet: '{name}' ({len(group)} results)")
+            group_started = time.perf_counter()
             # Determine earliest date and city from group
             # Earliest date
             raw_dates = [r.get('meet_date') for r in group if r.get('meet_date')]
@@ -2001,15 +2058,25 @@ async def process_uploaded_file(file_path: str, filename: str, meet_name: str, m
             for r in group:
                 r['meet_id'] = meet_id_assigned
 
+            timings.record("resolve_meet", group_started, meet=name)
+
             # Insert and collect summary (pass collector to track skipped rows)
-            print(f"[DB]   Inserting {len(group)} results into database...")
-            summary = insert_data_simple(conn, athletes, group, events, child_meet_info, collector=validation_issues)
+            summary = insert_data_simple(
+                conn, athletes, group, events, child_meet_info,
+                collector=validation_issues, timings=timings,
+            )
             inserted = summary.get('inserted_results', 0)
             skipped = summary.get('skipped_results', 0)
-            print(f"[DB]   OK Inserted: {inserted} new, {skipped} duplicates skipped")
+            relays_note = f", {summary['inserted_relays']} relays" if summary.get('inserted_relays') else ""
+            print(f"[DB] [{idx}/{len(results_by_meet)}] '{name}': {inserted} inserted, {skipped} skipped{relays_note}", flush=True)
             per_meet_summaries.append((name, child_meet_info['meet_date'], child_meet_info.get('city'), summary))
             total_meets_created += 0 if existing else 1
 
+        # Distribution partitions queued by the inserts above
+        distribution_started = time.perf_counter()
+        refresh_performance_distribution(conn)
+        timings.record("refresh_distribution", distribution_started)
+
         # Build summary message with clear statistics
         lines = [f"Upload complete: {filename}\n"]
         total_inserted = 0
@@ -2231,6 +2298,7 @@ async def process_uploaded_file(file_path: str, filename: str, meet_name: str, m
         print(f"[UPLOAD]   Total skipped (duplicates): {total_skipped} results")
         print(f"[UPLOAD]   Meets processed: {len(results_by_meet)}")
         print(f"{'='*60}\n")
+        timings.log_summary(filename)
         
         # Extract unmatched clubs and name format mismatches from validation collector
         unmatched_clubs_list = []
@@ -2288,6 +2356,7 @@ async def process_uploaded_file(file_path: str, filename: str, meet_name: str, m
             club_misses=club_misses_list,
             name_format_mismatches=name_format_mismatches_list,
             missing_athletes=missing_athletes_list,
+            timings=timings.as_dict(),
         )
     except Exception as e:
         import traceback
@@ -2357,6 +2426,7 @@ async def convert_clubs_excel(file: UploadFile = File(...)):
         conn = get_database_connection()
         try:
             result = insert_club_data(conn, data['states'], data['clubs'])
+            mark_reference_data_changed()
             print(f"[club upload] Inserted: {result['inserted_states']} states, {result['inserted_clubs']} clubs")
             print(f"[club upload] Skipped: {result['skipped_states']} states, {result['skipped_clubs']} clubs")
             
@@ -2416,6 +2486,7 @@ async def search_athletes(q: str = ""):
 
 
 @router.get("/admin/events/export-excel")
+@timed_job("export_events")
 async def export_events_excel():
     """Export ALL columns from events table as Excel file."""
     from fastapi.responses import StreamingResponse
@@ -2641,6 +2712,8 @@ async def update_event(event_id: str, distance: int = None, stroke: str = None,
                 cursor.execute(query, update_values)
 
         conn.commit()
+        if id_changed:
+            refresh_athlete_progression(conn, all_dirty=True)
         conn.close()
 
         message = f"Event updated successfully"
@@ -2667,6 +2740,7 @@ async def update_event(event_id: str, distance: int = None, stroke: str = None,
 
 
 @router.get("/admin/results/export-excel")
+@timed_job("export_results")
 async def export_results_excel():
     """Export all results from the database as an exact replica of the results table."""
     from fastapi.responses import StreamingResponse
@@ -2750,6 +2824,7 @@ async def export_results_excel():
         raise HTTPException(status_code=500, detail=f"Export failed: {str(e)}")
     
 @router.get("/admin/athletes/export-excel")
+@timed_job("export_athletes")
 async def export_athletes_excel():
     """Export ALL columns from athletes table as Excel file"""
     from fastapi.responses import StreamingResponse
@@ -2813,6 +2888,7 @@ async def export_athletes_excel():
 
 
 @router.get("/admin/foreign-athletes/export-excel")
+@timed_job("export_foreign_athletes")
 async def export_foreign_athletes_excel():
     """Export all foreign athletes from database as Excel file"""
     from fastapi.responses import StreamingResponse
@@ -2862,6 +2938,7 @@ async def export_foreign_athletes_excel():
 
 
 @router.get("/admin/coaches/export-excel")
+@timed_job("export_coaches")
 async def export_coaches_excel():
     """Export all coaches from database as Excel file"""
     from fastapi.responses import StreamingResponse
@@ -2911,6 +2988,7 @@ async def export_coaches_excel():
 
 
 @router.get("/admin/clubs/export-excel")
+@timed_job("export_clubs")
 async def export_clubs_excel():
     """Export all clubs from database as Excel file"""
     from fastapi.responses import StreamingResponse
@@ -3075,21 +3153,19 @@ async def get_unmatched_clubs():
     cursor = conn.cursor()
     
     try:
-        # Get unique club names from results where club_name is NULL (unmatched)
-        # But we need to track what the original club name was
-        # For now, let's get clubs that appear in results but not in clubs table
+        # Clubs that appear in results but match neither a club name nor a club alias
+        _, _, exact = get_club_lookup(conn)
         cursor.execute("""
-            SELECT DISTINCT r.club_name as unmatched_name, r.state_code
-            FROM results r
-            LEFT JOIN clubs c ON UPPER(TRIM(r.club_name)) = UPPER(TRIM(c.club_name))
-            WHERE r.club_name IS NOT NULL
-            AND r.club_name != ''
-            AND c.club_name IS NULL
-            ORDER BY r.club_name
+            SELECT DISTINCT club_name, state_code
+            FROM results
+            WHERE club_name IS NOT NULL AND club_name != ''
+            ORDER BY club_name
         """)
         
         unmatched = []
         for row in cursor.fetchall():
+            if normalize_name(row[0]) in exact:
+                continue
             unmatched.append({
                 "club_name": row[0],
                 "state_code": row[1] if row[1] else None
@@ -3117,9 +3193,7 @@ async def create_club(club: ClubCreateRequest):
             raise HTTPException(status_code=400, detail=f"Club '{club.club_name}' already exists")
         
         # Check if alias column exists
-        cursor.execute("PRAGMA table_info(clubs)")
-        columns = {row[1].lower() for row in cursor.fetchall()}
-        has_alias = 'club_alias' in columns
+        has_alias = get_schema_capabilities(conn).has_column("clubs", "club_alias")
         
         # Insert new club
         if has_alias:
@@ -3143,8 +3217,12 @@ async def create_club(club: ClubCreateRequest):
                 club.state_code.strip().upper() if club.state_code else None,
                 club.nation.strip().upper() if club.nation else "MAS"
             ))
+
+        for alias in split_club_aliases(club.alias):
+            add_club_alias(conn, club.club_name.strip(), alias)
         
         conn.commit()
+        mark_reference_data_changed()
         return {"success": True, "message": f"Club '{club.club_name}' created successfully"}
     except HTTPException:
         raise
@@ -3162,9 +3240,7 @@ async def list_clubs(state_code: Optional[str] = None):
     
     try:
         # Check if alias column exists
-        cursor.execute("PRAGMA table_info(clubs)")
-        columns = {row[1].lower() for row in cursor.fetchall()}
-        has_alias = 'club_alias' in columns
+        has_alias = get_schema_capabilities(conn).has_column("clubs", "club_alias")
         
         # Build query with optional state filter
         if state_code:
@@ -3246,9 +3322,7 @@ async def update_club(club_name: str, club: ClubCreateRequest):
                 )
 
         # Check if alias column exists
-        cursor.execute("PRAGMA table_info(clubs)")
-        columns = {row[1].lower() for row in cursor.fetchall()}
-        has_alias = 'club_alias' in columns
+        has_alias = get_schema_capabilities(conn).has_column("clubs", "club_alias")
         
         # Update club - use actual column names: club_nation, club_alias
         if has_alias:
@@ -3276,8 +3350,16 @@ async def update_club(club_name: str, club: ClubCreateRequest):
                 club.nation.strip().upper() if club.nation else "MAS",
                 club_name  # WHERE clause uses original name
             ))
+
+        # Keep normalized aliases attached to the (possibly renamed) club
+        cursor.execute("UPDATE club_aliases SET club_name = ? WHERE club_name = ?", (club.club_name.strip(), club_name))
+        if has_alias:
+            cursor.execute("DELETE FROM club_aliases WHERE club_name = ?", (club.club_name.strip(),))
+            for alias in split_club_aliases(club.alias):
+                add_club_alias(conn, club.club_name.strip(), alias)
         
         conn.commit()
+        mark_reference_data_changed()
         return {"success": True, "message": f"Club '{club.club_name}' updated successfully"}
     except HTTPException:
         raise
@@ -3320,7 +3402,10 @@ async def delete_club(club_name: str):
 
         # Delete the club
         cursor.execute("DELETE FROM clubs WHERE club_name = ?", (club_name,))
+        get_schema_capabilities(conn)  # club_aliases table
+        cursor.execute("DELETE FROM club_aliases WHERE club_name = ?", (club_name,))
         conn.commit()
+        mark_reference_data_changed()
 
         return {"success": True, "message": f"Club '{club_name}' deleted successfully"}
     except HTTPException:
@@ -3603,29 +3688,21 @@ async def delete_coach(coach_id: int):
 
 @router.get("/admin/clubs/search")
 async def search_clubs(query: str = Query(..., min_length=2)):
-    """Search for clubs by name (case-insensitive partial match)"""
+    """Search for clubs by name, code or alias (trigram index; substring matches first)"""
     conn = get_database_connection()
-    cursor = conn.cursor()
     
     try:
-        cursor.execute("""
-            SELECT club_name, club_code, state_code, nation, alias
-            FROM clubs
-            WHERE LOWER(club_name) LIKE LOWER(?) OR LOWER(club_code) LIKE LOWER(?)
-            ORDER BY club_name
-            LIMIT 20
-        """, (f"%{query}%", f"%{query}%"))
-        
-        results = cursor.fetchall()
+        index, club_rows, _ = get_club_lookup(conn)
         clubs = []
-        for row in results:
-            clubs.append({
-                "club_name": row[0],
-                "club_code": row[1],
-                "state_code": row[2],
-                "nation": row[3],
-                "alias": row[4]
-            })
+        seen = set()
+        for idx, _score in index.search(normalize_name(query), limit=60):
+            club = club_rows[idx]
+            if club["club_name"] in seen:
+                continue
+            seen.add(club["club_name"])
+            clubs.append(club)
+            if len(clubs) == 20:
+                break
         
         return {"clubs": clubs, "count": len(clubs)}
     except Exception as e:
@@ -3633,6 +3710,43 @@ async def search_clubs(query: str = Query(..., min_length=2)):
     finally:
         conn.close()
 
+class AquaRecomputeRequest(BaseModel):
+    year: Optional[int] = None  # meet year; None = all years
+    course: Optional[str] = None  # LCM / SCM; None = both
+    event_ids: Optional[List[str]] = None  # base-table ids like "LCM_Free_100_M"
+    dry_run: bool = True
+
+class TeamSelectionRequest(BaseModel):
+    start_date: str  # meet window, YYYY-MM-DD inclusive
+    end_date: str
+    course: str = "LCM"
+    nation: str = "MAS"
+    gender: Optional[str] = None
+    min_age: Optional[int] = None
+    max_age: Optional[int] = None
+    age_year: Optional[int] = None  # age on 31 Dec of this year; defaults to end_date's year
+    max_per_event: int = 2
+    max_events_per_athlete: int = 4
+    events: Optional[List[str]] = None  # base-table ids like "LCM_Free_100_M"
+    podium_year: Optional[int] = None  # podium_target_times year; None = latest
+    target_tolerance_pct: Optional[float] = None  # e.g. 2.0 = within 2% of the podium target; None = no threshold
+
+class RelayLeg(BaseModel):
+    leg_order: int  # 1-4; medley legs are Back, Breast, Fly, Free
+    athlete_id: Optional[str] = None
+    foreign_athlete_id: Optional[str] = None
+    full_name: Optional[str] = None
+    split_seconds: Optional[float] = None
+
+class RelayLegsUpdate(BaseModel):
+    legs: List[RelayLeg]
+
+class SqlTraceSettings(BaseModel):
+    enabled: Optional[bool] = None
+    slow_ms: Optional[float] = None
+    explain_ms: Optional[float] = None
+    clear: bool = False
+
 class ClubResolutionRequest(BaseModel):
     club_miss_id: Optional[str] = None  # Identifier for the club miss (e.g., index or hash)
     action: str  # "add_alias", "swap_names", or "create_new"
@@ -3649,13 +3763,8 @@ async def resolve_club_miss(resolution: ClubResolutionRequest):
     cursor = conn.cursor()
     
     try:
-        # Check if alias column exists
-        cursor.execute("PRAGMA table_info(clubs)")
-        columns = [row[1].lower() for row in cursor.fetchall()]
-        has_alias = "alias" in columns
-        
-        if not has_alias:
-            cursor.execute("ALTER TABLE clubs ADD COLUMN alias TEXT")
+        # clubs.club_alias and club_aliases are guaranteed by the schema migrations
+        get_schema_capabilities(conn)
         
         if resolution.action == "add_alias":
             # Add the read-in name as an alias to existing club
@@ -3673,6 +3782,10 @@ async def resolve_club_miss(resolution: ClubResolutionRequest):
             new_alias = resolution.new_club_name or ""
 
             if new_alias:
+                if not add_club_alias(conn, resolution.existing_club_name, new_alias):
+                    raise HTTPException(status_code=400, detail=f"Alias '{new_alias}' is already registered to a club")
+
+                # Legacy display column mirrors the normalized aliases
                 if current_alias:
                     updated_alias = f"{current_alias}, {new_alias}"
                 else:
@@ -3680,6 +3793,7 @@ async def resolve_club_miss(resolution: ClubResolutionRequest):
 
                 cursor.execute("UPDATE clubs SET club_alias = ? WHERE club_name = ?", (updated_alias, resolution.existing_club_name))
                 conn.commit()
+                mark_reference_data_changed()
                 return {"success": True, "message": f"Added '{new_alias}' as alias to '{resolution.existing_club_name}'"}
         
         elif resolution.action == "swap_names":
@@ -3711,7 +3825,14 @@ async def resolve_club_miss(resolution: ClubResolutionRequest):
                 SET club_name = ?, club_alias = ?
                 WHERE club_name = ?
             """, (resolution.new_club_name, updated_alias, resolution.existing_club_name))
+            cursor.execute(
+                "UPDATE club_aliases SET club_name = ? WHERE club_name = ?",
+                (resolution.new_club_name, resolution.existing_club_name),
+            )
+            cursor.execute("DELETE FROM club_aliases WHERE normalized_alias = ?", (normalize_name(resolution.new_club_name),))
+            add_club_alias(conn, resolution.new_club_name, resolution.existing_club_name)
             conn.commit()
+            mark_reference_data_changed()
             return {"success": True, "message": f"Swapped names: '{resolution.existing_club_name}' -> '{resolution.new_club_name}' (old name added as alias)"}
         
         elif resolution.action == "create_new":
@@ -3735,6 +3856,7 @@ async def resolve_club_miss(resolution: ClubResolutionRequest):
                 None  # No alias for new club
             ))
             conn.commit()
+            mark_reference_data_changed()
             return {"success": True, "message": f"Created new club '{resolution.new_club_name}'"}
         
         else:
@@ -3762,11 +3884,9 @@ async def add_athlete_alias(athlete_id: str, alias: str = Query(...)):
             raise HTTPException(status_code=404, detail=f"Athlete with id {athlete_id} not found")
         
         # Check which alias columns exist
-        cursor.execute("PRAGMA table_info(athletes)")
-        columns_info = cursor.fetchall()
-        columns = {row[1].lower() for row in columns_info}
-        has_alias_1 = "athlete_alias_1" in columns
-        has_alias_2 = "athlete_alias_2" in columns
+        schema = get_schema_capabilities(conn)
+        has_alias_1 = schema.has_column("athletes", "athlete_alias_1")
+        has_alias_2 = schema.has_column("athletes", "athlete_alias_2")
         
         if not has_alias_1 and not has_alias_2:
             raise HTTPException(status_code=400, detail="Alias columns not found in athletes table")
@@ -3878,20 +3998,12 @@ async def get_athlete_results(athlete_id: str, start_date: Optional[str] = None,
             cursor.execute(base_query, params)
             all_results = cursor.fetchall()
             
-            # Group by event and keep only best time
+            # Rows are ordered by time_seconds within each event, so the first row
+            # per event is the best (time_string does not compare, e.g. "1:02.3" vs "59.8")
             best_results = {}
             for row in all_results:
-                event_key = f"{row[6]}_{row[7]}_{row[8]}"  # distance_stroke_gender
-                if event_key not in best_results:
-                    best_results[event_key] = row
-                else:
-                    # Compare times (lower is better)
-                    current_time = row[1] or "99:99.99"
-                    best_time = best_results[event_key][1] or "99:99.99"
-                    # Simple string comparison for times (works for most formats)
-                    if current_time < best_time:
-                        best_results[event_key] = row
-            
+                best_results.setdefault((row[6], row[7], row[8]), row)  # distance, stroke, gender
+
             results = list(best_results.values())
         else:
             base_query += " ORDER BY m.meet_date DESC, e.event_distance, e.event_stroke"
@@ -4180,6 +4292,8 @@ async def submit_manual_results(submission: ManualResultsSubmission):
                 errors.append(f"Error inserting result for athlete {result.athlete_id}: {str(e)}")
 
         conn.commit()
+        refresh_athlete_progression(conn, (result.athlete_id for result in submission.results))
+        refresh_performance_distribution(conn)
 
         response = {
             "success": True,
@@ -4203,6 +4317,7 @@ async def submit_manual_results(submission: ManualResultsSubmission):
 
 
 @router.get("/admin/export-base-table/{table_type}")
+@timed_job("export_base_table")
 async def export_base_table(table_type: str):
     """
     Export base time tables as Excel files.
@@ -4593,6 +4708,7 @@ async def save_map_base_times(request: Request):
                 inserted += 1
 
         conn.commit()
+        invalidate_points_calculator()
         return {"success": True, "updated": updated, "inserted": inserted}
 
     except Exception as e:
@@ -4694,6 +4810,8 @@ async def save_aqua_base_times(request: Request):
     """
     Save/update AQUA base times for a specific year and course.
     Expects JSON body: { "year": 2025, "course": "LCM", "times": [{"event_id": "LCM_Free_100_M", "time_string": "46.40"}, ...] }
+    Results priced from the changed times are re-priced before returning ("recompute"
+    in the response), and the distribution rows built from their aqua_points refreshed.
     """
     conn = get_database_connection()
     try:
@@ -4705,6 +4823,7 @@ async def save_aqua_base_times(request: Request):
         cursor = conn.cursor()
         updated = 0
         inserted = 0
+        changed_events = set()
 
         for item in times:
             event_id = item.get("event_id")
@@ -4737,11 +4856,13 @@ async def save_aqua_base_times(request: Request):
 
             # Check if exists for this year, course, and event
             cursor.execute("""
-                SELECT id FROM aqua_base_times
+                SELECT id, base_time_seconds, event_id FROM aqua_base_times
                 WHERE gender = ? AND distance = ? AND stroke = ? AND course = ? AND competition_year = ?
             """, (gender, distance, stroke, course, year))
 
             existing = cursor.fetchone()
+            if not existing or existing[1] != time_seconds or existing[2] != new_event_id:
+                changed_events.add(new_event_id)
             if existing:
                 cursor.execute("""
                     UPDATE aqua_base_times
@@ -4757,7 +4878,16 @@ async def save_aqua_base_times(request: Request):
                 inserted += 1
 
         conn.commit()
-        return {"success": True, "updated": updated, "inserted": inserted}
+        invalidate_points_calculator()
+
+        def reprice():
+            summary = reprice_after_base_time_save(conn, course, int(year), sorted(changed_events))
+            if summary["written"]:
+                summary["distribution_partitions"] = refresh_performance_distribution(conn)
+            return summary
+
+        recompute = await run_in_threadpool(reprice) if changed_events else None
+        return {"success": True, "updated": updated, "inserted": inserted, "recompute": recompute}
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -4766,6 +4896,111 @@ async def save_aqua_base_times(request: Request):
         conn.close()
 
 
+@router.post("/admin/aqua-base-times/recompute")
+async def recompute_aqua_base_points(request: AquaRecomputeRequest):
+    """
+    Re-price stored results.aqua_points against the current AQUA base times.
+    Defaults to a dry run that returns a diff summary; send dry_run=false to write
+    (the distribution rows built from aqua_points are refreshed after a write).
+    """
+    def run():
+        conn = get_database_connection()
+        try:
+            summary = recompute_aqua_points(
+                conn,
+                course=request.course,
+                year=request.year,
+                event_ids=request.event_ids,
+                dry_run=request.dry_run,
+            )
+            if summary["written"]:
+                summary["distribution_partitions"] = refresh_performance_distribution(conn)
+            return summary
+        finally:
+            conn.close()
+
+    try:
+        summary = await run_in_threadpool(run)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    print(f"[AQUA] Recompute {'(dry run) ' if request.dry_run else ''}course={request.course} year={request.year}: "
+          f"{summary['changed']} of {summary['scanned']} changed in {summary['seconds']}s", flush=True)
+    return summary
+
+
+@router.post("/admin/performance-distribution/refresh")
+@timed_job("performance_distribution")
+async def refresh_distribution_stats(full: bool = False):
+    """
+    Recompute per-event/age/season distribution statistics. By default only the
+    partitions touched since the last refresh; full=true recomputes everything.
+    """
+    def run():
+        conn = get_database_connection()
+        try:
+            started = time.perf_counter()
+            partitions = refresh_performance_distribution(conn, full=full)
+            return {"success": True, "partitions": partitions, "seconds": round(time.perf_counter() - started, 2)}
+        finally:
+            conn.close()
+
+    try:
+        return await run_in_threadpool(run)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/admin/team-selection")
+async def run_team_selection(request: TeamSelectionRequest):
+    """
+    Pick the squad for a meet window: best individual times in the window, eligibility
+    rules, per-event and per-athlete caps, optional podium-target threshold.
+    """
+    if request.max_per_event < 1 or request.max_events_per_athlete < 1:
+        raise HTTPException(status_code=400, detail="max_per_event and max_events_per_athlete must be at least 1")
+    try:
+        rules = SelectionRules(**{
+            **request.model_dump(),
+            "start_date": parse_and_validate_date(request.start_date, field_name="start_date")[:10],
+            "end_date": parse_and_validate_date(request.end_date, field_name="end_date")[:10],
+        })
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid date: {str(e)}")
+
+    def run():
+        conn = get_database_connection()
+        try:
+            return select_team(conn, rules)
+        finally:
+            conn.close()
+
+    try:
+        selection = await run_in_threadpool(run)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    summary = selection["summary"]
+    print(f"[Selection] {rules.start_date}..{rules.end_date}: {summary['entries']} entries, "
+          f"{summary['team_size']} athletes from {summary['candidates']} candidates in {summary['ms']} ms", flush=True)
+    return selection
+
+
+@router.put("/admin/relays/{relay_id}/legs")
+async def update_relay_legs(relay_id: str, update: RelayLegsUpdate):
+    """Record the swimmers (and splits, when known) of a relay; replaces any existing legs."""
+    if len({leg.leg_order for leg in update.legs}) != len(update.legs):
+        raise HTTPException(status_code=400, detail="Each leg_order may appear only once")
+    conn = get_database_connection()
+    try:
+        count = set_relay_legs(conn, relay_id, [leg.model_dump() for leg in update.legs])
+        return {"success": True, "relay_id": relay_id, "legs": count}
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Relay {relay_id} not found")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        conn.close()
+
+
 @router.get("/admin/mot-base-times")
 async def get_mot_base_times():
     """
@@ -4885,6 +5120,7 @@ async def save_mot_base_times(request: Request):
                 inserted += 1
 
         conn.commit()
+        invalidate_points_calculator()
         return {"success": True, "updated": updated, "inserted": inserted}
 
     except Exception as e:
@@ -5019,6 +5255,7 @@ async def update_comp_place(request: Request):
             updated += 1
 
         conn.commit()
+        refresh_athlete_progression(conn, all_dirty=True)
         return {"success": True, "updated": updated}
 
     except Exception as e:
@@ -5153,6 +5390,7 @@ async def save_canada_on_track(request: Request):
                 inserted += 1
 
         conn.commit()
+        invalidate_canada_curves()
         return {"success": True, "updated": updated, "inserted": inserted}
 
     except Exception as e:
@@ -5160,3 +5398,61 @@ async def save_canada_on_track(request: Request):
 
     finally:
         conn.close()
+
+
+@router.get("/admin/canada-on-track/curves")
+async def get_canada_on_track_curves(event_id: str, step: float = Query(1.0, gt=0, le=1), ages: Optional[str] = None):
+    """
+    Interpolated Canada On Track curves for one event, from the shared curve cache.
+    Returns each track's times every `step` years (missing ages interpolated) and 1-year deltas.
+    ages=16.5,17.25 also returns each track's time at those (fractional) ages.
+    """
+    conn = get_database_connection()
+    try:
+        curves = get_canada_curves(conn)
+        result = curves.curve(event_id, step)
+        if not result["tracks"]:
+            raise HTTPException(status_code=404, detail=f"No Canada On Track times for {event_id}")
+
+        if ages:
+            try:
+                wanted = [float(a) for a in ages.split(",") if a.strip()]
+            except ValueError:
+                raise HTTPException(status_code=400, detail="ages must be comma-separated numbers")
+            tracks = [track["track"] for track in result["tracks"]]
+            times = curves.interpolate(event_id, [[track] for track in tracks], [wanted])
+            result["ages"] = wanted
+            result["at_ages"] = {
+                str(track): [None if seconds != seconds else round(float(seconds), 2) for seconds in row]
+                for track, row in zip(tracks, times)
+            }
+        return result
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    finally:
+        conn.close()
+
+
+@router.get("/admin/sql-trace")
+async def get_sql_trace(explain: bool = False, limit: int = Query(50, ge=1, le=200)):
+    """Slow-query log and the most expensive normalized statements since tracing was enabled.
+
+    explain=true adds EXPLAIN QUERY PLAN output to slow SELECTs above the explain threshold.
+    """
+    return SQL_TRACE.snapshot(explain=explain, limit=limit)
+
+
+@router.post("/admin/sql-trace")
+async def update_sql_trace(settings: SqlTraceSettings):
+    """Turn the SQL tracer on/off, adjust thresholds, or clear collected entries"""
+    if settings.enabled is False:
+        SQL_TRACE.disable()
+    elif settings.enabled or settings.slow_ms is not None or settings.explain_ms is not None:
+        SQL_TRACE.enable(slow_ms=settings.slow_ms, explain_ms=settings.explain_ms)
+    if settings.clear:
+        SQL_TRACE.clear()
+    return {"enabled": SQL_TRACE.enabled, "slow_ms": SQL_TRACE.slow_ms, "explain_ms": SQL_TRACE.explain_ms}
@@ -1,3 +1,4 @@
+import math
 from datetime import datetime
 from typing import Optional
 
@@ -6,8 +7,26 @@ import sqlite3
 
 # Import date validation utility
 from ..utils.date_validator import parse_and_validate_date
-# Import MAP and MOT points calculation
-from ..utils.calculation_utils import calculate_map_points, calculate_mot_data
+# Batch MAP and MOT points calculation
+from ..utils.points import event_key, format_seconds, get_points_calculator, points_list
+from ..utils.metrics import timed_job
+# Season-best national rankings (sorted partitions, bisect rank lookup)
+from ..utils.rankings import RANKINGS, parse_age_group
+# Per-event/age/season distribution statistics (charts)
+from ..utils.distribution import DISTRIBUTION
+# Cohort MOT gap matrices
+from ..utils.mot_gaps import MOT_GAPS
+# Relay lineup optimizer (individual bests + relay splits)
+from ..utils.relay_optimizer import optimize_relay
+# Head-to-head athlete comparison
+from ..utils.compare import MAX_COMPARED_ATHLETES, compare_athletes
+# Reference tables (meets, clubs, events) are served from the shared in-memory snapshot
+from scripts import convert_meets_to_sqlite_simple as db
+from scripts.convert_meets_to_sqlite_simple import (
+    get_database_connection,
+    get_reference_snapshot,
+    get_schema_capabilities,
+)
 
 router = APIRouter()
 
@@ -48,39 +67,14 @@ def _compute_age(
 
 
 def get_db():
-    # Simple SQLite connection for now
-    import os
-    from pathlib import Path
-    
-    # Get database path - works for both Docker and local development
-    # results.py is in src/web/routers/, so go up 4 levels to get to project root
-    # __file__ = src/web/routers/results.py
-    # parent = src/web/routers/
-    # parent.parent = src/web/
-    # parent.parent.parent = src/
-    # parent.parent.parent.parent = project root
-    project_root = Path(__file__).parent.parent.parent.parent
-    
-    # Use authoritative database in root directory
-    root_db = project_root / "malaysia_swimming.db"
-    if root_db.exists():
-        db_path = str(root_db)
-    else:
-        # Docker path (fallback)
-        db_path = '/app/malaysia_swimming.db'
-    
-    # Ensure the directory exists
-    db_dir = Path(db_path).parent
-    if not db_dir.exists() and db_path.startswith('/app'):
-        # Docker path - assume it exists
-        pass
-    elif not Path(db_path).exists() and not db_path.startswith('/app'):
-        # File doesn't exist - raise an error
-        raise FileNotFoundError(f"Database file not found: {db_path}")
-    
-    conn = sqlite3.connect(db_path, timeout=30.0)
-    conn.execute("PRAGMA journal_mode=WAL")
-    conn.execute("PRAGMA busy_timeout=30000")
+    """Shared instrumented connection (get_database_connection) returning sqlite3.Row rows.
+
+    Going through get_database_connection() keeps these queries in /metrics SQL
+    timings and the SQL trace.
+    """
+    if not db.DATABASE_PATH.exists():
+        raise FileNotFoundError(f"Database file not found: {db.DATABASE_PATH}")
+    conn = get_database_connection()
     conn.row_factory = sqlite3.Row
     return conn
 
@@ -95,9 +89,7 @@ async def get_simple_results():
         cursor = conn.cursor()
         
         # Check if meet_date column exists
-        cursor.execute("PRAGMA table_info(meets)")
-        columns = [col[1] for col in cursor.fetchall()]
-        has_meet_date = 'meet_date' in columns
+        has_meet_date = get_schema_capabilities().has_column("meets", "meet_date")
         
         # Simple query with direct mapping columns
         # Use year_age with fallback to athlete age
@@ -223,9 +215,7 @@ async def get_filtered_results(
         cursor = conn.cursor()
         
         # Check if meet_date column exists
-        cursor.execute("PRAGMA table_info(meets)")
-        columns = [col[1] for col in cursor.fetchall()]
-        has_meet_date = 'meet_date' in columns
+        has_meet_date = get_schema_capabilities().has_column("meets", "meet_date")
         
         # Build base query
         # Use year_age with fallback to athlete age
@@ -241,6 +231,7 @@ async def get_filtered_results(
                 e.event_distance AS distance,
                 e.event_stroke AS stroke,
                 e.gender AS event_gender,
+                e.event_course AS course,
                 r.time_string,
                 r.time_seconds,
                 r.comp_place,
@@ -439,38 +430,36 @@ async def get_filtered_results(
         results = cursor.fetchall()
         print(f"[DEBUG] Query returned {len(results)} rows")
 
+        # MAP points and MOT time/AQUA/gap for the whole result set in one batch.
+        # Lookups use the event gender (events are gender-specific); rows without an
+        # age, event or valid time come back as None.
+        ages = [_compute_age(row["year_age"], row["day_age"], row["birthdate"], row["meet_date"]) for row in results]
+        event_keys = [
+            event_key(row["course"], row["stroke"], row["distance"], row["event_gender"] or row["gender"])
+            if row["distance"] and row["stroke"] else ""
+            for row in results
+        ]
+        meet_years = [
+            int(row["meet_date"][:4]) if row["meet_date"] and str(row["meet_date"])[:4].isdigit() else None
+            for row in results
+        ]
+        calculator = get_points_calculator()
+        map_points_all = points_list(
+            calculator.map_points(event_keys, ages, [row["time_seconds"] for row in results], meet_years)
+        )
+        mot_times, mot_aquas, mot_gaps = calculator.mot(event_keys, ages, [row["aqua_points"] for row in results])
+        mot_times, mot_aquas, mot_gaps = mot_times.tolist(), points_list(mot_aquas), points_list(mot_gaps)
+
         # Convert to list of dicts
         data = []
-        for row in results:
-            # Calculate age for MAP points
-            age = _compute_age(row["year_age"], row["day_age"], row["birthdate"], row["meet_date"])
-
-            # Calculate MAP points using event gender, distance, stroke, time_seconds, and age
-            map_points = None
-            if age and row["time_seconds"] and row["distance"] and row["stroke"]:
-                # Use event_gender for MAP lookup (M or F)
-                event_gender = row["event_gender"] or row["gender"]
-                map_points = calculate_map_points(
-                    conn,
-                    event_gender,
-                    row["distance"],
-                    row["stroke"],
-                    row["time_seconds"],
-                    age
-                )
-
-            # Calculate MOT data (time, AQUA points, gap) for ages 15-23
-            mot_data = {"mot_time": None, "mot_aqua": None, "mot_gap": None}
-            if age and row["distance"] and row["stroke"]:
-                event_gender = row["event_gender"] or row["gender"]
-                mot_data = calculate_mot_data(
-                    conn,
-                    event_gender,
-                    row["distance"],
-                    row["stroke"],
-                    row["aqua_points"],
-                    age
-                )
+        for i, row in enumerate(results):
+            age = ages[i]
+            map_points = map_points_all[i]
+            mot_data = {
+                "mot_time": None if math.isnan(mot_times[i]) else format_seconds(mot_times[i]),
+                "mot_aqua": mot_aquas[i],
+                "mot_gap": mot_gaps[i],
+            }
 
             # Show result_status (DQ, DNS, etc.) in place field if no comp_place and status isn't OK
             place_value = row["comp_place"]
@@ -535,33 +524,18 @@ async def get_filtered_results(
 async def get_meets():
     """Get list of available meets."""
     try:
-        conn = get_db()
-        cursor = conn.cursor()
-        
-        # Get all meets with dates in a single query
-        cursor.execute("""
-            SELECT id, meet_name, meet_alias, COALESCE(meet_date, '2099-12-31') as meet_date, meet_type
-            FROM meets
-            ORDER BY COALESCE(meet_date, '2099-12-31') DESC, meet_name
-        """)
-        meets = cursor.fetchall()
+        snapshot = get_reference_snapshot()
 
         # Process all meets - return all individual meets
         all_meets = []
 
-        for meet in meets:
-            meet_id = meet[0]
-            db_name = meet[1]
-            meet_code = meet[2]  # meet_alias is the code (W-PARA, MIAG25)
-            meet_date = meet[3] if len(meet) > 3 else "2099-12-31"
-            meet_type = meet[4] if len(meet) > 4 else ""  # meet_type is now OPEN-D, PARA-I
-
+        for meet in snapshot.meets:
             all_meets.append({
-                "id": str(meet_id),
-                "name": db_name,
-                "meet_code": meet_code,
-                "meet_date": meet_date,
-                "meet_type": meet_type or ""
+                "id": str(meet.id),
+                "name": meet.name,
+                "meet_code": meet.alias,  # meet_alias is the code (W-PARA, MIAG25)
+                "meet_date": meet.meet_date or "2099-12-31",
+                "meet_type": meet.meet_type or ""  # meet_type is now OPEN-D, PARA-I
             })
 
         # Sort by date descending (most recent first), then by name
@@ -569,53 +543,37 @@ async def get_meets():
 
         data = all_meets
         
-        conn.close()
         return {"meets": data}
     except Exception as e:
         import traceback
         print(f"Error in get_meets: {e}")
         traceback.print_exc()
-        if 'conn' in locals():
-            conn.close()
         return {"meets": [], "error": str(e)}
 
 @router.get("/clubs")
 async def get_clubs(state_code: str = None):
     """Get list of clubs, optionally filtered by state."""
-    conn = get_db()
-    cursor = conn.cursor()
+    clubs = get_reference_snapshot().clubs
 
     if state_code:
-        cursor.execute("""
-            SELECT club_code, club_name
-            FROM clubs
-            WHERE state_code = ?
-            ORDER BY club_code
-        """, (state_code.upper(),))
-    else:
-        cursor.execute("""
-            SELECT club_code, club_name
-            FROM clubs
-            ORDER BY club_code
-        """)
-
-    clubs = cursor.fetchall()
-    conn.close()
+        clubs = [club for club in clubs if club.stored_state_code == state_code.upper()]
+
+    # Same order as ORDER BY club_code (NULL codes first)
+    clubs = sorted(clubs, key=lambda club: (club.club_code is not None, club.club_code or ""))
 
     return {
-        "clubs": [{"code": row[0], "name": row[1]} for row in clubs]
+        "clubs": [{"code": club.club_code, "name": club.name} for club in clubs]
     }
 
 
 @router.get("/events")
 async def get_events():
     """Get list of available events."""
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    # Get distinct events from database
-    cursor.execute("SELECT DISTINCT event_distance, event_stroke FROM events ORDER BY event_distance, event_stroke")
-    events = cursor.fetchall()
+    # Get distinct events from the reference snapshot
+    events = sorted({
+        (event.distance, event.stroke) for event in get_reference_snapshot().events
+        if event.distance is not None and event.stroke is not None
+    })
     
     # Stroke mapping: DATABASE format -> user display
     # Database stores: Free, Back, Breast, Fly, Medley
@@ -639,9 +597,338 @@ async def get_events():
             "name": event_name
         })
     
-    conn.close()
     return {"events": data}
 
+@router.get("/athletes/{athlete_id}/progression")
+async def get_athlete_progression(athlete_id: str):
+    """
+    Season bests per event with season-on-season change and personal-best history,
+    served from the athlete_progression index in a single query.
+    """
+    conn = get_database_connection()
+    try:
+        rows = conn.execute("""
+            SELECT p.event_id, e.event_course, e.event_distance, e.event_stroke, e.gender,
+                   p.season, p.time_seconds, p.time_string, p.swims, p.season_delta,
+                   p.previous_pb, p.is_pb, p.result_id, p.meet_id, m.meet_name, p.meet_date
+            FROM athlete_progression p
+            LEFT JOIN events e ON p.event_id = e.id
+            LEFT JOIN meets m ON p.meet_id = m.id
+            WHERE p.athlete_id = ?
+            ORDER BY e.event_course, e.event_stroke, e.event_distance, p.season
+        """, (athlete_id,)).fetchall()
+    finally:
+        conn.close()
+
+    events = {}
+    for row in rows:
+        event = events.setdefault(row[0], {
+            "event_id": row[0],
+            "course": row[1],
+            "distance": row[2],
+            "stroke": row[3],
+            "gender": row[4],
+            "seasons": [],
+            "pb_history": [],
+            "personal_best": None,
+        })
+        season = {
+            "season": row[5],
+            "time_seconds": row[6],
+            "time": row[7],
+            "swims": row[8],
+            "season_delta": row[9],  # vs previous season best (negative = faster)
+            "pb_delta": round(row[6] - row[10], 2) if row[10] is not None else None,
+            "is_pb": bool(row[11]),
+            "result_id": row[12],
+            "meet_id": row[13],
+            "meet_name": row[14],
+            "meet_date": row[15],
+        }
+        event["seasons"].append(season)
+        if season["is_pb"]:
+            event["pb_history"].append(season)
+            event["personal_best"] = season
+
+    return {"athlete_id": athlete_id, "events": list(events.values()), "count": len(events)}
+
+
+def _resolve_event(event_id: Optional[str], event: Optional[str], course: str, gender: Optional[str]) -> Optional[str]:
+    """event_id, or an /events name such as "100m Free" plus course and gender."""
+    if event_id:
+        return event_id
+    if not event or not gender:
+        return None
+    distance, _, stroke = event.strip().partition("m ")
+    stroke = "Medley" if stroke.strip() == "IM" else stroke.strip()
+    for row in get_reference_snapshot().events:
+        if (str(row.distance) == distance and row.stroke == stroke
+                and (row.course or "LCM").upper() == course.upper() and row.gender == gender.upper()):
+            return row.id
+    return None
+
+
+@router.get("/compare")
+async def compare(athletes: str, course: Optional[str] = None):
+    """
+    Head-to-head comparison of 2-6 athletes (comma-separated ids): common events with
+    each athlete's PB and season bests, races they swam together (same meet and event),
+    and win/loss/tie counts per pair.
+    """
+    athlete_ids = [athlete_id.strip() for athlete_id in athletes.split(",") if athlete_id.strip()]
+    if not 2 <= len(set(athlete_ids)) <= MAX_COMPARED_ATHLETES:
+        return {"athletes": [], "error": f"Pass between 2 and {MAX_COMPARED_ATHLETES} distinct athlete ids"}
+    conn = get_database_connection()
+    try:
+        return compare_athletes(conn, athlete_ids, course)
+    finally:
+        conn.close()
+
+
+@router.get("/rankings")
+async def get_rankings(
+    season: int,
+    event_id: Optional[str] = None,
+    event: Optional[str] = None,
+    course: str = "LCM",
+    gender: Optional[str] = None,
+    age_group: str = "OPEN",
+    nation: str = "ALL",
+    offset: int = 0,
+    limit: int = 50,
+):
+    """
+    National ranking of season bests for one event: age_group uses the /results/filtered
+    labels (OPEN, 13U, 15, 15-16, 17+) with age as of 31 December of the season;
+    nation is a country code (e.g. MAS) or ALL.
+    """
+    resolved = _resolve_event(event_id, event, course, gender)
+    if resolved is None:
+        return {"rankings": [], "total": 0, "error": "Unknown event (pass event_id, or event + course + gender)"}
+    try:
+        parse_age_group(age_group)
+    except ValueError as e:
+        return {"rankings": [], "total": 0, "error": str(e)}
+    limit = max(1, min(limit, 500))
+
+    athletes = get_reference_snapshot().athletes_by_id
+    conn = get_database_connection()
+    try:
+        page = RANKINGS.page(conn, resolved, season, age_group, nation, max(offset, 0), limit)
+    finally:
+        conn.close()
+
+    rankings = []
+    for rank, athlete_id, time_seconds in page["entries"]:
+        athlete = athletes.get(athlete_id)
+        rankings.append({
+            "rank": rank,
+            "athlete_id": athlete_id,
+            "name": athlete.full_name if athlete else None,
+            "club": athlete.club_name if athlete else None,
+            "nation": athlete.nation if athlete else None,
+            "time_seconds": time_seconds,
+            "time": format_seconds(time_seconds),
+        })
+    return {
+        "event_id": resolved,
+        "season": season,
+        "age_group": age_group,
+        "nation": nation,
+        "total": page["total"],
+        "offset": offset,
+        "rankings": rankings,
+    }
+
+
+@router.get("/rankings/athlete/{athlete_id}")
+async def get_athlete_ranking(
+    athlete_id: str,
+    season: int,
+    event_id: Optional[str] = None,
+    event: Optional[str] = None,
+    course: str = "LCM",
+    gender: Optional[str] = None,
+    age_group: str = "OPEN",
+    nation: str = "ALL",
+):
+    """Rank and percentile of one athlete's season best within the same ranking as /rankings."""
+    if event and not gender:
+        athlete = get_reference_snapshot().athletes_by_id.get(athlete_id)
+        gender = athlete.gender if athlete else None
+    resolved = _resolve_event(event_id, event, course, gender)
+    if resolved is None:
+        return {"athlete_id": athlete_id, "ranked": False, "error": "Unknown event (pass event_id, or event + course + gender)"}
+    try:
+        parse_age_group(age_group)
+    except ValueError as e:
+        return {"athlete_id": athlete_id, "ranked": False, "error": str(e)}
+
+    conn = get_database_connection()
+    try:
+        position = RANKINGS.rank_of(conn, athlete_id, resolved, season, age_group, nation)
+    finally:
+        conn.close()
+
+    if position is None:
+        return {"athlete_id": athlete_id, "event_id": resolved, "season": season, "ranked": False}
+    position["time"] = format_seconds(position["time_seconds"])
+    return {
+        "athlete_id": athlete_id,
+        "event_id": resolved,
+        "season": season,
+        "age_group": age_group,
+        "nation": nation,
+        "ranked": True,
+        **position,
+    }
+
+
+@router.get("/stats/distribution")
+async def get_performance_distribution(
+    event_id: Optional[str] = None,
+    event: Optional[str] = None,
+    course: str = "LCM",
+    gender: Optional[str] = None,
+    season: Optional[int] = None,
+    age: Optional[int] = None,
+    metric: str = "time",
+):
+    """
+    Distribution of athletes' best swims per age and season: count, mean, std, p10..p99
+    and histogram bins. metric is "time" (seconds) or "aqua" (AQUA points). Time rows also
+    carry the MAP base time for that age and the share of our population at or faster than it.
+    """
+    if metric not in ("time", "aqua"):
+        return {"rows": [], "count": 0, "error": "metric must be 'time' or 'aqua'"}
+    resolved = _resolve_event(event_id, event, course, gender)
+    if resolved is None:
+        return {"rows": [], "count": 0, "error": "Unknown event (pass event_id, or event + course + gender)"}
+
+    conn = get_database_connection()
+    try:
+        return DISTRIBUTION.get(conn, resolved, season, age, metric)
+    finally:
+        conn.close()
+
+
+@router.get("/mot/gaps")
+async def get_mot_gap_matrix(
+    season: int,
+    state: Optional[str] = None,
+    club: Optional[str] = None,
+    gender: Optional[str] = None,
+    course: str = "LCM",
+    min_age: int = 15,
+    max_age: int = 23,
+):
+    """
+    MOT gap matrix for a cohort (athletes x events) from season bests, ranked by each
+    athlete's best gap. gaps are AQUA points vs the MOT time (>= 0 is at or inside MOT);
+    time_gaps are seconds (negative is faster than MOT).
+    """
+    conn = get_database_connection()
+    try:
+        return MOT_GAPS.matrix(conn, season, state, club, gender, course, min_age, max_age)
+    finally:
+        conn.close()
+
+
+@router.get("/relays")
+async def get_relays(
+    meet_id: Optional[str] = None,
+    team: Optional[str] = None,
+    course: Optional[str] = None,
+    gender: Optional[str] = None,
+    stroke_kind: Optional[str] = None,
+    leg_distance: Optional[int] = None,
+    limit: int = 200,
+):
+    """Relay team results with their legs (swimmers and splits) where recorded."""
+    where, params = [], []
+    for column, value in (("meet_id", meet_id), ("course", course), ("gender", gender),
+                          ("stroke_kind", stroke_kind), ("leg_distance", leg_distance)):
+        if value is not None:
+            where.append(f"rr.{column} = ?")
+            params.append(value.upper() if column in ("course", "gender") else value)
+    if team:
+        where.append("UPPER(rr.team_name) LIKE ?")
+        params.append(f"%{team.upper()}%")
+
+    conn = get_database_connection()
+    try:
+        if not get_schema_capabilities(conn).has_table("relay_results"):
+            return {"relays": [], "count": 0}
+        rows = conn.execute(f"""
+            SELECT rr.id, rr.meet_id, rr.meet_name, rr.meet_date, rr.course, rr.gender, rr.leg_distance,
+                   rr.stroke_kind, rr.team_name, rr.state_code, rr.nation, rr.time_seconds, rr.time_string, rr.aqua_points
+            FROM relay_results rr
+            {"WHERE " + " AND ".join(where) if where else ""}
+            ORDER BY rr.meet_date DESC, rr.course, rr.gender, rr.stroke_kind, rr.leg_distance, rr.time_seconds
+            LIMIT ?
+        """, (*params, max(1, min(limit, 1000)))).fetchall()
+        legs = {}
+        ids = [row[0] for row in rows]
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            for leg in conn.execute(f"""
+                SELECT relay_result_id, leg_order, stroke, athlete_id, foreign_athlete_id, full_name, split_seconds
+                FROM relay_legs WHERE relay_result_id IN ({",".join("?" * len(chunk))})
+                ORDER BY relay_result_id, leg_order
+            """, chunk):
+                legs.setdefault(leg[0], []).append({
+                    "leg": leg[1], "stroke": leg[2], "athlete_id": leg[3], "foreign_athlete_id": leg[4],
+                    "name": leg[5], "split_seconds": leg[6],
+                })
+    finally:
+        conn.close()
+
+    relays = [
+        {
+            "id": row[0], "meet_id": row[1], "meet_name": row[2], "meet_date": row[3],
+            "event": f"{row[4]} 4x{row[6]} {row[7]} ({row[5]})",
+            "team": row[8], "state_code": row[9], "nation": row[10],
+            "time_seconds": row[11], "time": row[12], "aqua_points": row[13],
+            "legs": legs.get(row[0], []),
+        }
+        for row in rows
+    ]
+    return {"relays": relays, "count": len(relays)}
+
+
+@router.get("/relays/optimize")
+async def get_relay_lineups(
+    season: int,
+    gender: str,
+    stroke_kind: str = "Free",
+    leg_distance: int = 100,
+    course: str = "LCM",
+    teams: int = 1,
+    seasons: int = 1,
+    nation: str = "MAS",
+    club: Optional[str] = None,
+    state: Optional[str] = None,
+    min_age: Optional[int] = None,
+    max_age: Optional[int] = None,
+    takeover_seconds: float = 0.0,
+):
+    """
+    Fastest relay lineups (A, B, ... teams without shared swimmers) from individual season
+    bests and recorded relay splits. gender X builds mixed relays (2 men + 2 women);
+    seasons > 1 also uses earlier seasons' bests; takeover_seconds is the flying-start gain per leg.
+    """
+    if stroke_kind not in ("Free", "Medley") or leg_distance not in (50, 100, 200):
+        return {"lineups": [], "error": "stroke_kind must be Free or Medley and leg_distance 50, 100 or 200"}
+    conn = get_database_connection()
+    try:
+        return optimize_relay(
+            conn, season, gender, stroke_kind, leg_distance, course, min(max(teams, 1), 4), max(seasons, 1),
+            nation, club, state, min_age, max_age, takeover_seconds,
+        )
+    finally:
+        conn.close()
+
+
 @router.get("/results/stats")
 async def get_results_stats():
     """
@@ -670,6 +957,7 @@ async def get_results_stats():
 
 
 @router.get("/results/export-sxl-gf")
+@timed_job("export_sxl_gf")
 async def export_sxl_gf(
     meet_ids: str = None,
     genders: str = None,
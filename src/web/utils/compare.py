@@ -0,0 +1,160 @@
+"""
+Head-to-head comparison of a few athletes.
+
+All of the athletes' individual swims are read in one query that walks the
+idx_results_athlete_event_date index (athlete_id, event_id, meet_date). Everything else
+is derived in memory from those rows:
+  - per event: each athlete's PB and season bests,
+  - common events: events swum by at least two of the athletes,
+  - races: the same meet_id and event_id swum by two or more of them,
+  - win/loss counts per pair of athletes over those races.
+
+A race is decided on comp_place when both swimmers have one. Otherwise the faster time
+wins. Equal places or equal times are ties. When an athlete has several swims in one
+race (heats and final), their fastest swim is used.
+
+Usage:
+    from src.web.utils.compare import compare_athletes
+    compare_athletes(conn, ["id-a", "id-b", "id-c"], course="LCM")
+"""
+
+from itertools import combinations
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from scripts.convert_meets_to_sqlite_simple import get_reference_snapshot, get_schema_capabilities
+from .points import format_seconds
+
+MAX_COMPARED_ATHLETES = 6
+
+_SWIMS_SQL = """
+    SELECT r.athlete_id, r.event_id, r.meet_id, COALESCE(r.meet_date, m.meet_date) AS meet_date,
+           r.time_seconds, r.time_string, r.comp_place, r.aqua_points, m.meet_name
+    FROM results r
+    LEFT JOIN meets m ON r.meet_id = m.id
+    WHERE r.athlete_id IN ({placeholders})
+      AND r.time_seconds > 0
+      AND COALESCE(r.result_status, 'OK') = 'OK'
+      AND COALESCE(r.is_relay, 0) = 0
+    ORDER BY r.athlete_id, r.event_id, r.meet_date
+"""
+
+
+def _outcome(a: Tuple, b: Tuple) -> int:
+    """1 if swim a beat swim b, -1 if it lost, 0 for a tie; swims are (time_seconds, comp_place)."""
+    if a[1] and b[1]:
+        return (a[1] < b[1]) - (a[1] > b[1])
+    return (a[0] < b[0]) - (a[0] > b[0])
+
+
+def compare_athletes(conn, athlete_ids: Sequence[str], course: Optional[str] = None) -> Dict[str, Any]:
+    athlete_ids = list(dict.fromkeys(athlete_ids))  # keep order, drop repeats
+    get_schema_capabilities(conn)  # idx_results_athlete_event_date
+    snapshot = get_reference_snapshot()
+    events = {
+        event.id: event for event in snapshot.events
+        if course is None or (event.course or "LCM").upper() == course.upper()
+    }
+    rows = conn.execute(
+        _SWIMS_SQL.format(placeholders=", ".join("?" * len(athlete_ids))), athlete_ids
+    ).fetchall()
+
+    # event_id -> athlete_id -> {"pb": row, "seasons": {season: row}}
+    bests: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    # (meet_id, event_id) -> athlete_id -> fastest row in that race
+    races: Dict[Tuple[str, str], Dict[str, Tuple]] = {}
+    for row in rows:
+        athlete_id, event_id, meet_id, meet_date, seconds = row[:5]
+        if event_id not in events:
+            continue
+        entry = bests.setdefault(event_id, {}).setdefault(athlete_id, {"pb": None, "seasons": {}})
+        if entry["pb"] is None or seconds < entry["pb"][4]:
+            entry["pb"] = row
+        season = int(meet_date[:4]) if meet_date and meet_date[:4].isdigit() else None
+        if season is not None and (season not in entry["seasons"] or seconds < entry["seasons"][season][4]):
+            entry["seasons"][season] = row
+        if meet_id:
+            swims = races.setdefault((meet_id, event_id), {})
+            if athlete_id not in swims or seconds < swims[athlete_id][4]:
+                swims[athlete_id] = row
+
+    def swim(row: Tuple) -> Dict[str, Any]:
+        return {
+            "time_seconds": row[4],
+            "time": row[5] or format_seconds(row[4]),
+            "aqua_points": row[7],
+            "meet_id": row[2],
+            "meet_name": row[8],
+            "meet_date": row[3],
+        }
+
+    def label(event_id: str) -> str:
+        event = events[event_id]
+        return f"{event.course or 'LCM'} {event.distance}m {'IM' if event.stroke == 'Medley' else event.stroke} {event.gender}"
+
+    common_events = []
+    for event_id in sorted(bests, key=lambda e: (events[e].course or "", events[e].gender or "", events[e].stroke or "", events[e].distance or 0)):
+        by_athlete = bests[event_id]
+        if len(by_athlete) < 2:
+            continue
+        common_events.append({
+            "event_id": event_id,
+            "label": label(event_id),
+            "shared_by_all": len(by_athlete) == len(athlete_ids),
+            "athletes": {
+                athlete_id: {
+                    "pb": swim(entry["pb"]),
+                    "season_bests": {season: swim(row) for season, row in sorted(entry["seasons"].items())},
+                }
+                for athlete_id, entry in by_athlete.items()
+            },
+        })
+
+    head_to_head = {
+        f"{a}|{b}": {"athlete_a": a, "athlete_b": b, "wins_a": 0, "wins_b": 0, "ties": 0, "races": 0}
+        for a, b in combinations(athlete_ids, 2)
+    }
+    direct_races = []
+    for (meet_id, event_id), swims in races.items():
+        if len(swims) < 2:
+            continue
+        for a, b in combinations([athlete_id for athlete_id in athlete_ids if athlete_id in swims], 2):
+            outcome = _outcome((swims[a][4], swims[a][6]), (swims[b][4], swims[b][6]))
+            record = head_to_head[f"{a}|{b}"]
+            record["races"] += 1
+            record["wins_a" if outcome > 0 else "wins_b" if outcome < 0 else "ties"] += 1
+        any_swim = next(iter(swims.values()))
+        direct_races.append({
+            "meet_id": meet_id,
+            "meet_name": any_swim[8],
+            "meet_date": any_swim[3],
+            "event_id": event_id,
+            "label": label(event_id),
+            "results": sorted(
+                ({"athlete_id": athlete_id, "time_seconds": row[4], "time": row[5] or format_seconds(row[4]),
+                  "comp_place": row[6]} for athlete_id, row in swims.items()),
+                key=lambda r: (r["comp_place"] or 9999, r["time_seconds"]),
+            ),
+        })
+    direct_races.sort(key=lambda race: race["meet_date"] or "", reverse=True)
+
+    wanted = set(athlete_ids)
+    athletes_by_id = {row.id: row for row in snapshot.athletes if row.id in wanted}
+    athletes: List[Dict[str, Any]] = []
+    for athlete_id in athlete_ids:
+        athlete = athletes_by_id.get(athlete_id)
+        athletes.append({
+            "athlete_id": athlete_id,
+            "name": athlete.full_name if athlete else None,
+            "gender": athlete.gender if athlete else None,
+            "club": athlete.club_name if athlete else None,
+            "nation": athlete.nation if athlete else None,
+            "events_swum": sum(1 for by_athlete in bests.values() if athlete_id in by_athlete),
+        })
+
+    return {
+        "athletes": athletes,
+        "common_events": common_events,
+        "direct_races": direct_races,
+        "head_to_head": list(head_to_head.values()),
+        "swims_read": len(rows),
+    }
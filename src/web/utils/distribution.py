@@ -0,0 +1,211 @@
+"""
+Performance distribution statistics per (event, age, season).
+
+Each athlete (local or foreign) counts once per event, age and season, with their best
+swim. For each of those populations the job stores count, mean, std, min/max, p10..p99
+and a histogram for time_seconds and for AQUA points in the performance_distribution
+table. Histogram edges are shared across ages within an event and season so one chart
+can overlay ages.
+
+Results triggers queue touched (event_id, season) partitions; refresh only recomputes
+those. The queue is drained by the admin upload paths after they insert, by the admin
+refresh job and by a background task started with the web app; reads only serve stored
+statistics. Query results are cached in-process until a refresh changes their event.
+
+Usage:
+    from src.web.utils.distribution import DISTRIBUTION, refresh_performance_distribution
+
+    refresh_performance_distribution(conn)             # dirty partitions only
+    refresh_performance_distribution(conn, full=True)  # everything
+    DISTRIBUTION.get(conn, event_id, season=2025, metric="time")
+"""
+
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from scripts.convert_meets_to_sqlite_simple import (
+    DISTRIBUTION_PERCENTILES,
+    count_cache,
+    get_reference_snapshot,
+    get_schema_capabilities,
+)
+from .points import event_key, get_points_calculator
+
+HISTOGRAM_BINS = 20
+
+# Best swim per athlete and age for one event and season
+_POPULATION_SQL = """
+    SELECT COALESCE(r.year_age, r.day_age) AS age, MIN(r.time_seconds), MAX(r.aqua_points)
+    FROM results r
+    LEFT JOIN meets m ON r.meet_id = m.id
+    WHERE r.event_id = ?
+      AND substr(COALESCE(r.meet_date, m.meet_date), 1, 4) = ?
+      AND r.time_seconds > 0
+      AND COALESCE(r.result_status, 'OK') = 'OK'
+      AND COALESCE(r.is_relay, 0) = 0
+      AND COALESCE(r.year_age, r.day_age) IS NOT NULL
+      AND COALESCE(r.athlete_id, r.foreign_athlete_id) IS NOT NULL
+    GROUP BY COALESCE(r.athlete_id, r.foreign_athlete_id), age
+"""
+
+_COLUMNS = (
+    ["event_id", "gender", "age", "season", "metric", "count", "mean", "std", "min", "max"]
+    + [f"p{p}" for p in DISTRIBUTION_PERCENTILES]
+    + ["histogram", "computed_at"]
+)
+
+
+def summarize_by_age(ages: np.ndarray, values: np.ndarray, decimals: int) -> List[Tuple[int, List[Any]]]:
+    """(age, [count, mean, std, min, max, p10..p99, histogram json]) per age; NaN values dropped."""
+    keep = np.isfinite(values)
+    ages, values = ages[keep], values[keep]
+    if not len(values):
+        return []
+    edges = np.histogram_bin_edges(values, bins=HISTOGRAM_BINS)
+    order = np.argsort(ages, kind="stable")
+    ages, values = ages[order], values[order]
+    unique_ages, starts = np.unique(ages, return_index=True)
+    out = []
+    for age, group in zip(unique_ages.tolist(), np.split(values, starts[1:])):
+        counts, _ = np.histogram(group, bins=edges)
+        percentiles = np.percentile(group, DISTRIBUTION_PERCENTILES)
+        histogram = {"edges": np.round(edges, decimals).tolist(), "counts": counts.tolist()}
+        out.append((int(age), [
+            int(len(group)),
+            round(float(group.mean()), decimals),
+            round(float(group.std()), decimals),
+            round(float(group.min()), decimals),
+            round(float(group.max()), decimals),
+            *[round(float(p), decimals) for p in percentiles],
+            json.dumps(histogram, separators=(",", ":")),
+        ]))
+    return out
+
+
+def compute_partition(conn: sqlite3.Connection, event_id: str, season: int, gender: Optional[str]) -> List[Tuple]:
+    rows = conn.execute(_POPULATION_SQL, (event_id, str(season))).fetchall()
+    if not rows:
+        return []
+    ages = np.array([row[0] for row in rows], dtype=np.int64)
+    computed_at = datetime.now().isoformat(timespec="seconds")
+    out = []
+    for metric, column, decimals in (("time", 1, 2), ("aqua", 2, 1)):
+        values = np.array([np.nan if row[column] is None else row[column] for row in rows], dtype=float)
+        for age, stats in summarize_by_age(ages, values, decimals):
+            out.append((event_id, gender, age, season, metric, *stats, computed_at))
+    return out
+
+
+def refresh_performance_distribution(conn: sqlite3.Connection, full: bool = False) -> int:
+    """Recompute queued (event_id, season) partitions (all of them with full=True).
+
+    Each partition is replaced in its own short transaction. Returns the number recomputed.
+    """
+    get_schema_capabilities(conn)  # distribution table, queue and triggers
+    if full:
+        with conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO performance_distribution_dirty (event_id, season) "
+                "SELECT DISTINCT r.event_id, CAST(substr(COALESCE(r.meet_date, m.meet_date), 1, 4) AS INTEGER) "
+                "FROM results r LEFT JOIN meets m ON r.meet_id = m.id WHERE r.event_id IS NOT NULL"
+            )
+    dirty = conn.execute("SELECT event_id, season FROM performance_distribution_dirty").fetchall()
+    if not dirty:
+        return 0
+    genders = {event.id: event.gender for event in get_reference_snapshot().events}
+    insert = (
+        f"INSERT INTO performance_distribution ({', '.join(_COLUMNS)}) "
+        f"VALUES ({', '.join('?' * len(_COLUMNS))})"
+    )
+    for event_id, season in dirty:
+        rows = compute_partition(conn, event_id, season, genders.get(event_id)) if season else []
+        with conn:
+            conn.execute("DELETE FROM performance_distribution WHERE event_id = ? AND season = ?", (event_id, season))
+            conn.executemany(insert, rows)
+            conn.execute(
+                "DELETE FROM performance_distribution_dirty WHERE event_id = ? AND season = ?", (event_id, season)
+            )
+    DISTRIBUTION.invalidate({event_id for event_id, _ in dirty})
+    print(f"[Distribution] Recomputed {len(dirty)} event/season partitions", flush=True)
+    return len(dirty)
+
+
+def _share_at_or_faster(base_seconds: float, row: Dict[str, Any]) -> Optional[float]:
+    """Approximate % of the population at or faster than base_seconds, from stored percentiles."""
+    points = [row[f"p{p}"] for p in DISTRIBUTION_PERCENTILES]
+    if base_seconds < row["min"]:
+        return 0.0
+    if base_seconds >= row["max"]:
+        return 100.0
+    xs = [row["min"], *points, row["max"]]
+    ys = [0.0, *DISTRIBUTION_PERCENTILES, 100.0]
+    return round(float(np.interp(base_seconds, xs, ys)), 1)
+
+
+class DistributionCache:
+    def __init__(self):
+        self._entries: Dict[Tuple[str, Optional[int], Optional[int], str], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def invalidate(self, event_ids: Optional[set] = None) -> None:
+        with self._lock:
+            if event_ids is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[0] in event_ids]:
+                    del self._entries[key]
+
+    def get(self, conn: sqlite3.Connection, event_id: str, season: Optional[int] = None,
+            age: Optional[int] = None, metric: str = "time") -> Dict[str, Any]:
+        key = (event_id, season, age, metric)
+        with self._lock:
+            cached = self._entries.get(key)
+        count_cache("performance_distribution", hit=cached is not None)
+        if cached is not None:
+            return cached
+
+        where, params = ["event_id = ?", "metric = ?"], [event_id, metric]
+        if season is not None:
+            where.append("season = ?")
+            params.append(season)
+        if age is not None:
+            where.append("age = ?")
+            params.append(age)
+        cursor = conn.execute(
+            f"SELECT {', '.join(_COLUMNS)} FROM performance_distribution "
+            f"WHERE {' AND '.join(where)} ORDER BY season, age",
+            params,
+        )
+        rows = [dict(zip(_COLUMNS, row)) for row in cursor.fetchall()]
+        for row in rows:
+            row["histogram"] = json.loads(row["histogram"]) if row["histogram"] else None
+
+        if metric == "time" and rows:
+            # Where do the MAP base times (from USA tables) fall in our own population?
+            event = next((e for e in get_reference_snapshot().events if e.id == event_id), None)
+            if event is not None:
+                key_id = event_key(event.course, event.stroke, event.distance, event.gender)
+                base = get_points_calculator(conn).map.lookup(
+                    [key_id] * len(rows),
+                    np.array([row["age"] for row in rows], dtype=np.int64),
+                    np.array([row["season"] for row in rows], dtype=np.int64),
+                )
+                for row, seconds in zip(rows, base.tolist()):
+                    row["map_base_seconds"] = None if np.isnan(seconds) else seconds
+                    row["map_base_share_at_or_faster"] = (
+                        None if np.isnan(seconds) else _share_at_or_faster(seconds, row)
+                    )
+
+        payload = {"event_id": event_id, "metric": metric, "percentiles": list(DISTRIBUTION_PERCENTILES),
+                   "rows": rows, "count": len(rows)}
+        with self._lock:
+            self._entries[key] = payload
+        return payload
+
+
+DISTRIBUTION = DistributionCache()
@@ -0,0 +1,224 @@
+"""
+Request and job metrics exposed at /metrics in Prometheus text format.
+
+No prometheus_client dependency - the handful of counters, gauges and histograms
+the API needs are kept in-process and rendered on scrape.
+
+Usage:
+    from src.web.utils.metrics import METRICS, observe_job
+
+    with observe_job("upload"):
+        ...
+
+    @router.get("/admin/results/export-excel")
+    @timed_job("export_results")
+    async def export_results_excel(): ...
+
+The request middleware in main.py calls `request_started()` / `request_finished()`;
+SQL statements are attributed to the current request through the SQL observer hook
+on connections from `get_database_connection()`.
+"""
+
+import functools
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+from starlette.routing import Match
+
+from scripts.convert_meets_to_sqlite_simple import CACHE_STATS, add_sql_observer
+
+# Seconds; covers cached snapshot reads (~ms) through full Excel exports (~minutes)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+JOB_BUCKETS = (0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+SQL_COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250, 1000)
+
+Labels = Tuple[str, ...]
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, label_names: Labels, buckets: Tuple[float, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series: Dict[Labels, List[float]] = {}  # per-bucket counts + [sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Labels, value: float) -> None:
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0.0] * (len(self.buckets) + 2)
+            series[bisect_left(self.buckets, value)] += 1  # index len(buckets) = +Inf only
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((labels, list(series)) for labels, series in self._series.items())
+        for labels, series in items:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = _format_labels(self.label_names + ("le",), labels + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{le} {_format_value(cumulative)}")
+            le = _format_labels(self.label_names + ("le",), labels + ("+Inf",))
+            lines.append(f"{self.name}_bucket{le} {_format_value(series[-1])}")
+            base = _format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{base} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{base} {_format_value(series[-1])}")
+        return lines
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, label_names: Labels):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Labels, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, labels: Labels, amount: float = 1.0) -> None:
+        self.inc(labels, -amount)
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _format_labels(names: Labels, values: Labels) -> str:
+    if not names:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in values)
+    return "{" + ",".join(f'{n}="{v}"' for n, v in zip(names, escaped)) + "}"
+
+
+class RequestStats:
+    """SQL work attributed to one in-flight request (shared with its worker thread)."""
+
+    __slots__ = ("route", "statements", "sql_seconds")
+
+    def __init__(self, route: str):
+        self.route = route
+        self.statements = 0
+        self.sql_seconds = 0.0
+
+
+CURRENT_REQUEST: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+class Metrics:
+    def __init__(self):
+        self.request_seconds = Histogram(
+            "http_request_duration_seconds", "Request latency by route template",
+            ("method", "route", "status"), LATENCY_BUCKETS,
+        )
+        self.in_flight = Gauge("http_requests_in_flight", "Requests currently being served", ("method", "route"))
+        self.sql_statements = Counter("sql_statements_total", "SQL statements executed", ("route",))
+        self.sql_seconds = Counter("sql_seconds_total", "Time spent executing SQL", ("route",))
+        self.sql_per_request = Histogram(
+            "sql_statements_per_request", "SQL statements issued by one request", ("route",), SQL_COUNT_BUCKETS,
+        )
+        self.job_seconds = Histogram("job_duration_seconds", "Upload and export job duration", ("job", "outcome"), JOB_BUCKETS)
+        self.started_at = time.time()
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in (self.request_seconds, self.in_flight, self.sql_statements, self.sql_seconds,
+                       self.sql_per_request, self.job_seconds):
+            lines.extend(metric.render())
+        lines.append("# HELP cache_requests_total Cache lookups by outcome")
+        lines.append("# TYPE cache_requests_total counter")
+        for (cache, outcome), value in sorted(CACHE_STATS.items()):
+            lines.append(f"cache_requests_total{_format_labels(('cache', 'outcome'), (cache, outcome))} {value}")
+        lines.append("# HELP process_start_time_seconds Start time of the API process")
+        lines.append("# TYPE process_start_time_seconds gauge")
+        lines.append(f"process_start_time_seconds {self.started_at:.3f}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Metrics()
+
+
+def _record_sql(sql: str, parameters: Any, seconds: float) -> None:
+    stats = CURRENT_REQUEST.get()
+    route = stats.route if stats is not None else "(background)"
+    if stats is not None:
+        stats.statements += 1
+        stats.sql_seconds += seconds
+    METRICS.sql_statements.inc((route,))
+    METRICS.sql_seconds.inc((route,), seconds)
+
+
+add_sql_observer(_record_sql)
+
+
+def resolve_route(app: Any, scope: Dict[str, Any]) -> str:
+    """Route template for a request (e.g. /api/meets/{meet_id}) so label values stay bounded."""
+    for route in app.router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", scope.get("path", ""))
+    return "(unmatched)"
+
+
+def request_started(method: str, route: str) -> RequestStats:
+    stats = RequestStats(route)
+    CURRENT_REQUEST.set(stats)
+    METRICS.in_flight.inc((method, route))
+    return stats
+
+
+def request_finished(method: str, stats: RequestStats, status: int, seconds: float) -> None:
+    METRICS.in_flight.dec((method, stats.route))
+    METRICS.request_seconds.observe((method, stats.route, str(status)), seconds)
+    METRICS.sql_per_request.observe((stats.route,), stats.statements)
+
+
+@contextmanager
+def observe_job(job: str) -> Iterator[None]:
+    """Record the duration of an upload/export job, labelled ok or error."""
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        METRICS.job_seconds.observe((job, outcome), time.perf_counter() - started)
+
+
+def timed_job(job: str) -> Callable[[Callable[..., Awaitable[Any]]], Callable[..., Awaitable[Any]]]:
+    """Decorator form of observe_job for async endpoints (signature is preserved for FastAPI)."""
+
+    def decorator(func: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with observe_job(job):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,191 @@
+"""
+Set-based MOT gap analytics for whole cohorts.
+
+A cohort is every athlete matching a state / club / gender / age-range filter. Their
+season bests come from athlete_progression in one query. AQUA points, MOT time, MOT AQUA
+and the gap are then computed for all of them at once with the batch PointsCalculator,
+and pivoted into an athletes x events matrix ranked by each athlete's best gap.
+
+Age is the age on 31 December of the season, as in the rankings. Gap is athlete AQUA
+minus the AQUA of the MOT time, so >= 0 means at or inside MOT.
+
+Matrices are cached per (cohort, season). A progression refresh that touches the
+season, a new reference snapshot or a reloaded points calculator drops them.
+
+Usage:
+    from src.web.utils.mot_gaps import MOT_GAPS
+    MOT_GAPS.matrix(conn, 2025, state="SEL", min_age=15, max_age=23)
+"""
+
+import threading
+import time
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from scripts.convert_meets_to_sqlite_simple import (
+    add_progression_listener,
+    count_cache,
+    get_reference_snapshot,
+    normalize_state_code,
+)
+from .points import event_key, get_points_calculator
+
+STROKE_ORDER = {"Free": 1, "Back": 2, "Breast": 3, "Fly": 4, "Medley": 5}
+MAX_CACHED_COHORTS = 256
+
+
+class Cohort(NamedTuple):
+    season: int
+    course: str
+    state: Optional[str]
+    club: Optional[str]
+    gender: Optional[str]
+    min_age: int
+    max_age: int
+
+
+class MotGapEngine:
+    def __init__(self):
+        self._cache: Dict[Tuple[Cohort, int, int], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        add_progression_listener(self._on_progression_changes)
+
+    def _on_progression_changes(self, changes: Dict[Tuple[str, str, int], Optional[float]]) -> None:
+        seasons = {season for _, _, season in changes}
+        with self._lock:
+            for key in [key for key in self._cache if key[0].season in seasons]:
+                del self._cache[key]
+
+    def _cohort_athletes(self, cohort: Cohort) -> Dict[str, Tuple[Any, int, Optional[str]]]:
+        """athlete_id -> (AthleteRow, age, state) for Malaysian athletes in the cohort."""
+        snapshot = get_reference_snapshot()
+        club_states: Dict[str, Optional[str]] = {}
+        for club in snapshot.clubs:
+            club_states.setdefault(club.name, club.state_code)
+            club_states.setdefault(club.club_name, club.state_code)
+        members = {}
+        for athlete in snapshot.athletes:
+            if athlete.is_foreign or not athlete.birthdate[:4].isdigit():
+                continue
+            if cohort.gender and (athlete.gender or "").upper() != cohort.gender:
+                continue
+            if cohort.club and (athlete.club_name or "").upper() != cohort.club:
+                continue
+            state = club_states.get(athlete.club_name or "")
+            if cohort.state and state != cohort.state:
+                continue
+            age = cohort.season - int(athlete.birthdate[:4])
+            if cohort.min_age <= age <= cohort.max_age:
+                members[athlete.id] = (athlete, age, state)
+        return members
+
+    def _build(self, conn, cohort: Cohort) -> Dict[str, Any]:
+        members = self._cohort_athletes(cohort)
+        events = {
+            event.id: event for event in get_reference_snapshot().events
+            if (event.course or "LCM").upper() == cohort.course
+        }
+        rows = [
+            row for row in conn.execute(
+                "SELECT athlete_id, event_id, time_seconds FROM athlete_progression WHERE season = ?",
+                (cohort.season,),
+            )
+            if row[0] in members and row[1] in events
+        ]
+        empty = {"events": [], "athletes": [], "gaps": [], "time_gaps": []}
+        if not rows:
+            return empty
+
+        athlete_ids = np.array([row[0] for row in rows])
+        event_keys = [
+            event_key(events[row[1]].course, events[row[1]].stroke, events[row[1]].distance, events[row[1]].gender)
+            for row in rows
+        ]
+        ages = [members[row[0]][1] for row in rows]
+        times = np.array([row[2] for row in rows], dtype=float)
+
+        calculator = get_points_calculator(conn)
+        aqua = calculator.aqua_points(event_keys, times, [cohort.season] * len(rows))
+        mot_time, _, gap = calculator.mot(event_keys, ages, aqua)
+        has_mot = np.isfinite(mot_time) & np.isfinite(gap)
+        if not has_mot.any():
+            return empty
+
+        keys = np.array(event_keys)[has_mot]
+        athlete_ids, gap, time_gap = athlete_ids[has_mot], gap[has_mot], (times - mot_time)[has_mot]
+        athlete_axis, athlete_index = np.unique(athlete_ids, return_inverse=True)
+        event_axis, event_index = np.unique(keys, return_inverse=True)
+
+        gaps = np.full((len(athlete_axis), len(event_axis)), np.nan)
+        time_gaps = np.full_like(gaps, np.nan)
+        gaps[athlete_index, event_index] = gap
+        time_gaps[athlete_index, event_index] = time_gap
+
+        # Columns in the usual stroke/distance order, rows by best gap (closest to or furthest inside MOT first)
+        def event_sort(key: str) -> Tuple:
+            course, stroke, distance, gender = key.split("_")
+            return gender, STROKE_ORDER.get(stroke, 9), int(distance)
+
+        column_order = sorted(range(len(event_axis)), key=lambda i: event_sort(event_axis[i]))
+        gaps, time_gaps, event_axis = gaps[:, column_order], time_gaps[:, column_order], event_axis[column_order]
+        best = np.nanmax(gaps, axis=1)
+        row_order = np.lexsort((athlete_axis, -best))
+        gaps, time_gaps, athlete_axis, best = gaps[row_order], time_gaps[row_order], athlete_axis[row_order], best[row_order]
+        at_or_inside = (gaps >= 0).sum(axis=1)
+
+        athletes = []
+        for rank, (athlete_id, best_gap, inside) in enumerate(zip(athlete_axis.tolist(), best.tolist(), at_or_inside.tolist()), 1):
+            athlete, age, state = members[athlete_id]
+            athletes.append({
+                "rank": rank,
+                "athlete_id": athlete_id,
+                "name": athlete.full_name,
+                "gender": athlete.gender,
+                "age": age,
+                "club": athlete.club_name,
+                "state": state,
+                "best_gap": int(best_gap),
+                "events_at_or_inside_mot": inside,
+            })
+        return {
+            "events": [
+                {"event_id": key, "label": f"{key.split('_')[2]}m {key.split('_')[1].replace('Medley', 'IM')} {key.split('_')[3]}"}
+                for key in event_axis.tolist()
+            ],
+            "athletes": athletes,
+            # Row per athlete, column per event; None where the athlete has no swim with a MOT
+            "gaps": [[None if np.isnan(v) else int(v) for v in row] for row in gaps.tolist()],
+            "time_gaps": [[None if np.isnan(v) else round(v, 2) for v in row] for row in time_gaps.tolist()],
+        }
+
+    def matrix(self, conn, season: int, state: Optional[str] = None, club: Optional[str] = None,
+               gender: Optional[str] = None, course: str = "LCM", min_age: int = 15, max_age: int = 23) -> Dict[str, Any]:
+        cohort = Cohort(
+            season=season,
+            course=course.upper(),
+            state=normalize_state_code(state.upper()) if state else None,
+            club=club.strip().upper() if club else None,
+            gender=gender.upper()[:1] if gender else None,
+            min_age=min_age,
+            max_age=max_age,
+        )
+        key = (cohort, get_reference_snapshot().generation, id(get_points_calculator(conn)))
+        with self._lock:
+            cached = self._cache.get(key)
+        count_cache("mot_gaps", hit=cached is not None)
+        if cached is not None:
+            return cached
+
+        started = time.perf_counter()
+        payload = {"cohort": cohort._asdict(), **self._build(conn, cohort)}
+        payload["count"] = len(payload["athletes"])
+        payload["build_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        with self._lock:
+            if len(self._cache) >= MAX_CACHED_COHORTS:
+                self._cache.pop(next(iter(self._cache)))
+            self._cache[key] = payload
+        return payload
+
+
+MOT_GAPS = MotGapEngine()
@@ -0,0 +1,356 @@
+"""
+Batch points calculator for AQUA, MAP and MOT.
+
+All three use points = 1000 x (base_time / time)^3. Instead of one base-time query per
+result, the base tables are loaded once into sorted NumPy key arrays and whole result
+sets are priced with vectorized lookups. Missing base times and invalid times
+(None, zero, negative) come back as NaN.
+
+Base tables (event ids are "{course}_{stroke}_{distance}_{gender}", e.g. "LCM_Free_100_M"):
+    aqua_base_times(event_id, base_time_seconds, competition_year)
+    map_base_times(event_id, age, base_time_seconds, competition_year)
+    mot_base_times(mot_event_id, mot_age, mot_time_seconds)
+
+Usage:
+    from src.web.utils.points import get_points_calculator, points_list
+
+    calc = get_points_calculator(conn)
+    aqua = calc.aqua_points(event_ids, times, years)
+    map_pts = calc.map_points(event_ids, ages, times, years)
+    mot_time, mot_aqua, mot_gap = calc.mot(event_ids, ages, aqua)
+    rows_points = points_list(aqua)  # -> [int | None, ...] for JSON / SQLite
+
+    recompute_aqua_points(conn, course="LCM", year=2025, dry_run=True)  # diff summary only
+"""
+
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from scripts.convert_meets_to_sqlite_simple import get_database_connection, get_schema_capabilities
+
+NO_AGE = -1
+NO_YEAR = -1
+
+
+def event_key(course: Optional[str], stroke: Optional[str], distance: Any, gender: Optional[str]) -> str:
+    """Base-table event id for an event, e.g. ("LCM", "Free", 100, "M") -> "LCM_Free_100_M"."""
+    return f"{(course or 'LCM').upper()}_{stroke}_{int(distance)}_{(gender or '').upper()[:1]}"
+
+
+def _as_float(values: Sequence[Any]) -> np.ndarray:
+    return np.array([np.nan if v is None else v for v in values], dtype=float)
+
+
+def _as_int(values: Optional[Sequence[Any]], size: int, missing: int) -> np.ndarray:
+    if values is None:
+        return np.full(size, missing, dtype=np.int64)
+    return np.array([missing if v is None else int(v) for v in values], dtype=np.int64)
+
+
+def points_from_base(base_seconds: np.ndarray, times: np.ndarray) -> np.ndarray:
+    """1000 x (base/time)^3, floored; NaN where either side is missing or time <= 0."""
+    valid = np.isfinite(base_seconds) & np.isfinite(times) & (times > 0) & (base_seconds > 0)
+    points = np.full(times.shape, np.nan)
+    points[valid] = np.floor(1000.0 * (base_seconds[valid] / times[valid]) ** 3)
+    return points
+
+
+def points_list(values: np.ndarray) -> List[Optional[int]]:
+    """NaN-masked float array -> list of int/None."""
+    return [None if np.isnan(v) else int(v) for v in values.tolist()]
+
+
+def format_seconds(seconds: float) -> str:
+    minutes = int(seconds // 60)
+    secs = seconds % 60
+    return f"{minutes}:{secs:05.2f}" if minutes > 0 else f"{secs:.2f}"
+
+
+class BaseTimeLookup:
+    """Sorted (event, age, year) -> base seconds table with vectorized lookup.
+
+    A query matches its own competition year first and falls back to the most recent
+    year on file for the same event and age.
+    """
+
+    def __init__(self, event_ids: Sequence[str], ages: Sequence[int], years: Sequence[int], seconds: Sequence[float]):
+        self.events = np.unique(np.array(event_ids, dtype=str)) if len(event_ids) else np.array([], dtype=str)
+        codes = self._codes(np.array(event_ids, dtype=str))
+        ages_arr = np.asarray(ages, dtype=np.int64)
+        years_arr = np.asarray(years, dtype=np.int64)
+        seconds_arr = np.asarray(seconds, dtype=float)
+
+        exact = self._key(codes, ages_arr, years_arr)
+        order = np.argsort(exact, kind="stable")
+        self._exact_keys = exact[order]
+        self._exact_seconds = seconds_arr[order]
+
+        # Latest year per (event, age): sort by (event, age, year) and keep the last of each run
+        pair = self._key(codes, ages_arr, np.zeros_like(years_arr))
+        order = np.lexsort((years_arr, pair))
+        pair_sorted = pair[order]
+        last = np.append(pair_sorted[1:] != pair_sorted[:-1], True) if len(pair_sorted) else np.array([], dtype=bool)
+        self._latest_keys = pair_sorted[last]
+        self._latest_seconds = seconds_arr[order][last]
+
+    def __len__(self) -> int:
+        return len(self._exact_keys)
+
+    @staticmethod
+    def _key(codes: np.ndarray, ages: np.ndarray, years: np.ndarray) -> np.ndarray:
+        # codes < 2^31, ages + 1 < 2^8, years + 1 < 2^14
+        return (codes << 22) | ((ages + 1) << 14) | (years + 1)
+
+    def _codes(self, event_ids: np.ndarray) -> np.ndarray:
+        if not len(self.events):
+            return np.full(len(event_ids), -1, dtype=np.int64)
+        idx = np.searchsorted(self.events, event_ids)
+        idx = np.clip(idx, 0, len(self.events) - 1)
+        return np.where(self.events[idx] == event_ids, idx, -1).astype(np.int64)
+
+    @staticmethod
+    def _search(keys: np.ndarray, values: np.ndarray, query: np.ndarray) -> np.ndarray:
+        out = np.full(query.shape, np.nan)
+        if not len(keys):
+            return out
+        idx = np.clip(np.searchsorted(keys, query), 0, len(keys) - 1)
+        hit = keys[idx] == query
+        out[hit] = values[idx[hit]]
+        return out
+
+    def lookup(self, event_ids: Sequence[str], ages: np.ndarray, years: np.ndarray) -> np.ndarray:
+        codes = self._codes(np.array(event_ids, dtype=str))
+        known = codes >= 0
+        out = np.full(len(codes), np.nan)
+        if not known.any():
+            return out
+        codes, ages, years = codes[known], ages[known], years[known]
+        found = self._search(self._exact_keys, self._exact_seconds, self._key(codes, ages, years))
+        missing = np.isnan(found)
+        if missing.any():
+            latest_query = self._key(codes[missing], ages[missing], np.zeros(missing.sum(), dtype=np.int64))
+            found[missing] = self._search(self._latest_keys, self._latest_seconds, latest_query)
+        out[known] = found
+        return out
+
+
+class PointsCalculator:
+    def __init__(self, aqua: BaseTimeLookup, map_: BaseTimeLookup, mot: BaseTimeLookup):
+        self.aqua = aqua
+        self.map = map_
+        self.mot_base = mot
+
+    @classmethod
+    def load(cls, conn: sqlite3.Connection) -> "PointsCalculator":
+        schema = get_schema_capabilities(conn)
+        cursor = conn.cursor()
+
+        def rows(table: str, sql: str) -> List[Tuple]:
+            return cursor.execute(sql).fetchall() if schema.has_table(table) else []
+
+        aqua = rows("aqua_base_times", """
+            SELECT event_id, competition_year, base_time_seconds FROM aqua_base_times
+            WHERE event_id IS NOT NULL AND base_time_seconds > 0
+        """)
+        map_rows = rows("map_base_times", """
+            SELECT event_id, age, competition_year, base_time_seconds FROM map_base_times
+            WHERE event_id IS NOT NULL AND age IS NOT NULL AND base_time_seconds > 0
+        """)
+        mot = rows("mot_base_times", """
+            SELECT mot_event_id, mot_age, mot_time_seconds FROM mot_base_times
+            WHERE mot_event_id IS NOT NULL AND mot_time_seconds > 0
+        """)
+        return cls(
+            BaseTimeLookup([r[0] for r in aqua], [NO_AGE] * len(aqua),
+                           [r[1] or NO_YEAR for r in aqua], [r[2] for r in aqua]),
+            BaseTimeLookup([r[0] for r in map_rows], [int(r[1]) for r in map_rows],
+                           [r[2] or NO_YEAR for r in map_rows], [r[3] for r in map_rows]),
+            BaseTimeLookup([r[0] for r in mot], [int(r[1]) for r in mot],
+                           [NO_YEAR] * len(mot), [r[2] for r in mot]),
+        )
+
+    def aqua_points(self, event_ids: Sequence[str], times: Sequence[Any],
+                    years: Optional[Sequence[Any]] = None) -> np.ndarray:
+        n = len(event_ids)
+        base = self.aqua.lookup(event_ids, np.full(n, NO_AGE, dtype=np.int64), _as_int(years, n, NO_YEAR))
+        return points_from_base(base, _as_float(times))
+
+    def map_points(self, event_ids: Sequence[str], ages: Sequence[Any], times: Sequence[Any],
+                   years: Optional[Sequence[Any]] = None) -> np.ndarray:
+        n = len(event_ids)
+        base = self.map.lookup(event_ids, _as_int(ages, n, NO_AGE), _as_int(years, n, NO_YEAR))
+        return points_from_base(base, _as_float(times))
+
+    def mot(self, event_ids: Sequence[str], ages: Sequence[Any],
+            aqua_points: Sequence[Any]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(MOT time seconds, AQUA points of the MOT time, athlete AQUA - MOT AQUA); NaN where no MOT."""
+        n = len(event_ids)
+        mot_time = self.mot_base.lookup(event_ids, _as_int(ages, n, NO_AGE), np.full(n, NO_YEAR, dtype=np.int64))
+        mot_aqua = self.aqua_points(event_ids, mot_time)
+        return mot_time, mot_aqua, _as_float(aqua_points) - mot_aqua
+
+
+_CALCULATOR: Optional[PointsCalculator] = None
+_CALCULATOR_LOCK = threading.Lock()
+
+
+def get_points_calculator(conn: Optional[sqlite3.Connection] = None) -> PointsCalculator:
+    """Process-wide calculator; rebuilt after invalidate_points_calculator()."""
+    global _CALCULATOR
+    calculator = _CALCULATOR
+    if calculator is not None:
+        return calculator
+    with _CALCULATOR_LOCK:
+        if _CALCULATOR is None:
+            own_conn = conn is None
+            conn = conn or get_database_connection()
+            try:
+                _CALCULATOR = PointsCalculator.load(conn)
+            finally:
+                if own_conn:
+                    conn.close()
+        return _CALCULATOR
+
+
+def invalidate_points_calculator() -> None:
+    """Call after writing aqua/map/mot base times."""
+    global _CALCULATOR
+    _CALCULATOR = None
+
+
+def reset_caches() -> None:
+    """Drop every process-level cache in this module (currently just the calculator)."""
+    invalidate_points_calculator()
+
+
+# --------------------------------------------------------------------------- #
+# Bulk AQUA recompute
+# --------------------------------------------------------------------------- #
+
+RECOMPUTE_SAMPLE_SIZE = 20
+
+
+def recompute_aqua_points(
+    conn: sqlite3.Connection,
+    course: Optional[str] = None,
+    year: Optional[int] = None,
+    event_ids: Optional[Sequence[str]] = None,
+    dry_run: bool = True,
+    chunk_size: int = 5000,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """Re-price stored results.aqua_points against the current aqua_base_times.
+
+    Scope: individual OK results with a time, optionally narrowed to a course, a meet
+    year and base-table event ids ("LCM_Free_100_M"). Results are read in rowid
+    keyset pages so no read transaction stays open; each page's changes are written
+    with one executemany in its own short transaction (WAL readers are never blocked).
+    Results whose event has no base time are left untouched and counted as unpriced.
+    With dry_run=True nothing is written and the summary describes the diff.
+    """
+    calculator = PointsCalculator.load(conn)
+    wanted = set(event_ids) if event_ids else None
+    filters = ["r.rowid > ?", "COALESCE(r.is_relay, 0) = 0", "r.time_seconds > 0",
+               "COALESCE(r.result_status, 'OK') = 'OK'"]
+    params: List[Any] = []
+    if course:
+        filters.append("UPPER(COALESCE(r.meet_course, e.event_course, 'LCM')) = ?")
+        params.append(course.upper())
+    if year:
+        filters.append("substr(COALESCE(r.meet_date, m.meet_date), 1, 4) = ?")
+        params.append(str(year))
+    sql = f"""
+        SELECT r.rowid, r.id, COALESCE(r.meet_course, e.event_course), e.event_stroke, e.event_distance,
+               e.gender, r.time_seconds, r.aqua_points, substr(COALESCE(r.meet_date, m.meet_date), 1, 4)
+        FROM results r
+        JOIN events e ON r.event_id = e.id
+        LEFT JOIN meets m ON r.meet_id = m.id
+        WHERE {' AND '.join(filters)}
+        ORDER BY r.rowid
+        LIMIT ?
+    """
+    summary: Dict[str, Any] = {
+        "dry_run": dry_run, "course": course, "year": year, "scanned": 0, "unpriced": 0,
+        "unchanged": 0, "changed": 0, "newly_scored": 0, "increased": 0, "decreased": 0,
+        "max_abs_delta": 0, "written": 0, "sample": [],
+    }
+    abs_delta_total = 0
+    last_rowid = 0
+    started = time.perf_counter()
+    while True:
+        rows = conn.execute(sql, [last_rowid, *params, chunk_size]).fetchall()
+        if not rows:
+            break
+        last_rowid = rows[-1][0]
+        keys = [event_key(r[2], r[3], r[4], r[5]) if r[3] and r[4] else "" for r in rows]
+        if wanted is not None:
+            rows = [r for r, k in zip(rows, keys) if k in wanted]
+            keys = [k for k in keys if k in wanted]
+        summary["scanned"] += len(rows)
+        if not rows:
+            continue
+        years = [int(r[8]) if r[8] and r[8].isdigit() else None for r in rows]
+        new_points = calculator.aqua_points(keys, [r[6] for r in rows], years)
+        old_points = _as_float([r[7] for r in rows])
+
+        priced = ~np.isnan(new_points)
+        changed = priced & (np.isnan(old_points) | (new_points != old_points))
+        delta = np.where(np.isnan(old_points), 0, new_points - old_points)
+        summary["unpriced"] += int((~priced).sum())
+        summary["unchanged"] += int((priced & ~changed).sum())
+        summary["changed"] += int(changed.sum())
+        summary["newly_scored"] += int((changed & np.isnan(old_points)).sum())
+        summary["increased"] += int((changed & (delta > 0)).sum())
+        summary["decreased"] += int((changed & (delta < 0)).sum())
+        if changed.any():
+            abs_delta = np.abs(delta[changed])
+            abs_delta_total += int(abs_delta.sum())
+            summary["max_abs_delta"] = max(summary["max_abs_delta"], int(abs_delta.max()))
+
+        updates = [(int(new_points[i]), rows[i][1]) for i in np.flatnonzero(changed)]
+        for i in np.flatnonzero(changed)[: RECOMPUTE_SAMPLE_SIZE - len(summary["sample"])]:
+            summary["sample"].append({
+                "result_id": rows[i][1], "event": keys[i], "year": years[i], "time_seconds": rows[i][6],
+                "old": None if np.isnan(old_points[i]) else int(old_points[i]), "new": int(new_points[i]),
+            })
+        if updates and not dry_run:
+            with conn:
+                conn.executemany("UPDATE results SET aqua_points = ? WHERE id = ?", updates)
+            summary["written"] += len(updates)
+
+        if progress:
+            progress({"scanned": summary["scanned"], "changed": summary["changed"], "written": summary["written"]})
+        else:
+            print(f"[AQUA] scanned {summary['scanned']}, changed {summary['changed']}, "
+                  f"written {summary['written']}", flush=True)
+
+    summary["mean_abs_delta"] = round(abs_delta_total / summary["changed"], 1) if summary["changed"] else 0
+    summary["seconds"] = round(time.perf_counter() - started, 2)
+    return summary
+
+
+def reprice_after_base_time_save(
+    conn: sqlite3.Connection,
+    course: Optional[str],
+    year: int,
+    event_ids: Sequence[str],
+) -> Dict[str, Any]:
+    """Write re-priced aqua_points for the results a save of `year` base times affects.
+
+    Results from `year` use the saved times directly. Results from years with no base
+    times of their own fall back to the latest year, so a save to an event's latest
+    year re-prices that event in every year.
+    """
+    placeholders = ", ".join("?" * len(event_ids))
+    latest = dict(conn.execute(f"""
+        SELECT event_id, MAX(competition_year) FROM aqua_base_times
+        WHERE event_id IN ({placeholders}) AND base_time_seconds > 0
+        GROUP BY event_id
+    """, list(event_ids)).fetchall())
+    every_year = any(latest.get(event_id) is not None and year >= int(latest[event_id]) for event_id in event_ids)
+    return recompute_aqua_points(conn, course=course, year=None if every_year else year,
+                                 event_ids=event_ids, dry_run=False)
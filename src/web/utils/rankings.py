@@ -0,0 +1,188 @@
+"""
+National rankings over season-best times.
+
+Rankings are built from athlete_progression (one season best per athlete, event and
+season). Each (event_id, season) partition is kept as parallel sorted lists
+of times and athlete ids, so ranking an athlete is a bisect. Age-group and
+nationality views are filtered copies of the partition, cached until it changes or the
+reference snapshot (birthdates, nations) moves to a new generation.
+
+Partitions are kept up to date in place: refresh_athlete_progression() reports every
+changed season best to this module, which moves just that athlete inside its partition.
+Request paths never drain the progression dirty queue themselves: ingestion refreshes the
+athletes it touched, and a background task started with the web app drains the rest.
+
+Usage:
+    from src.web.utils.rankings import RANKINGS
+    RANKINGS.page(conn, event_id, 2025, age_group="15", nation="MAS", limit=50)
+    RANKINGS.rank_of(conn, athlete_id, event_id, 2025, age_group="15")
+"""
+
+import threading
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, List, Optional, Tuple
+
+from scripts.convert_meets_to_sqlite_simple import add_progression_listener, get_reference_snapshot
+
+PartitionKey = Tuple[str, int]  # (event_id, season)
+ViewKey = Tuple[str, int, int, str, str]  # (event_id, season, reference generation, age_group, nation)
+
+
+def parse_age_group(age_group: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+    """Age-group label -> inclusive (min, max); same labels as /results/filtered.
+
+    Raises ValueError for a label it does not recognise.
+    """
+    label = (age_group or "OPEN").strip().upper().replace(" ", "")
+    if label == "OPEN":
+        return None, None
+    if label in ("13U", "13&UNDER"):
+        return None, 13
+    if label in ("17+", "17&OVER"):
+        return 17, None
+    if label.endswith("U") and label[:-1].isdigit():
+        return None, int(label[:-1])
+    if label.endswith("+") and label[:-1].isdigit():
+        return int(label[:-1]), None
+    if "-" in label:
+        low, high = label.split("-", 1)
+        if low.isdigit() and high.isdigit() and int(low) <= int(high):
+            return int(low), int(high)
+    elif label.isdigit():
+        return int(label), int(label)
+    raise ValueError(f"Unknown age group '{age_group}' (use OPEN, 13U, 15, 15-16 or 17+)")
+
+
+class RankingPartition:
+    """Season bests for one event and season, fastest first (ties keep insertion order)."""
+
+    __slots__ = ("times", "athletes", "by_athlete")
+
+    def __init__(self, rows: List[Tuple[str, float]]):
+        rows = sorted(rows, key=lambda row: row[1])
+        self.times: List[float] = [row[1] for row in rows]
+        self.athletes: List[str] = [row[0] for row in rows]
+        self.by_athlete: Dict[str, float] = dict(rows)
+
+    def remove(self, athlete_id: str) -> None:
+        time_seconds = self.by_athlete.pop(athlete_id, None)
+        if time_seconds is None:
+            return
+        i = bisect_left(self.times, time_seconds)
+        while self.athletes[i] != athlete_id:
+            i += 1
+        del self.times[i]
+        del self.athletes[i]
+
+    def upsert(self, athlete_id: str, time_seconds: float) -> None:
+        self.remove(athlete_id)
+        i = bisect_right(self.times, time_seconds)
+        self.times.insert(i, time_seconds)
+        self.athletes.insert(i, athlete_id)
+        self.by_athlete[athlete_id] = time_seconds
+
+    def rank(self, time_seconds: float) -> int:
+        """1-based competition rank: athletes tied on time share the better rank."""
+        return bisect_left(self.times, time_seconds) + 1
+
+
+class RankingsService:
+    def __init__(self):
+        self._partitions: Dict[PartitionKey, RankingPartition] = {}
+        self._views: Dict[ViewKey, RankingPartition] = {}
+        self._lock = threading.Lock()
+        add_progression_listener(self.apply_changes)
+
+    def _partition(self, conn, event_id: str, season: int) -> RankingPartition:
+        key = (event_id, season)
+        partition = self._partitions.get(key)
+        if partition is None:
+            rows = conn.execute(
+                "SELECT athlete_id, time_seconds FROM athlete_progression WHERE event_id = ? AND season = ?",
+                (event_id, season),
+            ).fetchall()
+            with self._lock:
+                partition = self._partitions.setdefault(key, RankingPartition(rows))
+        return partition
+
+    def _view(self, conn, event_id: str, season: int, age_group: Optional[str], nation: Optional[str]) -> RankingPartition:
+        age_label = (age_group or "OPEN").strip().upper()
+        nation_label = (nation or "ALL").strip().upper()
+        base = self._partition(conn, event_id, season)
+        if age_label == "OPEN" and nation_label == "ALL":
+            return base
+        snapshot = get_reference_snapshot()
+        key = (event_id, season, snapshot.generation, age_label, nation_label)
+        view = self._views.get(key)
+        if view is not None:
+            return view
+
+        min_age, max_age = parse_age_group(age_label)
+        athletes = snapshot.athletes_by_id
+        rows = []
+        with self._lock:
+            pairs = list(zip(base.athletes, base.times))
+        for athlete_id, time_seconds in pairs:
+            athlete = athletes.get(athlete_id)
+            if athlete is None:
+                continue
+            if nation_label != "ALL" and (athlete.nation or "MAS").upper() != nation_label:
+                continue
+            if min_age is not None or max_age is not None:
+                birth_year = athlete.birthdate[:4]
+                if not birth_year.isdigit():
+                    continue
+                age = season - int(birth_year)  # age on 31 December of the season
+                if (min_age is not None and age < min_age) or (max_age is not None and age > max_age):
+                    continue
+            rows.append((athlete_id, time_seconds))
+        view = RankingPartition(rows)
+        with self._lock:
+            self._views[key] = view
+        return view
+
+    def apply_changes(self, changes: Dict[Tuple[str, str, int], Optional[float]]) -> None:
+        """Progression listener: move changed season bests inside cached partitions."""
+        with self._lock:
+            for (athlete_id, event_id, season), time_seconds in changes.items():
+                partition = self._partitions.get((event_id, season))
+                if partition is not None:
+                    if time_seconds is None:
+                        partition.remove(athlete_id)
+                    else:
+                        partition.upsert(athlete_id, time_seconds)
+                stale = [key for key in self._views if key[0] == event_id and key[1] == season]
+                for key in stale:
+                    del self._views[key]
+
+    def page(self, conn, event_id: str, season: int, age_group: Optional[str] = None,
+             nation: Optional[str] = None, offset: int = 0, limit: int = 50) -> Dict[str, Any]:
+        view = self._view(conn, event_id, season, age_group, nation)
+        with self._lock:
+            ids = view.athletes[offset:offset + limit]
+            times = view.times[offset:offset + limit]
+            total = len(view.times)
+            ranks = [view.rank(t) for t in times]
+        return {"total": total, "entries": list(zip(ranks, ids, times))}
+
+    def rank_of(self, conn, athlete_id: str, event_id: str, season: int, age_group: Optional[str] = None,
+                nation: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        view = self._view(conn, event_id, season, age_group, nation)
+        with self._lock:
+            time_seconds = view.by_athlete.get(athlete_id)
+            if time_seconds is None:
+                return None
+            rank = view.rank(time_seconds)
+            total = len(view.times)
+            leader = view.times[0]
+        return {
+            "rank": rank,
+            "total": total,
+            # Share of the field the athlete is at or ahead of
+            "percentile": round(100.0 * (total - rank + 1) / total, 1),
+            "time_seconds": time_seconds,
+            "gap_to_leader": round(time_seconds - leader, 2),
+        }
+
+
+RANKINGS = RankingsService()
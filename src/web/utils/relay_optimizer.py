@@ -0,0 +1,255 @@
+"""
+Relay lineup optimizer.
+
+Picks the fastest 4 x {50,100,200} Free or Medley lineups from a pool. For each swimmer
+and leg stroke we take the best of:
+  - the individual season best at the leg distance (athlete_progression), and
+  - relay splits at that distance (relay_legs). A split from legs 2-4 had a flying
+    start, so takeover_seconds is added back to compare it with a flat start.
+Leg 1 swims from a flat start and legs 2-4 get takeover_seconds off.
+
+Each leg is an assignment of a swimmer to a stroke, and no swimmer may swim twice. Mixed
+relays (gender X) must also have two men and two women. We prune first: an optimal
+lineup only uses, for each (stroke, gender), one of that group's four fastest swimmers
+(otherwise one of those four is free and at least as fast). That leaves at most 32
+candidates. A depth-first branch-and-bound then solves it exactly, using the sum of each
+remaining leg's fastest time as the lower bound. B and C teams are solved again without
+the swimmers already used.
+
+Usage:
+    from src.web.utils.relay_optimizer import optimize_relay
+    optimize_relay(conn, season=2025, gender="M", stroke_kind="Medley", leg_distance=100, teams=2)
+"""
+
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from scripts.convert_meets_to_sqlite_simple import (
+    MEDLEY_LEG_STROKES,
+    get_reference_snapshot,
+    get_schema_capabilities,
+    normalize_state_code,
+)
+from .points import format_seconds
+
+CANDIDATES_PER_GROUP = 4  # per (stroke, gender); see module docstring for why 4 is enough
+
+
+class LegOption:
+    __slots__ = ("athlete_id", "gender", "flat_seconds", "source")
+
+    def __init__(self, athlete_id: str, gender: str, flat_seconds: float, source: str):
+        self.athlete_id = athlete_id
+        self.gender = gender
+        self.flat_seconds = flat_seconds
+        self.source = source
+
+
+def _pool(season: int, genders: Sequence[str], nation: str, club: Optional[str], state: Optional[str],
+          min_age: Optional[int], max_age: Optional[int]) -> Dict[str, Any]:
+    snapshot = get_reference_snapshot()
+    club_states = {}
+    for row in snapshot.clubs:
+        club_states.setdefault(row.name, row.state_code)
+        club_states.setdefault(row.club_name, row.state_code)
+    state = normalize_state_code(state.upper()) if state else None
+    pool = {}
+    for athlete in snapshot.athletes:
+        if athlete.is_foreign or (athlete.nation or "MAS").upper() != nation.upper():
+            continue
+        if (athlete.gender or "").upper() not in genders:
+            continue
+        if club and (athlete.club_name or "").upper() != club.strip().upper():
+            continue
+        if state and club_states.get(athlete.club_name or "") != state:
+            continue
+        if min_age is not None or max_age is not None:
+            if not athlete.birthdate[:4].isdigit():
+                continue
+            age = season - int(athlete.birthdate[:4])
+            if (min_age is not None and age < min_age) or (max_age is not None and age > max_age):
+                continue
+        pool[athlete.id] = athlete
+    return pool
+
+
+def _leg_options(conn, pool: Dict[str, Any], season: int, seasons: int, course: str, leg_distance: int,
+                 strokes: Sequence[str], takeover_seconds: float) -> Dict[Tuple[str, str], List[LegOption]]:
+    """(stroke, gender) -> options sorted fastest first, one per swimmer."""
+    events = {
+        event.id: event.stroke for event in get_reference_snapshot().events
+        if (event.course or "LCM").upper() == course and event.distance == leg_distance and event.stroke in strokes
+    }
+    best: Dict[Tuple[str, str], Tuple[float, str]] = {}
+
+    def offer(athlete_id: str, stroke: str, seconds: float, source: str) -> None:
+        key = (athlete_id, stroke)
+        if athlete_id in pool and seconds and seconds > 0 and seconds < best.get(key, (float("inf"), ""))[0]:
+            best[key] = (seconds, source)
+
+    for athlete_id, event_id, seconds in conn.execute(
+        "SELECT athlete_id, event_id, time_seconds FROM athlete_progression WHERE season BETWEEN ? AND ?",
+        (season - seasons + 1, season),
+    ):
+        stroke = events.get(event_id)
+        if stroke is not None:
+            offer(athlete_id, stroke, seconds, "individual")
+
+    if get_schema_capabilities(conn).has_table("relay_legs"):
+        for athlete_id, stroke, leg_order, split in conn.execute(
+            """
+            SELECT l.athlete_id, l.stroke, l.leg_order, l.split_seconds
+            FROM relay_legs l
+            JOIN relay_results rr ON rr.id = l.relay_result_id
+            WHERE l.athlete_id IS NOT NULL AND l.split_seconds > 0
+              AND rr.course = ? AND rr.leg_distance = ?
+              AND CAST(substr(rr.meet_date, 1, 4) AS INTEGER) BETWEEN ? AND ?
+            """,
+            (course, leg_distance, season - seasons + 1, season),
+        ):
+            if stroke in strokes:
+                offer(athlete_id, stroke, split + (takeover_seconds if leg_order > 1 else 0.0), "relay_split")
+
+    groups: Dict[Tuple[str, str], List[LegOption]] = {}
+    for (athlete_id, stroke), (seconds, source) in best.items():
+        gender = (pool[athlete_id].gender or "").upper()
+        groups.setdefault((stroke, gender), []).append(LegOption(athlete_id, gender, seconds, source))
+    for options in groups.values():
+        options.sort(key=lambda o: (o.flat_seconds, o.athlete_id))
+    return groups
+
+
+def _solve(leg_strokes: Sequence[str], groups: Dict[Tuple[str, str], List[LegOption]], genders: Sequence[str],
+           mixed: bool, takeover_seconds: float, excluded: set) -> Optional[List[LegOption]]:
+    """Exact minimum-time assignment over the pruned candidates (branch and bound)."""
+    leg_candidates: List[List[LegOption]] = []
+    for stroke in leg_strokes:
+        options: List[LegOption] = []
+        for gender in genders:
+            free = [o for o in groups.get((stroke, gender), []) if o.athlete_id not in excluded]
+            options.extend(free[:CANDIDATES_PER_GROUP])
+        if not options:
+            return None
+        options.sort(key=lambda o: o.flat_seconds)
+        leg_candidates.append(options)
+
+    legs = len(leg_strokes)
+    # Flying-start legs are takeover_seconds faster; constant per lineup, so it only shifts totals
+    adjust = [0.0] + [takeover_seconds] * (legs - 1)
+    floor = [0.0] * (legs + 1)
+    for leg in range(legs - 1, -1, -1):
+        floor[leg] = floor[leg + 1] + leg_candidates[leg][0].flat_seconds - adjust[leg]
+    same_stroke = len(set(leg_strokes)) == 1
+
+    best_total = float("inf")
+    best_lineup: Optional[List[LegOption]] = None
+    chosen: List[LegOption] = []
+    used: set = set()
+
+    def search(leg: int, total: float, start: int, men: int) -> None:
+        nonlocal best_total, best_lineup
+        if total + floor[leg] >= best_total:
+            return
+        if leg == legs:
+            if not mixed or men == legs // 2:
+                best_total, best_lineup = total, list(chosen)
+            return
+        options = leg_candidates[leg]
+        # Free relays: the four legs are interchangeable, so only take options in index order
+        for i in range(start if same_stroke else 0, len(options)):
+            option = options[i]
+            if option.athlete_id in used:
+                continue
+            is_man = option.gender == "M"
+            if mixed and (men + is_man > legs // 2 or (leg + 1 - men - is_man) > legs // 2):
+                continue
+            used.add(option.athlete_id)
+            chosen.append(option)
+            search(leg + 1, total + option.flat_seconds - adjust[leg], i + 1 if same_stroke else 0, men + is_man)
+            chosen.pop()
+            used.discard(option.athlete_id)
+
+    search(0, 0.0, 0, 0)
+    return best_lineup
+
+
+def optimize_relay(
+    conn,
+    season: int,
+    gender: str,
+    stroke_kind: str = "Free",
+    leg_distance: int = 100,
+    course: str = "LCM",
+    teams: int = 1,
+    seasons: int = 1,
+    nation: str = "MAS",
+    club: Optional[str] = None,
+    state: Optional[str] = None,
+    min_age: Optional[int] = None,
+    max_age: Optional[int] = None,
+    takeover_seconds: float = 0.0,
+) -> Dict[str, Any]:
+    """Fastest `teams` disjoint lineups (A, B, ...) for one relay."""
+    started = time.perf_counter()
+    course = course.upper()
+    gender = gender.upper()[:1]
+    mixed = gender == "X"
+    genders = ("M", "F") if mixed else (gender,)
+    leg_strokes = MEDLEY_LEG_STROKES if stroke_kind == "Medley" else ("Free",) * 4
+
+    pool = _pool(season, genders, nation, club, state, min_age, max_age)
+    groups = _leg_options(conn, pool, season, seasons, course, leg_distance, set(leg_strokes), takeover_seconds)
+
+    lineups = []
+    excluded: set = set()
+    for team in range(max(1, teams)):
+        lineup = _solve(leg_strokes, groups, genders, mixed, takeover_seconds, excluded)
+        if lineup is None:
+            break
+        if stroke_kind != "Medley":
+            # Fastest swimmer leads off from the flat start
+            lineup.sort(key=lambda o: o.flat_seconds)
+        excluded.update(o.athlete_id for o in lineup)
+        legs = []
+        total = 0.0
+        for leg, (stroke, option) in enumerate(zip(leg_strokes, lineup), 1):
+            predicted = option.flat_seconds - (takeover_seconds if leg > 1 else 0.0)
+            total += predicted
+            athlete = pool[option.athlete_id]
+            legs.append({
+                "leg": leg,
+                "stroke": stroke,
+                "athlete_id": option.athlete_id,
+                "name": athlete.full_name,
+                "gender": option.gender,
+                "club": athlete.club_name,
+                "flat_seconds": option.flat_seconds,
+                "predicted_seconds": round(predicted, 2),
+                "source": option.source,
+            })
+        lineups.append({
+            "team": chr(ord("A") + team),
+            "legs": legs,
+            "total_seconds": round(total, 2),
+            "total": format_seconds(total),
+        })
+
+    alternates = {}
+    for stroke in dict.fromkeys(leg_strokes):
+        options = [o for g in genders for o in groups.get((stroke, g), []) if o.athlete_id not in excluded]
+        options.sort(key=lambda o: o.flat_seconds)
+        alternates[stroke] = [
+            {"athlete_id": o.athlete_id, "name": pool[o.athlete_id].full_name, "gender": o.gender,
+             "flat_seconds": o.flat_seconds, "source": o.source}
+            for o in options[:3]
+        ]
+
+    return {
+        "relay": f"{course} 4x{leg_distance} {stroke_kind} ({gender})",
+        "season": season,
+        "lineups": lineups,
+        "alternates": alternates,
+        "pool_athletes": len(pool),
+        "candidates": sum(len(v) for v in groups.values()),
+        "ms": round((time.perf_counter() - started) * 1000, 1),
+    }
@@ -0,0 +1,147 @@
+"""
+Opt-in SQL tracer and slow-query log.
+
+Enable with SQL_TRACE=1 (or POST /api/admin/sql-trace). While enabled every statement
+run through `get_database_connection()` is timed, attributed to the current request
+route, aggregated by normalized SQL, and - above SQL_SLOW_MS (default 100 ms) - kept in
+a rolling slow-query log. Entries above SQL_EXPLAIN_MS (default 500 ms) get their
+EXPLAIN QUERY PLAN captured when the log is read with explain=true.
+
+Usage:
+    from src.web.utils.sql_trace import SQL_TRACE
+    SQL_TRACE.enable(slow_ms=50)
+    SQL_TRACE.snapshot(explain=True)
+"""
+
+import os
+import re
+import sqlite3
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+
+from scripts import convert_meets_to_sqlite_simple as db
+from .metrics import CURRENT_REQUEST
+
+MAX_SLOW_ENTRIES = 200
+MAX_STATEMENT_KEYS = 1000
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)+\s*\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(sql: str) -> str:
+    """Collapse literals, IN-lists and whitespace so equivalent statements share one key."""
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _WHITESPACE.sub(" ", sql).strip()
+    return _IN_LIST.sub("IN (?+)", sql)
+
+
+def parameter_shape(parameters: Any) -> str:
+    """Describe bound parameters by type only (values may be personal data)."""
+    if isinstance(parameters, list) and parameters and isinstance(parameters[0], (tuple, list, dict)):
+        return f"{len(parameters)} rows x {parameter_shape(parameters[0])}"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{k}: {type(v).__name__}" for k, v in parameters.items()) + "}"
+    if isinstance(parameters, (tuple, list)):
+        return "(" + ", ".join(type(v).__name__ for v in parameters) + ")"
+    return type(parameters).__name__
+
+
+class SqlTrace:
+    def __init__(self):
+        self.enabled = False
+        self.slow_ms = float(os.environ.get("SQL_SLOW_MS", 100))
+        self.explain_ms = float(os.environ.get("SQL_EXPLAIN_MS", 500))
+        self.started_at: Optional[str] = None
+        self._slow: Deque[Dict[str, Any]] = deque(maxlen=MAX_SLOW_ENTRIES)
+        self._statements: Dict[str, List[float]] = {}  # normalized sql -> [count, total_ms, max_ms]
+        self._lock = threading.Lock()
+
+    def enable(self, slow_ms: Optional[float] = None, explain_ms: Optional[float] = None) -> None:
+        if slow_ms is not None:
+            self.slow_ms = slow_ms
+        if explain_ms is not None:
+            self.explain_ms = explain_ms
+        if not self.enabled:
+            self.started_at = datetime.now().isoformat(timespec="seconds")
+            db.add_sql_observer(self.observe)
+            self.enabled = True
+
+    def disable(self) -> None:
+        db.remove_sql_observer(self.observe)
+        self.enabled = False
+
+    def clear(self) -> None:
+        with self._lock:
+            self._slow.clear()
+            self._statements.clear()
+
+    def observe(self, sql: str, parameters: Any, seconds: float) -> None:
+        ms = seconds * 1000
+        normalized = normalize_sql(sql)
+        request = CURRENT_REQUEST.get()
+        with self._lock:
+            stats = self._statements.get(normalized)
+            if stats is None and len(self._statements) < MAX_STATEMENT_KEYS:
+                stats = self._statements[normalized] = [0, 0.0, 0.0]
+            if stats is not None:
+                stats[0] += 1
+                stats[1] += ms
+                stats[2] = max(stats[2], ms)
+            if ms >= self.slow_ms:
+                self._slow.append({
+                    "at": datetime.now().isoformat(timespec="milliseconds"),
+                    "ms": round(ms, 2),
+                    "route": request.route if request is not None else "(background)",
+                    "statement_no": request.statements if request is not None else None,
+                    "sql": normalized,
+                    "params": parameter_shape(parameters),
+                    "_sql": sql,
+                    "_parameters": parameters,
+                })
+
+    def snapshot(self, explain: bool = False, limit: int = 50) -> Dict[str, Any]:
+        with self._lock:
+            slow = list(self._slow)[-limit:][::-1]
+            statements = sorted(self._statements.items(), key=lambda item: item[1][1], reverse=True)[:limit]
+        if explain:
+            for entry in slow:
+                if entry["ms"] >= self.explain_ms and "plan" not in entry:
+                    entry["plan"] = explain_query_plan(entry["_sql"], entry["_parameters"])
+        return {
+            "enabled": self.enabled,
+            "since": self.started_at,
+            "slow_ms": self.slow_ms,
+            "explain_ms": self.explain_ms,
+            "slow_queries": [{k: v for k, v in entry.items() if not k.startswith("_")} for entry in slow],
+            "top_statements": [
+                {"sql": sql, "count": int(count), "total_ms": round(total, 2),
+                 "avg_ms": round(total / count, 3), "max_ms": round(worst, 2)}
+                for sql, (count, total, worst) in statements
+            ],
+        }
+
+
+def explain_query_plan(sql: str, parameters: Any) -> Optional[List[str]]:
+    """EXPLAIN QUERY PLAN on a read-only side connection (never traced). Reads only."""
+    if not sql.lstrip().upper().startswith(("SELECT", "WITH")) or isinstance(parameters, list):
+        return None
+    try:
+        conn = sqlite3.connect(f"file:{db.DATABASE_PATH}?mode=ro", uri=True, timeout=5.0)
+        try:
+            rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", parameters).fetchall()
+        finally:
+            conn.close()
+        return [row[-1] for row in rows]
+    except sqlite3.Error as e:
+        return [f"(plan unavailable: {e})"]
+
+
+SQL_TRACE = SqlTrace()
+if os.environ.get("SQL_TRACE", "").lower() in ("1", "true", "yes"):
+    SQL_TRACE.enable()
@@ -0,0 +1,334 @@
+"""
+Team-selection engine.
+
+Given a meet window and eligibility rules, picks the squad that maximizes the summed
+AQUA points of its entries, subject to:
+  - nation (MAS by default) and age limits (age on 31 December of age_year),
+  - at most max_per_event athletes per event,
+  - at most max_events_per_athlete events per athlete,
+  - optionally, a best time within target_tolerance_pct of the podium_target_times
+    time for the event.
+
+Best times are each athlete's fastest individual swim per event inside the window.
+Choosing entries is a capacitated b-matching between athletes and events, solved
+exactly as a min-cost flow (see max_points_assignment). Slots the optimum leaves
+open are then filled with zero-point candidates (no AQUA base time), best time first.
+
+Usage:
+    from src.web.utils.team_selection import SelectionRules, select_team
+    select_team(conn, SelectionRules(start_date="2025-01-01", end_date="2025-06-30",
+                                     max_per_event=2, max_events_per_athlete=4, podium_year=2025))
+"""
+
+import heapq
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from scripts.convert_meets_to_sqlite_simple import get_reference_snapshot, get_schema_capabilities
+from .points import event_key, format_seconds, get_points_calculator
+
+RESERVES_PER_EVENT = 2
+
+
+@dataclass
+class SelectionRules:
+    start_date: str  # YYYY-MM-DD, inclusive
+    end_date: str  # YYYY-MM-DD, inclusive
+    course: str = "LCM"
+    nation: str = "MAS"
+    gender: Optional[str] = None
+    min_age: Optional[int] = None
+    max_age: Optional[int] = None
+    age_year: Optional[int] = None  # defaults to the year of end_date
+    max_per_event: int = 2
+    max_events_per_athlete: int = 4
+    events: Optional[List[str]] = None  # base-table ids ("LCM_Free_100_M"); None = every event in the pool
+    podium_year: Optional[int] = None  # podium_target_times.sea_games_year; None = latest
+    target_tolerance_pct: Optional[float] = None  # None = no time threshold
+
+
+class Candidate:
+    __slots__ = ("athlete_id", "event", "time_seconds", "score")
+
+    def __init__(self, athlete_id: str, event: str, time_seconds: float, score: float):
+        self.athlete_id = athlete_id
+        self.event = event
+        self.time_seconds = time_seconds
+        self.score = score
+
+
+def _podium_targets(conn, year: Optional[int]) -> Tuple[Optional[int], Dict[str, float]]:
+    if not get_schema_capabilities(conn).has_table("podium_target_times"):
+        return None, {}
+    if year is None:
+        row = conn.execute("SELECT MAX(sea_games_year) FROM podium_target_times").fetchone()
+        year = row[0] if row else None
+    rows = conn.execute(
+        "SELECT event_id, target_time_seconds FROM podium_target_times WHERE sea_games_year = ?", (year,)
+    ).fetchall()
+    return year, {event_id: seconds for event_id, seconds in rows if seconds}
+
+
+def _load_candidates(conn, rules: SelectionRules, targets: Dict[str, float]) -> Tuple[List[Candidate], Dict[str, Any]]:
+    snapshot = get_reference_snapshot()
+    age_year = rules.age_year or int(rules.end_date[:4])
+    athletes = {}
+    for athlete in snapshot.athletes:
+        if athlete.is_foreign or (athlete.nation or "MAS").upper() != rules.nation.upper():
+            continue
+        if rules.gender and (athlete.gender or "").upper() != rules.gender.upper()[:1]:
+            continue
+        if rules.min_age is not None or rules.max_age is not None:
+            if not athlete.birthdate[:4].isdigit():
+                continue
+            age = age_year - int(athlete.birthdate[:4])
+            if (rules.min_age is not None and age < rules.min_age) or (rules.max_age is not None and age > rules.max_age):
+                continue
+        athletes[athlete.id] = athlete
+    events = {
+        event.id: event_key(event.course, event.stroke, event.distance, event.gender)
+        for event in snapshot.events
+        if (event.course or "LCM").upper() == rules.course.upper()
+    }
+    wanted = set(rules.events) if rules.events else None
+
+    rows = conn.execute(
+        """
+        SELECT r.athlete_id, r.event_id, MIN(r.time_seconds)
+        FROM results r
+        LEFT JOIN meets m ON r.meet_id = m.id
+        WHERE substr(COALESCE(r.meet_date, m.meet_date), 1, 10) BETWEEN ? AND ?
+          AND r.time_seconds > 0
+          AND COALESCE(r.result_status, 'OK') = 'OK'
+          AND COALESCE(r.is_relay, 0) = 0
+        GROUP BY r.athlete_id, r.event_id
+        """,
+        (rules.start_date[:10], rules.end_date[:10]),
+    ).fetchall()
+    # An athlete can have several event rows mapping to one base event; keep the fastest
+    best: Dict[Tuple[str, str], float] = {}
+    for athlete_id, event_id, seconds in rows:
+        key = events.get(event_id)
+        if athlete_id not in athletes or key is None or (wanted is not None and key not in wanted):
+            continue
+        if rules.target_tolerance_pct is not None:
+            target = targets.get(key)
+            if target is None or seconds > target * (1 + rules.target_tolerance_pct / 100):
+                continue
+        if seconds < best.get((athlete_id, key), float("inf")):
+            best[(athlete_id, key)] = seconds
+
+    pairs = list(best.items())
+    scores = get_points_calculator(conn).aqua_points(
+        [key for (_, key), _ in pairs], [seconds for _, seconds in pairs], [age_year] * len(pairs)
+    )
+    candidates = [
+        Candidate(athlete_id, key, seconds, 0.0 if np.isnan(score) else float(score))
+        for ((athlete_id, key), seconds), score in zip(pairs, scores.tolist())
+    ]
+    return candidates, athletes
+
+
+class _Squad:
+    """Current assignment with per-event and per-athlete views."""
+
+    def __init__(self, rules: SelectionRules, candidates: List[Candidate]):
+        self.rules = rules
+        self.by_event: Dict[str, List[Candidate]] = {}  # candidates per event, best first
+        for candidate in sorted(candidates, key=lambda c: (-c.score, c.time_seconds, c.athlete_id)):
+            self.by_event.setdefault(candidate.event, []).append(candidate)
+        self.event_entries: Dict[str, Dict[str, Candidate]] = {event: {} for event in self.by_event}
+        self.athlete_entries: Dict[str, Dict[str, Candidate]] = {}
+        self.total = 0.0
+
+    def athlete_load(self, athlete_id: str) -> int:
+        return len(self.athlete_entries.get(athlete_id, ()))
+
+    def add(self, candidate: Candidate) -> None:
+        self.event_entries[candidate.event][candidate.athlete_id] = candidate
+        self.athlete_entries.setdefault(candidate.athlete_id, {})[candidate.event] = candidate
+        self.total += candidate.score
+
+    def fill_open_slots(self) -> int:
+        """Add zero-point candidates to slots the optimum left open (never changes the total)."""
+        added = 0
+        for event, candidates in self.by_event.items():
+            for candidate in candidates:
+                if len(self.event_entries[event]) >= self.rules.max_per_event:
+                    break
+                if (candidate.athlete_id not in self.event_entries[event]
+                        and self.athlete_load(candidate.athlete_id) < self.rules.max_events_per_athlete):
+                    self.add(candidate)
+                    added += 1
+        return added
+
+
+def max_points_assignment(candidates: List[Candidate], max_per_event: int,
+                          max_events_per_athlete: int) -> Tuple[List[Candidate], int]:
+    """Exact maximum-points entries under both caps, as a min-cost flow.
+
+    Network: source -> athlete (capacity max_events_per_athlete) -> event (capacity 1,
+    cost -score) -> sink (capacity max_per_event). Successive shortest paths with
+    Dijkstra on reduced costs; augmenting stops at the first path that does not add
+    points, which is the maximum-weight flow. Returns (entries, augmenting paths).
+
+    Only each event's best `keep` candidates enter the network. An athlete at their event
+    limit fills max_events_per_athlete of the other events' slots, so among the top keep
+    of an event at least one athlete is neither in it nor at the limit, and could replace
+    any weaker entry without losing points.
+    """
+    by_event: Dict[str, List[Candidate]] = {}
+    for candidate in candidates:
+        if candidate.score > 0:
+            by_event.setdefault(candidate.event, []).append(candidate)
+    keep = max_per_event + (len(by_event) - 1) * max_per_event // max_events_per_athlete
+    candidates = [
+        candidate
+        for event_candidates in by_event.values()
+        for candidate in sorted(event_candidates, key=lambda c: (-c.score, c.time_seconds, c.athlete_id))[:keep]
+    ]
+    athletes = sorted({c.athlete_id for c in candidates})
+    events = sorted({c.event for c in candidates})
+    source, sink = 0, 1 + len(athletes) + len(events)
+    athlete_node = {athlete_id: 1 + i for i, athlete_id in enumerate(athletes)}
+    event_node = {event: 1 + len(athletes) + i for i, event in enumerate(events)}
+
+    # Edge e and its reverse e ^ 1 live in parallel lists
+    head: List[int] = []
+    capacity: List[int] = []
+    cost: List[float] = []
+    out: List[List[int]] = [[] for _ in range(sink + 1)]
+
+    def edge(u: int, v: int, cap: int, c: float) -> int:
+        for a, b, edge_cap, edge_cost in ((u, v, cap, c), (v, u, 0, -c)):
+            out[a].append(len(head))
+            head.append(b)
+            capacity.append(edge_cap)
+            cost.append(edge_cost)
+        return len(head) - 2
+
+    for athlete_id in athletes:
+        edge(source, athlete_node[athlete_id], max_events_per_athlete, 0.0)
+    entry_edges = [
+        (edge(athlete_node[c.athlete_id], event_node[c.event], 1, -c.score), c)
+        for c in candidates
+    ]
+    for event in events:
+        edge(event_node[event], sink, max_per_event, 0.0)
+
+    # Initial potentials: shortest distances in the layered (acyclic) starting network
+    potential = [0.0] * (sink + 1)
+    for e, _ in entry_edges:
+        potential[head[e]] = min(potential[head[e]], cost[e])
+    potential[sink] = min(potential[event_node[event]] for event in events) if events else 0.0
+
+    paths = 0
+    while True:
+        dist = [float("inf")] * (sink + 1)
+        via = [-1] * (sink + 1)
+        dist[source] = 0.0
+        heap = [(0.0, source)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            for e in out[u]:
+                if capacity[e] <= 0:
+                    continue
+                v = head[e]
+                nd = d + cost[e] + potential[u] - potential[v]
+                if nd < dist[v] - 1e-12:
+                    dist[v], via[v] = nd, e
+                    heapq.heappush(heap, (nd, v))
+        if dist[sink] == float("inf") or dist[sink] + potential[sink] - potential[source] >= -1e-9:
+            break
+        # Clamping at dist[sink] keeps every residual reduced cost non-negative
+        for v in range(sink + 1):
+            potential[v] += min(dist[v], dist[sink])
+        flow, v = max_per_event + max_events_per_athlete, sink
+        while v != source:
+            flow = min(flow, capacity[via[v]])
+            v = head[via[v] ^ 1]
+        v = sink
+        while v != source:
+            capacity[via[v]] -= flow
+            capacity[via[v] ^ 1] += flow
+            v = head[via[v] ^ 1]
+        paths += 1
+
+    return [candidate for e, candidate in entry_edges if capacity[e] == 0], paths
+
+
+def select_team(conn, rules: SelectionRules) -> Dict[str, Any]:
+    started = time.perf_counter()
+    podium_year, targets = _podium_targets(conn, rules.podium_year)
+    candidates, athletes = _load_candidates(conn, rules, targets)
+    squad = _Squad(rules, candidates)
+    entries, paths = max_points_assignment(candidates, rules.max_per_event, rules.max_events_per_athlete)
+    for candidate in entries:
+        squad.add(candidate)
+    filled = squad.fill_open_slots()
+
+    age_year = rules.age_year or int(rules.end_date[:4])
+
+    def entry(candidate: Candidate) -> Dict[str, Any]:
+        athlete = athletes[candidate.athlete_id]
+        target = targets.get(candidate.event)
+        return {
+            "athlete_id": candidate.athlete_id,
+            "name": athlete.full_name,
+            "club": athlete.club_name,
+            "age": age_year - int(athlete.birthdate[:4]) if athlete.birthdate[:4].isdigit() else None,
+            "time_seconds": candidate.time_seconds,
+            "time": format_seconds(candidate.time_seconds),
+            "aqua_points": int(candidate.score),
+            "gap_to_target": round(candidate.time_seconds - target, 2) if target else None,
+        }
+
+    events = []
+    for event in sorted(squad.by_event):
+        chosen = squad.event_entries[event]
+        ranked = squad.by_event[event]
+        course, stroke, distance, gender = event.split("_")
+        target = targets.get(event)
+        events.append({
+            "event_id": event,
+            "label": f"{distance}m {'IM' if stroke == 'Medley' else stroke} {gender}",
+            "target_time": format_seconds(target) if target else None,
+            "selected": [entry(c) for c in ranked if c.athlete_id in chosen],
+            "reserves": [entry(c) for c in [c for c in ranked if c.athlete_id not in chosen][:RESERVES_PER_EVENT]],
+            "open_slots": rules.max_per_event - len(chosen),
+        })
+
+    team = []
+    for athlete_id, entries in squad.athlete_entries.items():
+        athlete = athletes[athlete_id]
+        team.append({
+            "athlete_id": athlete_id,
+            "name": athlete.full_name,
+            "gender": athlete.gender,
+            "club": athlete.club_name,
+            "events": sorted(entries),
+            "total_points": int(sum(c.score for c in entries.values())),
+        })
+    team.sort(key=lambda a: (-a["total_points"], a["name"]))
+
+    return {
+        "events": events,
+        "team": team,
+        "summary": {
+            "pool_athletes": len(athletes),
+            "candidates": len(candidates),
+            "team_size": len(team),
+            "entries": sum(len(e["selected"]) for e in events),
+            "total_points": int(squad.total),
+            "method": "min_cost_flow",
+            "augmenting_paths": paths,
+            "zero_point_entries": filled,
+            "podium_year": podium_year,
+            "ms": round((time.perf_counter() - started) * 1000, 1),
+        },
+    }
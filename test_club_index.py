@@ -0,0 +1,117 @@
+"""
+Club index checks: the trigram index finds exactly what a linear substring scan finds,
+ClubIndex resolves club names to the same record as the old scan over every club, and
+the cached club lookup follows DATABASE_PATH when it is repointed.
+
+Run with `python test_club_index.py` or pytest.
+"""
+
+import random
+
+import scripts.convert_meets_to_sqlite_simple as db
+from conftest import database_factory
+from scripts.convert_meets_to_sqlite_simple import (
+    CLUB_NAME_SUFFIXES,
+    ClubIndex,
+    ClubNgramIndex,
+    ClubRecord,
+    clean_club_name_and_extract_state,
+    normalize_name,
+)
+from scripts.generate_synthetic_dataset import CLUB_SUFFIXES, CLUB_WORDS, STATE_CODES
+
+
+def _random_club_names(rng, count):
+    names = []
+    while len(names) < count:
+        words = [rng.choice(CLUB_WORDS) for _ in range(rng.randint(1, 3))]
+        name = " ".join(words + ([rng.choice(CLUB_SUFFIXES)] if rng.random() < 0.7 else []))
+        if name not in names:
+            names.append(name)
+    return names
+
+
+def _old_resolve(mapping, club_name):
+    """The linear scan ClubIndex used before the trigram index."""
+    cleaned, _ = clean_club_name_and_extract_state(club_name)
+    norm = normalize_name(cleaned) if cleaned else normalize_name(club_name)
+    if not norm:
+        return None
+    if norm in mapping:
+        return mapping[norm]
+    for suffix in CLUB_NAME_SUFFIXES:
+        if norm.endswith(suffix) and norm[:-len(suffix)].strip() in mapping:
+            return mapping[norm[:-len(suffix)].strip()]
+    for db_norm, record in mapping.items():
+        if db_norm in norm and len(db_norm) > 10:
+            return record
+        norm_clean = norm
+        for suffix in CLUB_NAME_SUFFIXES:
+            if norm_clean.endswith(suffix):
+                norm_clean = norm_clean[:-len(suffix)].strip()
+        if norm_clean and norm_clean in db_norm and len(norm_clean) > 5:
+            return record
+    return None
+
+
+def test_ngram_containment_matches_linear_scan():
+    rng = random.Random(27)
+    keys = ["".join(rng.choice("ABC ") for _ in range(rng.randint(3, 9))) for _ in range(300)]
+    index = ClubNgramIndex(keys)
+    for _ in range(500):
+        text = "".join(rng.choice("ABC ") for _ in range(rng.randint(1, 14)))
+        assert index.containing(text) == [i for i, key in enumerate(keys) if text in key], text
+        assert index.contained_in(text) == [i for i, key in enumerate(keys) if key in text], text
+
+
+def test_search_ranks_substring_matches_first():
+    index = ClubNgramIndex(["MARLIN AQUATIC CLUB", "AQUA MARLIN", "SHARK SWIM TEAM"])
+    ranked = [idx for idx, _ in index.search("MARLIN AQUA")]  # a substring of key 0 only
+    assert ranked[:2] == [0, 1] and 2 not in ranked
+    assert [idx for idx, _ in index.search("SW")] == [2]
+
+
+def test_resolve_matches_old_scan():
+    rng = random.Random(2027)
+    names = _random_club_names(rng, 80)
+    mapping = {
+        normalize_name(name): ClubRecord(club_name=name, club_code=f"C{i:03d}", state_code=None, nation="MAS")
+        for i, name in enumerate(names)
+    }
+    index = ClubIndex(mapping)
+    queries = []
+    for name in names:
+        words = name.split()
+        queries += [
+            name,
+            f"{name} {rng.choice(STATE_CODES)}",
+            " ".join(words[:-1]),
+            " ".join(words[1:]),
+            f"{rng.choice(CLUB_WORDS)} {name}",
+        ]
+    queries += [" ".join(rng.choice(CLUB_WORDS) for _ in range(rng.randint(1, 4))) for _ in range(300)]
+    for query in queries:
+        expected = _old_resolve(mapping, query)
+        assert index._resolve_uncached(query) is expected, query
+
+
+def test_club_lookup_follows_database_path(synthetic_db):
+    first = synthetic_db(athletes=40, clubs=5, meets=2, years=1, results=100, seed=29)
+    first_path = db.DATABASE_PATH
+    second = synthetic_db(athletes=40, clubs=12, meets=2, years=1, results=100, seed=29)
+    # Repoint without resetting caches, as a benchmark or script would
+    for conn, path in ((first, first_path), (second, db.DATABASE_PATH), (first, first_path)):
+        db.DATABASE_PATH = path
+        _, clubs, _ = db.get_club_lookup(conn)
+        expected = conn.execute("SELECT COUNT(*) FROM clubs").fetchone()[0]
+        assert len({club["club_name"] for club in clubs}) == expected, path
+        assert str(path) in db._SCHEMA_CAPABILITIES
+
+
+if __name__ == "__main__":
+    test_ngram_containment_matches_linear_scan()
+    test_search_ranks_substring_matches_first()
+    test_resolve_matches_old_scan()
+    with database_factory() as make:
+        test_club_lookup_follows_database_path(make)
+    print("[OK] Club index checks passed")
@@ -0,0 +1,77 @@
+"""
+Performance distribution checks: population counts per (event, age, season) against a
+brute-force count of best swims, with local and foreign athletes each counted once.
+
+Run with `python test_distribution.py` or pytest.
+"""
+
+from collections import defaultdict
+
+from conftest import database_factory
+from src.web.utils.distribution import DISTRIBUTION, refresh_performance_distribution
+
+DISTRIBUTION_DB = dict(results=5000, foreign_rate=0.3, seed=11)
+
+
+def _expected_counts(conn):
+    """(event_id, season, age) -> number of distinct swimmers with a valid individual swim."""
+    swimmers = defaultdict(set)
+    for athlete_id, foreign_id, event_id, meet_date, age, seconds, status, is_relay in conn.execute("""
+        SELECT r.athlete_id, r.foreign_athlete_id, r.event_id, COALESCE(r.meet_date, m.meet_date),
+               COALESCE(r.year_age, r.day_age), r.time_seconds, r.result_status, r.is_relay
+        FROM results r LEFT JOIN meets m ON r.meet_id = m.id
+    """):
+        swimmer = athlete_id or foreign_id
+        if swimmer is None or age is None or not meet_date or not seconds or seconds <= 0:
+            continue
+        if (status or "OK") != "OK" or is_relay:
+            continue
+        swimmers[(event_id, int(meet_date[:4]), age)].add(swimmer)
+    return {key: len(ids) for key, ids in swimmers.items()}
+
+
+def test_population_counts_match_brute_force(synthetic_db):
+    conn = synthetic_db(**DISTRIBUTION_DB)
+    assert conn.execute("SELECT COUNT(*) FROM results WHERE foreign_athlete_id IS NOT NULL").fetchone()[0] > 0
+    refresh_performance_distribution(conn, full=True)
+    stored = {
+        (event_id, season, age): count
+        for event_id, season, age, count in conn.execute(
+            "SELECT event_id, season, age, count FROM performance_distribution WHERE metric = 'time'"
+        )
+    }
+    assert stored == _expected_counts(conn)
+
+
+def test_reads_serve_stored_statistics_until_refresh(synthetic_db):
+    conn = synthetic_db(**DISTRIBUTION_DB)
+    refresh_performance_distribution(conn, full=True)
+    event_id, season, age, count = conn.execute("""
+        SELECT event_id, season, age, count FROM performance_distribution
+        WHERE metric = 'aqua' ORDER BY count DESC LIMIT 1
+    """).fetchone()
+    meet_id, meet_date = conn.execute(
+        "SELECT meet_id, meet_date FROM results WHERE event_id = ? AND substr(meet_date, 1, 4) = ? LIMIT 1",
+        (event_id, str(season)),
+    ).fetchone()
+    conn.execute("""
+        INSERT INTO results (id, meet_id, foreign_athlete_id, event_id, time_seconds, aqua_points,
+                             meet_date, year_age, result_status, is_relay)
+        VALUES ('extra-result', ?, 'extra-foreign-athlete', ?, 60.0, 500, ?, ?, 'OK', 0)
+    """, (meet_id, event_id, meet_date, age))
+    conn.commit()
+
+    def stored_count():
+        rows = DISTRIBUTION.get(conn, event_id, season, age, metric="aqua")["rows"]
+        return rows[0]["count"]
+
+    assert stored_count() == count  # the read does not drain the queue
+    assert refresh_performance_distribution(conn) == 1
+    assert stored_count() == count + 1
+
+
+if __name__ == "__main__":
+    for test in (test_population_counts_match_brute_force, test_reads_serve_stored_statistics_until_refresh):
+        with database_factory() as make:
+            test(make)
+    print("[OK] Distribution checks passed")
@@ -0,0 +1,106 @@
+"""
+MOT builder checks: build_mot_times gives the same table as the original per-event
+script (its final-age branches and USA steps transcribed below), with and without gaps
+in the Canada and USA inputs.
+
+Run with `python test_mot_builder.py` or pytest.
+"""
+
+import random
+
+import numpy as np
+
+from scripts.populate_mot_base_times import AGES, FINAL_AGES, MIN_AGE, TRACKS, build_mot_times
+
+# The original script's steps: final age -> [(age, from_age, tracks averaged), ...] in order
+ORIGINAL_STEPS = {
+    21: [(20, 21, [3]), (19, 20, [3]), (18, 19, [3, 2])],
+    22: [(21, 22, [3]), (20, 21, [3]), (19, 20, [3, 2]), (18, 19, [3, 2])],
+    23: [(22, 23, [3]), (21, 22, [3]), (20, 21, [3, 2]), (19, 20, [3, 2]), (18, 19, [3, 2, 1])],
+    24: [(22, 23, [3]), (21, 22, [3, 2]), (20, 21, [3, 2]), (19, 20, [3, 2, 1]), (18, 19, [3, 2, 1])],
+    25: [(22, 23, [3, 2]), (21, 22, [3, 2]), (20, 21, [3, 2, 1]), (19, 20, [3, 2, 1]), (18, 19, [2, 1])],
+    26: [(22, 23, [3, 2]), (21, 22, [3, 2, 1]), (20, 21, [3, 2, 1]), (19, 20, [3, 2]), (18, 19, [2])],
+}
+
+
+def _original_event(event_id, podium_time, canada, usa):
+    """populate_event() from the original script; a missing time stays missing for younger ages."""
+    final_age = FINAL_AGES[event_id]
+    mot = {23: podium_time}
+    for age in range(final_age, 23):
+        mot[age] = podium_time
+    for age, source_age, tracks in ORIGINAL_STEPS[final_age]:
+        deltas = [
+            canada[track][age] - canada[track][source_age]
+            for track in tracks
+            if age in canada.get(track, {}) and source_age in canada.get(track, {})
+        ]
+        mot[age] = mot[source_age] + sum(deltas) / len(deltas) if deltas and mot.get(source_age) is not None else None
+    if '_50_' not in event_id:
+        for age in (17, 16, 15):
+            median = usa.get(age)
+            mot[age] = mot[age + 1] + median if median is not None and mot.get(age + 1) is not None else None
+    return mot
+
+
+def _random_inputs(rng, events, holes):
+    podium = {event_id: rng.uniform(25, 900) for event_id in events}
+    canada, usa = {}, {}
+    for event_id in events:
+        base = podium[event_id]
+        canada[event_id] = {
+            track: {
+                age: base * (1 + 0.02 * (26 - age)) * (1 + 0.01 * track) + rng.random()
+                for age in range(12, 27)
+                if not (holes and rng.random() < 0.05)
+            }
+            for track in TRACKS
+        }
+        usa[event_id] = {age: rng.uniform(0.1, 3) for age in (15, 16, 17) if not (holes and rng.random() < 0.1)}
+    return podium, canada, usa
+
+
+def _as_arrays(events, podium, canada, usa):
+    canada_array = np.full((len(events), len(TRACKS), len(AGES)), np.nan)
+    usa_array = np.full((len(events), len(AGES)), np.nan)
+    for e, event_id in enumerate(events):
+        for t, track in enumerate(TRACKS):
+            for age, seconds in canada[event_id][track].items():
+                if MIN_AGE <= age <= AGES[-1]:
+                    canada_array[e, t, age - MIN_AGE] = seconds
+        for age, median in usa[event_id].items():
+            usa_array[e, age - MIN_AGE] = median
+    return np.array([podium[event_id] for event_id in events]), canada_array, usa_array
+
+
+def _check(holes, seed):
+    rng = random.Random(seed)
+    events = sorted(FINAL_AGES)
+    podium, canada, usa = _random_inputs(rng, events, holes)
+    mot, _ = build_mot_times(events, *_as_arrays(events, podium, canada, usa))
+    compared = 0
+    for e, event_id in enumerate(events):
+        expected = _original_event(event_id, podium[event_id], canada[event_id], usa[event_id])
+        for a, age in enumerate(AGES.tolist()):
+            value = expected.get(age)
+            if value is None:
+                assert np.isnan(mot[e, a]), (event_id, age)
+            else:
+                assert abs(mot[e, a] - value) < 1e-9, (event_id, age)
+                compared += 1
+    return compared
+
+
+def test_matches_original_on_complete_inputs():
+    assert _check(holes=False, seed=45) == sum(9 if '_50_' not in e else 6 for e in FINAL_AGES)
+
+
+def test_matches_original_with_gaps():
+    for seed in range(10):
+        _check(holes=True, seed=450 + seed)
+
+
+if __name__ == "__main__":
+    test_matches_original_on_complete_inputs()
+    test_matches_original_with_gaps()
+    print("[OK] MOT builder checks passed")
@@ -0,0 +1,159 @@
+"""
+Points calculator checks: vectorized base-time lookups and AQUA/MAP/MOT points against
+a per-row scalar computation, and a base-time save re-pricing every result it affects.
+
+Run with `python test_points.py` or pytest.
+"""
+
+import math
+import random
+
+import numpy as np
+
+from conftest import database_factory
+from src.web.utils.points import (
+    NO_AGE,
+    NO_YEAR,
+    BaseTimeLookup,
+    PointsCalculator,
+    event_key,
+    points_list,
+    recompute_aqua_points,
+    reprice_after_base_time_save,
+)
+
+EVENTS = ["LCM_Free_100_M", "LCM_Free_50_F", "SCM_Back_200_M", "LCM_Medley_400_F"]
+
+
+def _random_table(rng, with_ages):
+    rows = {}
+    for event_id in EVENTS:
+        for age in (range(12, 19) if with_ages else [NO_AGE]):
+            for year in rng.sample([2019, 2021, 2023, 2024, 2025], rng.randint(1, 3)):
+                rows[(event_id, age, year)] = round(rng.uniform(25, 300), 2)
+    return rows
+
+
+def _lookup(rows):
+    keys = list(rows)
+    return BaseTimeLookup([k[0] for k in keys], [k[1] for k in keys], [k[2] for k in keys], list(rows.values()))
+
+
+def _expected_base(rows, event_id, age, year):
+    """Same year if on file, else the latest year for the event and age."""
+    if (event_id, age, year) in rows:
+        return rows[(event_id, age, year)]
+    years = [y for (e, a, y) in rows if e == event_id and a == age]
+    return rows[(event_id, age, max(years))] if years else None
+
+
+def _expected_points(base, seconds):
+    if base is None or seconds is None or seconds <= 0:
+        return None
+    return math.floor(1000.0 * (base / seconds) ** 3)
+
+
+def test_event_key():
+    assert event_key("lcm", "Free", "100", "male") == "LCM_Free_100_M"
+    assert event_key(None, "Back", 50.0, "F") == "LCM_Back_50_F"
+
+
+def test_lookup_prefers_own_year_then_latest():
+    rng = random.Random(36)
+    rows = _random_table(rng, with_ages=True)
+    lookup = _lookup(rows)
+    queries = [
+        (rng.choice(EVENTS + ["LCM_Fly_100_M"]), rng.randint(11, 19), rng.choice([2018, 2021, 2024, 2025, 2026]))
+        for _ in range(2000)
+    ]
+    found = lookup.lookup(
+        [q[0] for q in queries],
+        np.array([q[1] for q in queries], dtype=np.int64),
+        np.array([q[2] for q in queries], dtype=np.int64),
+    )
+    for query, value in zip(queries, found.tolist()):
+        expected = _expected_base(rows, *query)
+        assert (np.isnan(value) and expected is None) or value == expected, query
+
+
+def test_points_match_scalar_formula():
+    rng = random.Random(360)
+    aqua_rows = _random_table(rng, with_ages=False)
+    map_rows = _random_table(rng, with_ages=True)
+    mot_rows = {(e, a, NO_YEAR): t for (e, a, _), t in _random_table(rng, with_ages=True).items()}
+    calc = PointsCalculator(_lookup(aqua_rows), _lookup(map_rows), _lookup(mot_rows))
+
+    n = 1000
+    event_ids = [rng.choice(EVENTS + ["LCM_Fly_100_M"]) for _ in range(n)]
+    times = [rng.choice([None, 0, -1.0, round(rng.uniform(20, 400), 2), round(rng.uniform(20, 400), 2)]) for _ in range(n)]
+    ages = [rng.choice([None, 11, 13, 15, 18]) for _ in range(n)]
+    years = [rng.choice([None, 2019, 2023, 2025]) for _ in range(n)]
+
+    aqua = points_list(calc.aqua_points(event_ids, times, years))
+    map_pts = points_list(calc.map_points(event_ids, ages, times, years))
+    mot_time, mot_aqua, gap = calc.mot(event_ids, ages, aqua)
+    for i in range(n):
+        year = NO_YEAR if years[i] is None else years[i]
+        age = NO_AGE if ages[i] is None else ages[i]
+        assert aqua[i] == _expected_points(_expected_base(aqua_rows, event_ids[i], NO_AGE, year), times[i]), i
+        assert map_pts[i] == _expected_points(_expected_base(map_rows, event_ids[i], age, year), times[i]), i
+        base_mot = _expected_base(mot_rows, event_ids[i], age, NO_YEAR)
+        if base_mot is None:
+            assert np.isnan(mot_time[i]) and np.isnan(gap[i])
+            continue
+        assert mot_time[i] == base_mot
+        expected_mot_aqua = _expected_points(_expected_base(aqua_rows, event_ids[i], NO_AGE, NO_YEAR), base_mot)
+        assert points_list(mot_aqua[i:i + 1]) == [expected_mot_aqua]
+        if aqua[i] is not None and expected_mot_aqua is not None:
+            assert gap[i] == aqua[i] - expected_mot_aqua
+
+
+def _busiest_event(conn):
+    """(base-table event id, [meet years]) of the event with the most results."""
+    course, stroke, distance, gender = conn.execute("""
+        SELECT COALESCE(r.meet_course, e.event_course), e.event_stroke, e.event_distance, e.gender
+        FROM results r JOIN events e ON r.event_id = e.id
+        GROUP BY 1, 2, 3, 4 ORDER BY COUNT(*) DESC LIMIT 1
+    """).fetchone()
+    years = [row[0] for row in conn.execute(
+        "SELECT DISTINCT CAST(substr(meet_date, 1, 4) AS INTEGER) FROM results ORDER BY 1"
+    )]
+    return event_key(course, stroke, distance, gender), years
+
+
+def _save_base_time(conn, event_id, year, seconds):
+    conn.execute("DELETE FROM aqua_base_times WHERE event_id = ? AND competition_year = ?", (event_id, year))
+    conn.execute("INSERT INTO aqua_base_times VALUES (?, ?, ?)", (event_id, year, seconds))
+    conn.commit()
+
+
+def test_base_time_save_reprices_affected_results(synthetic_db):
+    conn = synthetic_db(athletes=120, clubs=6, meets=10, years=3, results=2000, seed=37)
+    conn.execute("CREATE TABLE aqua_base_times (event_id TEXT, competition_year INTEGER, base_time_seconds REAL)")
+    event_id, years = _busiest_event(conn)
+    course = event_id.split("_")[0]
+    for year in years:
+        _save_base_time(conn, event_id, year, 60.0)
+    recompute_aqua_points(conn, dry_run=False)
+
+    # An earlier year only re-prices that year's results
+    _save_base_time(conn, event_id, years[0], 55.0)
+    summary = reprice_after_base_time_save(conn, course, years[0], [event_id])
+    assert summary["year"] == years[0] and summary["written"] > 0
+    assert recompute_aqua_points(conn)["changed"] == 0
+
+    # Years without their own base time fall back to the latest, so saving it re-prices them too
+    conn.execute("DELETE FROM aqua_base_times WHERE competition_year = ?", (years[1],))
+    _save_base_time(conn, event_id, years[-1], 65.0)
+    summary = reprice_after_base_time_save(conn, course, years[-1], [event_id])
+    assert summary["year"] is None and summary["written"] > 0
+    assert recompute_aqua_points(conn)["changed"] == 0
+
+
+if __name__ == "__main__":
+    test_event_key()
+    test_lookup_prefers_own_year_then_latest()
+    test_points_match_scalar_formula()
+    with database_factory() as make:
+        test_base_time_save_reprices_affected_results(make)
+    print("[OK] Points checks passed")
@@ -0,0 +1,113 @@
+"""
+Athlete progression checks: the results triggers queue the right athletes, and a refresh
+rebuilds season bests, deltas and PB flags the same way a per-athlete Python pass does.
+
+Run with `python test_progression.py` or pytest.
+"""
+
+import scripts.convert_meets_to_sqlite_simple as db
+from conftest import database_factory
+
+PROGRESSION_DB = dict(athletes=150, clubs=8, meets=15, years=3, results=3000, seed=38)
+
+
+def _dirty(conn):
+    return {row[0] for row in conn.execute("SELECT athlete_id FROM athlete_progression_dirty")}
+
+
+def _expected_progression(conn):
+    """(athlete_id, event_id, season) -> (result_id, time, swims, season_delta, previous_pb, is_pb)."""
+    swims = {}
+    for athlete_id, event_id, result_id, seconds, meet_date in conn.execute("""
+        SELECT r.athlete_id, r.event_id, r.id, r.time_seconds, COALESCE(r.meet_date, m.meet_date)
+        FROM results r LEFT JOIN meets m ON r.meet_id = m.id
+        WHERE r.athlete_id IS NOT NULL AND r.time_seconds > 0
+          AND COALESCE(r.result_status, 'OK') = 'OK' AND COALESCE(r.is_relay, 0) = 0
+    """):
+        season = int(meet_date[:4]) if meet_date and meet_date[:4].isdigit() else 0
+        if season > 0:
+            swims.setdefault((athlete_id, event_id), {}).setdefault(season, []).append((seconds, meet_date, result_id))
+
+    expected = {}
+    for (athlete_id, event_id), by_season in swims.items():
+        previous_best = previous_pb = None
+        for season in sorted(by_season):
+            seconds, _, result_id = min(by_season[season], key=lambda swim: swim[:2])
+            delta = None if previous_best is None else round(seconds - previous_best, 2)
+            is_pb = 1 if previous_pb is None or seconds < previous_pb else 0
+            expected[(athlete_id, event_id, season)] = (result_id, seconds, len(by_season[season]), delta, previous_pb, is_pb)
+            previous_best = seconds
+            previous_pb = seconds if previous_pb is None else min(previous_pb, seconds)
+    return expected
+
+
+def _stored_progression(conn):
+    return {
+        row[:3]: row[3:]
+        for row in conn.execute("""
+            SELECT athlete_id, event_id, season, result_id, time_seconds, swims, season_delta, previous_pb, is_pb
+            FROM athlete_progression
+        """)
+    }
+
+
+def test_full_refresh_matches_python(synthetic_db):
+    conn = synthetic_db(**PROGRESSION_DB)
+    assert _dirty(conn)  # the migration queues every athlete with results
+    assert db.refresh_athlete_progression(conn, all_dirty=True) > 0
+    assert not _dirty(conn)
+    assert _stored_progression(conn) == _expected_progression(conn)
+
+
+def test_triggers_queue_touched_athletes(synthetic_db):
+    conn = synthetic_db(**PROGRESSION_DB)
+    db.refresh_athlete_progression(conn, all_dirty=True)
+    athlete_a, athlete_b, athlete_c = [row[0] for row in conn.execute(
+        "SELECT DISTINCT athlete_id FROM results WHERE athlete_id IS NOT NULL ORDER BY athlete_id LIMIT 3"
+    )]
+    result_a = conn.execute("SELECT id FROM results WHERE athlete_id = ? LIMIT 1", (athlete_a,)).fetchone()[0]
+
+    conn.execute("UPDATE results SET comp_place = 1 WHERE id = ?", (result_a,))  # not a progression column
+    assert _dirty(conn) == set()
+    conn.execute("UPDATE results SET time_seconds = time_seconds - 0.5 WHERE id = ?", (result_a,))
+    conn.execute("DELETE FROM results WHERE id = (SELECT id FROM results WHERE athlete_id = ? LIMIT 1)", (athlete_b,))
+    conn.execute("UPDATE results SET athlete_id = ? WHERE id = (SELECT id FROM results WHERE athlete_id = ? LIMIT 1)",
+                 (athlete_c, athlete_b))
+    conn.commit()
+    assert _dirty(conn) == {athlete_a, athlete_b, athlete_c}
+
+
+def test_targeted_refresh_reports_changes(synthetic_db):
+    conn = synthetic_db(**PROGRESSION_DB)
+    db.refresh_athlete_progression(conn, all_dirty=True)
+    athlete_id, event_id, season, result_id, seconds = conn.execute("""
+        SELECT athlete_id, event_id, season, result_id, time_seconds FROM athlete_progression
+        ORDER BY athlete_id, event_id, season LIMIT 1
+    """).fetchone()
+    other = conn.execute(
+        "SELECT athlete_id FROM results WHERE athlete_id IS NOT NULL AND athlete_id != ? LIMIT 1", (athlete_id,)
+    ).fetchone()[0]
+    conn.execute("UPDATE results SET time_seconds = ? WHERE id = ?", (seconds - 1.0, result_id))
+    conn.execute("UPDATE results SET time_seconds = time_seconds + 0.01 WHERE athlete_id = ?", (other,))
+    conn.commit()
+
+    received = []
+    db.add_progression_listener(received.append)
+    try:
+        assert db.refresh_athlete_progression(conn, [athlete_id]) == 1
+    finally:
+        db._PROGRESSION_LISTENERS.remove(received.append)
+    assert _dirty(conn) == {other}  # only the requested athlete was drained
+    assert received and received[0][(athlete_id, event_id, season)] == seconds - 1.0
+    assert all(key[0] == athlete_id for key in received[0])
+
+    db.refresh_athlete_progression(conn, all_dirty=True)
+    assert _stored_progression(conn) == _expected_progression(conn)
+
+
+if __name__ == "__main__":
+    for test in (test_full_refresh_matches_python, test_triggers_queue_touched_athletes,
+                 test_targeted_refresh_reports_changes):
+        with database_factory() as make:
+            test(make)
+    print("[OK] Progression checks passed")
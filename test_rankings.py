@@ -0,0 +1,126 @@
+"""
+Rankings checks: rank, percentile and age-group/nation views against a brute-force
+ranking of athlete_progression on a small synthetic database.
+
+Run with `python test_rankings.py` or pytest.
+"""
+
+import scripts.convert_meets_to_sqlite_simple as db
+from conftest import database_factory
+from src.web.utils.rankings import RankingPartition, RankingsService, parse_age_group
+
+
+def _rankings_db(synthetic_db):
+    """Synthetic database with athlete_progression built, and a fresh rankings service."""
+    conn = synthetic_db()
+    db.refresh_athlete_progression(conn, all_dirty=True)
+    return conn, RankingsService()
+
+
+def _largest_partition(conn):
+    return conn.execute("""
+        SELECT event_id, season FROM athlete_progression
+        GROUP BY event_id, season ORDER BY COUNT(*) DESC LIMIT 1
+    """).fetchone()
+
+
+def _brute_force(conn, event_id, season, keep=lambda athlete_id: True):
+    rows = conn.execute(
+        "SELECT athlete_id, time_seconds FROM athlete_progression WHERE event_id = ? AND season = ?",
+        (event_id, season),
+    ).fetchall()
+    rows = [row for row in rows if keep(row[0])]
+    return {athlete_id: (1 + sum(1 for _, t in rows if t < time_seconds), len(rows)) for athlete_id, time_seconds in rows}
+
+
+def test_parse_age_group():
+    assert parse_age_group(None) == (None, None)
+    assert parse_age_group("13U") == (None, 13)
+    assert parse_age_group("17+") == (17, None)
+    assert parse_age_group("15-16") == (15, 16)
+    assert parse_age_group("15") == (15, 15)
+    for label in ("abc", "15-", "-16", "16-15", "15-16-17"):
+        try:
+            parse_age_group(label)
+        except ValueError:
+            continue
+        raise AssertionError(f"{label!r} should be rejected")
+
+
+def test_partition_ties_and_moves():
+    partition = RankingPartition([("a", 60.0), ("b", 61.0), ("c", 60.0), ("d", 62.0)])
+    assert partition.rank(60.0) == 1 and partition.rank(61.0) == 3 and partition.rank(62.0) == 4
+    partition.upsert("d", 59.0)
+    assert partition.athletes[0] == "d" and partition.rank(60.0) == 2
+    partition.remove("a")
+    assert partition.athletes == ["d", "c", "b"] and partition.times == [59.0, 60.0, 61.0]
+
+
+def test_rank_and_percentile_match_brute_force(synthetic_db):
+    conn, rankings = _rankings_db(synthetic_db)
+    event_id, season = _largest_partition(conn)
+    expected = _brute_force(conn, event_id, season)
+    assert len(expected) > 20
+    for athlete_id, (rank, total) in expected.items():
+        position = rankings.rank_of(conn, athlete_id, event_id, season)
+        assert (position["rank"], position["total"]) == (rank, total), athlete_id
+        assert position["percentile"] == round(100.0 * (total - rank + 1) / total, 1)
+    page = rankings.page(conn, event_id, season, limit=10)
+    assert page["total"] == len(expected)
+    assert [rank for rank, _, _ in page["entries"]] == sorted(expected[a][0] for _, a, _ in page["entries"])
+
+
+def test_age_group_view_matches_brute_force(synthetic_db):
+    conn, rankings = _rankings_db(synthetic_db)
+    event_id, season = _largest_partition(conn)
+    athletes = db.get_reference_snapshot().athletes_by_id
+
+    def is_15_to_16(athlete_id):
+        birth_year = athletes[athlete_id].birthdate[:4]
+        return birth_year.isdigit() and 15 <= season - int(birth_year) <= 16
+
+    expected = _brute_force(conn, event_id, season, is_15_to_16)
+    assert expected
+    for athlete_id, (rank, total) in expected.items():
+        position = rankings.rank_of(conn, athlete_id, event_id, season, age_group="15-16")
+        assert (position["rank"], position["total"]) == (rank, total), athlete_id
+    outside = next(a for a in _brute_force(conn, event_id, season) if a not in expected)
+    assert rankings.rank_of(conn, outside, event_id, season, age_group="15-16") is None
+
+
+def test_views_follow_reference_generation(synthetic_db):
+    conn, rankings = _rankings_db(synthetic_db)
+    event_id, season = _largest_partition(conn)
+    assert rankings.page(conn, event_id, season, nation="SGP")["total"] == 0
+    athlete_id = rankings.page(conn, event_id, season, limit=1)["entries"][0][1]
+    conn.execute("UPDATE athletes SET NATION = 'SGP' WHERE id = ?", (athlete_id,))
+    conn.commit()
+    db.mark_reference_data_changed()
+    page = rankings.page(conn, event_id, season, nation="SGP")
+    assert page["total"] == 1 and page["entries"][0][1] == athlete_id
+
+
+def test_ingest_refresh_moves_athlete(synthetic_db):
+    conn, rankings = _rankings_db(synthetic_db)
+    event_id, season = _largest_partition(conn)
+    last = rankings.page(conn, event_id, season, limit=500)["entries"][-1]
+    assert rankings.rank_of(conn, last[1], event_id, season)["rank"] > 1
+    result = conn.execute("""
+        SELECT r.id FROM results r JOIN athlete_progression p ON p.result_id = r.id
+        WHERE p.athlete_id = ? AND p.event_id = ? AND p.season = ?
+    """, (last[1], event_id, season)).fetchone()
+    conn.execute("UPDATE results SET time_seconds = 1.0 WHERE id = ?", (result[0],))
+    conn.commit()
+    db.refresh_athlete_progression(conn, [last[1]])
+    position = rankings.rank_of(conn, last[1], event_id, season)
+    assert position["rank"] == 1 and position["percentile"] == 100.0
+
+
+if __name__ == "__main__":
+    test_parse_age_group()
+    test_partition_ties_and_moves()
+    for test in (test_rank_and_percentile_match_brute_force, test_age_group_view_matches_brute_force,
+                 test_views_follow_reference_generation, test_ingest_refresh_moves_athlete):
+        with database_factory() as make:
+            test(make)
+    print("[OK] Rankings checks passed")
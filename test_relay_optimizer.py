@@ -0,0 +1,88 @@
+"""
+Relay optimizer checks: the pruned branch-and-bound lineup is as fast as a brute-force
+search over every swimmer, for free, medley and mixed relays.
+
+Run with `python test_relay_optimizer.py` or pytest.
+"""
+
+import itertools
+import random
+
+from scripts.convert_meets_to_sqlite_simple import MEDLEY_LEG_STROKES
+from src.web.utils.relay_optimizer import LegOption, _solve
+
+STROKES = ("Free", "Back", "Breast", "Fly")
+
+
+def _random_groups(rng, genders, swimmers):
+    """Each swimmer has a time in a random subset of strokes; groups sorted fastest first."""
+    groups = {}
+    for n in range(swimmers):
+        gender = rng.choice(genders)
+        for stroke in STROKES:
+            if rng.random() < 0.6:
+                seconds = round(rng.uniform(50, 70), 2)
+                groups.setdefault((stroke, gender), []).append(LegOption(f"s{n}", gender, seconds, "individual"))
+    for options in groups.values():
+        options.sort(key=lambda o: (o.flat_seconds, o.athlete_id))
+    return groups
+
+
+def _brute_force(leg_strokes, groups, genders, mixed, takeover_seconds, excluded):
+    by_swimmer = {}
+    for (stroke, gender), options in groups.items():
+        if gender in genders:
+            for option in options:
+                if option.athlete_id not in excluded:
+                    by_swimmer.setdefault(option.athlete_id, {})[stroke] = option
+    best = None
+    for lineup in itertools.permutations(by_swimmer, len(leg_strokes)):
+        if any(stroke not in by_swimmer[a] for a, stroke in zip(lineup, leg_strokes)):
+            continue
+        options = [by_swimmer[a][stroke] for a, stroke in zip(lineup, leg_strokes)]
+        if mixed and sum(o.gender == "M" for o in options) != len(leg_strokes) // 2:
+            continue
+        total = sum(o.flat_seconds for o in options) - takeover_seconds * (len(leg_strokes) - 1)
+        best = total if best is None else min(best, total)
+    return best
+
+
+def _total(lineup, takeover_seconds):
+    return sum(o.flat_seconds for o in lineup) - takeover_seconds * (len(lineup) - 1)
+
+
+def _check(leg_strokes, genders, mixed, cases, swimmers):
+    rng = random.Random(43)
+    for _ in range(cases):
+        groups = _random_groups(rng, genders, swimmers)
+        takeover_seconds = rng.choice((0.0, 0.6))
+        excluded = set()
+        for _team in range(2):  # A team, then B team without the A swimmers
+            expected = _brute_force(leg_strokes, groups, genders, mixed, takeover_seconds, excluded)
+            lineup = _solve(leg_strokes, groups, genders, mixed, takeover_seconds, excluded)
+            if expected is None:
+                assert lineup is None
+                break
+            assert lineup is not None
+            assert len({o.athlete_id for o in lineup}) == len(leg_strokes)
+            assert abs(_total(lineup, takeover_seconds) - expected) < 1e-9
+            excluded.update(o.athlete_id for o in lineup)
+
+
+def test_free_relay_matches_brute_force():
+    _check(("Free",) * 4, ("M",), False, cases=40, swimmers=11)
+
+
+def test_medley_relay_matches_brute_force():
+    _check(MEDLEY_LEG_STROKES, ("F",), False, cases=40, swimmers=11)
+
+
+def test_mixed_medley_relay_matches_brute_force():
+    _check(MEDLEY_LEG_STROKES, ("M", "F"), True, cases=40, swimmers=12)
+
+
+if __name__ == "__main__":
+    test_free_relay_matches_brute_force()
+    test_medley_relay_matches_brute_force()
+    test_mixed_medley_relay_matches_brute_force()
+    print("[OK] Relay optimizer checks passed")
@@ -0,0 +1,65 @@
+"""
+SQL tracer checks: statements run on web-layer connections reach the slow-query log.
+
+Run with `python test_sql_trace.py` or pytest.
+"""
+
+import re
+import sqlite3
+import tempfile
+from pathlib import Path
+
+from conftest import database_factory
+from src.web.utils.metrics import request_started
+from src.web.utils.sql_trace import SQL_TRACE, normalize_sql
+
+PROJECT_ROOT = Path(__file__).parent
+
+
+def test_normalize_sql():
+    assert normalize_sql("select * from t where a = 'x''y' and b in (?, ?,?) and c=12.5") == \
+        "select * from t where a = ? and b IN (?+) and c=?"
+
+
+def test_filtered_results_query_is_traced(synthetic_db):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "trace.db"
+        setup = sqlite3.connect(path)
+        setup.execute("CREATE TABLE results (id INTEGER PRIMARY KEY, athlete_id TEXT, time_seconds REAL)")
+        setup.executemany("INSERT INTO results (athlete_id, time_seconds) VALUES (?, ?)", [("a", 60.0), ("b", 61.0)])
+        setup.commit()
+        setup.close()
+
+        SQL_TRACE.clear()
+        SQL_TRACE.enable(slow_ms=0)
+        try:
+            request_started("GET", "/api/results/filtered")
+            # Same setup as results.get_db(): the shared factory with sqlite3.Row rows
+            conn = synthetic_db(path)
+            conn.row_factory = sqlite3.Row
+            rows = conn.cursor().execute("SELECT athlete_id FROM results WHERE time_seconds < ?", (61.5,)).fetchall()
+        finally:
+            SQL_TRACE.disable()
+
+        assert [row["athlete_id"] for row in rows] == ["a", "b"]
+        traced = [q for q in SQL_TRACE.snapshot(limit=50)["slow_queries"] if "FROM results" in q["sql"]]
+        assert traced and traced[0]["route"] == "/api/results/filtered"
+        assert traced[0]["params"] == "(float)"
+
+
+def test_web_layer_opens_no_raw_connections():
+    # Raw sqlite3.connect calls bypass InstrumentedConnection (no /metrics SQL, no trace)
+    allowed = {"src/web/utils/sql_trace.py"}  # EXPLAIN side connection, deliberately untraced
+    for path in (PROJECT_ROOT / "src" / "web").rglob("*.py"):
+        relative = path.relative_to(PROJECT_ROOT).as_posix()
+        if relative in allowed:
+            continue
+        assert not re.search(r"sqlite3\.connect\(", path.read_text(encoding="utf-8")), relative
+
+
+if __name__ == "__main__":
+    test_normalize_sql()
+    with database_factory() as make:
+        test_filtered_results_query_is_traced(make)
+    test_web_layer_opens_no_raw_connections()
+    print("[OK] SQL trace checks passed")
@@ -0,0 +1,72 @@
+"""
+Team-selection checks: the min-cost-flow entries reach the best total an exhaustive
+search finds under the per-event and per-athlete caps.
+
+Run with `python test_team_selection.py` or pytest.
+"""
+
+import itertools
+import random
+from collections import Counter
+
+from src.web.utils.team_selection import Candidate, max_points_assignment
+
+
+def _random_candidates(rng, athletes, events, density):
+    candidates = []
+    for a in range(athletes):
+        for e in range(events):
+            if rng.random() < density:
+                score = rng.choice((0.0, float(rng.randint(300, 900)), float(rng.randint(300, 900))))
+                candidates.append(Candidate(f"a{a}", f"e{e}", 60.0, score))
+    return candidates
+
+
+def _within_caps(entries, max_per_event, max_events_per_athlete):
+    per_event = Counter(c.event for c in entries)
+    per_athlete = Counter(c.athlete_id for c in entries)
+    return (all(n <= max_per_event for n in per_event.values())
+            and all(n <= max_events_per_athlete for n in per_athlete.values()))
+
+
+def _brute_force(candidates, max_per_event, max_events_per_athlete):
+    best = 0.0
+    for size in range(1, len(candidates) + 1):
+        for entries in itertools.combinations(candidates, size):
+            if _within_caps(entries, max_per_event, max_events_per_athlete):
+                best = max(best, sum(c.score for c in entries))
+    return best
+
+
+def test_matches_exhaustive_search():
+    rng = random.Random(42)
+    checked = 0
+    while checked < 150:
+        candidates = _random_candidates(rng, athletes=rng.randint(2, 5), events=rng.randint(2, 4), density=0.7)
+        if not candidates or len(candidates) > 13:
+            continue
+        max_per_event, max_events_per_athlete = rng.randint(1, 2), rng.randint(1, 3)
+        entries, _ = max_points_assignment(candidates, max_per_event, max_events_per_athlete)
+        assert _within_caps(entries, max_per_event, max_events_per_athlete)
+        assert len({(c.athlete_id, c.event) for c in entries}) == len(entries)
+        assert abs(sum(c.score for c in entries) - _brute_force(candidates, max_per_event, max_events_per_athlete)) < 1e-6
+        checked += 1
+
+
+def test_exchange_beats_greedy():
+    # Greedy takes A in event 1 (900) and is then stuck with B in event 2 (100);
+    # the optimum moves A to event 2 and gives event 1 to B.
+    candidates = [
+        Candidate("A", "e1", 60.0, 900.0),
+        Candidate("A", "e2", 60.0, 850.0),
+        Candidate("B", "e1", 60.0, 800.0),
+        Candidate("B", "e2", 60.0, 100.0),
+    ]
+    entries, _ = max_points_assignment(candidates, max_per_event=1, max_events_per_athlete=1)
+    assert sorted((c.athlete_id, c.event) for c in entries) == [("A", "e2"), ("B", "e1")]
+
+
+if __name__ == "__main__":
+    test_matches_exhaustive_search()
+    test_exchange_beats_greedy()
+    print("[OK] Team selection checks passed")
@@ -0,0 +1,117 @@
+"""
+USA delta statistics checks: the one-pass group statistics match NumPy run group by
+group, and compute_usa_delta_stats stores one row per (event, age transition).
+
+Run with `python test_usa_delta_stats.py` or pytest.
+"""
+
+import random
+import sqlite3
+
+import numpy as np
+
+from scripts.compute_usa_delta_stats import compute_usa_delta_stats, group_stats
+
+EVENTS = ["LCM_Free_100_M", "LCM_Back_50_F", "SCM_Fly_200_M"]
+
+
+def _random_rows(rng, count):
+    return [
+        (rng.choice(EVENTS), age, age + rng.choice((1, 2)), round(rng.gauss(1.5, 2.0), 2))
+        for age in (rng.randint(13, 17) for _ in range(count))
+    ]
+
+
+def _expected(values, trim):
+    v = np.sort(np.array(values, dtype=float))
+    cut = int(np.floor(len(v) * trim))
+    q25, q75 = np.percentile(v, [25, 75])
+    return {
+        "sample_size": len(v),
+        "median": np.median(v),
+        "mean": v.mean(),
+        "trimmed_mean": v[cut:len(v) - cut].mean(),
+        "sd": v.std(ddof=1) if len(v) > 1 else np.nan,
+        "min": v[0],
+        "max": v[-1],
+        "q25": q25,
+        "q75": q75,
+        "iqr": q75 - q25,
+    }
+
+
+def test_group_stats_match_numpy():
+    rng = random.Random(47)
+    for trim in (0.0, 0.1, 0.25):
+        rows = _random_rows(rng, 1500)
+        event_ids, age_start, age_end, values = (np.array(column) for column in zip(*rows))
+        stats = group_stats(event_ids.astype(object), age_start.astype(np.int64), age_end.astype(np.int64),
+                            values.astype(float), trim)
+
+        groups = {}
+        for event_id, start, end, value in rows:
+            groups.setdefault((event_id, start, end), []).append(value)
+        assert sorted(zip(stats["event_id"], stats["age_start"].tolist(), stats["age_end"].tolist())) == sorted(groups)
+
+        for i, key in enumerate(zip(stats["event_id"], stats["age_start"].tolist(), stats["age_end"].tolist())):
+            for column, value in _expected(groups[key], trim).items():
+                found = stats[column][i]
+                assert (np.isnan(found) and np.isnan(value)) or abs(found - value) < 1e-9, (key, column, trim)
+
+
+def test_single_value_group_and_empty_input():
+    stats = group_stats(np.array(["LCM_Free_50_M"], dtype=object), np.array([15]), np.array([16]), np.array([0.8]))
+    assert stats["sample_size"].tolist() == [1]
+    assert stats["median"][0] == stats["trimmed_mean"][0] == stats["q25"][0] == 0.8
+    assert np.isnan(stats["sd"][0]) and stats["iqr"][0] == 0.0
+
+    empty = group_stats(np.array([], dtype=object), np.array([], dtype=np.int64),
+                        np.array([], dtype=np.int64), np.array([], dtype=float))
+    assert len(empty["sample_size"]) == 0
+
+
+def test_invalid_trim_rejected():
+    try:
+        group_stats(np.array(["LCM_Free_50_M"], dtype=object), np.array([15]), np.array([16]), np.array([0.8]), 0.5)
+    except ValueError:
+        return
+    raise AssertionError("trim=0.5 should be rejected")
+
+
+def test_compute_stores_one_row_per_transition():
+    rng = random.Random(470)
+    rows = _random_rows(rng, 400)
+    conn = sqlite3.connect(":memory:")
+    try:
+        conn.execute("""
+            CREATE TABLE usa_delta_data (
+                usa_delta_event_id TEXT, usa_delta_age_start INTEGER,
+                usa_delta_age_end INTEGER, usa_delta_improvement_seconds REAL
+            )
+        """)
+        conn.executemany("INSERT INTO usa_delta_data VALUES (?, ?, ?, ?)", rows + [("LCM_Free_100_M", 15, 16, None)])
+        groups = {}
+        for event_id, start, end, value in rows:
+            groups.setdefault((event_id, start, end), []).append(value)
+
+        for _ in range(2):  # a recompute replaces the previous rows
+            assert compute_usa_delta_stats(conn) == len(groups)
+        stored = {
+            row[:3]: row[3:]
+            for row in conn.execute("SELECT event_id, age_start, age_end, sample_size, median, trim FROM usa_delta_stats")
+        }
+        assert set(stored) == set(groups)
+        for key, values in groups.items():
+            sample_size, median, trim = stored[key]
+            assert sample_size == len(values) and trim == 0.1
+            assert abs(median - round(float(np.median(values)), 4)) < 1e-9, key
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    test_group_stats_match_numpy()
+    test_single_value_group_and_empty_input()
+    test_invalid_trim_rejected()
+    test_compute_stores_one_row_per_transition()
+    print("[OK] USA delta stats checks passed")